@@ -0,0 +1 @@
+"""Benchmarks offline de los caminos calientes (`python -m benchmarks.run`)."""
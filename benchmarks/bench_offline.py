@@ -0,0 +1,99 @@
+"""Trabajo offline pesado: ranking de arena, entrenamiento del Cerebro y escrituras en Excel."""
+
+from __future__ import annotations
+
+import random
+import shutil
+import time
+from pathlib import Path
+
+from .fixtures import arena_columns, experience_rows, workdir, write_arena_jsonl
+from .harness import bench
+
+TRAIN_EPOCHS = 20
+
+
+def _arena_args():
+    from scripts.tools import arena_rank
+
+    return arena_rank, arena_rank.parse_args(["-", "--json"])
+
+
+@bench("arena", sizes=(5_000, 100_000, 1_000_000), rounds=3, heavy_from=1_000_000)
+def bench_rank_columnar(benchmark, size):
+    arena_rank, args = _arena_args()
+    path = arena_rank.export_columns(arena_columns(size), workdir() / "arena" / f"runs_{size}.npz")
+    result = benchmark(arena_rank.rank_columnar, [path], args, limit=100)
+    benchmark.extra_info["accepted"] = len(result["accepted"])
+
+
+@bench("arena", sizes=(5_000, 100_000, 1_000_000), rounds=3, heavy_from=100_000)
+def bench_rank_stream(benchmark, size):
+    arena_rank, args = _arena_args()
+    path = workdir() / "arena" / f"runs_{size}.jsonl"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if not path.exists():
+        write_arena_jsonl(path, arena_columns(size))
+    result = benchmark(arena_rank.rank_stream, [path], args, top_k=100)
+    benchmark.extra_info["seen"] = result["totals"]["seen"]
+
+
+@bench("cerebro", sizes=(10_000, 100_000), rounds=3, heavy_from=100_000)
+def bench_cerebro_train(benchmark, size):
+    """preprocess + descenso de gradiente + evaluate, como `cerebro.train.main` (con menos épocas)."""
+    from cerebro import train
+
+    rows = experience_rows(size)
+    random.Random(42).shuffle(rows)
+    split = int(len(rows) * 0.8)
+
+    def _train():
+        x, y, means, stds = train.preprocess(rows[:split])
+        weights, bias = train.train_model(x, y, epochs=TRAIN_EPOCHS)
+        test_x, test_y, _, _ = train.preprocess(rows[split:], stats=(means, stds))
+        return train.evaluate(weights, bias, test_x, test_y)
+
+    accuracy, win_rate, auc = benchmark(_train)
+    benchmark.extra_info.update(epochs=TRAIN_EPOCHS, auc=round(auc, 4))
+
+
+def _excel_row(i: int) -> dict:
+    return {
+        "FechaHora": f"2025-01-01T00:{i % 60:02d}:00",
+        "Símbolo": "BTCUSDT",
+        "TF": "1m",
+        "Tipo": "LONG" if i % 2 else "SHORT",
+        "Riesgo(%)": 0.5,
+        "Leverage": 10,
+        "Nocional(USDT)": 500.0,
+        "Precio entrada": 60_000.0 + i,
+        "Comentario": f"orderId=bench-{i}",
+    }
+
+
+@bench("excel", sizes=(5_000, 20_000), rounds=3, heavy_from=20_000)
+def bench_excel_append(benchmark, size):
+    """`append_operacion` sobre un libro que ya tiene `size` operaciones."""
+    from openpyxl import load_workbook
+    from sls_bot.excel_writer import append_operacion
+
+    base_dir = workdir() / f"excel_base_{size}"
+    book = base_dir / "26. Plan de inversión.xlsx"
+    if not book.exists():
+        append_operacion(base_dir, _excel_row(0))
+        wb = load_workbook(book)
+        ws = wb["Operaciones"]
+        for i in range(1, size):
+            ws.append(list(_excel_row(i).values()) + [0] * 16)  # 25 columnas como append_operacion
+        wb.save(book)
+    target = workdir() / f"excel_run_{size}"
+
+    def _setup():
+        shutil.rmtree(target, ignore_errors=True)
+        shutil.copytree(base_dir, target)
+        return (target, _excel_row(size)), {}
+
+    started = time.perf_counter()
+    benchmark.pedantic(append_operacion, setup=_setup)
+    benchmark.extra_info["book_mb"] = round(Path(target / book.name).stat().st_size / 1e6, 2)
+    benchmark.extra_info["wall_s"] = round(time.perf_counter() - started, 2)
@@ -0,0 +1,61 @@
+"""Indicadores y motores de decisión (ia_utils, scalping, PolicyEnsemble, memoria, WhaleWatcher)."""
+
+from __future__ import annotations
+
+from .fixtures import experience_rows, klines, offline_market
+from .harness import bench
+
+DECISION_BARS = 1_000
+
+
+@bench("indicators", sizes=(1_000, 10_000, 100_000, 1_000_000), heavy_from=1_000_000)
+def bench_compute_indicators(benchmark, size):
+    from sls_bot.ia_utils import compute_indicators
+
+    raw = klines(size, "BTCUSDT", "1m")
+    out = benchmark(compute_indicators, raw)
+    benchmark.extra_info["rows_out"] = int(len(out))
+
+
+@bench("decisions", rounds=20)
+def bench_scalping_decide(benchmark):
+    from sls_bot.strategies.scalping import ScalpingStrategy
+
+    strategy = ScalpingStrategy({"primary_timeframe": "1m", "anchor_timeframe": "15m", "lookback": 720})
+    with offline_market(bars=DECISION_BARS):
+        decision = benchmark(strategy.decide, symbol="BTCUSDT", marco="1m", riesgo_pct_user=None, leverage_user=None)
+    benchmark.extra_info["decision"] = decision.payload.get("decision")
+
+
+@bench("decisions", rounds=20)
+def bench_policy_decide(benchmark):
+    from cerebro.policy import PolicyEnsemble
+
+    policy = PolicyEnsemble(min_confidence=0.55, sl_atr=1.5, tp_atr=2.0, model_path=None)
+    market_row = {"close": 60_000.0, "atr": 120.0, "symbol": "BTCUSDT", "timeframe": "15m"}
+    memory_stats = {"total": 500, "wins": 270, "losses": 230, "win_rate": 0.54}
+    with offline_market(bars=DECISION_BARS):
+        decision = benchmark(policy.decide, symbol="BTCUSDT", timeframe="15m", market_row=market_row,
+                             news_sentiment=0.1, memory_stats=memory_stats)
+    benchmark.extra_info["action"] = decision.action
+
+
+@bench("decisions", sizes=(5_000,), rounds=200)
+def bench_memory_stats(benchmark, size):
+    from cerebro.memory import Experience, ExperienceMemory
+
+    memory = ExperienceMemory(maxlen=size)
+    for row in experience_rows(size):
+        memory.push(Experience(**row))
+    stats = benchmark(memory.stats)
+    benchmark.extra_info["symbols"] = len(stats["by_symbol"])
+
+
+@bench("decisions", sizes=(50, 200), rounds=200)
+def bench_whale_analyze(benchmark, size):
+    from cerebro.intel import WhaleWatcher
+
+    watcher = WhaleWatcher({"enabled": True, "min_notional": 1_500_000, "orderbook_depth": size, "spoof_ratio": 5.0})
+    with offline_market():
+        result = benchmark(watcher.analyze, "BTCUSDT")
+    benchmark.extra_info["whale_side"] = (result or {}).get("whale_side")
@@ -0,0 +1,68 @@
+"""Webhook completo (`POST /webhook`) contra el exchange simulado de `fixtures`."""
+
+from __future__ import annotations
+
+import itertools
+from collections import Counter
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from .fixtures import StubBybit, _Response, offline_market, stub_order_post
+from .harness import bench
+
+SYMBOLS = ("BTCUSDT", "ETHUSDT", "SOLUSDT")
+
+
+def _payloads():
+    for i in itertools.count():
+        symbol = SYMBOLS[i % len(SYMBOLS)]
+        if i % 4 == 3:
+            yield {"signal": "SLS_EXIT", "symbol": symbol, "tf": "15m"}
+            continue
+        long = i % 2 == 0
+        price = {"BTCUSDT": 60_000.0, "ETHUSDT": 3_000.0, "SOLUSDT": 150.0}[symbol]
+        yield {
+            "signal": "SLS_LONG_ENTRY" if long else "SLS_SHORT_ENTRY",
+            "symbol": symbol,
+            "tf": "15m",
+            "price": price,
+            "risk_pct": 0.5,
+            "leverage": 5,
+            "post_only": False,
+            "move_sl_to_be_on_tp1": False,
+            "sl": price * (0.99 if long else 1.01),
+            "tp1": price * (1.01 if long else 0.99),
+        }
+
+
+@contextmanager
+def stub_exchange():
+    """Parchea el cliente pybit y las llamadas REST firmadas de `sls_bot.app`."""
+    import sls_bot.app as bot_app
+
+    saved = (bot_app.bb, bot_app.requests)
+    bot_app.bb = StubBybit()
+    bot_app.requests = SimpleNamespace(post=stub_order_post, get=lambda *a, **k: _Response({"retCode": 0, "result": {}}))
+    try:
+        yield bot_app
+    finally:
+        bot_app.bb, bot_app.requests = saved
+
+
+@bench("webhook", rounds=200)
+def bench_webhook_roundtrip(benchmark):
+    from fastapi.testclient import TestClient
+
+    statuses: Counter = Counter()
+    payloads = _payloads()
+    with offline_market(), stub_exchange() as bot_app:
+        client = TestClient(bot_app.app)
+        path = bot_app.cfg.get("server", {}).get("webhook_path", "/webhook")
+
+        def _post(payload):
+            resp = client.post(path, json=payload)
+            statuses[resp.json().get("status", "unknown")] += 1
+            return resp
+
+        benchmark.pedantic(_post, setup=lambda: ((next(payloads),), {}), warmup_rounds=4)
+    benchmark.extra_info["statuses"] = dict(statuses)
@@ -0,0 +1,307 @@
+"""
+Datos y dobles de Bybit para correr los benchmarks sin red.
+
+- `prepare_environment(workdir)` escribe un config derivado de
+  `config/config.sample.json` con todas las rutas dentro de `workdir` y un
+  `base_url` que rechaza conexiones, y fija las variables de entorno que
+  `sls_bot` lee al importarse. Hay que llamarlo antes de importar nada de
+  `sls_bot`/`cerebro`.
+- Las velas son sintéticas (`synthetic_klines`, semilla fija: dos corridas ven
+  exactamente los mismos datos); el repo no trae respuestas grabadas. Si se
+  añade `benchmarks/fixtures/klines_<SYMBOL>_<interval>.json` (respuestas de
+  `/v5/market/kline`, lista `result.list` de una o varias páginas) con velas
+  suficientes, se usa en su lugar.
+- `offline_market()` sustituye `ia_utils.fetch_ohlc`/`fetch_orderbook` y
+  `StubBybit` + `stub_order_post` hacen de exchange para el webhook.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+UNREACHABLE_URL = "http://127.0.0.1:9"
+INTERVAL_MS = {"1m": 60_000, "5m": 300_000, "15m": 900_000, "1h": 3_600_000, "4h": 14_400_000, "1d": 86_400_000}
+BASE_PRICES = {"BTCUSDT": 60_000.0, "ETHUSDT": 3_000.0, "SOLUSDT": 150.0}
+
+_WORKDIR: Optional[Path] = None
+
+
+def prepare_environment(workdir: Path, base_url: str = UNREACHABLE_URL) -> Path:
+    """Config aislado para el benchmark; devuelve su ruta (ya exportada en SLSBOT_CONFIG)."""
+    global _WORKDIR
+    workdir = _WORKDIR = Path(workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    sample = json.loads((REPO_ROOT / "config" / "config.sample.json").read_text(encoding="utf-8"))
+    shared = sample.setdefault("shared", {})
+    shared["paths"] = {
+        "root": str(workdir),
+        "excel_dir": str(workdir / "excel"),
+        "logs_dir": str(workdir / "logs"),
+        "models_dir": str(workdir / "models"),
+        "klines_dir": str(workdir / "data" / "klines"),
+        "features_dir": str(workdir / "data" / "features"),
+    }
+    shared["market_data"] = dict(shared.get("market_data") or {}, resample_from_1m=False)
+    shared["tracing"] = {"sample_rate": 0.0, "buffer_size": 50, "export_path": None}
+    shared["cerebro"] = dict(shared.get("cerebro") or {}, enabled=False)
+    test = sample.setdefault("modes", {}).setdefault("test", {})
+    test["bybit"] = dict(test.get("bybit") or {}, base_url=base_url, private_stream=False)
+    test["paths"] = {}
+    cfg_path = workdir / "config.bench.json"
+    cfg_path.write_text(json.dumps(sample, indent=2), encoding="utf-8")
+    os.environ.update({
+        "SLSBOT_CONFIG": str(cfg_path),
+        "SLSBOT_MODE": "test",
+        "SLS_SKIP_TIME_SYNC": "1",
+        "SLS_RESAMPLE_FROM_1M": "0",
+        "SLS_TRACE_SAMPLE_RATE": "0",
+        "PANEL_API_TOKEN": os.environ.get("PANEL_API_TOKEN", "bench-token"),
+        "CONTROL_USER": os.environ.get("CONTROL_USER", "bench"),
+        "CONTROL_PASSWORD": os.environ.get("CONTROL_PASSWORD", "bench"),
+    })
+    bot_dir = str(REPO_ROOT / "bot")
+    if bot_dir not in sys.path:
+        sys.path.insert(0, bot_dir)
+    return cfg_path
+
+
+def workdir() -> Path:
+    if _WORKDIR is None:
+        raise RuntimeError("prepare_environment() no se ha llamado")
+    return _WORKDIR
+
+
+# ----- velas -----
+def _recorded_klines(symbol: str, interval: str) -> Optional[pd.DataFrame]:
+    path = FIXTURES_DIR / f"klines_{symbol.upper()}_{interval}.json"
+    if not path.exists():
+        return None
+    data = json.loads(path.read_text(encoding="utf-8"))
+    rows = data.get("result", {}).get("list", data) if isinstance(data, dict) else data
+    df = pd.DataFrame(rows, columns=["start", "open", "high", "low", "close", "volume", "turnover"])
+    for col in ["open", "high", "low", "close", "volume", "turnover"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df["ts"] = pd.to_numeric(df["start"], errors="coerce").astype(np.int64)
+    df = df.drop_duplicates("ts").sort_values("ts").reset_index(drop=True)
+    df["typical"] = (df["high"] + df["low"] + df["close"]) / 3.0
+    return df
+
+
+def lognormal_klines(n: int, *, seed: int = 7, start_ms: int = 1_699_920_000_000, step_ms: int = 60_000,
+                     price: float = 100.0, vol: Any = 0.001, wick: Any = 0.0004,
+                     volume_scale: float = 10.0) -> pd.DataFrame:
+    """Velas de un paseo aleatorio lognormal con semilla fija (ts, OHLCV y `typical`).
+
+    `vol`/`wick` aceptan un escalar o un array por vela (regímenes de volatilidad).
+    Es la fábrica común de los tests (fixture `make_klines` del conftest raíz) y de
+    `synthetic_klines`.
+    """
+    rng = np.random.default_rng(seed)
+    vol = np.broadcast_to(np.asarray(vol, dtype=float), n)
+    wick = np.broadcast_to(np.asarray(wick, dtype=float), n)
+    close = price * np.exp(np.cumsum(rng.normal(0.0, 1.0, n) * vol))
+    open_ = np.concatenate([close[:1], close[:-1]])
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0.0, 1.0, n)) * wick)
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0.0, 1.0, n)) * wick)
+    df = pd.DataFrame({"ts": start_ms + np.arange(n, dtype=np.int64) * step_ms, "open": open_, "high": high,
+                       "low": low, "close": close, "volume": rng.gamma(2.0, volume_scale, n)})
+    df["typical"] = (df["high"] + df["low"] + df["close"]) / 3.0
+    return df
+
+
+def synthetic_klines(n: int, symbol: str = "BTCUSDT", interval: str = "1m", seed: int = 7,
+                     end_ms: int = 1_760_000_000_000) -> pd.DataFrame:
+    """`lognormal_klines` con volatilidad por regímenes, mismo formato que `fetch_ohlc`."""
+    seed += sum(map(ord, symbol + interval))
+    step = INTERVAL_MS.get(interval, 60_000)
+    regimes = np.repeat(np.random.default_rng(seed).uniform(0.0004, 0.0025, size=n // 500 + 1), 500)[:n]
+    df = lognormal_klines(n, seed=seed, start_ms=end_ms - n * step, step_ms=step,
+                          price=BASE_PRICES.get(symbol.upper(), 100.0), vol=regimes, wick=regimes, volume_scale=15.0)
+    df.insert(0, "start", df["ts"])
+    df["turnover"] = df["volume"] * df["close"]
+    return df
+
+
+def klines(n: int, symbol: str = "BTCUSDT", interval: str = "1m") -> pd.DataFrame:
+    recorded = _recorded_klines(symbol, interval)
+    if recorded is not None and len(recorded) >= n:
+        return recorded.tail(n).reset_index(drop=True)
+    return synthetic_klines(n, symbol, interval)
+
+
+def orderbook(symbol: str = "BTCUSDT", depth: int = 80, seed: int = 3, whale: bool = True) -> dict:
+    rng = np.random.default_rng(seed)
+    mid = BASE_PRICES.get(symbol.upper(), 100.0)
+    tick = mid * 0.0001
+    sizes_bid = rng.lognormal(0.0, 0.8, size=depth)
+    sizes_ask = rng.lognormal(0.0, 0.8, size=depth)
+    if whale:
+        sizes_bid[depth // 3] *= 60.0
+    return {
+        "symbol": symbol.upper(),
+        "bids": [{"price": mid - (i + 1) * tick, "size": float(s)} for i, s in enumerate(sizes_bid)],
+        "asks": [{"price": mid + (i + 1) * tick, "size": float(s)} for i, s in enumerate(sizes_ask)],
+    }
+
+
+@contextmanager
+def offline_market(bars: int = 1000) -> Iterator[Dict[str, pd.DataFrame]]:
+    """`ia_utils.fetch_ohlc`/`fetch_orderbook` servidos desde fixtures en memoria."""
+    from sls_bot import ia_utils
+
+    frames: Dict[tuple, pd.DataFrame] = {}
+
+    def fetch_ohlc(symbol: str, marco: str, limit: int = 1000) -> pd.DataFrame:
+        key = (symbol.upper(), str(marco).lower())
+        if key not in frames:
+            frames[key] = klines(max(bars, int(limit)), key[0], key[1])
+        return frames[key].tail(int(limit)).reset_index(drop=True)
+
+    books: Dict[tuple, dict] = {}
+
+    def fetch_orderbook(symbol: str, depth: int = 50) -> dict:
+        key = (symbol.upper(), int(depth))
+        if key not in books:
+            books[key] = orderbook(symbol, depth=depth)
+        return books[key]
+
+    saved = (ia_utils.fetch_ohlc, ia_utils.fetch_orderbook)
+    ia_utils.fetch_ohlc, ia_utils.fetch_orderbook = fetch_ohlc, fetch_orderbook
+    try:
+        yield frames
+    finally:
+        ia_utils.fetch_ohlc, ia_utils.fetch_orderbook = saved
+
+
+# ----- experiencias / runs de arena -----
+def experience_rows(n: int, seed: int = 11) -> List[dict]:
+    rng = np.random.default_rng(seed)
+    conf = rng.uniform(0.4, 0.95, size=n)
+    pnl = rng.normal((conf - 0.6) * 40.0, 25.0)
+    symbols = np.array(["BTCUSDT", "ETHUSDT", "SOLUSDT"])[rng.integers(0, 3, size=n)]
+    states = np.array(["open", "pre_open", "news_wait", "news_ready"])[rng.integers(0, 4, size=n)]
+    rows = []
+    for i in range(n):
+        rows.append({
+            "symbol": str(symbols[i]),
+            "timeframe": "15m",
+            "pnl": float(pnl[i]),
+            "decision": "LONG" if i % 2 else "SHORT",
+            "features": {
+                "confidence": float(conf[i]),
+                "risk_pct": float(rng.uniform(0.3, 1.5)),
+                "leverage": float(rng.integers(3, 20)),
+                "news_sentiment": float(rng.uniform(-1, 1)),
+                "session_guard_risk_multiplier": float(rng.uniform(0.6, 1.0)),
+                "memory_win_rate": float(rng.uniform(0.3, 0.7)),
+                "ml_score": float(rng.uniform(0.2, 0.9)),
+                "session_guard_state": str(states[i]),
+            },
+        })
+    return rows
+
+
+def arena_columns(n: int, seed: int = 5) -> Dict[str, np.ndarray]:
+    """Runs de arena ya en columnas (lo que `arena_rank.load_columns` devuelve)."""
+    rng = np.random.default_rng(seed)
+    pnl = rng.normal(600.0, 700.0, size=n)
+    gross_profit = np.abs(pnl) * rng.uniform(1.5, 3.5, size=n) + 100.0
+    returns_avg = rng.uniform(0.005, 0.05, size=n)
+    return {
+        "pnl": pnl,
+        "max_drawdown": np.abs(rng.normal(4.0, 2.0, size=n)),
+        "gross_profit": gross_profit,
+        "gross_loss": np.abs(gross_profit - pnl),
+        "trades": rng.integers(20, 400, size=n).astype(np.float64),
+        "win_rate": rng.uniform(0.35, 0.75, size=n),
+        "returns_avg": returns_avg,
+        "returns_std": returns_avg / rng.uniform(0.8, 2.5, size=n),
+        "feature_drift": np.abs(rng.normal(0.05, 0.05, size=n)),
+        "name": np.char.add("run_", np.arange(n).astype(str)),
+        "source": np.full(n, "bench"),
+    }
+
+
+def write_arena_jsonl(path: Path, columns: Dict[str, np.ndarray]) -> Path:
+    fields = [k for k in columns if k not in ("name", "source")]
+    with Path(path).open("w", encoding="utf-8") as fh:
+        for i in range(len(columns["name"])):
+            stats = {k: float(columns[k][i]) for k in fields}
+            stats["trades"] = int(stats["trades"])
+            fh.write(json.dumps({"name": str(columns["name"][i]), "stats": stats}) + "\n")
+    return Path(path)
+
+
+# ----- exchange simulado para el webhook -----
+class _Response:
+    def __init__(self, payload: dict):
+        self._payload = payload
+        self.status_code = 200
+
+    def json(self) -> dict:
+        return self._payload
+
+    def raise_for_status(self) -> None:
+        return None
+
+
+class _StubSession:
+    def get_instruments_info(self, category: str = "linear", symbol: str = "", **_: Any) -> dict:
+        step = "0.001" if symbol.upper().startswith("BTC") else "0.01"
+        return {"retCode": 0, "result": {"list": [{
+            "symbol": symbol,
+            "priceFilter": {"tickSize": "0.1"},
+            "lotSizeFilter": {"qtyStep": step, "minOrderQty": step, "maxOrderQty": "1000"},
+        }]}}
+
+    def get_positions(self, **_: Any) -> dict:
+        return {"retCode": 0, "result": {"list": []}}
+
+    def set_leverage(self, **_: Any) -> dict:
+        return {"retCode": 0, "result": {}}
+
+    def set_trading_stop(self, **_: Any) -> dict:
+        return {"retCode": 0, "result": {}}
+
+    def get_closed_pnl(self, **_: Any) -> dict:
+        return {"retCode": 0, "result": {"list": [], "nextPageCursor": ""}}
+
+
+class StubBybit:
+    """Sustituto de `BybitClient` con saldo y precios fijos."""
+
+    def __init__(self, balance: float = 10_000.0):
+        self.balance = balance
+        self.session = _StubSession()
+
+    def get_balance(self) -> float:
+        return self.balance
+
+    def get_mark_price(self, symbol: str) -> float:
+        return BASE_PRICES.get(symbol.upper(), 100.0)
+
+    def set_leverage(self, symbol: str, buy: int, sell: int, category: str = "linear") -> dict:
+        return {"retCode": 0}
+
+    def get_closed_pnl(self, *args: Any, **kwargs: Any) -> dict:
+        return self.session.get_closed_pnl()
+
+
+def stub_order_post(url: str, headers: Optional[dict] = None, data: Optional[str] = None, timeout: float = 0,
+                    **_: Any) -> _Response:
+    payload = json.loads(data or "{}")
+    return _Response({"retCode": 0, "retMsg": "OK", "result": {
+        "orderId": f"bench-{abs(hash(data)) % 10**9}",
+        "orderLinkId": payload.get("orderLinkId", ""),
+        "orderType": payload.get("orderType"),
+    }})
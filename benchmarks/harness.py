@@ -0,0 +1,218 @@
+"""
+Mini arnés de benchmarks con la misma forma que `pytest-benchmark`.
+
+Cada benchmark es una función `bench_x(benchmark, size)` registrada con
+`@bench(group, sizes=...)`; dentro llama a `benchmark(fn, *args)` (o a
+`benchmark.pedantic(fn, setup=...)` si necesita preparar estado por ronda) y
+el arnés mide rondas con `perf_counter`, descarta el calentamiento y guarda
+min/mediana/media/desviación. `write_results()` deja un JSON con el commit y
+el entorno para comparar corridas con `compare()`.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+@dataclass
+class BenchResult:
+    name: str
+    group: str
+    size: Optional[int]
+    rounds: int
+    min_s: float
+    max_s: float
+    mean_s: float
+    median_s: float
+    stddev_s: float
+    ops_per_s: float
+    extra: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class Benchmark:
+    """Objeto `benchmark` que recibe cada función (API compatible con pytest-benchmark)."""
+
+    def __init__(self, rounds: int = 5, warmup: int = 1, min_time: float = 0.0, max_time: float = 30.0):
+        self.rounds = max(1, int(rounds))
+        self.warmup = max(0, int(warmup))
+        self.min_time = float(min_time)
+        self.max_time = float(max_time)
+        self.timings: List[float] = []
+        self.extra_info: Dict[str, Any] = {}
+
+    def _measure(self, fn: Callable, args: Sequence, kwargs: Dict[str, Any], rounds: int, warmup: int,
+                 setup: Optional[Callable] = None) -> Any:
+        result = None
+        for _ in range(warmup):
+            call_args, call_kwargs = setup() if setup else (args, kwargs)
+            result = fn(*call_args, **call_kwargs)
+        budget_start = time.perf_counter()
+        done = 0
+        while done < rounds or (time.perf_counter() - budget_start) < self.min_time:
+            call_args, call_kwargs = setup() if setup else (args, kwargs)
+            started = time.perf_counter()
+            result = fn(*call_args, **call_kwargs)
+            self.timings.append(time.perf_counter() - started)
+            done += 1
+            if time.perf_counter() - budget_start > self.max_time:
+                break
+        return result
+
+    def __call__(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        return self._measure(fn, args, kwargs, self.rounds, self.warmup)
+
+    def pedantic(self, fn: Callable, args: Sequence = (), kwargs: Optional[Dict[str, Any]] = None,
+                 setup: Optional[Callable[[], tuple]] = None, rounds: Optional[int] = None,
+                 warmup_rounds: int = 0) -> Any:
+        """`setup()` devuelve `(args, kwargs)` nuevos para cada ronda; no cuenta en la medida."""
+        kwargs = kwargs or {}
+        return self._measure(fn, args, kwargs, int(rounds or self.rounds), warmup_rounds, setup)
+
+
+@dataclass
+class _Spec:
+    name: str
+    group: str
+    fn: Callable
+    sizes: Sequence[Optional[int]]
+    rounds: int
+    heavy_from: Optional[int]
+
+
+_REGISTRY: List[_Spec] = []
+
+
+def bench(group: str, sizes: Sequence[Optional[int]] = (None,), rounds: int = 5,
+          heavy_from: Optional[int] = None) -> Callable[[Callable], Callable]:
+    """Registra un benchmark; los tamaños >= `heavy_from` solo corren con `--full`."""
+
+    def decorator(fn: Callable) -> Callable:
+        name = fn.__name__[len("bench_"):] if fn.__name__.startswith("bench_") else fn.__name__
+        _REGISTRY.append(_Spec(name, group, fn, tuple(sizes), rounds, heavy_from))
+        return fn
+
+    return decorator
+
+
+def registered() -> List[_Spec]:
+    return list(_REGISTRY)
+
+
+def _full_name(spec: _Spec, size: Optional[int]) -> str:
+    return f"{spec.group}.{spec.name}" + (f"[{size}]" if size is not None else "")
+
+
+def plan(patterns: Sequence[str] = (), full: bool = False) -> List[tuple]:
+    out = []
+    for spec in _REGISTRY:
+        for size in spec.sizes:
+            if not full and spec.heavy_from is not None and size is not None and size >= spec.heavy_from:
+                continue
+            name = _full_name(spec, size)
+            if patterns and not any(fnmatch.fnmatch(name, p) or p in name for p in patterns):
+                continue
+            out.append((name, spec, size))
+    return out
+
+
+def run(patterns: Sequence[str] = (), full: bool = False, rounds: Optional[int] = None,
+        log: Callable[[str], None] = print) -> List[BenchResult]:
+    results: List[BenchResult] = []
+    for name, spec, size in plan(patterns, full):
+        benchmark = Benchmark(rounds=rounds or spec.rounds)
+        error = None
+        try:
+            if size is None:
+                spec.fn(benchmark)
+            else:
+                spec.fn(benchmark, size)
+        except Exception as exc:  # un benchmark roto no tumba el resto
+            error = f"{type(exc).__name__}: {exc}"
+        timings = benchmark.timings or [float("nan")]
+        mean = statistics.fmean(timings)
+        result = BenchResult(
+            name=name,
+            group=spec.group,
+            size=size,
+            rounds=len(benchmark.timings),
+            min_s=min(timings),
+            max_s=max(timings),
+            mean_s=mean,
+            median_s=statistics.median(timings),
+            stddev_s=statistics.pstdev(timings) if len(timings) > 1 else 0.0,
+            ops_per_s=(1.0 / mean) if mean and mean == mean else 0.0,
+            extra=benchmark.extra_info,
+            error=error,
+        )
+        results.append(result)
+        status = f"ERROR {error}" if error else f"median={result.median_s * 1000:.3f} ms min={result.min_s * 1000:.3f} ms"
+        log(f"{name:<48} rounds={result.rounds:<3} {status}")
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                             text=True, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    info: Dict[str, Any] = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "machine": platform.machine(),
+    }
+    for module in ("numpy", "pandas", "openpyxl", "fastapi"):
+        try:
+            info[module] = __import__(module).__version__
+        except Exception:
+            info[module] = None
+    return info
+
+
+def write_results(path: Path, results: Iterable[BenchResult]) -> Path:
+    payload = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": environment(),
+        "benchmarks": [asdict(r) for r in results],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.15) -> List[Dict[str, Any]]:
+    """Ratio de medianas actual/base por benchmark; `regression` si empeora más de `threshold`."""
+    base = {b["name"]: b for b in baseline.get("benchmarks", []) if not b.get("error")}
+    rows = []
+    for item in current.get("benchmarks", []):
+        ref = base.get(item["name"])
+        if ref is None or item.get("error") or not ref["median_s"]:
+            continue
+        ratio = item["median_s"] / ref["median_s"]
+        rows.append({
+            "name": item["name"],
+            "base_ms": round(ref["median_s"] * 1000.0, 3),
+            "current_ms": round(item["median_s"] * 1000.0, 3),
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1.0 + threshold,
+            "improvement": ratio < 1.0 - threshold,
+        })
+    return rows
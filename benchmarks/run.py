@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Ejecuta los benchmarks y guarda el resultado en JSON.
+
+    python -m benchmarks.run                      # todo salvo los tamaños pesados
+    python -m benchmarks.run --full -k arena      # incluye 1M filas, solo arena
+    python -m benchmarks.run --compare benchmarks/results/abc123.json
+
+Por defecto escribe `benchmarks/results/<commit>.json`; con `--compare` imprime
+el ratio de medianas frente a otra corrida y sale con código 1 si algún
+benchmark empeora más que `--threshold`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+from typing import List, Optional
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks import harness
+from benchmarks.fixtures import prepare_environment
+
+SUITES = ("benchmarks.bench_signals", "benchmarks.bench_webhook", "benchmarks.bench_offline")
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="patterns", action="append", default=[],
+                        help="Filtra por nombre (subcadena o glob, p.ej. 'arena.*'). Repetible.")
+    parser.add_argument("--full", action="store_true", help="Incluye los tamaños pesados (1M filas, 100k train).")
+    parser.add_argument("--rounds", type=int, default=None, help="Fuerza el número de rondas de cada benchmark.")
+    parser.add_argument("--output", type=Path, default=None, help="JSON de salida (por defecto results/<commit>.json).")
+    parser.add_argument("--compare", type=Path, default=None, help="JSON de una corrida anterior para comparar.")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Empeoramiento relativo que cuenta como regresión.")
+    parser.add_argument("--workdir", type=Path, default=None, help="Directorio de trabajo (por defecto uno temporal).")
+    parser.add_argument("--list", action="store_true", help="Lista los benchmarks sin ejecutarlos.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    warnings.simplefilter("ignore", FutureWarning)  # avisos de pandas en ia_utils, ruido en la salida
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="sls_bench_"))
+    prepare_environment(workdir)
+    for module in SUITES:
+        importlib.import_module(module)
+
+    if args.list:
+        for name, _, _ in harness.plan(args.patterns, args.full):
+            print(name)
+        return 0
+
+    results = harness.run(args.patterns, full=args.full, rounds=args.rounds)
+    output = args.output or RESULTS_DIR / f"{harness.environment()['commit'] or 'local'}.json"
+    harness.write_results(output, results)
+    print(f"\n{len(results)} benchmarks -> {output}")
+
+    if args.compare:
+        current = json.loads(output.read_text(encoding="utf-8"))
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        rows = harness.compare(current, baseline, threshold=args.threshold)
+        for row in rows:
+            flag = "REGRESIÓN" if row["regression"] else ("mejora" if row["improvement"] else "")
+            print(f"{row['name']:<48} {row['base_ms']:>12.3f} -> {row['current_ms']:>12.3f} ms  x{row['ratio']:<6} {flag}")
+        if any(row["regression"] for row in rows):
+            return 1
+    return 1 if any(r.error for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
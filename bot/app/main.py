@@ -1,8 +1,11 @@
-﻿import json
+﻿from sls_bot.startup import StartupReport  # primero: su import marca el t0 del arranque
+
+import json
 import os
 import secrets
 import time
 from collections import defaultdict, deque
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, date, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Tuple, Optional
@@ -23,6 +26,8 @@ from .models import (
 )
 from .services import service_action, service_status
 from .utils import tail_lines
+from sls_bot.log_manager import append_jsonl, iter_jsonl, log_exists
+from sls_bot.metrics import install as install_metrics
 
 try:
     from sls_bot.config_loader import load_config, CFG_PATH_IN_USE  # type: ignore
@@ -30,6 +35,9 @@ except Exception:  # pragma: no cover - optional dependency
     load_config = None  # type: ignore
     CFG_PATH_IN_USE = None  # type: ignore
 
+STARTUP = StartupReport("control")
+STARTUP.checkpoint("imports")
+
 APP_DIR = Path(__file__).resolve().parent
 BOT_DIR = APP_DIR.parent
 PROJECT_ROOT = BOT_DIR.parent
@@ -66,6 +74,7 @@ if load_config:
         BOT_CONFIG = {}
 else:
     BOT_CONFIG = {}
+STARTUP.checkpoint("config")
 
 
 def _resolve_path(value: Any, default: Path) -> Path:
@@ -95,7 +104,31 @@ RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "60"))
 RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "60"))
 _RATE_LIMIT_BUCKETS: Dict[str, deque[float]] = defaultdict(deque)
 
-app = FastAPI(title="SLS Bot API", version="1.0.0")
+_CEREBRO_LOOP_ENABLED = os.getenv("SLS_API_CEREBRO_LOOP", "1").lower() in {"1", "true", "yes"}
+_CEREBRO = None
+
+
+def _start_cerebro_loop() -> None:
+    """Construye el Cerebro (modelo, memoria, feature store) y arranca su loop fuera del arranque."""
+    global _CEREBRO
+    from cerebro import get_cerebro  # type: ignore
+
+    _CEREBRO = get_cerebro()
+    _CEREBRO.start_loop()
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    STARTUP.background({"cerebro_loop": _start_cerebro_loop} if _CEREBRO_LOOP_ENABLED else {})
+    STARTUP.mark_ready()
+    try:
+        yield
+    finally:
+        if _CEREBRO is not None:
+            _CEREBRO.stop_loop()
+
+
+app = FastAPI(title="SLS Bot API", version="1.0.0", lifespan=_lifespan)
 
 try:
     from cerebro.router import cerebro_router  # type: ignore
@@ -143,20 +176,13 @@ def _is_panel_token_valid(value: str) -> bool:
     return False
 
 
-def _load_pnl_history() -> List[dict]:
+def _load_pnl_history(since: Optional[date] = None) -> List[dict]:
     entries: List[dict] = []
-    if not PNL_LOG.exists():
+    if not log_exists(PNL_LOG):
         return entries
     try:
-        with PNL_LOG.open("r", encoding="utf-8", errors="ignore") as fh:
-            for line in fh:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    entries.append(json.loads(line))
-                except json.JSONDecodeError:
-                    continue
+        for entry in iter_jsonl(PNL_LOG, start=since):
+            entries.append(entry)
     except Exception:
         return entries
     return entries
@@ -189,9 +215,8 @@ def _append_audit_event(actor: str, action: str, success: bool, details: Optiona
         "details": details or {},
     }
     try:
-        AUDIT_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with AUDIT_LOG_PATH.open("a", encoding="utf-8") as fh:
-            fh.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        # auditoría: volcado + fsync inmediato, sin esperar al flusher
+        append_jsonl(AUDIT_LOG_PATH, payload, sync=True)
     except Exception:
         pass
 
@@ -236,6 +261,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+install_metrics(app, "control")
 
 
 def require_control_auth(
@@ -284,6 +310,11 @@ def health():
     return Health(ok=True, time=str(datetime.now(timezone.utc)), pid=os.getpid())
 
 
+@app.get("/startup")
+def startup_report():
+    return STARTUP.snapshot()
+
+
 @app.get("/status", response_model=StatusResponse)
 def get_status(_: None = Depends(require_panel_token)):
 
@@ -359,17 +390,14 @@ def get_decisiones(limit: int = Query(20, ge=1, le=1000), _: None = Depends(requ
 
     rows: List[dict] = []
     try:
-        if DECISIONS_LOG.exists():
-            with DECISIONS_LOG.open("r", encoding="utf-8", errors="ignore") as f:
-                all_lines = f.readlines()
-            for line in all_lines[-limit:]:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    rows.append(json.loads(line))
-                except json.JSONDecodeError:
-                    pass
+        for line in tail_lines(DECISIONS_LOG, limit):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass
     except Exception:
         pass
     return DecisionsResponse(rows=rows)
@@ -377,7 +405,8 @@ def get_decisiones(limit: int = Query(20, ge=1, le=1000), _: None = Depends(requ
 
 @app.get("/pnl/diario", response_model=PnLDailyResponse)
 def pnl_diario(days: int = Query(7, ge=1, le=30), _: None = Depends(require_panel_token)):
-    entries = _load_pnl_history()
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    entries = _load_pnl_history(since)
     symbol_breakdowns = _load_symbol_breakdowns()
     daily_map: Dict[str, Dict[str, float]] = {}
     for entry in entries:
@@ -453,3 +482,6 @@ def autopilot_summary(_: None = Depends(require_panel_token)):
     if not data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No hay resumen autopilot disponible")
     return data
+
+
+STARTUP.checkpoint("routes")
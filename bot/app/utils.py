@@ -1,18 +1,16 @@
-from collections import deque
 from pathlib import Path
 from typing import List
 
+from sls_bot.log_manager import tail_lines as _tail_log_lines
+
 
 def tail_lines(path: Path, limit: int) -> List[str]:
     """
-    Devuelve las últimas `limit` líneas del archivo `path`.
+    Devuelve las últimas `limit` líneas del archivo `path`, incluyendo los
+    segmentos rotados si el archivo vivo no alcanza.
     Si no existe, devuelve lista vacía sin romper.
     """
     try:
-        if not path.exists() or not path.is_file():
-            return []
-        with path.open("r", encoding="utf-8", errors="ignore") as f:
-            dq = deque(f, maxlen=limit)
-        return list(dq)
+        return _tail_log_lines(path, limit)
     except Exception:
         return []
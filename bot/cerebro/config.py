@@ -55,6 +55,10 @@ class CerebroConfig:
     orderflow_warn: float = 0.35
     orderflow_block: float = 0.7
     allow_spoof_override: bool = False
+    profile_allocations: bool = False
+    snapshot_seconds: int = 300
+    snapshot_max_age_minutes: int = 30
+    snapshot_memory_max_age_hours: int = 168
 
     @classmethod
     def from_dict(cls, data: dict) -> "CerebroConfig":
@@ -78,6 +82,10 @@ class CerebroConfig:
             orderflow_warn=float(whale_cfg.get("imbalance_warn") or whale_cfg.get("imbalance_threshold") or 0.35),
             orderflow_block=float(whale_cfg.get("imbalance_block") or 0.7),
             allow_spoof_override=bool(whale_cfg.get("allow_spoof_override", False)),
+            profile_allocations=bool(data.get("profile_allocations", False)),
+            snapshot_seconds=int(data.get("snapshot_seconds", 300) or 0),
+            snapshot_max_age_minutes=int(data.get("snapshot_max_age_minutes") or 30),
+            snapshot_memory_max_age_hours=int(data.get("snapshot_memory_max_age_hours") or 168),
         )
 
 
@@ -1,24 +1,21 @@
 from __future__ import annotations
 
-import json
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Sequence
+from typing import Dict, List, Optional, Sequence
 
+try:
+    from ..sls_bot.log_manager import iter_jsonl, log_exists
+except (ImportError, ValueError):  # pragma: no cover - fallback when running standalone
+    from sls_bot.log_manager import iter_jsonl, log_exists  # type: ignore
 
-def load_rows(dataset_path: Path) -> List[dict]:
-    rows: List[dict] = []
-    if not dataset_path.exists():
+
+def load_rows(dataset_path: Path, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[dict]:
+    """Carga el dataset JSONL incluyendo los segmentos rotados dentro de la ventana."""
+    dataset_path = Path(dataset_path)
+    if not log_exists(dataset_path):
         raise FileNotFoundError(f"No existe el dataset en {dataset_path}")
-    with dataset_path.open("r", encoding="utf-8", errors="ignore") as fh:
-        for line in fh:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                rows.append(json.loads(line))
-            except json.JSONDecodeError:
-                continue
-    return rows
+    return list(iter_jsonl(dataset_path, start=since, end=until))
 
 
 def summarize_rows(rows: Sequence[dict]) -> Dict[str, object]:
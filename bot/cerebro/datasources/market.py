@@ -2,20 +2,25 @@ from __future__ import annotations
 
 from typing import List
 
-try:
-    from ...sls_bot import ia_utils
-except (ImportError, ValueError):
-    from sls_bot import ia_utils  # type: ignore
 from .base import DataSource
 
 
+def _ia_utils():
+    """ia_utils carga pandas y la config al importarse: se difiere hasta el primer fetch."""
+    try:
+        from ...sls_bot import ia_utils
+    except (ImportError, ValueError):
+        from sls_bot import ia_utils  # type: ignore
+    return ia_utils
+
+
 class MarketDataSource(DataSource):
-    """Envuelve fetch_ohlc + indicadores para el Cerebro."""
+    """Envuelve latest_slice (buffer de 1m re-muestreado) + indicadores para el Cerebro."""
 
     name = "market"
 
     def fetch(self, *, symbol: str | None = None, timeframe: str | None = None, limit: int = 200) -> List[dict]:
         if not symbol or not timeframe:
             raise ValueError("symbol y timeframe son obligatorios para MarketDataSource")
-        df = ia_utils.compute_indicators(ia_utils.fetch_ohlc(symbol, timeframe, limit=limit))
+        df, _ = _ia_utils().latest_slice(symbol, timeframe, limit=limit)
         return df.tail(limit).to_dict(orient="records")
@@ -5,8 +5,6 @@ from datetime import datetime, timezone
 from typing import List, Sequence
 from xml.etree import ElementTree
 
-import requests
-
 from .base import DataSource, NewsItem
 from ..nlp import get_sentiment_analyzer
 
@@ -23,6 +21,8 @@ class RSSNewsDataSource(DataSource):
         self._sentiment = get_sentiment_analyzer()
 
     def fetch(self, *, symbol: str | None = None, timeframe: str | None = None, limit: int = 20) -> List[dict]:
+        import requests  # perezoso: ~150 ms que la API no debe pagar al importar
+
         items: List[dict] = []
         for url in self.feeds:
             try:
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from collections import defaultdict, deque
 from dataclasses import dataclass
-from typing import Deque, Dict, List
+from typing import Deque, Dict, List, Optional, Set
 
 
 @dataclass
@@ -33,3 +33,28 @@ class FeatureStore:
 
     def stats(self) -> dict:
         return {key: len(values) for key, values in self._store.items()}
+
+    def export_state(self) -> Dict[str, dict]:
+        """Buckets en columnas (`columns` + `rows`) para el snapshot de arranque en caliente."""
+        out: Dict[str, dict] = {}
+        for key, bucket in self._store.items():
+            if not bucket:
+                continue
+            columns: List[str] = []
+            for row in bucket:
+                columns.extend(col for col in row if col not in columns)
+            out[key] = {"columns": columns, "rows": [[row.get(col) for col in columns] for row in bucket]}
+        return out
+
+    def restore_state(self, state: Dict[str, dict], keys: Optional[Set[str]] = None) -> int:
+        """Rellena buckets desde `export_state`; `keys` limita a los pares configurados. Devuelve filas."""
+        restored = 0
+        for key, payload in (state or {}).items():
+            if keys is not None and key not in keys:
+                continue
+            columns = payload.get("columns") or []
+            bucket = self._store[key]
+            for values in payload.get("rows") or []:
+                bucket.append(dict(zip(columns, values)))
+            restored += len(bucket)
+        return restored
@@ -7,14 +7,16 @@ from datetime import datetime, timezone
 from statistics import median
 from typing import Any, Dict, List, Optional
 
-import requests
+log = logging.getLogger(__name__)
 
-try:
-    from ..sls_bot import ia_utils
-except (ImportError, ValueError):
-    from sls_bot import ia_utils  # type: ignore
 
-log = logging.getLogger(__name__)
+def _ia_utils():
+    """Import perezoso de ia_utils (pandas + config): solo lo necesita WhaleWatcher al analizar."""
+    try:
+        from ..sls_bot import ia_utils
+    except (ImportError, ValueError):
+        from sls_bot import ia_utils  # type: ignore
+    return ia_utils
 
 
 def _utc_now() -> datetime:
@@ -78,6 +80,8 @@ class NewsAggregatorClient:
             "limit": min(limit, cfg.limit),
         }
         try:
+            import requests  # perezoso, como en datasources.news
+
             resp = requests.get(cfg.api_url, params=params, timeout=10)
             resp.raise_for_status()
             payload = resp.json()
@@ -152,7 +156,7 @@ class WhaleWatcher:
         if not cfg.enabled:
             return None
         try:
-            book = ia_utils.fetch_orderbook(symbol, depth=cfg.orderbook_depth)
+            book = _ia_utils().fetch_orderbook(symbol, depth=cfg.orderbook_depth)
         except Exception as exc:
             log.debug("Orderbook fetch failed: %s", exc)
             return None
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import json
 from collections import deque
 from dataclasses import dataclass
-from typing import Deque, Dict, List
+from typing import Deque, Dict, Iterable, List
 
 
 @dataclass
@@ -16,22 +17,91 @@ class Experience:
     decision: str
 
 
+def _rate(counts: List[int]) -> dict:
+    total, wins, losses = counts
+    return {"total": total, "wins": wins, "losses": losses, "win_rate": wins / total if total else 0.0}
+
+
 class ExperienceMemory:
+    """Últimas `maxlen` operaciones con contadores incrementales.
+
+    wins/losses globales, por símbolo y por timeframe se actualizan al insertar y
+    al desalojar la más antigua, así `stats()` no recorre el buffer (se llama en
+    cada ciclo y viaja en cada decisión).
+    """
+
     def __init__(self, maxlen: int = 5000):
         self.buffer: Deque[Experience] = deque(maxlen=maxlen)
+        self._totals = [0, 0, 0]  # total, wins, losses
+        self._by_symbol: Dict[str, List[int]] = {}
+        self._by_timeframe: Dict[str, List[int]] = {}
+
+    def _count(self, exp: Experience, delta: int) -> None:
+        win = delta if exp.pnl > 0 else 0
+        loss = delta if exp.pnl < 0 else 0
+        for counts in (
+            self._totals,
+            self._by_symbol.setdefault(exp.symbol.upper(), [0, 0, 0]),
+            self._by_timeframe.setdefault(exp.timeframe, [0, 0, 0]),
+        ):
+            counts[0] += delta
+            counts[1] += win
+            counts[2] += loss
+        if delta < 0:
+            if not self._by_symbol[exp.symbol.upper()][0]:
+                del self._by_symbol[exp.symbol.upper()]
+            if not self._by_timeframe[exp.timeframe][0]:
+                del self._by_timeframe[exp.timeframe]
 
     def push(self, exp: Experience) -> None:
+        if len(self.buffer) == self.buffer.maxlen:
+            if not self.buffer:  # maxlen=0: memoria desactivada
+                return
+            self._count(self.buffer[0], -1)  # el append desaloja la más antigua
         self.buffer.append(exp)
+        self._count(exp, 1)
 
     def last(self, limit: int = 50) -> List[Experience]:
         return list(self.buffer)[-limit:]
 
+    def load_lines(self, lines: Iterable[str], mode: str | None = None) -> int:
+        """Rellena desde líneas de `cerebro_experience.jsonl` (las de otro `mode` se saltan). Devuelve las cargadas."""
+        loaded = 0
+        for raw in lines:
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                row = json.loads(raw)
+                if mode and row.get("mode") not in (None, mode):
+                    continue
+                exp = Experience(
+                    symbol=str(row["symbol"]),
+                    timeframe=str(row.get("timeframe") or ""),
+                    pnl=float(row.get("pnl") or 0.0),
+                    features=row.get("features") or {},
+                    decision=str(row.get("decision") or ""),
+                )
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue
+            self.push(exp)
+            loaded += 1
+        return loaded
+
+    def export_state(self) -> List[list]:
+        return [[e.symbol, e.timeframe, e.pnl, e.decision, e.features] for e in self.buffer]
+
+    def restore_state(self, rows: List[list]) -> int:
+        for symbol, timeframe, pnl, decision, features in rows or []:
+            self.push(Experience(symbol=symbol, timeframe=timeframe, pnl=float(pnl), features=features or {},
+                                 decision=decision))
+        return len(self.buffer)
+
+    def symbol_stats(self, symbol: str) -> dict:
+        return _rate(self._by_symbol.get(symbol.upper(), [0, 0, 0]))
+
     def stats(self) -> dict:
-        wins = sum(1 for e in self.buffer if e.pnl > 0)
-        losses = sum(1 for e in self.buffer if e.pnl < 0)
-        return {
-            "total": len(self.buffer),
-            "wins": wins,
-            "losses": losses,
-            "win_rate": wins / len(self.buffer) if self.buffer else 0.0,
-        }
+        out = _rate(self._totals)
+        out["by_symbol"] = {symbol: _rate(counts) for symbol, counts in self._by_symbol.items()}
+        out["by_timeframe"] = {tf: _rate(counts) for tf, counts in self._by_timeframe.items()}
+        return out
@@ -6,11 +6,6 @@ from typing import Optional
 
 log = logging.getLogger(__name__)
 
-try:
-    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer  # type: ignore
-except Exception:  # pragma: no cover - optional dependency
-    SentimentIntensityAnalyzer = None  # type: ignore
-
 
 @dataclass
 class SentimentResult:
@@ -21,19 +16,35 @@ class SentimentResult:
 
 
 class HeadlineSentiment:
-    """Envuelve un analizador ligero (VADER) para puntuar titulares."""
+    """Envuelve un analizador ligero (VADER) para puntuar titulares.
+
+    VADER (y su léxico) se carga en el primer `score()`, no al construir el
+    Cerebro: así importar la API no paga la dependencia opcional.
+    """
 
     def __init__(self) -> None:
-        if SentimentIntensityAnalyzer is None:  # pragma: no cover - depende del entorno
-            self._analyzer = None
-        else:
-            self._analyzer = SentimentIntensityAnalyzer()
+        self._analyzer = None
+        self._loaded = False
+
+    def _get_analyzer(self):
+        if not self._loaded:
+            self._loaded = True
+            try:
+                from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer  # type: ignore
+
+                self._analyzer = SentimentIntensityAnalyzer()
+            except Exception:  # pragma: no cover - optional dependency
+                self._analyzer = None
+        return self._analyzer
 
     def score(self, text: str | None) -> Optional[SentimentResult]:
-        if not text or not text.strip() or not self._analyzer:
+        if not text or not text.strip():
+            return None
+        analyzer = self._get_analyzer()
+        if not analyzer:
             return None
         try:
-            scores = self._analyzer.polarity_scores(text)
+            scores = analyzer.polarity_scores(text)
             return SentimentResult(
                 compound=float(scores.get("compound") or 0.0),
                 positive=float(scores.get("pos") or 0.0),
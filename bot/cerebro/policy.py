@@ -6,10 +6,17 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, Optional
 
-try:
-    from ..sls_bot import ia_signal_engine
-except (ImportError, ValueError):
-    from sls_bot import ia_signal_engine  # type: ignore
+
+def _signal_engine():
+    """ia_signal_engine arrastra pandas/joblib: se importa en la primera decisión, no con el paquete."""
+    try:
+        from ..sls_bot import ia_signal_engine
+    except (ImportError, ValueError):
+        from sls_bot import ia_signal_engine  # type: ignore
+    return ia_signal_engine
+
+
+MEMORY_MIN_SAMPLES = 20  # operaciones mínimas para ajustar riesgo por win rate
 
 
 @dataclass
@@ -54,7 +61,7 @@ class PolicyEnsemble:
         news_meta: dict | None = None,
         orderflow_meta: dict | None = None,
     ) -> PolicyDecision:
-        payload, evid_rules, meta = ia_signal_engine.decide(symbol=symbol, marco=timeframe)
+        payload, evid_rules, meta = _signal_engine().decide(symbol=symbol, marco=timeframe)
         decision = payload["decision"]
         confidence = payload["confianza_pct"] / 100.0
         if news_sentiment is not None:
@@ -85,16 +92,28 @@ class PolicyEnsemble:
 
         risk_pct = float(payload["riesgo_pct"])
         memory_stats = memory_stats or {}
-        if memory_stats.get("total", 0) >= 20:
+        symbol_stats = (memory_stats.get("by_symbol") or {}).get(symbol.upper()) or {}
+        if symbol_stats.get("total", 0) >= MEMORY_MIN_SAMPLES:
+            # Historial propio suficiente: el win rate del símbolo manda sobre el global.
+            win_rate = float(symbol_stats.get("win_rate") or 0.0)
+            scope = symbol.upper()
+        elif memory_stats.get("total", 0) >= MEMORY_MIN_SAMPLES:
             win_rate = float(memory_stats.get("win_rate") or 0.0)
+            scope = "global"
+        else:
+            scope = None
+        if scope:
             dyn_mult = max(0.5, min(1.5, 0.5 + win_rate))
             risk_pct = max(0.1, risk_pct * dyn_mult)
-            reasons.append(f"Ajuste riesgo (win_rate={win_rate:.2%}, mult={dyn_mult:.2f})")
+            reasons.append(f"Ajuste riesgo (win_rate {scope}={win_rate:.2%}, mult={dyn_mult:.2f})")
 
         metadata: Dict[str, Any] = {
             "news_sentiment": news_sentiment or 0.0,
             "memory_win_rate": float(memory_stats.get("win_rate") or 0.0),
         }
+        if symbol_stats:
+            metadata["memory_symbol_win_rate"] = float(symbol_stats.get("win_rate") or 0.0)
+            metadata["memory_symbol_trades"] = int(symbol_stats.get("total") or 0)
         if news_meta:
             metadata["news"] = news_meta
 
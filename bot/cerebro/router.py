@@ -7,12 +7,15 @@ from fastapi import APIRouter, HTTPException, Query
 
 from .service import get_cerebro
 
-cerebro_router = APIRouter(prefix="/cerebro", tags=["cerebro"])
-
 try:
-    get_cerebro().start_loop()
-except Exception:
-    pass
+    from ..sls_bot.profiling import router as profile_router
+except (ImportError, ValueError):  # pragma: no cover - fallback when running standalone
+    from sls_bot.profiling import router as profile_router  # type: ignore
+
+cerebro_router = APIRouter(prefix="/cerebro", tags=["cerebro"])
+cerebro_router.include_router(profile_router("/profile"))
+# El loop ya no arranca al importar el router: lo lanza el lifespan de `app.main`
+# en segundo plano (SLS_API_CEREBRO_LOOP=0 lo desactiva si corre sls-cerebro.service).
 
 
 def _utc_now_iso() -> str:
@@ -19,9 +19,22 @@ from .features import FeatureStore
 from .intel import NewsAggregatorClient, WhaleWatcher
 from .memory import Experience, ExperienceMemory
 from .policy import PolicyDecision, PolicyEnsemble
+from . import snapshot
 
 log = logging.getLogger(__name__)
 
+try:
+    from ..sls_bot.log_manager import get_log, log_exists, tail_lines
+except (ImportError, ValueError):  # pragma: no cover - fallback when running standalone
+    from sls_bot.log_manager import get_log, log_exists, tail_lines  # type: ignore
+
+try:
+    from ..sls_bot.metrics import CEREBRO_CYCLE_SECONDS
+    from ..sls_bot.profiling import AllocationTracker, profiled
+except (ImportError, ValueError):  # pragma: no cover - fallback when running standalone
+    from sls_bot.metrics import CEREBRO_CYCLE_SECONDS  # type: ignore
+    from sls_bot.profiling import AllocationTracker, profiled  # type: ignore
+
 try:
     from ..sls_bot.config_loader import load_config as _load_bot_config
 except (ImportError, ValueError):  # pragma: no cover - fallback when running standalone
@@ -52,13 +65,12 @@ LOGS_DIR = Path(os.getenv("SLS_CEREBRO_LOGS", ROOT_DIR / "logs" / MODE_NAME))
 MODELS_DIR = Path(os.getenv("SLS_CEREBRO_MODELS", ROOT_DIR / "models" / "cerebro" / MODE_NAME))
 DECISIONS_LOG = LOGS_DIR / "cerebro_decisions.jsonl"
 EXPERIENCE_LOG = LOGS_DIR / "cerebro_experience.jsonl"
+SNAPSHOT_PATH = Path(os.getenv("SLS_CEREBRO_SNAPSHOT", LOGS_DIR / "cerebro_state.snap"))
 
 
 def _append_jsonl(path: Path, payload: dict) -> None:
     try:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("a", encoding="utf-8") as fh:
-            fh.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        get_log(path).append(payload)
     except Exception:
         log.debug("Failed to append jsonl to %s", path, exc_info=True)
 
@@ -100,6 +112,13 @@ class Cerebro:
         self._last_run = 0.0
         self._loop_thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
+        self._allocations = AllocationTracker() if AllocationTracker.enabled(self.config.profile_allocations) else None
+        self._snapshot_info: dict = {"path": str(SNAPSHOT_PATH), "saved_ts": None, "bytes": None, "restored": None}
+        self._last_snapshot = time.time()
+        if self.config.enabled:
+            self._reload_experience()
+            if self.config.snapshot_seconds > 0:
+                self.restore_snapshot()
 
     def start_loop(self) -> None:
         if not self.config.enabled or (self._loop_thread and self._loop_thread.is_alive()):
@@ -119,10 +138,22 @@ class Cerebro:
 
     def stop_loop(self) -> None:
         self._stop_event.set()
+        if self.config.enabled and self.config.snapshot_seconds > 0:
+            self.save_snapshot()
 
     def run_cycle(self) -> None:
         if not self.config.enabled:
             return
+        with profiled("cerebro"):
+            if self._allocations is None:
+                self._run_cycle()
+            else:
+                with self._allocations.measure("cycle"):
+                    self._run_cycle()
+        if self.config.snapshot_seconds > 0 and time.time() - self._last_snapshot >= self.config.snapshot_seconds:
+            self.save_snapshot()
+
+    def _run_cycle(self) -> None:
         with self._lock:
             self._last_run = time.time()
             now = datetime.now(timezone.utc)
@@ -146,6 +177,7 @@ class Cerebro:
             stats = self.memory.stats()
             for symbol in self.config.symbols:
                 for tf in self.config.timeframes:
+                    pair_started = time.perf_counter()
                     try:
                         rows = self.market_source.fetch(symbol=symbol, timeframe=tf, limit=200)
                         self.feature_store.update(symbol, tf, rows)
@@ -169,6 +201,9 @@ class Cerebro:
                         log.exception("Cerebro run_cycle failed for %s %s: %s", symbol, tf, exc)
                     else:
                         self._record_decision(symbol, tf, decision)
+                    finally:
+                        CEREBRO_CYCLE_SECONDS.observe(time.perf_counter() - pair_started,
+                                                      symbol=symbol.upper(), timeframe=tf)
 
     def register_trade(self, *, symbol: str, timeframe: str, pnl: float, features: Dict[str, float], decision: str) -> None:
         with self._lock:
@@ -191,6 +226,8 @@ class Cerebro:
                 "memory": self.memory.stats(),
                 "history": list(self._history),
                 "mode": MODE_NAME,
+                "allocations": self._allocations.recent(5) if self._allocations else None,
+                "snapshot": dict(self._snapshot_info),
             }
 
     def latest_decision(self, symbol: str, timeframe: str) -> PolicyDecision | None:
@@ -201,10 +238,9 @@ class Cerebro:
     def list_decisions(self, limit: int = 50) -> List[dict]:
         limit = max(1, min(limit, 500))
         rows: List[dict] = []
-        if DECISIONS_LOG.exists():
+        if log_exists(DECISIONS_LOG):
             try:
-                with DECISIONS_LOG.open("r", encoding="utf-8", errors="ignore") as fh:
-                    lines = fh.readlines()[-limit:]
+                lines = tail_lines(DECISIONS_LOG, limit)
                 for raw in reversed(lines):
                     raw = raw.strip()
                     if not raw:
@@ -227,7 +263,88 @@ class Cerebro:
         rows.sort(key=lambda item: item.get("ts", ""), reverse=True)
         return rows[:limit]
 
+    # ----- Snapshot para arranque en caliente -----
+    def save_snapshot(self, path: Path | None = None) -> Optional[int]:
+        """Serializa feature store, memoria, decisiones e historial; devuelve bytes o None si falla."""
+        path = path or SNAPSHOT_PATH
+        with self._lock:
+            state = {
+                "mode": MODE_NAME,
+                "last_run_ts": self._last_run,
+                "feature_store": self.feature_store.export_state(),
+                "memory": self.memory.export_state(),
+                "decisions": {
+                    key: {"decision": asdict(snap.decision), "generated_at": snap.generated_at, "features": snap.features}
+                    for key, snap in self._decisions.items()
+                },
+                "history": list(self._history),
+            }
+        self._last_snapshot = time.time()
+        try:
+            size = snapshot.dump(path, state, created_at=self._last_snapshot)
+        except Exception:
+            log.warning("No se pudo escribir el snapshot del Cerebro en %s", path, exc_info=True)
+            return None
+        self._snapshot_info.update(saved_ts=self._last_snapshot, bytes=size)
+        return size
+
+    def restore_snapshot(self, path: Path | None = None) -> dict:
+        """Restaura el último snapshot del mismo modo.
+
+        Velas y decisiones solo si tienen menos de `snapshot_max_age_minutes` (más viejas
+        llevarían a decidir con mercado caducado); memoria e historial hasta
+        `snapshot_memory_max_age_hours`. Pares fuera de la config actual se descartan.
+        """
+        path = path or SNAPSHOT_PATH
+        restored = {"age_s": None, "feature_rows": 0, "memory": 0, "decisions": 0, "history": 0}
+        loaded = snapshot.load(path)
+        if loaded is None:
+            return restored
+        created, state = loaded
+        age = max(0.0, time.time() - created)
+        restored["age_s"] = round(age, 1)
+        if state.get("mode") != MODE_NAME:
+            log.info("Snapshot %s es del modo %s (actual %s); se ignora", path, state.get("mode"), MODE_NAME)
+            return restored
+        keys = {f"{symbol.upper()}::{tf}" for symbol in self.config.symbols for tf in self.config.timeframes}
+        with self._lock:
+            if age <= self.config.snapshot_memory_max_age_hours * 3600:
+                if not self.memory.buffer:  # el log de experiencias, si existe, es la fuente de verdad
+                    restored["memory"] = self.memory.restore_state(state.get("memory") or [])
+                self._history.extend(state.get("history") or [])
+                restored["history"] = len(self._history)
+            if age <= self.config.snapshot_max_age_minutes * 60:
+                restored["feature_rows"] = self.feature_store.restore_state(state.get("feature_store") or {}, keys)
+                for key, item in (state.get("decisions") or {}).items():
+                    if key not in keys:
+                        continue
+                    try:
+                        self._decisions[key] = DecisionSnapshot(
+                            decision=PolicyDecision(**item["decision"]),
+                            generated_at=float(item.get("generated_at") or created),
+                            features=item.get("features") or {},
+                        )
+                    except Exception:
+                        log.debug("Decisión %s del snapshot incompatible", key, exc_info=True)
+                restored["decisions"] = len(self._decisions)
+                self._last_run = float(state.get("last_run_ts") or 0.0)
+        self._snapshot_info["restored"] = restored
+        log.info("Cerebro restaurado desde %s: %s", path, restored)
+        return restored
+
     # ----- Persistencia auxiliar -----
+    def _reload_experience(self) -> int:
+        """Recarga en memoria la cola de `cerebro_experience.jsonl` (hasta `max_memory` operaciones)."""
+        if not log_exists(EXPERIENCE_LOG):
+            return 0
+        try:
+            loaded = self.memory.load_lines(tail_lines(EXPERIENCE_LOG, self.config.max_memory), mode=MODE_NAME)
+        except Exception:
+            log.warning("No se pudo recargar %s", EXPERIENCE_LOG, exc_info=True)
+            return 0
+        log.info("Memoria del Cerebro recargada con %d experiencias de %s", loaded, EXPERIENCE_LOG)
+        return loaded
+
     def _record_decision(self, symbol: str, timeframe: str, decision: PolicyDecision) -> None:
         payload = {
             "ts": _utc_now_iso(),
@@ -257,10 +374,15 @@ class Cerebro:
 
 
 _singleton: Cerebro | None = None
+_singleton_lock = threading.Lock()
 
 
 def get_cerebro() -> Cerebro:
+    # Se construye en un hilo de arranque mientras ya se sirven peticiones (y tarda: pandas,
+    # log de experiencias, snapshot); sin el lock una ruta o webhook crearía una segunda instancia.
     global _singleton
     if _singleton is None:
-        _singleton = Cerebro()
+        with _singleton_lock:
+            if _singleton is None:
+                _singleton = Cerebro()
     return _singleton
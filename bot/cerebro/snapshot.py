@@ -0,0 +1,88 @@
+"""
+Snapshot binario del estado en memoria del Cerebro para arranques en caliente.
+
+Formato::
+
+    b"SLSCSNAP" | u16 versión | f64 creado (epoch) | u32 crc32 | zlib(JSON)
+
+El cuerpo es JSON (nunca pickle: el archivo vive junto a los logs y no debe
+poder ejecutar código al restaurar) comprimido con zlib; las filas del
+FeatureStore van en columnas para no repetir las claves de cada vela. Un
+archivo con otra versión, magic o CRC distinto se ignora y el Cerebro arranca
+en frío como antes; los límites de antigüedad los aplica `Cerebro`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import struct
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"SLSCSNAP"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<8sHdI")
+
+
+def _default(obj: Any) -> Any:
+    """numpy/pandas (filas de `DataFrame.to_dict`) a tipos JSON."""
+    if hasattr(obj, "item"):
+        return obj.item()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+def dump(path: Path, state: dict, *, created_at: Optional[float] = None) -> int:
+    """Escribe el snapshot de forma atómica y devuelve los bytes escritos."""
+    body = zlib.compress(json.dumps(state, default=_default, separators=(",", ":")).encode("utf-8"), 6)
+    created = time.time() if created_at is None else float(created_at)
+    blob = _HEADER.pack(MAGIC, SNAPSHOT_VERSION, created, zlib.crc32(body)) + body
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(blob)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return len(blob)
+
+
+def load(path: Path) -> Optional[Tuple[float, dict]]:
+    """(creado_epoch, estado) o None si no existe o no es un snapshot válido de esta versión."""
+    try:
+        blob = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    except OSError as exc:
+        log.warning("No se pudo leer el snapshot %s: %s", path, exc)
+        return None
+    if len(blob) < _HEADER.size:
+        log.warning("Snapshot %s truncado (%d bytes); se ignora", path, len(blob))
+        return None
+    magic, version, created, crc = _HEADER.unpack_from(blob)
+    body = blob[_HEADER.size:]
+    if magic != MAGIC or version != SNAPSHOT_VERSION:
+        log.warning("Snapshot %s con formato %r v%s (esperado v%s); se ignora", path, magic, version, SNAPSHOT_VERSION)
+        return None
+    if zlib.crc32(body) != crc:
+        log.warning("Snapshot %s corrupto (crc); se ignora", path)
+        return None
+    try:
+        state = json.loads(zlib.decompress(body))
+    except Exception as exc:
+        log.warning("Snapshot %s ilegible: %s", path, exc)
+        return None
+    return created, (state if isinstance(state, dict) else {})
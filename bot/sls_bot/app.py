@@ -1,4 +1,5 @@
-﻿from fastapi import Depends, FastAPI, HTTPException, Query, status
+﻿from .startup import StartupReport  # primero: su import marca el t0 del arranque
+from fastapi import Depends, FastAPI, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from pydantic import BaseModel
@@ -9,18 +10,32 @@ import os
 import secrets
 import time, hmac, hashlib, json, requests
 import threading, math
+from contextlib import asynccontextmanager, contextmanager
 
 from .config_loader import load_config, CFG_PATH_IN_USE
 from .bybit import BybitClient
+from .log_manager import RotationPolicy, flush_all, get_log, pending_lines, set_default_policy
+from .metrics import QUEUE_DEPTH, WEBHOOK_SECONDS, install as install_metrics, observe_bybit, stage
+from .pnl_sync import ClosedPnlSync
+from .private_stream import PositionBook, PrivateStream, private_ws_url
+from .profiling import profiled, router as profile_router
+from .scheduler import Scheduler
+from .tracing import Tracer
 from .excel_writer import (
     append_operacion, append_evento,
     compute_resumen_diario, upsert_resumen_diario
 )
 
-try:
-    from cerebro import get_cerebro  # type: ignore
-except Exception:
-    get_cerebro = None  # type: ignore
+STARTUP = StartupReport("bot")
+STARTUP.checkpoint("imports")
+
+
+def get_cerebro():
+    """Import perezoso: `cerebro` arrastra pandas/ia_utils y solo hace falta con el Cerebro activo."""
+    from cerebro import get_cerebro as _get_cerebro  # type: ignore
+
+    return _get_cerebro()
+
 
 # ==== CARGA CONFIG ====
 cfg = load_config()
@@ -65,9 +80,12 @@ DECISIONS_LOG = LOGS_DIR / "decisions.jsonl"
 BRIDGE_LOG = LOGS_DIR / "bridge.log"
 PNL_LOG = LOGS_DIR / "pnl.jsonl"
 PNL_SYMBOLS_JSON = LOGS_DIR / "pnl_daily_symbols.json"
+PNL_SYNC_STATE_JSON = LOGS_DIR / "pnl_sync_state.json"
 SCALP_TELEMETRY_LOG = LOGS_DIR / "scalp_telemetry.jsonl"
 SCALP_DAILY_LOG = LOGS_DIR / "scalp_daily.jsonl"
 ALERTS_LOG = LOGS_DIR / "alerts.log"
+set_default_policy(RotationPolicy.from_dict(cfg.get("log_rotation") if isinstance(cfg, dict) else None))
+STARTUP.checkpoint("config")
 
 # ==== CLIENTE BYBIT (pybit) ====
 bb = BybitClient(
@@ -79,8 +97,57 @@ bb = BybitClient(
 
 BASE_URL = cfg["bybit"]["base_url"].rstrip("/")
 
+
+# ==== STREAM PRIVADO (position/execution/order) ====
+def _fetch_open_positions() -> list[dict]:
+    r = bb.session.get_positions(category="linear", settleCoin="USDT")
+    if r.get("retCode") != 0:
+        return []
+    return r.get("result", {}).get("list", []) or []
+
+
+_PRIVATE_STREAM_ENABLED = str(
+    os.getenv("SLS_PRIVATE_STREAM", cfg["bybit"].get("private_stream", False))
+).lower() in {"1", "true", "yes"}
+_POSITION_BOOK = PositionBook()
+_PRIVATE_STREAM = PrivateStream(
+    cfg["bybit"]["api_key"],
+    cfg["bybit"]["api_secret"],
+    cfg["bybit"].get("private_ws_url") or private_ws_url(BASE_URL),
+    book=_POSITION_BOOK,
+    snapshot_loader=_fetch_open_positions,
+)
+
+
+def _private_stream_live() -> bool:
+    return _PRIVATE_STREAM_ENABLED and _PRIVATE_STREAM.is_live()
+
+
+# ==== PLANIFICADOR (TTL scalping, heartbeat, resumen diario, sync PnL) ====
+_SCHEDULER = Scheduler(workers=max(1, int(os.getenv("SLS_SCHEDULER_WORKERS", "3"))))
+
+# ==== TRAZAS DEL WEBHOOK (muestreadas, buffer circular + JSONL opcional) ====
+TRACER = Tracer.from_config(cfg)
+STARTUP.checkpoint("clients")
+
+
+@contextmanager
+def _stage(name: str, **attrs):
+    """Etapa del webhook: histograma de /metrics + span de la traza activa."""
+    with stage(name), TRACER.span(name, **attrs) as span:
+        yield span
+
 # ==== FASTAPI ====
-app = FastAPI(title="SLS Bot Webhook")
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    _start_background()
+    try:
+        yield
+    finally:
+        _stop_background()
+
+
+app = FastAPI(title="SLS Bot Webhook", lifespan=_lifespan)
 
 
 def _parse_origins() -> list[str]:
@@ -110,6 +177,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+install_metrics(app, "bot")
+app.include_router(profile_router("/profile"))
+QUEUE_DEPTH.set_function(_SCHEDULER.pending, worker="scheduler")
+QUEUE_DEPTH.set_function(pending_lines, worker="log_buffer")
 
 
 def require_control_auth(credentials: HTTPBasicCredentials = Depends(security)) -> None:
@@ -129,18 +200,14 @@ def require_control_auth(credentials: HTTPBasicCredentials = Depends(security))
 
 def _append_jsonl(path: Path, payload: dict) -> None:
     try:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("a", encoding="utf-8") as fh:
-            fh.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        get_log(path).append(payload)
     except Exception:
         pass
 
 
 def _append_bridge_log(message: str) -> None:
     try:
-        BRIDGE_LOG.parent.mkdir(parents=True, exist_ok=True)
-        with BRIDGE_LOG.open("a", encoding="utf-8") as fh:
-            fh.write(f"{utc_now_naive().isoformat()} {message}\n")
+        get_log(BRIDGE_LOG).append_line(f"{utc_now_naive().isoformat()} {message}")
     except Exception:
         pass
 
@@ -226,23 +293,6 @@ def _append_scalp_daily_summary(st: dict) -> None:
     _append_jsonl(SCALP_DAILY_LOG, payload)
 
 
-def _load_symbol_pnl_cache() -> dict:
-    try:
-        if not PNL_SYMBOLS_JSON.exists():
-            return {}
-        return json.loads(PNL_SYMBOLS_JSON.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
-
-
-def _save_symbol_pnl_cache(payload: dict) -> None:
-    try:
-        PNL_SYMBOLS_JSON.parent.mkdir(parents=True, exist_ok=True)
-        PNL_SYMBOLS_JSON.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    except Exception:
-        pass
-
-
 # ----- MODELOS -----
 class Confirmations(BaseModel):
     ema_trend_1h: Optional[str] = None
@@ -319,7 +369,7 @@ def _calc_stop_tp(symbol: str, side: str, price: float, atr: float) -> Tuple[flo
 
 
 def _maybe_apply_cerebro(sig: Signal, price_live: float, st: dict) -> Optional[dict]:
-    if not (CEREBRO_ENABLED and get_cerebro and sig.tf):
+    if not (CEREBRO_ENABLED and sig.tf):
         return None
     try:
         cerebro = get_cerebro()
@@ -358,7 +408,7 @@ def _maybe_apply_cerebro(sig: Signal, price_live: float, st: dict) -> Optional[d
 
 
 def _notify_cerebro_learn(symbol: str, tf: Optional[str], pnl: float, st: dict) -> None:
-    if not (CEREBRO_ENABLED and get_cerebro):
+    if not CEREBRO_ENABLED:
         return
     info = st.get("last_cerebro_decision")
     if not info:
@@ -394,10 +444,12 @@ _TIME_OFFSET_MS = 0  # server_ms - local_ms
 
 def _sync_server_time():
     global _TIME_OFFSET_MS
+    started = time.perf_counter()
     try:
         r = requests.get(f"{BASE_URL}/v5/market/time", timeout=8)
         r.raise_for_status()
         data = r.json()
+        observe_bybit("/v5/market/time", started, data.get("retCode", 0))
         server_ms = int(data.get("time") or int(data["result"]["timeSecond"]) * 1000)
         local_ms  = int(time.time() * 1000)
         _TIME_OFFSET_MS = server_ms - local_ms
@@ -413,8 +465,9 @@ def _sign_v5(api_key: str, api_secret: str, payload_str: str, recv_window: str =
     sign = hmac.new(api_secret.encode(), prehash.encode(), hashlib.sha256).hexdigest()
     return ts, sign, recv_window
 
-if os.getenv("SLS_SKIP_TIME_SYNC") != "1":
-    _sync_server_time()
+# El sync de hora ya no bloquea el import: corre en segundo plano desde el lifespan
+# (`_start_background`); hasta que termina el offset es 0 y las órdenes que fallen
+# por timestamp re-sincronizan en su propio reintento.
 
 # ====== FILTROS DEL INSTRUMENTO Y NORMALIZACIÓN ======
 def _decimals_from_step(step: float) -> int:
@@ -479,8 +532,10 @@ def _create_order_signed(payload: dict) -> dict:
                 "X-BAPI-SIGN-TYPE": "2",
                 "Content-Type": "application/json",
             }
+            started = time.perf_counter()
             r = requests.post(url, headers=headers, data=payload_str, timeout=12)
             data = r.json()
+            observe_bybit("/v5/order/create", started, data.get("retCode"))
             if data.get("retCode") == 0:
                 return data
             msg = str(data).lower()
@@ -495,11 +550,53 @@ def _create_order_signed(payload: dict) -> dict:
             time.sleep(0.6 + i * 0.5)
     raise last_exc if last_exc else RuntimeError("create order failed")
 
+def _tp1_plan(symbol: str, opened_side: str, size: float, entry: float,
+              close_pct: int = 50, tp1_pct: float = 1.0, be_offset_bps: float = 2.0) -> Optional[dict]:
+    """Calcula la orden TP1 reduceOnly y el precio de break-even para una posición abierta."""
+    tick, lot = _get_symbol_filters_simple(symbol)
+    tp_qty = _floor_to(size * (close_pct / 100.0), lot)
+    if tp_qty < lot:
+        return None
+
+    if opened_side.upper() == "LONG":
+        close_side = "Sell"
+        tp_price_raw = entry * (1.0 + tp1_pct / 100.0)
+        be_price_raw = entry * (1.0 + be_offset_bps / 10000.0)
+    else:
+        close_side = "Buy"
+        tp_price_raw = entry * (1.0 - tp1_pct / 100.0)
+        be_price_raw = entry * (1.0 - be_offset_bps / 10000.0)
+
+    tp_payload = {
+        "category": "linear",
+        "symbol": symbol,
+        "side": close_side,
+        "orderType": "Limit",
+        "qty": str(tp_qty),
+        "price": str(_floor_to(tp_price_raw, tick)),
+        "reduceOnly": True,
+        "isLeverage": 1
+    }
+    return {
+        "tp_payload": tp_payload,
+        "target_size": _floor_to(max(lot, size - tp_qty), lot),
+        "be_price": _floor_to(be_price_raw, tick),
+        "tolerance": lot / 1000.0,
+    }
+
+
+def _move_sl_to_be(symbol: str, be_price: float) -> None:
+    try:
+        bb.session.set_trading_stop(category="linear", symbol=symbol, stopLoss=str(be_price))
+    except Exception:
+        pass
+
+
 def _autopilot_tp1_and_be(symbol: str, opened_side: str,
                           close_pct: int = 50, tp1_pct: float = 1.0,
                           be_offset_bps: float = 2.0, timeout_s: int = 900):
+    """Fallback por polling REST cuando el stream privado no está disponible."""
     try:
-        tick, lot = _get_symbol_filters_simple(symbol)
         t0 = time.time()
         size = 0.0
         entry = None
@@ -518,36 +615,11 @@ def _autopilot_tp1_and_be(symbol: str, opened_side: str,
         if not (size > 0 and entry and entry > 0):
             return
 
-        tp_qty_raw = size * (close_pct / 100.0)
-        tp_qty = _floor_to(tp_qty_raw, lot)
-        if tp_qty < lot:
+        plan = _tp1_plan(symbol, opened_side, size, entry, close_pct, tp1_pct, be_offset_bps)
+        if not plan:
             return
+        _create_order_signed(plan["tp_payload"])
 
-        if opened_side.upper() == "LONG":
-            close_side = "Sell"
-            tp_price_raw = entry * (1.0 + tp1_pct / 100.0)
-            be_price_raw = entry * (1.0 + be_offset_bps / 10000.0)
-        else:
-            close_side = "Buy"
-            tp_price_raw = entry * (1.0 - tp1_pct / 100.0)
-            be_price_raw = entry * (1.0 - be_offset_bps / 10000.0)
-
-        tp_price = _floor_to(tp_price_raw, tick)
-        be_price = _floor_to(be_price_raw, tick)
-
-        tp_payload = {
-            "category": "linear",
-            "symbol": symbol,
-            "side": close_side,
-            "orderType": "Limit",
-            "qty": str(tp_qty),
-            "price": str(tp_price),
-            "reduceOnly": True,
-            "isLeverage": 1
-        }
-        _create_order_signed(tp_payload)
-
-        target_size = _floor_to(max(lot, size - tp_qty), lot)
         deadline = time.time() + timeout_s
         while time.time() < deadline:
             r = bb.session.get_positions(category="linear", symbol=symbol)
@@ -555,20 +627,92 @@ def _autopilot_tp1_and_be(symbol: str, opened_side: str,
                 for p in r.get("result", {}).get("list", []):
                     sz = float(p.get("size", "0") or "0")
                     if sz > 0:
-                        if sz <= target_size + (lot / 1000.0):
-                            try:
-                                bb.session.set_trading_stop(
-                                    category="linear",
-                                    symbol=symbol,
-                                    stopLoss=str(be_price)
-                                )
-                            except Exception:
-                                pass
+                        if sz <= plan["target_size"] + plan["tolerance"]:
+                            _move_sl_to_be(symbol, plan["be_price"])
                             return
             time.sleep(2.0)
     except Exception:
         return
 
+
+class Tp1BreakEvenAutopilot:
+    """TP1 parcial + SL a BE reaccionando a eventos `position` del stream privado."""
+
+    def __init__(self):
+        self._plans: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def start(self, symbol: str, opened_side: str, close_pct: int = 50, tp1_pct: float = 1.0,
+              be_offset_bps: float = 2.0, timeout_s: int = 900) -> None:
+        if not _private_stream_live():
+            threading.Thread(
+                target=_autopilot_tp1_and_be,
+                args=(symbol, opened_side),
+                kwargs={"close_pct": close_pct, "tp1_pct": tp1_pct, "be_offset_bps": be_offset_bps, "timeout_s": timeout_s},
+                daemon=True,
+            ).start()
+            return
+        with self._lock:
+            self._plans[symbol.upper()] = {
+                "symbol": symbol.upper(),
+                "side": opened_side,
+                "close_pct": close_pct,
+                "tp1_pct": tp1_pct,
+                "be_offset_bps": be_offset_bps,
+                "deadline": time.time() + timeout_s,
+                "phase": "await_fill",
+            }
+        _SCHEDULER.call_later(timeout_s, self._expire, symbol.upper(), name="tp1_be_expire")
+        pos = _POSITION_BOOK.get(symbol)
+        if pos:
+            self.on_stream_event("position", symbol.upper(), pos)
+
+    def pending(self) -> Dict[str, dict]:
+        with self._lock:
+            return {k: dict(v) for k, v in self._plans.items()}
+
+    def _expire(self, symbol: str) -> None:
+        with self._lock:
+            plan = self._plans.get(symbol)
+            if plan and time.time() >= plan["deadline"]:
+                self._plans.pop(symbol, None)
+
+    def on_stream_event(self, topic: str, symbol: str, data: dict) -> None:
+        if topic != "position":
+            return
+        with self._lock:
+            plan = self._plans.get(symbol)
+            if not plan:
+                return
+            if time.time() > plan["deadline"]:
+                self._plans.pop(symbol, None)
+                return
+            size = float(data.get("size") or 0.0)
+            entry = float(data.get("avg_price") or 0.0)
+            if plan["phase"] == "await_fill":
+                if size <= 0 or entry <= 0:
+                    return
+                tp = _tp1_plan(symbol, plan["side"], size, entry,
+                               plan["close_pct"], plan["tp1_pct"], plan["be_offset_bps"])
+                if not tp:
+                    self._plans.pop(symbol, None)
+                    return
+                plan.update(tp, phase="await_tp1")
+                action = ("tp1", tp)
+            elif size <= 0:
+                self._plans.pop(symbol, None)
+                return
+            elif size <= plan["target_size"] + plan["tolerance"]:
+                self._plans.pop(symbol, None)
+                action = ("be", plan)
+            else:
+                return
+        if action[0] == "tp1":
+            _create_order_signed(action[1]["tp_payload"])
+        else:
+            _move_sl_to_be(symbol, action[1]["be_price"])
+
+
 # ====== RISK STATE (cooldown + DD intradía) ======
 _STATE_FILE = LOGS_DIR / "risk_state.json"
 
@@ -940,8 +1084,6 @@ class ScalpPositionManager:
     def __init__(self):
         self._positions: Dict[str, dict] = {}
         self._lock = threading.Lock()
-        self._thread: Optional[threading.Thread] = None
-        self._stop = threading.Event()
 
     def register(self, *, symbol: str, side: str, ttl_minutes: float, expected_price: float,
                  latency_ms: float, strategy_meta: dict) -> None:
@@ -955,49 +1097,70 @@ class ScalpPositionManager:
             "strategy_meta": strategy_meta,
         }
         with self._lock:
+            previous = self._positions.get(entry["symbol"])
+            if previous and previous.get("ttl_task"):
+                previous["ttl_task"].cancel()
             self._positions[entry["symbol"]] = entry
-        self._ensure_loop()
-        threading.Thread(target=self._capture_fill_snapshot, args=(entry,), daemon=True).start()
+            # cierre exacto en start_ts + ttl_s en lugar de un escaneo cada 5 s
+            entry["ttl_task"] = _SCHEDULER.call_at(
+                entry["start_ts"] + entry["ttl_s"], self._on_ttl_expired, entry, name="scalp_ttl"
+            )
+        if _private_stream_live():
+            # el snapshot de fill llega con el primer evento `position` del stream
+            pos = _POSITION_BOOK.get(entry["symbol"])
+            if pos:
+                self.on_stream_event("position", entry["symbol"], pos)
+            return
+        _SCHEDULER.call_later(4, self._capture_fill_snapshot, entry, name="scalp_fill_snapshot")
 
-    def _ensure_loop(self) -> None:
-        if self._thread and self._thread.is_alive():
+    def on_stream_event(self, topic: str, symbol: str, data: dict) -> None:
+        if topic != "position":
             return
-        self._stop.clear()
-
-        def _loop() -> None:
-            while not self._stop.is_set():
-                time.sleep(5)
-                now = time.time()
-                targets: list[dict] = []
-                with self._lock:
-                    for symbol, entry in list(self._positions.items()):
-                        pos = self._fetch_position(symbol)
-                        if not pos or pos.get("size", 0.0) <= 0:
-                            self._positions.pop(symbol, None)
-                            continue
-                        if now - entry["start_ts"] >= entry["ttl_s"]:
-                            targets.append(entry)
-                            self._positions.pop(symbol, None)
-                for entry in targets:
-                    resp = _close_position_reduce_only(entry["symbol"])
-                    _append_bridge_log(
-                        f"scalp_guard ttl_close symbol={entry['symbol']} ttl_s={entry['ttl_s']:.0f} resp={resp}"
-                    )
-                    telemetry = {
-                        "symbol": entry["symbol"],
-                        "side": entry["side"],
-                        "reason": "ttl_expired",
-                        "max_hold_minutes": entry["ttl_s"] / 60.0,
-                        "strategy": entry["strategy_meta"].get("strategy"),
-                        "forced_entry": entry["strategy_meta"].get("forced_entry"),
-                        "telemetry": resp,
-                    }
-                    _append_scalp_telemetry(telemetry)
+        with self._lock:
+            entry = self._positions.get(symbol)
+            if not entry:
+                return
+            if float(data.get("size") or 0.0) <= 0:
+                self._positions.pop(symbol, None)
+                if entry.get("ttl_task"):
+                    entry["ttl_task"].cancel()
+                return
+            if entry.get("fill_captured") or float(data.get("avg_price") or 0.0) <= 0:
+                return
+            entry["fill_captured"] = True
+        self._emit_fill_snapshot(entry, {"size": data["size"], "avg_price": float(data["avg_price"])})
+
+    def tracked(self) -> Dict[str, dict]:
+        with self._lock:
+            return {k: {kk: vv for kk, vv in v.items() if kk != "ttl_task"} for k, v in self._positions.items()}
 
-        self._thread = threading.Thread(target=_loop, daemon=True, name="scalp-ttl-guard")
-        self._thread.start()
+    def _on_ttl_expired(self, entry: dict) -> None:
+        with self._lock:
+            if self._positions.get(entry["symbol"]) is not entry:
+                return  # reemplazada por una entrada nueva o ya cerrada
+            self._positions.pop(entry["symbol"], None)
+        pos = self._fetch_position(entry["symbol"])
+        if not pos or pos.get("size", 0.0) <= 0:
+            return
+        resp = _close_position_reduce_only(entry["symbol"])
+        _append_bridge_log(
+            f"scalp_guard ttl_close symbol={entry['symbol']} ttl_s={entry['ttl_s']:.0f} resp={resp}"
+        )
+        telemetry = {
+            "symbol": entry["symbol"],
+            "side": entry["side"],
+            "reason": "ttl_expired",
+            "max_hold_minutes": entry["ttl_s"] / 60.0,
+            "strategy": entry["strategy_meta"].get("strategy"),
+            "forced_entry": entry["strategy_meta"].get("forced_entry"),
+            "telemetry": resp,
+        }
+        _append_scalp_telemetry(telemetry)
 
     def _fetch_position(self, symbol: str) -> Optional[dict]:
+        if _private_stream_live():
+            pos = _POSITION_BOOK.get(symbol)
+            return {"size": pos["size"], "avg_price": pos["avg_price"]} if pos else None
         try:
             resp = bb.session.get_positions(category="linear", symbol=symbol)
             if resp.get("retCode") != 0:
@@ -1011,10 +1174,12 @@ class ScalpPositionManager:
         return None
 
     def _capture_fill_snapshot(self, entry: dict) -> None:
-        time.sleep(4)
         pos = self._fetch_position(entry["symbol"])
         if not pos or pos.get("avg_price", 0) <= 0:
             return
+        self._emit_fill_snapshot(entry, pos)
+
+    def _emit_fill_snapshot(self, entry: dict, pos: dict) -> None:
         avg_price = pos["avg_price"]
         expected = entry["expected_price"] or avg_price
         slippage_bps = ((avg_price - expected) / expected) * 10000 if expected else 0.0
@@ -1033,22 +1198,45 @@ class ScalpPositionManager:
 
 
 _SCALP_MANAGER = ScalpPositionManager()
+_TP1_AUTOPILOT = Tp1BreakEvenAutopilot()
+_PRIVATE_STREAM.add_listener(_TP1_AUTOPILOT.on_stream_event)
+_PRIVATE_STREAM.add_listener(_SCALP_MANAGER.on_stream_event)
 
 # ----- WEBHOOK -----
+_WEBHOOK_SIGNALS = ("SLS_LONG_ENTRY", "SLS_SHORT_ENTRY", "SLS_EXIT", "SLS_UPDATE")
+
+
 @app.post(cfg.get("server", {}).get("webhook_path", "/webhook"))
 def webhook(sig: Signal):
+    started = time.perf_counter()
+    with profiled("webhook"), \
+            TRACER.trace("webhook", signal=sig.signal, symbol=(sig.symbol or "").upper(), tf=sig.tf) as root:
+        result = _handle_webhook(sig)
+        root.set(status=result.get("status") if isinstance(result, dict) else None)
+    WEBHOOK_SECONDS.observe(time.perf_counter() - started,
+                            signal=sig.signal if sig.signal in _WEBHOOK_SIGNALS else "other",
+                            status=result.get("status", "unknown") if isinstance(result, dict) else "unknown")
+    return result
+
+
+def _handle_webhook(sig: Signal):
     try:
-        if sig.signal not in ("SLS_LONG_ENTRY", "SLS_SHORT_ENTRY", "SLS_EXIT", "SLS_UPDATE"):
+        if sig.signal not in _WEBHOOK_SIGNALS:
             return {"status": "ignored", "reason": "unknown signal"}
 
         # ====== RESET DIARIO & GUARDAS ======
-        st = _reset_daily_if_needed()
-        balance = bb.get_balance()
-        _enforce_dd_guard(balance, st)
-        st = _load_state()
+        with _stage("state_load"):
+            st = _reset_daily_if_needed()
+        with _stage("balance"):
+            balance = bb.get_balance()
+        with _stage("state_load"):
+            _enforce_dd_guard(balance, st)
+            st = _load_state()
 
         # Bloqueos previos a operar
-        blocked, reason, until = _is_blocked(st)
+        with _stage("block_check") as span:
+            blocked, reason, until = _is_blocked(st)
+            span.set(blocked=blocked, reason=reason)
         if sig.signal in ("SLS_LONG_ENTRY", "SLS_SHORT_ENTRY") and blocked:
             return {
                 "status": "blocked",
@@ -1060,8 +1248,9 @@ def webhook(sig: Signal):
         # ====== CIERRE ======
         if sig.signal == "SLS_EXIT":
             before = balance
-            resp = _close_position_reduce_only(sig.symbol)
-            after = bb.get_balance()
+            with _stage("close_position"):
+                resp = _close_position_reduce_only(sig.symbol)
+                after = bb.get_balance()
             epsilon = float(cfg.get("risk", {}).get("pnl_epsilon", 0.05))
             last_entry = float(st.get("last_entry_equity") or before)
             pnl = after - last_entry
@@ -1101,43 +1290,43 @@ def webhook(sig: Signal):
             if st["consecutive_losses"] >= nloss:
                 _start_cooldown("losses", mins)
 
-        forced_open = bool(st.get("scalp_open_forced"))
-        open_meta = st.get("scalp_open_strategy_meta") or {}
-        st["scalp_open_forced"] = False
-        st["scalp_open_strategy_meta"] = None
-        st = _register_trade_result(st, pnl)
-        _bump_scalp_pnl(st, pnl)
-        _evaluate_scalp_objectives(st, open_meta)
-        if forced_open:
-            limit = int(open_meta.get("forced_loss_backoff") or 0)
-            backoff_minutes = int(open_meta.get("forced_backoff_minutes") or 30)
-            if pnl < -epsilon:
-                st["scalp_forced_loss_streak"] = int(st.get("scalp_forced_loss_streak") or 0) + 1
+            forced_open = bool(st.get("scalp_open_forced"))
+            open_meta = st.get("scalp_open_strategy_meta") or {}
+            st["scalp_open_forced"] = False
+            st["scalp_open_strategy_meta"] = None
+            st = _register_trade_result(st, pnl)
+            _bump_scalp_pnl(st, pnl)
+            _evaluate_scalp_objectives(st, open_meta)
+            if forced_open:
+                limit = int(open_meta.get("forced_loss_backoff") or 0)
+                backoff_minutes = int(open_meta.get("forced_backoff_minutes") or 30)
+                if pnl < -epsilon:
+                    st["scalp_forced_loss_streak"] = int(st.get("scalp_forced_loss_streak") or 0) + 1
+                else:
+                    st["scalp_forced_loss_streak"] = 0
+                if limit and st.get("scalp_forced_loss_streak", 0) >= limit:
+                    _append_alert("Activando backoff por pérdidas forzadas", {
+                        "streak": st.get("scalp_forced_loss_streak"),
+                        "limit": limit,
+                        "minutes": backoff_minutes,
+                    })
+                    _save_state(st)
+                    _start_cooldown("scalp_forced_losses", backoff_minutes, extra={"streak": st.get("scalp_forced_loss_streak")})
+                    st = _load_state()
+                    st["scalp_forced_loss_streak"] = 0
             else:
                 st["scalp_forced_loss_streak"] = 0
-            if limit and st.get("scalp_forced_loss_streak", 0) >= limit:
-                _append_alert("Activando backoff por pérdidas forzadas", {
-                    "streak": st.get("scalp_forced_loss_streak"),
-                    "limit": limit,
-                    "minutes": backoff_minutes,
+            _save_state(st)
+            loss_cooldown_minutes = int(cfg.get("risk", {}).get("cooldown_loss_minutes", 30))
+            if _loss_streak_reached(st):
+                _start_cooldown("loss_streak", loss_cooldown_minutes, extra={
+                    "recent_results": len(st.get("recent_results") or []),
+                    "threshold": int(cfg.get("risk", {}).get("cooldown_loss_streak", 0))
                 })
-                _save_state(st)
-                _start_cooldown("scalp_forced_losses", backoff_minutes, extra={"streak": st.get("scalp_forced_loss_streak")})
-                st = _load_state()
-                st["scalp_forced_loss_streak"] = 0
-        else:
-            st["scalp_forced_loss_streak"] = 0
-        _save_state(st)
-        loss_cooldown_minutes = int(cfg.get("risk", {}).get("cooldown_loss_minutes", 30))
-        if _loss_streak_reached(st):
-            _start_cooldown("loss_streak", loss_cooldown_minutes, extra={
-                "recent_results": len(st.get("recent_results") or []),
-                "threshold": int(cfg.get("risk", {}).get("cooldown_loss_streak", 0))
-            })
-        _notify_cerebro_learn(sig.symbol, sig.tf, pnl, st)
+            _notify_cerebro_learn(sig.symbol, sig.tf, pnl, st)
 
-        return {"status": "ok", "close_resp": resp, "pnl_from_last_entry": round(pnl, 4),
-                "consecutive_losses": st.get("consecutive_losses", 0)}
+            return {"status": "ok", "close_resp": resp, "pnl_from_last_entry": round(pnl, 4),
+                    "consecutive_losses": st.get("consecutive_losses", 0)}
 
         # ====== APERTURA ======
         side = sig.side or ("LONG" if "LONG" in sig.signal else "SHORT")
@@ -1148,7 +1337,9 @@ def webhook(sig: Signal):
         strategy_meta = sig.strategy_meta or {}
         force_scalp = False
         if strategy_meta.get("strategy") == "scalping_v1" and not strategy_meta.get("forced_entry"):
-            if _needs_scalp_push(strategy_meta, st):
+            with _stage("scalp_objectives"):
+                needs_push = _needs_scalp_push(strategy_meta, st)
+            if needs_push:
                 force_scalp = True
                 strategy_meta["forced_entry"] = True
                 strategy_meta["force_reason"] = "daily_objective"
@@ -1160,11 +1351,16 @@ def webhook(sig: Signal):
                 })
 
         price_live = bb.get_mark_price(symbol) or (60000.0 if "BTC" in symbol else 3000.0)
-        cere_decision = None if force_scalp else _maybe_apply_cerebro(sig, price_live, st)
+        with _stage("cerebro") as span:
+            cere_decision = None if force_scalp else _maybe_apply_cerebro(sig, price_live, st)
+            span.set(blocked=bool(cere_decision and cere_decision.get("blocked")))
         if cere_decision and cere_decision.get("blocked"):
             return {"status": "filtered", "reason": cere_decision.get("reason", "cerebro")}
-        _apply_dynamic_risk(sig, balance, st)
-        guardrail = _apply_guardrails(sig, price_live, st)
+        with _stage("dynamic_risk"):
+            _apply_dynamic_risk(sig, balance, st)
+        with _stage("guardrails") as span:
+            guardrail = _apply_guardrails(sig, price_live, st)
+            span.set(blocked=bool(guardrail and guardrail.get("blocked")))
         if guardrail and guardrail.get("blocked") and not force_scalp:
             _save_state(st)
             return {"status": "filtered", "reason": guardrail.get("reason", "guardrails"), "details": guardrail}
@@ -1174,8 +1370,9 @@ def webhook(sig: Signal):
             min_risk = float(strategy_meta.get("min_risk_pct") or 0.25)
             sig.risk_pct = max(float(sig.risk_pct or min_risk), min_risk)
         _save_state(st)
-        qty_raw = _calc_qty_base(balance, sig.risk_pct or 1.0, sig.leverage or 10, price_live)
-        qty_num, qty_str, filters = _quantize_qty(symbol, qty_raw)
+        with _stage("quantize"):
+            qty_raw = _calc_qty_base(balance, sig.risk_pct or 1.0, sig.leverage or 10, price_live)
+            qty_num, qty_str, filters = _quantize_qty(symbol, qty_raw)
         tick = filters["tick"]
 
         api_key = cfg["bybit"]["api_key"]
@@ -1220,68 +1417,74 @@ def webhook(sig: Signal):
             _add_tp_sl(payload)
 
         # leverage tolerante
-        try:
-            bb.set_leverage(symbol, sig.leverage or 10, sig.leverage or 10)
-        except Exception:
-            pass
+        with _stage("leverage"):
+            try:
+                bb.set_leverage(symbol, sig.leverage or 10, sig.leverage or 10)
+            except Exception:
+                pass
 
         # ---- Crear orden con reintentos + fallback Market→Limit IOC ----
         payload_str = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
-        order_started = time.time()
-        last_exc = None
-        placed = None
-        for i in range(4):
-            try:
-                ts, sign, recv_window = _sign_v5(api_key, api_secret, payload_str, "120000")
-                headers = {
-                    "X-BAPI-API-KEY": api_key,
-                    "X-BAPI-SIGN": sign,
-                    "X-BAPI-TIMESTAMP": ts,
-                    "X-BAPI-RECV-WINDOW": recv_window,
-                    "X-BAPI-SIGN-TYPE": "2",
-                    "Content-Type": "application/json",
-                }
-                r = requests.post(url, headers=headers, data=payload_str, timeout=15)
-                data = r.json()
-                if data.get("retCode") == 0:
-                    placed = data["result"]
-                    break
-
-                msg = str(data).lower()
-                # Fallback para "maximum buying/minimum selling price" (ej. 30228)
-                if payload.get("orderType") == "Market" and (
-                    "maximum buying price" in msg or "minimum selling price" in msg or "30228" in msg
-                ):
-                    # Reintento como Limit IOC cerca del mark
-                    mark = bb.get_mark_price(symbol) or price_live
-                    if (side.upper() == "LONG"):
-                        px = _quantize_price(mark * 1.001, tick)
-                    else:
-                        px = _quantize_price(mark * 0.999, tick)
-                    payload_limit = dict(payload)
-                    payload_limit["orderType"] = "Limit"
-                    payload_limit["timeInForce"] = "IOC"
-                    payload_limit["price"] = str(px)
-                    payload_str = json.dumps(payload_limit, separators=(",", ":"), ensure_ascii=False)
-                    # no incrementamos i aquí; dejamos que el bucle lo reintente
-                    continue
-
-                if any(s in msg for s in ("timeout", "temporar", "try again", "service")) and i < 3:
-                    _sync_server_time()
-                    time.sleep(0.6 + i * 0.6)
-                    continue
-
-                raise RuntimeError(data)
-            except Exception as e:
-                last_exc = e
-                msg = str(e).lower()
-                if any(s in msg for s in ("timeout", "temporar", "try again", "service")) and i < 3:
-                    _sync_server_time()
-                    time.sleep(0.6 + i * 0.6)
-                    continue
-                raise
-        else:
-            raise last_exc
+        with _stage("order_create", order_type=payload.get("orderType")) as order_span:
+            order_started = time.time()
+            last_exc = None
+            placed = None
+            for i in range(4):
+                try:
+                    ts, sign, recv_window = _sign_v5(api_key, api_secret, payload_str, "120000")
+                    headers = {
+                        "X-BAPI-API-KEY": api_key,
+                        "X-BAPI-SIGN": sign,
+                        "X-BAPI-TIMESTAMP": ts,
+                        "X-BAPI-RECV-WINDOW": recv_window,
+                        "X-BAPI-SIGN-TYPE": "2",
+                        "Content-Type": "application/json",
+                    }
+                    started = time.perf_counter()
+                    r = requests.post(url, headers=headers, data=payload_str, timeout=15)
+                    data = r.json()
+                    observe_bybit("/v5/order/create", started, data.get("retCode"))
+                    TRACER.record("bybit_order_create", started, attempt=i, ret_code=data.get("retCode"))
+                    if data.get("retCode") == 0:
+                        placed = data["result"]
+                        order_span.set(attempts=i + 1)
+                        break
+
+                    msg = str(data).lower()
+                    # Fallback para "maximum buying/minimum selling price" (ej. 30228)
+                    if payload.get("orderType") == "Market" and (
+                        "maximum buying price" in msg or "minimum selling price" in msg or "30228" in msg
+                    ):
+                        # Reintento como Limit IOC cerca del mark
+                        mark = bb.get_mark_price(symbol) or price_live
+                        if (side.upper() == "LONG"):
+                            px = _quantize_price(mark * 1.001, tick)
+                        else:
+                            px = _quantize_price(mark * 0.999, tick)
+                        payload_limit = dict(payload)
+                        payload_limit["orderType"] = "Limit"
+                        payload_limit["timeInForce"] = "IOC"
+                        payload_limit["price"] = str(px)
+                        payload_str = json.dumps(payload_limit, separators=(",", ":"), ensure_ascii=False)
+                        # no incrementamos i aquí; dejamos que el bucle lo reintente
+                        continue
+
+                    if any(s in msg for s in ("timeout", "temporar", "try again", "service")) and i < 3:
+                        _sync_server_time()
+                        time.sleep(0.6 + i * 0.6)
+                        continue
+
+                    raise RuntimeError(data)
+                except Exception as e:
+                    last_exc = e
+                    msg = str(e).lower()
+                    if any(s in msg for s in ("timeout", "temporar", "try again", "service")) and i < 3:
+                        _sync_server_time()
+                        time.sleep(0.6 + i * 0.6)
+                        continue
+                    raise
+            else:
+                raise last_exc
         latency_ms = (time.time() - order_started) * 1000.0
 
         # Guardar equity en la entrada
@@ -1292,12 +1495,7 @@ def webhook(sig: Signal):
 
         # TP1 parcial + SL->BE
         if sig.move_sl_to_be_on_tp1 and (sig.tp1_close_pct or 50) > 0:
-            threading.Thread(
-                target=_autopilot_tp1_and_be,
-                args=(symbol, side),
-                kwargs={"close_pct": int(sig.tp1_close_pct or 50), "tp1_pct": 1.0, "be_offset_bps": 2.0},
-                daemon=True
-            ).start()
+            _TP1_AUTOPILOT.start(symbol, side, close_pct=int(sig.tp1_close_pct or 50), tp1_pct=1.0, be_offset_bps=2.0)
 
         # Log / Excel / Panel
         append_operacion(EXCEL_DIR, {
@@ -1388,127 +1586,96 @@ def daily_summary(date: Optional[str] = None, write: bool = True):
         _append_scalp_daily_summary(_load_state())
     return {"status": "ok", "summary": resumen}
 
-def _daily_scheduler():
-    while True:
-        now = datetime.now()
-        target = now.replace(hour=23, minute=59, second=45, microsecond=0)
-        if target <= now:
-            target = target + timedelta(days=1)
-        time.sleep((target - now).total_seconds())
-        try:
-            daily_summary(write=True)
-            _append_scalp_daily_summary(_load_state())
-        except Exception:
-            pass
-
-try:
-    threading.Thread(target=_daily_scheduler, daemon=True).start()
-except Exception:
-    pass
+def _daily_job():
+    try:
+        daily_summary(write=True)
+        _append_scalp_daily_summary(_load_state())
+    except Exception:
+        pass
 
 
-def _collect_closed_pnl_entries(start_ms: int, end_ms: int) -> list[dict]:
-    """Descarga el histórico de closed PnL de Bybit entre start/end usando paginación."""
-    rows: list[dict] = []
-    cursor: str | None = None
-    for _ in range(30):  # evita bucles infinitos
-        resp = bb.get_closed_pnl(start_time=start_ms, end_time=end_ms, cursor=cursor, limit=200)
-        if resp.get("retCode") != 0:
-            break
-        result = resp.get("result") or {}
-        batch = result.get("list") or []
-        rows.extend(batch)
-        cursor = result.get("nextPageCursor")
-        if not cursor:
-            break
-    return rows
+_PNL_SYNC = ClosedPnlSync(
+    bb,
+    PNL_SYMBOLS_JSON,
+    PNL_SYNC_STATE_JSON,
+    max_workers=max(1, int(os.getenv("PNL_SYNC_WORKERS", "4"))),
+)
 
 
-def _aggregate_closed_pnl(entries: list[dict]) -> dict[str, dict]:
-    """Agrupa por día y símbolo para generar breakdown real a partir de fills."""
-    aggregated: dict[str, dict] = {}
-    now_iso = utc_now_iso(z_suffix=True)
-    for entry in entries:
-        ts_raw = entry.get("createdTime") or entry.get("updatedTime") or entry.get("execTime")
-        symbol = entry.get("symbol")
-        if not ts_raw or not symbol:
-            continue
-        try:
-            ts_ms = int(ts_raw)
-        except Exception:
-            continue
-        day = datetime.utcfromtimestamp(ts_ms / 1000).date().isoformat()
-        pnl_val = entry.get("closedPnl") or entry.get("pnl") or 0.0
-        fees_val = entry.get("cumCommission") or entry.get("fees") or 0.0
-        try:
-            pnl = float(pnl_val)
-        except Exception:
-            pnl = 0.0
-        try:
-            fees = float(fees_val)
-        except Exception:
-            fees = 0.0
-        ref = aggregated.setdefault(day, {"total": 0.0, "symbols": {}, "refreshed_at": now_iso})
-        ref["total"] += pnl
-        sym = ref["symbols"].setdefault(symbol, {"pnl": 0.0, "fees": 0.0, "trades": 0})
-        sym["pnl"] += pnl
-        sym["fees"] += fees
-        sym["trades"] += 1
-    return aggregated
-
-
-def _sync_symbol_pnl(days_back: int = 30) -> None:
-    """Reconstruye los últimos `days_back` días con datos reales de Bybit."""
-    end_dt = utc_now()
-    start_dt = end_dt - timedelta(days=days_back)
-    entries = _collect_closed_pnl_entries(
-        int(start_dt.timestamp() * 1000),
-        int(end_dt.timestamp() * 1000),
-    )
-    aggregated = _aggregate_closed_pnl(entries)
-    if not aggregated:
-        return
-    cache = _load_symbol_pnl_cache()
-    cache.update(aggregated)
-    # conserva solo los últimos 90 días para evitar archivos gigantes
-    keys = sorted(cache.keys())
-    if len(keys) > 90:
-        for day in keys[:-90]:
-            cache.pop(day, None)
-    _save_symbol_pnl_cache(cache)
-
-
-def _pnl_symbol_worker():
-    interval = max(600, int(os.getenv("PNL_SYMBOL_SYNC_SECONDS", "1800")))
-    while True:
-        try:
-            _sync_symbol_pnl()
-        except Exception as exc:
-            _append_bridge_log(f"pnl_sync_error={exc}")
-        time.sleep(interval)
+def _sync_symbol_pnl(days_back: int = 30) -> dict:
+    """Sincroniza el breakdown diario con Bybit: incremental desde el cursor, backfill si no hay estado."""
+    return _PNL_SYNC.sync(initial_days=days_back)
 
 
-try:
-    threading.Thread(target=_pnl_symbol_worker, daemon=True).start()
-except Exception:
-    pass
+def _pnl_symbol_job():
+    backfill_days = max(1, int(os.getenv("PNL_SYNC_BACKFILL_DAYS", "30")))
+    try:
+        _sync_symbol_pnl(backfill_days)
+    except Exception as exc:
+        _append_bridge_log(f"pnl_sync_error={exc}")
 
 
 def _bridge_heartbeat():
-    interval = max(5, int(os.getenv("BRIDGE_HEARTBEAT_SEC", "10")))
-    while True:
-        try:
-            balance = bb.get_balance()
-        except Exception:
-            balance = None
-        st = _load_state()
-        cooldown = st.get("cooldown_until_ts")
-        cooldown_left = max(0, (cooldown or 0) - _now_ts()) if cooldown else 0
-        _append_bridge_log(f"heartbeat balance={balance} cooldown_s={cooldown_left}")
-        time.sleep(interval)
-
-
-try:
-    threading.Thread(target=_bridge_heartbeat, daemon=True).start()
-except Exception:
-    pass
+    try:
+        balance = bb.get_balance()
+    except Exception:
+        balance = None
+    st = _load_state()
+    cooldown = st.get("cooldown_until_ts")
+    cooldown_left = max(0, (cooldown or 0) - _now_ts()) if cooldown else 0
+    _append_bridge_log(f"heartbeat balance={balance} cooldown_s={cooldown_left}")
+
+
+@app.get("/scheduler")
+def scheduler_metrics():
+    return _SCHEDULER.metrics()
+
+
+@app.get("/traces")
+def traces(limit: int = 50, min_ms: float = 0.0, span: Optional[str] = None, summary: bool = False):
+    """Trazas recientes del webhook; `span` + `min_ms` filtran por la etapa lenta."""
+    if summary:
+        return TRACER.summary()
+    return {"sample_rate": TRACER.sample_rate, "traces": TRACER.recent(limit=limit, min_ms=min_ms, span=span)}
+
+
+_SCHEDULER.daily_at(23, 59, 45, _daily_job, name="daily_summary")
+_SCHEDULER.every(max(600, int(os.getenv("PNL_SYMBOL_SYNC_SECONDS", "1800"))), _pnl_symbol_job,
+                 name="pnl_symbol_sync", first_delay=0)
+_SCHEDULER.every(max(5, int(os.getenv("BRIDGE_HEARTBEAT_SEC", "10"))), _bridge_heartbeat,
+                 name="bridge_heartbeat", first_delay=0)
+
+
+def _warm_excel() -> None:
+    """openpyxl pesa ~0.2 s: se importa aquí para que no lo pague la primera entrada."""
+    import openpyxl  # noqa: F401
+
+
+def _start_background() -> None:
+    """Planificador y stream privado al arrancar; sync de hora y warmups sin bloquear el primer /health."""
+    _SCHEDULER.start()
+    if _PRIVATE_STREAM_ENABLED:
+        _PRIVATE_STREAM.start()
+    tasks = {"warm_excel": _warm_excel}
+    if os.getenv("SLS_SKIP_TIME_SYNC") != "1":
+        tasks["time_sync"] = _sync_server_time
+    if CEREBRO_ENABLED:
+        tasks["warm_cerebro"] = get_cerebro
+    STARTUP.background(tasks)
+    STARTUP.mark_ready()
+
+
+def _stop_background() -> None:
+    _SCHEDULER.stop()
+    if _PRIVATE_STREAM_ENABLED:
+        _PRIVATE_STREAM.stop()
+    flush_all()
+
+
+@app.get("/startup")
+def startup_report():
+    """Fases del arranque (import, config, clientes, rutas, lifespan) y tareas en segundo plano."""
+    return STARTUP.snapshot()
+
+
+STARTUP.checkpoint("routes")
@@ -0,0 +1,268 @@
+"""Backtester vectorizado para `ScalpingStrategy` sobre klines históricas.
+
+Los indicadores se calculan una sola vez para todo el rango y el scoring de
+`ScalpingStrategy.score_frame` se evalúa sobre todas las velas a la vez. La
+simulación abre en la apertura de la vela siguiente a la señal, cierra por
+stop/take profit (si ambos se tocan en la misma vela se asume el stop) o por
+`max_hold_minutes`, descuenta `fee_bps_round_trip` y dimensiona igual que el
+bot (`balance * risk_pct/100 * leverage`). El resultado usa el formato de
+stats que consume `scripts/tools/arena_rank.extract_stats`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .ia_utils import _map_interval, compute_indicators
+from .kline_store import KlineStore, to_ms
+from .resampler import aggregate
+from .strategies.scalping import ScalpingStrategy
+
+KLINE_COLUMNS = ["ts", "open", "high", "low", "close", "volume"]
+_CHUNK = 20_000
+
+
+def interval_minutes(marco: str) -> int:
+    iv = _map_interval(marco)
+    if iv == "D":
+        return 1440
+    if iv == "W":
+        return 10080
+    return int(iv)
+
+
+def load_klines(path: Path) -> pd.DataFrame:
+    """Lee klines desde CSV/Parquet/NPZ con columnas ts(ms)/open/high/low/close/volume."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".npz":
+        with np.load(path) as data:
+            df = pd.DataFrame({col: data[col] for col in KLINE_COLUMNS if col in data.files})
+    elif suffix == ".parquet":
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    if "ts" not in df.columns and "start" in df.columns:
+        df = df.rename(columns={"start": "ts"})
+    missing = [col for col in KLINE_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas en {path}: {missing}")
+    return normalize_klines(df)
+
+
+def load_store_klines(root: Path, symbol: str, marco: str, start=None, end=None) -> pd.DataFrame:
+    """Lee el rango pedido del almacén local (`kline_store`) sin tocar la red."""
+    df = KlineStore(root).read(symbol, marco, to_ms(start), to_ms(end), columns=KLINE_COLUMNS)
+    if df.empty:
+        raise ValueError(f"Sin klines para {symbol.upper()} {marco} en {root}")
+    return normalize_klines(df)
+
+
+def normalize_klines(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[KLINE_COLUMNS].copy()
+    for col in KLINE_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df = df.dropna().drop_duplicates("ts").sort_values("ts").reset_index(drop=True)
+    df["typical"] = (df["high"] + df["low"] + df["close"]) / 3.0
+    return df
+
+
+def resample_klines(df: pd.DataFrame, marco: str) -> pd.DataFrame:
+    """Agrega velas a un timeframe mayor alineado a los límites UTC de Bybit."""
+    return aggregate(df, interval_minutes(marco) * 60_000)
+
+
+def align_anchor(primary: pd.DataFrame, anchor: pd.DataFrame, primary_minutes: int, anchor_minutes: int) -> pd.DataFrame:
+    """Para cada vela primaria, la última vela ancla ya cerrada (sin lookahead)."""
+    left = pd.DataFrame({"avail": primary["ts"].to_numpy(dtype=np.int64) + primary_minutes * 60_000})
+    right = anchor[["ts", "close", "ema_mid", "rsi"]].copy()
+    right["avail"] = right["ts"].to_numpy(dtype=np.int64) + anchor_minutes * 60_000
+    merged = pd.merge_asof(left, right.drop(columns=["ts"]).sort_values("avail"), on="avail", direction="backward")
+    merged.index = primary.index
+    return merged[["close", "ema_mid", "rsi"]]
+
+
+@dataclass
+class BacktestResult:
+    stats: Dict[str, Any]
+    trades: pd.DataFrame
+    equity: np.ndarray
+
+
+def _simulate(
+    df: pd.DataFrame,
+    scores: pd.DataFrame,
+    hold_bars: int,
+    fee_ratio: float,
+) -> pd.DataFrame:
+    n = len(df)
+    opens = df["open"].to_numpy(dtype=float)
+    highs = df["high"].to_numpy(dtype=float)
+    lows = df["low"].to_numpy(dtype=float)
+    closes = df["close"].to_numpy(dtype=float)
+    ts = df["ts"].to_numpy(dtype=np.int64)
+    signal = scores["signal"].to_numpy()
+
+    hold_bars = max(1, hold_bars)
+    # señales con al menos una vela posterior para entrar
+    cand = np.flatnonzero((signal != 0) & (np.arange(n) < n - 1))
+    if cand.size == 0:
+        return pd.DataFrame(columns=["entry_idx", "exit_idx", "entry_ts", "exit_ts", "direction", "entry", "exit",
+                                     "ret", "reason", "forced", "risk_pct", "leverage"])
+
+    direction = signal[cand].astype(float)
+    ref = closes[cand]
+    stop_dist = scores["stop_distance"].to_numpy(dtype=float)[cand]
+    tp_dist = scores["tp_distance"].to_numpy(dtype=float)[cand]
+    stop_px = np.where(direction > 0, np.maximum(0.0, ref - stop_dist), ref + stop_dist)
+    tp_px = np.where(direction > 0, ref + tp_dist, np.maximum(0.0, ref - tp_dist))
+
+    hi_pad = np.concatenate([highs, np.full(hold_bars, np.nan)])
+    lo_pad = np.concatenate([lows, np.full(hold_bars, np.nan)])
+    hi_view = np.lib.stride_tricks.sliding_window_view(hi_pad, hold_bars)
+    lo_view = np.lib.stride_tricks.sliding_window_view(lo_pad, hold_bars)
+    big = hold_bars + 1
+    exit_idx = np.empty(cand.size, dtype=np.int64)
+    reason = np.empty(cand.size, dtype=object)
+    # por bloques para acotar memoria (candidatos x velas de holding)
+    for start in range(0, cand.size, _CHUNK):
+        sl = slice(start, start + _CHUNK)
+        win_hi = hi_view[cand[sl] + 1]
+        win_lo = lo_view[cand[sl] + 1]
+        d = direction[sl][:, None]
+        with np.errstate(invalid="ignore"):
+            hit_stop = np.where(d > 0, win_lo <= stop_px[sl][:, None], win_hi >= stop_px[sl][:, None])
+            hit_tp = np.where(d > 0, win_hi >= tp_px[sl][:, None], win_lo <= tp_px[sl][:, None])
+        valid = np.isfinite(win_hi)
+        hit_stop &= valid
+        hit_tp &= valid
+        first_stop = np.where(hit_stop.any(axis=1), hit_stop.argmax(axis=1), big)
+        first_tp = np.where(hit_tp.any(axis=1), hit_tp.argmax(axis=1), big)
+        last_valid = valid.sum(axis=1) - 1
+        exit_idx[sl] = cand[sl] + 1 + np.minimum(np.minimum(first_stop, first_tp), last_valid)
+        reason[sl] = np.where(
+            (first_stop >= big) & (first_tp >= big), "ttl", np.where(first_stop <= first_tp, "stop", "take_profit")
+        )
+    exit_px = np.where(reason == "stop", stop_px, np.where(reason == "take_profit", tp_px, closes[exit_idx]))
+    entry_px = opens[cand + 1]
+
+    # una posición a la vez: saltamos señales mientras hay una abierta
+    chosen = []
+    i = 0
+    while i < cand.size:
+        chosen.append(i)
+        i = int(np.searchsorted(cand, exit_idx[i], side="left"))
+    chosen = np.asarray(chosen, dtype=np.int64)
+
+    ret = direction[chosen] * (exit_px[chosen] - entry_px[chosen]) / entry_px[chosen] - fee_ratio
+    trades = pd.DataFrame({
+        "entry_idx": cand[chosen] + 1,
+        "exit_idx": exit_idx[chosen],
+        "entry_ts": ts[cand[chosen] + 1],
+        "exit_ts": ts[exit_idx[chosen]],
+        "direction": direction[chosen].astype(int),
+        "entry": entry_px[chosen],
+        "exit": exit_px[chosen],
+        "ret": ret,
+        "reason": reason[chosen],
+        "forced": scores["forced_entry"].to_numpy()[cand[chosen]],
+        "risk_pct": scores["risk_pct"].to_numpy(dtype=float)[cand[chosen]],
+        "leverage": scores["leverage"].to_numpy(dtype=float)[cand[chosen]],
+    })
+    return trades
+
+
+def summarize_trades(trades: pd.DataFrame, initial_equity: float) -> tuple[Dict[str, Any], np.ndarray]:
+    if trades.empty:
+        stats = {
+            "pnl": 0.0, "max_drawdown": 0.0, "gross_profit": 0.0, "gross_loss": 0.0, "trades": 0,
+            "win_rate": 0.0, "returns_avg": 0.0, "returns_std": 0.0, "sharpe": 0.0, "calmar": 0.0,
+            "profit_factor": 0.0, "feature_drift": 0.0,
+        }
+        return stats, np.array([initial_equity])
+    exposure = trades["risk_pct"].to_numpy() / 100.0 * trades["leverage"].to_numpy()
+    growth = np.maximum(0.0, 1.0 + exposure * trades["ret"].to_numpy())
+    equity = initial_equity * np.concatenate([[1.0], np.cumprod(growth)])
+    pnl_trade = np.diff(equity)
+    peaks = np.maximum.accumulate(equity)
+    max_dd = float(np.max((peaks - equity) / peaks) * 100.0)
+
+    day = pd.to_datetime(trades["exit_ts"], unit="ms", utc=True).dt.date.to_numpy()
+    daily = pd.DataFrame({"day": day, "pnl": pnl_trade, "start": equity[:-1]}).groupby("day", sort=True)
+    daily_ret = (daily["pnl"].sum() / daily["start"].first()).to_numpy()
+
+    gross_profit = float(pnl_trade[pnl_trade > 0].sum())
+    gross_loss = float(-pnl_trade[pnl_trade < 0].sum())
+    pnl = float(equity[-1] - initial_equity)
+    returns_avg = float(daily_ret.mean()) if daily_ret.size else 0.0
+    returns_std = float(daily_ret.std()) if daily_ret.size > 1 else 0.0
+    stats = {
+        "pnl": round(pnl, 4),
+        "max_drawdown": round(max_dd, 4),
+        "gross_profit": round(gross_profit, 4),
+        "gross_loss": round(gross_loss, 4),
+        "trades": int(len(trades)),
+        "win_rate": round(float((pnl_trade > 0).mean()), 4),
+        "returns_avg": round(returns_avg, 6),
+        "returns_std": round(returns_std, 6),
+        "sharpe": round(returns_avg / returns_std, 4) if returns_std else 0.0,
+        "calmar": round(pnl / max_dd, 4) if max_dd else 0.0,
+        "profit_factor": round(gross_profit / gross_loss, 4) if gross_loss else 0.0,
+        "feature_drift": 0.0,
+        "forced_trades": int(trades["forced"].sum()),
+        "exit_reasons": {str(k): int(v) for k, v in trades["reason"].value_counts().items()},
+    }
+    return stats, equity
+
+
+def prepare_frames(klines: pd.DataFrame, strategy: ScalpingStrategy, anchor_klines: Optional[pd.DataFrame] = None,
+                   timeframe: Optional[str] = None) -> tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """Calcula indicadores una vez (primario + ancla alineada) para reutilizar entre backtests."""
+    timeframe = timeframe or strategy.primary_tf
+    primary = compute_indicators(normalize_klines(klines))
+    anchor_raw = anchor_klines if anchor_klines is not None else resample_klines(normalize_klines(klines), strategy.anchor_tf)
+    anchor_ind = compute_indicators(anchor_raw)
+    anchor = None
+    if not anchor_ind.empty:
+        anchor = align_anchor(primary, anchor_ind, interval_minutes(timeframe), interval_minutes(strategy.anchor_tf))
+    return primary, anchor
+
+
+def run_backtest(
+    klines: pd.DataFrame,
+    config: Dict[str, Any],
+    *,
+    symbol: str = "BTCUSDT",
+    timeframe: Optional[str] = None,
+    anchor_klines: Optional[pd.DataFrame] = None,
+    initial_equity: float = 1000.0,
+    frames: Optional[tuple[pd.DataFrame, Optional[pd.DataFrame]]] = None,
+) -> BacktestResult:
+    strategy = ScalpingStrategy(config)
+    timeframe = timeframe or strategy.primary_tf
+    primary, anchor = frames if frames is not None else prepare_frames(klines, strategy, anchor_klines, timeframe)
+    scores = strategy.score_frame(primary, anchor, symbol=symbol)
+    hold_bars = int(np.ceil(strategy.max_hold_minutes / max(1, interval_minutes(timeframe))))
+    trades = _simulate(primary, scores, hold_bars, strategy.fee_bps_round_trip / 10000.0)
+    stats, equity = summarize_trades(trades, initial_equity)
+    return BacktestResult(stats=stats, trades=trades, equity=equity)
+
+
+def arena_record(result: BacktestResult, *, name: str, symbol: str, timeframe: str, config: Dict[str, Any],
+                 klines: Optional[pd.DataFrame] = None) -> dict:
+    """Registro JSONL compatible con arena_rank/arena_scoreboard."""
+    metadata: Dict[str, Any] = {
+        "entry_model": "scalping_v1",
+        "engine": "vector_backtest",
+        "hold_minutes": config.get("max_hold_minutes", 45),
+        "params": config,
+    }
+    if klines is not None and not klines.empty:
+        metadata["bars"] = int(len(klines))
+        metadata["range_ms"] = [int(klines["ts"].iloc[0]), int(klines["ts"].iloc[-1])]
+    return {"name": name, "symbol": symbol.upper(), "timeframe": timeframe, "stats": result.stats, "metadata": metadata}
@@ -1,8 +1,55 @@
+import time
 from typing import Dict, Optional
 from urllib.parse import urlparse
 
 from pybit.unified_trading import HTTP
 
+from .metrics import observe_bybit
+
+# método de pybit -> ruta v5, la misma etiqueta `endpoint` que usan las llamadas firmadas de app.py
+_V5_PATHS = {
+    "get_server_time": "/v5/market/time",
+    "get_kline": "/v5/market/kline",
+    "get_tickers": "/v5/market/tickers",
+    "get_instruments_info": "/v5/market/instruments-info",
+    "get_orderbook": "/v5/market/orderbook",
+    "get_wallet_balance": "/v5/account/wallet-balance",
+    "get_positions": "/v5/position/list",
+    "set_leverage": "/v5/position/set-leverage",
+    "set_trading_stop": "/v5/position/trading-stop",
+    "get_closed_pnl": "/v5/position/closed-pnl",
+    "place_order": "/v5/order/create",
+    "cancel_order": "/v5/order/cancel",
+    "get_open_orders": "/v5/order/realtime",
+}
+
+
+class _TimedSession:
+    """Envuelve la sesión de pybit y mide cada llamada REST (endpoint = ruta v5, etiqueta retCode)."""
+
+    def __init__(self, session):
+        self._session = session
+
+    def __getattr__(self, name):
+        attr = getattr(self._session, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        def _call(*args, **kwargs):
+            started = time.perf_counter()
+            ret_code = "exception"
+            try:
+                resp = attr(*args, **kwargs)
+                ret_code = resp.get("retCode") if isinstance(resp, dict) else "ok"
+                return resp
+            except Exception as exc:
+                ret_code = getattr(exc, "status_code", None) or "exception"
+                raise
+            finally:
+                observe_bybit(_V5_PATHS.get(name, name), started, ret_code)
+
+        return _call
+
 
 class BybitClient:
     """
@@ -25,7 +72,13 @@ class BybitClient:
         if is_demo:
             http_kwargs["demo"] = True
 
-        self.session = HTTP(**http_kwargs)
+        http = HTTP(**http_kwargs)
+        parsed = urlparse(normalized)
+        host = (parsed.hostname or "").lower()
+        if parsed.scheme in ("http", "https") and host and not host.endswith("bybit.com"):
+            # exchange propio (p.ej. scripts/tools/fake_bybit.py): pybit arma las URLs con `endpoint`
+            http.endpoint = normalized.rstrip("/")
+        self.session = _TimedSession(http)
         self.account_type = account_type
 
     # ----------------- UTIL: PRECIO -----------------
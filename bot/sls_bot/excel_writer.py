@@ -1,9 +1,28 @@
 from pathlib import Path
-from openpyxl import Workbook, load_workbook
 from datetime import datetime, timezone
-import json, re
+from functools import wraps
+import json, re, threading
 from typing import List, Dict, Any
 
+# El webhook corre en el threadpool de FastAPI: dos señales simultáneas hacían
+# load/save del mismo .xlsx a la vez y dejaban el zip corrupto ("Bad CRC-32").
+_BOOK_LOCK = threading.RLock()
+
+
+def _locked(fn):
+    @wraps(fn)
+    def _wrapper(*args, **kwargs):
+        with _BOOK_LOCK:
+            return fn(*args, **kwargs)
+    return _wrapper
+
+
+def _openpyxl():
+    """Import perezoso: openpyxl tarda ~0.2 s y no debe pesar en el arranque del bot."""
+    import openpyxl
+
+    return openpyxl
+
 # ---------- utilidades base ----------
 def _default_timestamp() -> str:
     return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
@@ -12,13 +31,13 @@ def _default_timestamp() -> str:
 def _ensure_book(path: Path, sheet: str, headers: list):
     path.parent.mkdir(parents=True, exist_ok=True)
     if not path.exists():
-        wb = Workbook()
+        wb = _openpyxl().Workbook()
         ws = wb.active
         ws.title = sheet
         ws.append(headers)
         wb.save(path)
         return
-    wb = load_workbook(path)
+    wb = _openpyxl().load_workbook(path)
     if sheet not in wb.sheetnames:
         ws = wb.create_sheet(sheet)
         ws.append(headers)
@@ -30,10 +49,11 @@ def _safe_row_date_str(v) -> str:
     v = "" if v is None else str(v)
     return v[:10] if len(v) >= 10 else ""
 
+@_locked
 def _read_sheet_dicts(path: Path, sheet: str) -> List[Dict[str, Any]]:
     if not path.exists():
         return []
-    wb = load_workbook(path, data_only=True)
+    wb = _openpyxl().load_workbook(path, data_only=True)
     if sheet not in wb.sheetnames:
         return []
     ws = wb[sheet]
@@ -50,6 +70,7 @@ def _read_sheet_dicts(path: Path, sheet: str) -> List[Dict[str, Any]]:
     return out
 
 # ---------- operaciones ----------
+@_locked
 def append_operacion(excel_dir: Path, row: dict):
     path = Path(excel_dir) / "26. Plan de inversión.xlsx"
     sheet = "Operaciones"
@@ -62,7 +83,7 @@ def append_operacion(excel_dir: Path, row: dict):
     ]
     try:
         _ensure_book(path, sheet, headers)
-        wb = load_workbook(path)
+        wb = _openpyxl().load_workbook(path)
         ws = wb[sheet]
         ws.append([
             row.get("FechaHora", _default_timestamp()),
@@ -96,6 +117,7 @@ def append_operacion(excel_dir: Path, row: dict):
         # Excel abierto; no bloqueamos el bot
         pass
 
+@_locked
 def append_evento(excel_dir: Path, row: dict):
     """
     Registra eventos como COOLDOWN, RESET_DAILY, COOLDOWN_DD, CLOSE, RESUMEN_AUTOMATICO, etc.
@@ -106,7 +128,7 @@ def append_evento(excel_dir: Path, row: dict):
     headers = ["FechaHora","Tipo","Detalle"]
     try:
         _ensure_book(path, sheet, headers)
-        wb = load_workbook(path)
+        wb = _openpyxl().load_workbook(path)
         ws = wb[sheet]
         ws.append([
             row.get("FechaHora", _default_timestamp()),
@@ -210,6 +232,7 @@ def compute_resumen_diario(excel_dir: Path, date_str: str,
         "Notas": ""
     }
 
+@_locked
 def upsert_resumen_diario(excel_dir: Path, resumen: Dict[str, Any]):
     """
     Escribe/actualiza una fila del día en la hoja 'Resumen Diario'.
@@ -223,7 +246,7 @@ def upsert_resumen_diario(excel_dir: Path, resumen: Dict[str, Any]):
     ]
     try:
         _ensure_book(path, sheet, headers)
-        wb = load_workbook(path)
+        wb = _openpyxl().load_workbook(path)
         ws = wb[sheet]
 
         # buscar fila por fecha
@@ -0,0 +1,214 @@
+"""
+Caché en disco de la matriz de indicadores/features por (símbolo, intervalo).
+
+Estructura::
+
+    <root>/<SYMBOL>/<interval>/v<INDICATOR_VERSION>/meta.json
+    <root>/<SYMBOL>/<interval>/v<INDICATOR_VERSION>/c000001.npy ...
+
+- `update(symbol, interval, raw)` solo calcula indicadores para las velas
+  cerradas posteriores a la última guardada, usando como calentamiento las
+  velas previas que ya están en la caché (desde el inicio del día UTC para que
+  el AVWAP diario salga igual). Las filas nuevas se añaden como un bloque
+  `.npy`; los bloques pequeños se compactan cuando se acumulan.
+- Cambiar `ia_utils.INDICATOR_VERSION`, pasar un histórico que empieza antes
+  que el cacheado o uno que no continúa la última vela guardada (hueco tras
+  una caída más larga que la ventana de `latest_raw`) reconstruye la matriz
+  completa desde `raw`: nunca se calculan indicadores a través de un hueco.
+- `frame()`/`last_row()` leen con `mmap` lo que `ia_train` y
+  `ia_signal_engine.decide` necesitan.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .ia_utils import INDICATOR_VERSION, compute_indicators
+from .kline_store import interval_ms
+
+RAW_COLUMNS = ["ts", "open", "high", "low", "close", "volume", "typical"]
+FRAME_COLUMNS = RAW_COLUMNS + [
+    "ema_fast", "ema_mid", "ema_slow", "rsi", "atr", "avwap", "range_pct", "ema_diff_bps",
+    "dist_to_avwap_bps", "dist_to_ema200_bps", "breakout_up", "breakout_dn", "slope_ema_fast",
+]
+DAY_MS = 86_400_000
+MAX_CHUNKS = 16
+
+_LOCKS: Dict[str, threading.Lock] = {}
+_LOCKS_GUARD = threading.Lock()
+
+
+def _lock_for(key: str) -> threading.Lock:
+    with _LOCKS_GUARD:
+        return _LOCKS.setdefault(key, threading.Lock())
+
+
+class FeatureCache:
+    def __init__(self, root: Path | str, warmup_bars: Optional[int] = None):
+        self.root = Path(root)
+        self.warmup_bars = int(warmup_bars or os.getenv("SLS_FEATURE_WARMUP_BARS", 1000))
+
+    @classmethod
+    def from_config(cls, cfg: Optional[dict] = None) -> Optional["FeatureCache"]:
+        """Usa SLS_FEATURE_CACHE o `paths.features_dir`; None si no está configurado."""
+        root = os.getenv("SLS_FEATURE_CACHE") or ((cfg or {}).get("paths") or {}).get("features_dir")
+        return cls(root) if root else None
+
+    # ----- meta / bloques -----
+    def series_dir(self, symbol: str, interval: str) -> Path:
+        return self.root / symbol.upper() / str(interval).lower() / f"v{INDICATOR_VERSION}"
+
+    def meta(self, symbol: str, interval: str) -> dict:
+        try:
+            data = json.loads((self.series_dir(symbol, interval) / "meta.json").read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+        if data.get("version") != INDICATOR_VERSION or data.get("columns") != FRAME_COLUMNS:
+            return {}
+        return data
+
+    def _write_meta(self, directory: Path, meta: dict) -> None:
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".meta.")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh, indent=2)
+        os.replace(tmp, directory / "meta.json")
+
+    def _write_chunk(self, directory: Path, meta: dict, matrix: np.ndarray) -> dict:
+        seq = int(meta.get("next_seq", 1))
+        name = f"c{seq:06d}.npy"
+        tmp = directory / f".{name}"
+        with open(tmp, "wb") as fh:
+            np.save(fh, matrix)
+        os.replace(tmp, directory / name)
+        meta["next_seq"] = seq + 1
+        return {"file": name, "rows": int(len(matrix)), "ts_min": int(matrix[0, 0]), "ts_max": int(matrix[-1, 0])}
+
+    def _load_chunks(self, directory: Path, chunks: List[dict]) -> np.ndarray:
+        if not chunks:
+            return np.zeros((0, len(FRAME_COLUMNS)))
+        arrays = [np.load(directory / c["file"], mmap_mode="r") for c in chunks]
+        return arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+
+    def _compact(self, directory: Path, meta: dict) -> None:
+        chunks = meta["chunks"]
+        if len(chunks) <= MAX_CHUNKS:
+            return
+        # se fusionan los bloques posteriores al base; si ya pesan más que él, todo
+        start = 1 if sum(c["rows"] for c in chunks[1:]) < chunks[0]["rows"] else 0
+        merged = np.array(self._load_chunks(directory, chunks[start:]))
+        new_chunk = self._write_chunk(directory, meta, merged)
+        old = chunks[start:]
+        meta["chunks"] = chunks[:start] + [new_chunk]
+        self._write_meta(directory, meta)
+        for chunk in old:
+            try:
+                (directory / chunk["file"]).unlink()
+            except FileNotFoundError:
+                pass
+
+    # ----- escritura -----
+    def _closed(self, raw: pd.DataFrame, interval: str, now_ms: Optional[int]) -> pd.DataFrame:
+        now_ms = int(time.time() * 1000) if now_ms is None else int(now_ms)
+        return raw[raw["ts"].to_numpy(dtype=np.int64) + interval_ms(interval) <= now_ms]
+
+    @staticmethod
+    def _to_matrix(df: pd.DataFrame) -> np.ndarray:
+        return df[FRAME_COLUMNS].to_numpy(dtype=np.float64)
+
+    def update(self, symbol: str, interval: str, raw: pd.DataFrame, now_ms: Optional[int] = None) -> int:
+        """Añade features de las velas cerradas nuevas de `raw`; devuelve cuántas filas se añadieron."""
+        if raw is None or raw.empty:
+            return 0
+        raw = raw.copy()
+        if "typical" not in raw.columns:
+            raw["typical"] = (raw["high"] + raw["low"] + raw["close"]) / 3.0
+        raw = self._closed(raw[RAW_COLUMNS].sort_values("ts").drop_duplicates("ts"), interval, now_ms)
+        raw = raw.reset_index(drop=True)  # compute_indicators (AVWAP diario) asume índice 0..n-1
+        if raw.empty:
+            return 0
+        directory = self.series_dir(symbol, interval)
+        with _lock_for(str(directory)):
+            meta = self.meta(symbol, interval)
+            raw_ts_min = int(raw["ts"].iloc[0])
+            rebuild = not meta or raw_ts_min < int(meta.get("raw_ts_min", raw_ts_min))
+            if not rebuild:
+                ts_max = int(meta["chunks"][-1]["ts_max"])
+                fresh = raw[raw["ts"] > ts_max]
+                if fresh.empty:
+                    return 0
+                # `fresh` ya incluye todo lo que `raw` tiene tras `ts_max`: si no empieza en la vela
+                # siguiente, `raw` no cubre el hueco y solo queda reconstruir desde `raw`.
+                rebuild = int(fresh["ts"].iloc[0]) > ts_max + interval_ms(interval)
+            if rebuild:
+                features = compute_indicators(raw)
+                if features.empty:
+                    return 0
+                directory.mkdir(parents=True, exist_ok=True)
+                old = meta.get("chunks", []) if meta else []
+                meta = {"version": INDICATOR_VERSION, "columns": FRAME_COLUMNS, "raw_ts_min": raw_ts_min,
+                        "next_seq": int(meta.get("next_seq", 1)) if meta else 1, "chunks": []}
+                meta["chunks"].append(self._write_chunk(directory, meta, self._to_matrix(features)))
+                meta["updated_at"] = int(time.time())
+                self._write_meta(directory, meta)
+                for chunk in old:
+                    (directory / chunk["file"]).unlink(missing_ok=True)
+                return int(len(features))
+
+            # calentamiento desde la caché, alineado al inicio del día UTC (AVWAP diario)
+            cached = self._load_chunks(directory, meta["chunks"])
+            warm_from = int(fresh["ts"].iloc[0]) - self.warmup_bars * interval_ms(interval)
+            warm_from = (warm_from // DAY_MS) * DAY_MS
+            lo = int(np.searchsorted(cached[:, 0], warm_from, side="left"))
+            warm = pd.DataFrame(np.array(cached[lo:, : len(RAW_COLUMNS)]), columns=RAW_COLUMNS)
+            warm["ts"] = warm["ts"].astype(np.int64)
+            features = compute_indicators(pd.concat([warm, fresh], ignore_index=True))
+            features = features[features["ts"] > ts_max]
+            if features.empty:
+                return 0
+            meta["chunks"].append(self._write_chunk(directory, meta, self._to_matrix(features)))
+            meta["updated_at"] = int(time.time())
+            self._write_meta(directory, meta)
+            self._compact(directory, meta)
+            return int(len(features))
+
+    # ----- lectura -----
+    def _frame(self, matrix: np.ndarray) -> pd.DataFrame:
+        df = pd.DataFrame(np.asarray(matrix), columns=FRAME_COLUMNS)
+        df["ts"] = df["ts"].astype(np.int64)
+        return df
+
+    def frame(self, symbol: str, interval: str, start_ms: Optional[int] = None,
+              end_ms: Optional[int] = None) -> pd.DataFrame:
+        meta = self.meta(symbol, interval)
+        chunks = [c for c in meta.get("chunks", [])
+                  if (start_ms is None or c["ts_max"] >= start_ms) and (end_ms is None or c["ts_min"] <= end_ms)]
+        matrix = self._load_chunks(self.series_dir(symbol, interval), chunks)
+        ts = matrix[:, 0]
+        lo = 0 if start_ms is None else int(np.searchsorted(ts, start_ms, side="left"))
+        hi = len(ts) if end_ms is None else int(np.searchsorted(ts, end_ms, side="right"))
+        return self._frame(matrix[lo:hi])
+
+    def tail(self, symbol: str, interval: str, rows: int) -> pd.DataFrame:
+        meta = self.meta(symbol, interval)
+        picked: List[dict] = []
+        total = 0
+        for chunk in reversed(meta.get("chunks", [])):
+            picked.insert(0, chunk)
+            total += chunk["rows"]
+            if total >= rows:
+                break
+        matrix = self._load_chunks(self.series_dir(symbol, interval), picked)
+        return self._frame(matrix[-int(rows):] if rows else matrix[:0])
+
+    def last_row(self, symbol: str, interval: str) -> Optional[pd.Series]:
+        df = self.tail(symbol, interval, 1)
+        return None if df.empty else df.iloc[-1]
@@ -0,0 +1,367 @@
+"""
+Cola de entrenamientos en segundo plano para `POST /ia/train`.
+
+- `TrainJobQueue.submit()` devuelve un `job_id` al momento; el ajuste corre en
+  un `ProcessPoolExecutor` (con `nice` para no quitar CPU a `decide`).
+- Cada job se persiste en `<models_dir>/jobs/<job_id>.json`; el proceso hijo
+  escribe etapa y progreso en `<job_id>.progress.json` y el resultado final
+  se guarda además junto al modelo (`ia_model_<SYM>_<TF>.train.json`).
+- `cancel()` quita de la cola los jobs pendientes y, en los que ya corren,
+  deja un fichero `<job_id>.cancel` que el hijo revisa entre etapas.
+- El límite por host (`SLS_IA_TRAIN_HOST_SLOTS`) se aplica con `flock` sobre
+  ficheros de slot, así que vale aunque haya varios workers de uvicorn.
+- Cada cola mantiene un `flock` sobre `jobs/owners/<host>-<pid>-<id>.lock`
+  mientras vive y lo anota como `owner` en sus jobs. Un job activo solo se da
+  por interrumpido si ese lock está libre (su worker murió), y la deduplicación
+  de `submit()` mira los jobs en disco de todos los workers bajo `jobs/.submit.lock`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:  # pragma: no cover - solo POSIX
+    import fcntl
+except Exception:  # pragma: no cover
+    fcntl = None
+
+from . import ia_train
+from .metrics import QUEUE_DEPTH
+
+ACTIVE = ("queued", "running")
+FINISHED = ("done", "failed", "cancelled")
+
+
+class TrainCancelled(RuntimeError):
+    pass
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _read_json(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def _write_json(path: Path, payload: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+# ----- lado del proceso hijo -----
+class _Progress:
+    def __init__(self, jobs_dir: Path, job_id: str):
+        self.path = jobs_dir / f"{job_id}.progress.json"
+        self.cancel_flag = jobs_dir / f"{job_id}.cancel"
+
+    def cancelled(self) -> bool:
+        return self.cancel_flag.exists()
+
+    def __call__(self, stage: str, fraction: float) -> None:
+        _write_json(self.path, {"stage": stage, "progress": round(float(fraction), 3), "updated_at": _now(),
+                                "pid": os.getpid()})
+        if self.cancelled():
+            raise TrainCancelled(f"cancelado en la etapa {stage}")
+
+
+@contextmanager
+def host_slot(slots_dir: Path, slots: int, should_stop: Callable[[], bool] = lambda: False,
+              poll_s: float = 0.5) -> Iterator[Optional[int]]:
+    """Bloquea uno de `slots` ficheros con flock; espera (revisando cancelación) si están todos ocupados."""
+    if fcntl is None or slots <= 0:
+        yield None
+        return
+    slots_dir.mkdir(parents=True, exist_ok=True)
+    while True:
+        for idx in range(slots):
+            fh = open(slots_dir / f"slot{idx}.lock", "a+")
+            try:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                fh.close()
+                continue
+            try:
+                yield idx
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+                fh.close()
+            return
+        if should_stop():
+            raise TrainCancelled("cancelado esperando un slot libre")
+        time.sleep(poll_s)
+
+
+def _init_worker(nice: int) -> None:
+    if nice:
+        try:
+            os.nice(int(nice))
+        except Exception:
+            pass
+
+
+def run_train_job(job_id: str, jobs_dir: str, params: Dict[str, Any], host_slots: int) -> Dict[str, Any]:
+    """Punto de entrada en el proceso hijo: espera slot del host y llama a `ia_train.train_model`."""
+    jobs = Path(jobs_dir)
+    progress = _Progress(jobs, job_id)
+    progress("waiting_slot", 0.0)
+    with host_slot(jobs / "slots", host_slots, should_stop=progress.cancelled):
+        progress("started", 0.01)
+        result = ia_train.train_model(progress=progress, **params)
+    progress("done", 1.0)
+    return result
+
+
+# ----- lado del servidor -----
+class TrainJobQueue:
+    def __init__(
+        self,
+        models_dir: Path | str,
+        *,
+        workers: Optional[int] = None,
+        host_slots: Optional[int] = None,
+        n_jobs: Optional[int] = None,
+        nice: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ):
+        self.models_dir = Path(models_dir)
+        self.jobs_dir = self.models_dir / "jobs"
+        self.host_slots = int(host_slots if host_slots is not None else os.getenv("SLS_IA_TRAIN_HOST_SLOTS", 1))
+        self.workers = max(1, int(workers or os.getenv("SLS_IA_TRAIN_WORKERS", 0) or self.host_slots or 1))
+        self.n_jobs = int(n_jobs or os.getenv("SLS_IA_TRAIN_THREADS", 2))
+        self.nice = int(nice if nice is not None else os.getenv("SLS_IA_TRAIN_NICE", 10))
+        self._executor = executor
+        self._futures: Dict[str, Future] = {}
+        self._jobs: Dict[str, dict] = {}
+        self._lock = threading.RLock()
+        self._owner = self._claim_owner()
+        self._load()
+
+    # ----- persistencia -----
+    def _job_path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _save(self, job: dict) -> None:
+        _write_json(self._job_path(job["job_id"]), job)
+
+    # ----- dueño del job (qué worker lo tiene en su pool) -----
+    def _claim_owner(self) -> dict:
+        owner = {"host": socket.gethostname(), "pid": os.getpid()}
+        self._owner_fh = None
+        if fcntl is not None:
+            owners = self.jobs_dir / "owners"
+            owners.mkdir(parents=True, exist_ok=True)
+            owner["lock"] = f"{owner['host']}-{owner['pid']}-{uuid.uuid4().hex[:6]}.lock"
+            self._owner_fh = open(owners / owner["lock"], "a+")
+            fcntl.flock(self._owner_fh.fileno(), fcntl.LOCK_EX)
+        return owner
+
+    def _mine(self, job: dict) -> bool:
+        return (job.get("owner") or {}) == self._owner
+
+    def _owner_alive(self, owner: Optional[dict]) -> bool:
+        if not owner:
+            return False  # jobs anteriores al campo `owner`
+        if owner.get("lock") and fcntl is not None:
+            path = self.jobs_dir / "owners" / owner["lock"]
+            if not path.exists():
+                return False
+            with open(path, "a+") as fh:
+                try:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return True
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return False
+        if owner.get("host") != socket.gethostname():
+            return True  # sin lock no podemos comprobar otro host
+        try:
+            os.kill(int(owner.get("pid") or 0), 0)
+        except ProcessLookupError:
+            return False
+        except (PermissionError, ValueError):
+            pass
+        return True
+
+    @contextmanager
+    def _submit_lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.jobs_dir / ".submit.lock", "a+") as fh:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+    def _load(self) -> None:
+        """Relee los jobs de otros workers; falla solo los activos cuyo dueño ya no existe."""
+        if not self.jobs_dir.exists():
+            return
+        for path in self.jobs_dir.glob("*.json"):
+            if path.name.endswith(".progress.json"):
+                continue
+            job = _read_json(path)
+            if not job.get("job_id") or self._mine(job):
+                continue
+            if job.get("status") in ACTIVE and not self._owner_alive(job.get("owner")):
+                job.update(status="failed", error="interrumpido por reinicio", finished_at=_now())
+                self._save(job)
+            with self._lock:
+                self._jobs[job["job_id"]] = job
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(self.nice,))
+        return self._executor
+
+    # ----- API -----
+    def submit(self, symbol: str, marco: str, **params: Any) -> dict:
+        symbol = symbol.upper()
+        with self._submit_lock(), self._lock:
+            self._load()  # jobs que otros workers hayan lanzado desde la última lectura
+            for job in self._jobs.values():
+                if job["symbol"] == symbol and job["marco"] == marco and job["status"] in ACTIVE:
+                    return dict(self.status(job["job_id"]), deduplicated=True)
+            job_id = uuid.uuid4().hex[:12]
+            call = dict(symbol=symbol, marco=marco, n_jobs=self.n_jobs, **params)
+            job = {"job_id": job_id, "symbol": symbol, "marco": marco, "params": params, "status": "queued",
+                   "stage": "queued", "progress": 0.0, "submitted_at": _now(), "owner": self._owner}
+            self._jobs[job_id] = job
+            self._save(job)
+            future = self._pool().submit(run_train_job, job_id, str(self.jobs_dir), call, self.host_slots)
+            self._futures[job_id] = future
+        future.add_done_callback(lambda fut, jid=job_id: self._finish(jid, fut))
+        return dict(job)
+
+    def _finish(self, job_id: str, future: Future) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            self._futures.pop(job_id, None)
+            job["finished_at"] = _now()
+            if future.cancelled():
+                job.update(status="cancelled", stage="cancelled")
+            else:
+                exc = future.exception()
+                if isinstance(exc, TrainCancelled):
+                    job.update(status="cancelled", stage="cancelled", error=str(exc))
+                elif exc is not None:
+                    job.update(status="failed", error=f"{type(exc).__name__}: {exc}")
+                else:
+                    job.update(status="done", stage="done", progress=1.0, result=future.result())
+            self._save(job)
+            self._cleanup(job_id)
+            if job["status"] == "done":
+                self._save_beside_model(job)
+
+    def _cleanup(self, job_id: str) -> None:
+        for suffix in (".progress.json", ".cancel"):
+            try:
+                (self.jobs_dir / f"{job_id}{suffix}").unlink()
+            except FileNotFoundError:
+                pass
+
+    def _save_beside_model(self, job: dict) -> None:
+        meta_path = ((job.get("result") or {}).get("paths") or {}).get("meta")
+        base = Path(meta_path[: -len(".meta.pkl")]) if meta_path else \
+            self.models_dir / f"ia_model_{job['symbol']}_{job['marco']}"
+        try:
+            _write_json(base.with_name(base.name + ".train.json"), job)
+        except Exception:
+            pass
+
+    def status(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not self._mine(job):
+                # job de otro worker: su estado vivo está en disco
+                job = _read_json(self._job_path(job_id)) or job
+            if not job or not job.get("job_id"):
+                return None
+            out = dict(job)
+        if out["status"] in ACTIVE:
+            live = _read_json(self.jobs_dir / f"{job_id}.progress.json")
+            if live:
+                out.update(stage=live.get("stage"), progress=live.get("progress"), updated_at=live.get("updated_at"))
+                if live.get("stage") not in (None, "waiting_slot"):
+                    out["status"] = "running"
+            if (self.jobs_dir / f"{job_id}.cancel").exists():
+                out["cancel_requested"] = True
+        return out
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[dict]:
+        self._load()
+        with self._lock:
+            ids = sorted(self._jobs, key=lambda jid: self._jobs[jid].get("submitted_at", ""), reverse=True)
+        jobs = [self.status(jid) for jid in ids]
+        if status:
+            jobs = [job for job in jobs if job and job["status"] == status]
+        return jobs[: max(0, int(limit))]
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not self._mine(job):
+                job = _read_json(self._job_path(job_id)) or job
+            if not job or not job.get("job_id"):
+                return None
+            if job["status"] in FINISHED:
+                return dict(job)
+            future = self._futures.get(job_id)
+            if future is not None and future.cancel():
+                return self.status(job_id)
+            (self.jobs_dir / f"{job_id}.cancel").touch()
+        return self.status(job_id)
+
+    def queued(self) -> int:
+        """Jobs sin empezar (incluye los que esperan slot del host)."""
+        with self._lock:
+            active = [jid for jid, job in self._jobs.items() if job["status"] in ACTIVE]
+        return sum(1 for jid in active if (self.status(jid) or {}).get("status") == "queued")
+
+    def metrics(self) -> dict:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"workers": self.workers, "host_slots": self.host_slots, "jobs": counts}
+
+    def shutdown(self, wait: bool = False) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_QUEUE: Optional[TrainJobQueue] = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_job_queue(models_dir: Path | str) -> TrainJobQueue:
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = TrainJobQueue(models_dir)
+            QUEUE_DEPTH.set_function(_QUEUE.queued, worker="ia_train")
+        return _QUEUE
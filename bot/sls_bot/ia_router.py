@@ -1,9 +1,10 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pathlib import Path
 import csv, joblib
 from datetime import datetime, timezone
 from .ia_models import IASignalRequest, IASignalResponse, LearnEvent
 from .ia_signal_engine import decide
+from .ia_jobs import get_job_queue
 from .ia_train import train_model
 
 router = APIRouter(tags=["IA"])
@@ -35,8 +36,32 @@ def ia_status():
             "models_dir": str(MODELS_DIR), "learn_log_path": str(LEARN_CSV)}
 
 @router.post("/train")
-def ia_train_endpoint(simbolo: str, marco: str, thr: float = 0.005, horizon: int = 20, limit: int = 3000):
-    return train_model(simbolo.upper(), marco, thr=thr, horizon=horizon, limit=limit)
+def ia_train_endpoint(simbolo: str, marco: str, thr: float = 0.005, horizon: int = 20, limit: int = 3000,
+                      sync: bool = False):
+    # Por defecto encola el entrenamiento y devuelve el job; `sync=true` conserva el modo bloqueante.
+    if sync:
+        return train_model(simbolo.upper(), marco, thr=thr, horizon=horizon, limit=limit)
+    job = get_job_queue(MODELS_DIR).submit(simbolo, marco, thr=thr, horizon=horizon, limit=limit)
+    return {"ok": True, "job": job}
+
+@router.get("/train/jobs")
+def ia_train_jobs(status: str | None = None, limit: int = 50):
+    queue = get_job_queue(MODELS_DIR)
+    return {"ok": True, "jobs": queue.list(status=status, limit=limit), "queue": queue.metrics()}
+
+@router.get("/train/{job_id}")
+def ia_train_job(job_id: str):
+    job = get_job_queue(MODELS_DIR).status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job no encontrado")
+    return {"ok": True, "job": job}
+
+@router.delete("/train/{job_id}")
+def ia_train_cancel(job_id: str):
+    job = get_job_queue(MODELS_DIR).cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job no encontrado")
+    return {"ok": True, "job": job}
 
 @router.get("/model")
 def ia_model_info(simbolo: str, marco: str):
@@ -3,11 +3,11 @@ from __future__ import annotations
 import os
 from typing import Any, Dict, Optional, Tuple
 
-import joblib
 import numpy as np
 
 from .config_loader import load_config
-from .ia_utils import latest_slice
+from .feature_cache import FeatureCache
+from .ia_utils import compute_indicators, latest_raw
 from .strategies import get_scalping_strategy
 
 _cfg = load_config()
@@ -54,6 +54,18 @@ def _try_scalping(symbol: str, marco: str, riesgo_pct_user: float | None, levera
     engine = get_scalping_strategy(strategy_cfg)
     return engine.decide(symbol=symbol, marco=marco, riesgo_pct_user=riesgo_pct_user, leverage_user=leverage_user)
 
+def _feature_row(symbol: str, marco: str, raw, fallback):
+    """Última fila cerrada de la caché de features (la misma matriz con la que se entrena)."""
+    cache = FeatureCache.from_config(_cfg)
+    if cache is None:
+        return fallback
+    try:
+        cache.update(symbol, marco, raw)
+        row = cache.last_row(symbol, marco)
+    except Exception:
+        row = None
+    return row if row is not None else fallback
+
 def _load_model(symbol: str, marco: str):
     base = os.path.join(_MODELS_DIR, f"ia_model_{symbol.upper()}_{marco}")
     model_p = base + ".pkl"
@@ -61,6 +73,8 @@ def _load_model(symbol: str, marco: str):
     meta_p   = base + ".meta.pkl"
     if not os.path.exists(model_p):
         return None, None, {"trained": False}
+    import joblib  # solo hace falta con modelo entrenado en disco
+
     model  = joblib.load(model_p)
     scaler = joblib.load(scaler_p) if os.path.exists(scaler_p) else None
     meta   = joblib.load(meta_p) if os.path.exists(meta_p) else {}
@@ -83,6 +97,21 @@ def _rule_scores(s) -> Dict[str,float]:
     if atr_bps > 120: long_s *= 0.9; short_s *= 0.9
     return {"long": min(long_s,1.0), "short": min(short_s,1.0)}
 
+def rule_scores_frame(df) -> Dict[str, np.ndarray]:
+    """Versión vectorizada de `_rule_scores` para todas las filas de `df`."""
+    close = df["close"].to_numpy(dtype=float)
+    ema_fast = df["ema_fast"].to_numpy(dtype=float)
+    ema_mid = df["ema_mid"].to_numpy(dtype=float)
+    ema_slow = df["ema_slow"].to_numpy(dtype=float)
+    rsi = df["rsi"].to_numpy(dtype=float)
+    above_vwap = close > df["avwap"].to_numpy(dtype=float)
+    long_s = (0.25 * (close > ema_slow) + 0.15 * ((ema_fast > ema_mid) & (ema_mid > ema_slow))
+              + 0.20 * (rsi >= 55) + 0.15 * above_vwap + 0.15 * (df["breakout_up"].to_numpy() == 1))
+    short_s = (0.25 * (close < ema_slow) + 0.15 * ((ema_fast < ema_mid) & (ema_mid < ema_slow))
+               + 0.20 * (rsi <= 45) + 0.15 * ~above_vwap + 0.15 * (df["breakout_dn"].to_numpy() == 1))
+    damp = np.where(df["atr"].to_numpy(dtype=float) / close * 10000.0 > 120, 0.9, 1.0)
+    return {"long": np.minimum(long_s * damp, 1.0), "short": np.minimum(short_s * damp, 1.0)}
+
 def decide(symbol: str, marco: str, riesgo_pct_user: float | None = None, leverage_user: int | None = None
           ) -> Tuple[Dict[str,Any], Dict[str,Any], Dict[str,Any]]:
     ia_cfg = _cfg.get("ia", {}); bybit_cfg = _cfg.get("bybit", {})
@@ -113,14 +142,17 @@ def decide(symbol: str, marco: str, riesgo_pct_user: float | None = None, levera
         payload["strategy_meta"] = scalping_result.metadata
         return payload, evid, meta_out
 
-    df, s = latest_slice(symbol, marco)
+    raw = latest_raw(symbol, marco)
+    df = compute_indicators(raw)
+    s = df.iloc[-1]
     scores = _rule_scores(s)
     rules_long, rules_short = scores["long"], scores["short"]
 
     model, scaler, meta = _load_model(symbol, marco)
     proba_up = None
     if meta.get("trained"):
-        x = np.array([[float(s.get(k, np.nan)) for k in _FEATURES]], dtype=float)
+        feats = _feature_row(symbol, marco, raw, s)
+        x = np.array([[float(feats.get(k, np.nan)) for k in _FEATURES]], dtype=float)
         if scaler is not None:
             try: x = scaler.transform(x)
             except Exception: pass
@@ -1,19 +1,13 @@
 from __future__ import annotations
-import os, joblib, numpy as np, pandas as pd
-from typing import Dict, Any
+import os, time, joblib, numpy as np, pandas as pd
+from typing import Callable, Dict, Any, Optional
 
-try:
-    from xgboost import XGBClassifier
-    _HAS_XGB = True
-except Exception:
-    _HAS_XGB = False
+# sklearn/xgboost (~1 s de import) solo se cargan al entrenar: ia_jobs/ia_router importan este
+# módulo en el arranque de la API y no deben pagarlo.
 
-from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import roc_auc_score, accuracy_score
-from sklearn.model_selection import train_test_split
-
-from .ia_utils import fetch_ohlc, compute_indicators
+from .ia_utils import _BASE_URL, fetch_ohlc, compute_indicators, _cfg
+from .feature_cache import FeatureCache
+from .kline_store import KlineStore, bybit_fetch_page, interval_ms
 
 _MODELS_DIR = "/opt/sls_bot/models"
 _FEATURES = ["rsi","atr","range_pct","ema_diff_bps","dist_to_avwap_bps","dist_to_ema200_bps",
@@ -23,20 +17,80 @@ def _future_return(df: pd.DataFrame, horizon: int) -> pd.Series:
     fwd = df["close"].shift(-horizon)
     return (fwd - df["close"]) / df["close"]
 
+def _load_raw(symbol: str, marco: str, rows: int, now_ms: Optional[int] = None) -> pd.DataFrame:
+    # Con el almacén local se entrena sin el tope de 1000 velas del REST. Solo lo rellena
+    # kline_store_cli, así que antes de leer se completa la cola hasta la última vela cerrada;
+    # si no se puede (sin red), REST como antes en vez de entrenar con datos viejos.
+    store = KlineStore.from_config(_cfg)
+    if store is None or not store.has(symbol, marco):
+        return fetch_ohlc(symbol, marco, limit=rows)
+    step = interval_ms(marco)
+    now_ms = int(time.time() * 1000) if now_ms is None else int(now_ms)
+    last_closed = (now_ms // step) * step - step
+    _, ts_max = store.coverage(symbol, marco)
+    if ts_max < last_closed:
+        # como mucho `rows` velas: un hueco más antiguo queda en store.gaps() para `repair`
+        start = max(ts_max + step, last_closed - (rows - 1) * step)
+        try:
+            store.download(symbol, marco, start, last_closed, bybit_fetch_page(_BASE_URL))
+        except Exception:
+            pass
+        _, ts_max = store.coverage(symbol, marco)
+        if ts_max < last_closed:
+            return fetch_ohlc(symbol, marco, limit=rows)
+    return store.tail(symbol, marco, rows)
+
+def _features(symbol: str, marco: str, rows: int) -> pd.DataFrame:
+    # Con caché de features solo se calculan indicadores para las velas nuevas.
+    raw = _load_raw(symbol, marco, rows)
+    cache = FeatureCache.from_config(_cfg)
+    if cache is None:
+        return compute_indicators(raw)
+    try:
+        cache.update(symbol, marco, raw)
+        df = cache.tail(symbol, marco, rows)
+    except Exception:
+        df = None
+    return df if df is not None and not df.empty else compute_indicators(raw)
+
 def _prep_dataset(symbol: str, marco: str, thr: float, horizon: int, limit: int) -> pd.DataFrame:
-    raw = fetch_ohlc(symbol, marco, limit=limit+500)
-    df = compute_indicators(raw)
+    df = _features(symbol, marco, limit+500)
     df["fret"] = _future_return(df, horizon=horizon)
     df["y_up"] = (df["fret"] > thr).astype(int)
     df = df.dropna().reset_index(drop=True)
     return df
 
-def train_model(symbol: str, marco: str, thr: float = 0.005, horizon: int = 20, limit: int = 3000) -> Dict[str, Any]:
+def _build_model(n_jobs: int = 2):
+    try:
+        from xgboost import XGBClassifier
+    except Exception:
+        from sklearn.linear_model import LogisticRegression
+
+        return LogisticRegression(max_iter=200)
+    return XGBClassifier(
+        n_estimators=300, max_depth=3, learning_rate=0.05,
+        subsample=0.8, colsample_bytree=0.8, reg_lambda=1.0,
+        n_jobs=n_jobs, random_state=42
+    )
+
+def _predict_proba(model, X) -> np.ndarray:
+    return model.predict_proba(X)[:,1] if hasattr(model,"predict_proba") \
+        else 1.0/(1.0+np.exp(-model.decision_function(X)))
+
+def train_model(symbol: str, marco: str, thr: float = 0.005, horizon: int = 20, limit: int = 3000,
+                n_jobs: int = 2, progress: Optional[Callable[[str, float], None]] = None) -> Dict[str, Any]:
+    # `progress(etapa, fraccion)` lo usa la cola de ia_jobs; puede lanzar excepción para cancelar.
+    report = progress or (lambda stage, frac: None)
     os.makedirs(_MODELS_DIR, exist_ok=True)
+    report("dataset", 0.05)
     df = _prep_dataset(symbol, marco, thr, horizon, limit)
     if len(df) < 500:
         raise RuntimeError(f"Datos insuficientes para entrenar: {len(df)}")
 
+    from sklearn.metrics import accuracy_score, roc_auc_score
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
     X = df[_FEATURES].astype(float).values
     y = df["y_up"].astype(int).values
 
@@ -46,23 +100,16 @@ def train_model(symbol: str, marco: str, thr: float = 0.005, horizon: int = 20,
     X_train_s = scaler.fit_transform(X_train)
     X_test_s  = scaler.transform(X_test)
 
-    if _HAS_XGB:
-        model = XGBClassifier(
-            n_estimators=300, max_depth=3, learning_rate=0.05,
-            subsample=0.8, colsample_bytree=0.8, reg_lambda=1.0,
-            n_jobs=2, random_state=42
-        )
-        model.fit(X_train_s, y_train)
-    else:
-        model = LogisticRegression(max_iter=200)
-        model.fit(X_train_s, y_train)
-
-    proba = model.predict_proba(X_test_s)[:,1] if hasattr(model,"predict_proba") \
-            else 1.0/(1.0+np.exp(-model.decision_function(X_test_s)))
+    report("fit", 0.4)
+    model = _build_model(n_jobs=n_jobs)
+    model.fit(X_train_s, y_train)
+    report("evaluate", 0.85)
+    proba = _predict_proba(model, X_test_s)
 
     auc = float(roc_auc_score(y_test, proba))
     acc = float(accuracy_score(y_test, (proba>=0.5).astype(int)))
 
+    report("save", 0.95)
     base = os.path.join(_MODELS_DIR, f"ia_model_{symbol.upper()}_{marco}")
     joblib.dump(model,  base + ".pkl")
     joblib.dump(scaler, base + ".scaler.pkl")
@@ -1,10 +1,15 @@
 from __future__ import annotations
+import os, threading
 import requests, pandas as pd, numpy as np
 from .config_loader import load_config
+from .kline_store import bybit_fetch_page
+from .resampler import Resampler
 
 _cfg = load_config()
 _BASE_URL = _cfg["bybit"]["base_url"].rstrip("/")
 _ORDERBOOK_LIMIT = 200
+# Subir cuando cambie compute_indicators: invalida las matrices de feature_cache.
+INDICATOR_VERSION = 1
 
 def _map_interval(marco: str) -> str:
     s = str(marco).lower().strip()
@@ -74,8 +79,37 @@ def compute_indicators(df: pd.DataFrame) -> pd.DataFrame:
     df["slope_ema_fast"] = df["ema_fast"].diff()
     return df.replace([np.inf,-np.inf], np.nan).dropna().reset_index(drop=True)
 
+_MARKET_CFG = _cfg.get("market_data") or {}
+_RESAMPLER: Resampler | None = None
+_RESAMPLER_LOCK = threading.Lock()
+
+def _resample_enabled() -> bool:
+    raw = os.getenv("SLS_RESAMPLE_FROM_1M")
+    if raw is not None:
+        return raw.strip().lower() in ("1", "true", "yes", "on")
+    return bool(_MARKET_CFG.get("resample_from_1m", True))
+
+def get_resampler() -> Resampler:
+    """Buffer de 1m compartido del que se derivan el resto de timeframes."""
+    global _RESAMPLER
+    with _RESAMPLER_LOCK:
+        if _RESAMPLER is None:
+            _RESAMPLER = Resampler(
+                lambda symbol, limit: fetch_ohlc(symbol, "1m", limit=limit),
+                bybit_fetch_page(_BASE_URL),
+                capacity_minutes=int(os.getenv("SLS_RESAMPLE_BUFFER_MINUTES", _MARKET_CFG.get("buffer_minutes", 10080))),
+                min_refresh_s=float(os.getenv("SLS_RESAMPLE_REFRESH_SECONDS", _MARKET_CFG.get("min_refresh_seconds", 2.0))),
+            )
+        return _RESAMPLER
+
+def latest_raw(symbol: str, marco: str, limit: int = 600) -> pd.DataFrame:
+    raw = get_resampler().raw_slice(symbol, marco, limit) if _resample_enabled() else None
+    if raw is None:
+        raw = fetch_ohlc(symbol, marco, limit=limit)
+    return raw
+
 def latest_slice(symbol: str, marco: str, limit: int = 600):
-    raw = fetch_ohlc(symbol, marco, limit=limit)
+    raw = latest_raw(symbol, marco, limit)
     df = compute_indicators(raw)
     return df, df.iloc[-1]
 
@@ -0,0 +1,199 @@
+"""
+Evaluación walk-forward de los modelos de `ia_train`.
+
+Sobre el histórico local (almacén de klines o REST) se calculan una vez los
+indicadores, las features, las etiquetas y los scores de reglas, y se guardan
+como `.npy` en un directorio de caché. Cada fold entrena un modelo nuevo en
+una ventana móvil (o creciente), deja `horizon` velas de purga antes del test
+para que las etiquetas no se solapen, y devuelve AUC, accuracy y el PnL
+simulado del ensemble reglas + ML que usa `ia_signal_engine.decide`. Los folds
+corren en paralelo en procesos separados y leen las matrices con `mmap`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.preprocessing import StandardScaler
+
+from .ia_signal_engine import rule_scores_frame
+from .ia_train import _FEATURES, _build_model, _future_return, _load_raw, _predict_proba
+from .ia_utils import compute_indicators
+
+_ARRAYS = ("X", "y", "fret", "rules_long", "rules_short", "ts")
+
+
+def fold_windows(n: int, train_size: int, test_size: int, *, step: Optional[int] = None,
+                 purge: int = 0, expanding: bool = False) -> List[Tuple[int, int, int, int]]:
+    """Ventanas (train_lo, train_hi, test_lo, test_hi) con `purge` velas entre train y test."""
+    step = int(step or test_size)
+    folds = []
+    start = 0
+    while True:
+        train_lo = 0 if expanding else start
+        train_hi = start + train_size
+        test_lo = train_hi + purge
+        test_hi = test_lo + test_size
+        if test_hi > n:
+            break
+        folds.append((train_lo, train_hi, test_lo, test_hi))
+        start += step
+    return folds
+
+
+def build_matrices(raw: pd.DataFrame, thr: float, horizon: int) -> Dict[str, np.ndarray]:
+    df = compute_indicators(raw)
+    df["fret"] = _future_return(df, horizon=horizon)
+    df["y_up"] = (df["fret"] > thr).astype(int)
+    df = df.dropna().reset_index(drop=True)
+    rules = rule_scores_frame(df)
+    return {
+        "X": df[_FEATURES].to_numpy(dtype=np.float64),
+        "y": df["y_up"].to_numpy(dtype=np.int8),
+        "fret": df["fret"].to_numpy(dtype=np.float64),
+        "rules_long": rules["long"],
+        "rules_short": rules["short"],
+        "ts": df["ts"].to_numpy(dtype=np.int64),
+    }
+
+
+def cache_matrices(raw: pd.DataFrame, cache_root: Path, key: Dict[str, Any], thr: float, horizon: int) -> Path:
+    """Guarda (o reutiliza) las matrices del rango en `cache_root/<hash>/`."""
+    key = dict(key, ts0=int(raw["ts"].iloc[0]), ts1=int(raw["ts"].iloc[-1]), rows=len(raw), thr=thr, horizon=horizon)
+    digest = hashlib.sha1(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    target = Path(cache_root) / digest
+    if all((target / f"{name}.npy").exists() for name in _ARRAYS):
+        return target
+    target.mkdir(parents=True, exist_ok=True)
+    for name, values in build_matrices(raw, thr, horizon).items():
+        tmp = target / f".{name}.tmp.npy"
+        np.save(tmp, values)
+        os.replace(tmp, target / f"{name}.npy")
+    (target / "key.json").write_text(json.dumps(key, indent=2), encoding="utf-8")
+    return target
+
+
+def simulate_ensemble(proba: np.ndarray, rules_long: np.ndarray, rules_short: np.ndarray, fret: np.ndarray,
+                      horizon: int, thr_enter: float, fee_bps: float, w_rules: float = 0.6,
+                      w_ml: float = 0.4) -> Dict[str, float]:
+    """PnL de entrar cuando el ensemble de `decide` supera `thr_enter`, sin solapar posiciones."""
+    long_w = w_rules * rules_long + w_ml * proba
+    short_w = w_rules * rules_short + w_ml * (1.0 - proba)
+    conf = np.maximum(long_w, short_w)
+    side = np.where(long_w >= short_w, 1.0, -1.0)
+    candidates = np.flatnonzero(conf >= thr_enter)
+    fee = fee_bps / 10000.0
+    returns = []
+    next_free = 0
+    for i in candidates.tolist():
+        if i < next_free:
+            continue
+        returns.append(side[i] * fret[i] - fee)
+        next_free = i + horizon
+    arr = np.asarray(returns, dtype=np.float64)
+    return {
+        "trades": int(len(arr)),
+        "win_rate": round(float((arr > 0).mean()), 4) if len(arr) else 0.0,
+        "pnl_pct": round(float(arr.sum() * 100.0), 4),
+        "avg_trade_bps": round(float(arr.mean() * 10000.0), 2) if len(arr) else 0.0,
+    }
+
+
+def _run_fold(cache_dir: str, fold: Tuple[int, int, int, int], params: Dict[str, Any]) -> Dict[str, Any]:
+    arrays = {name: np.load(Path(cache_dir) / f"{name}.npy", mmap_mode="r") for name in _ARRAYS}
+    train_lo, train_hi, test_lo, test_hi = fold
+    X_train, y_train = arrays["X"][train_lo:train_hi], arrays["y"][train_lo:train_hi]
+    X_test, y_test = arrays["X"][test_lo:test_hi], arrays["y"][test_lo:test_hi]
+    out: Dict[str, Any] = {
+        "fold": params["index"],
+        "train": [int(arrays["ts"][train_lo]), int(arrays["ts"][train_hi - 1])],
+        "test": [int(arrays["ts"][test_lo]), int(arrays["ts"][test_hi - 1])],
+        "n_train": int(len(y_train)),
+        "n_test": int(len(y_test)),
+    }
+    if len(np.unique(y_train)) < 2:
+        out["error"] = "train con una sola clase"
+        return out
+    scaler = StandardScaler()
+    model = _build_model(n_jobs=params["n_jobs"])
+    model.fit(scaler.fit_transform(X_train), y_train)
+    proba = _predict_proba(model, scaler.transform(X_test))
+    out["auc"] = round(float(roc_auc_score(y_test, proba)), 4) if len(np.unique(y_test)) > 1 else None
+    out["accuracy"] = round(float(accuracy_score(y_test, (proba >= 0.5).astype(int))), 4)
+    sim_args = dict(horizon=params["horizon"], thr_enter=params["thr_enter"], fee_bps=params["fee_bps"])
+    rules_long = arrays["rules_long"][test_lo:test_hi]
+    rules_short = arrays["rules_short"][test_lo:test_hi]
+    fret = arrays["fret"][test_lo:test_hi]
+    out["ensemble"] = simulate_ensemble(proba, rules_long, rules_short, fret, **sim_args)
+    out["rules_only"] = simulate_ensemble(np.full(len(fret), 0.5), rules_long, rules_short, fret,
+                                          w_rules=1.0, w_ml=0.0, **sim_args)
+    return out
+
+
+def summarize_folds(folds: List[Dict[str, Any]]) -> Dict[str, Any]:
+    valid = [f for f in folds if "error" not in f]
+    aucs = [f["auc"] for f in valid if f.get("auc") is not None]
+    summary: Dict[str, Any] = {"folds": len(folds), "valid_folds": len(valid)}
+    if aucs:
+        summary.update(auc_mean=round(float(np.mean(aucs)), 4), auc_std=round(float(np.std(aucs)), 4),
+                       auc_min=round(float(np.min(aucs)), 4))
+    if valid:
+        summary["accuracy_mean"] = round(float(np.mean([f["accuracy"] for f in valid])), 4)
+        for key in ("ensemble", "rules_only"):
+            summary[key] = {
+                "trades": int(sum(f[key]["trades"] for f in valid)),
+                "pnl_pct": round(float(sum(f[key]["pnl_pct"] for f in valid)), 4),
+                "positive_folds": int(sum(1 for f in valid if f[key]["pnl_pct"] > 0)),
+            }
+    return summary
+
+
+def walk_forward(
+    symbol: str,
+    marco: str,
+    *,
+    rows: int = 20_000,
+    train_size: int = 3_000,
+    test_size: int = 500,
+    step: Optional[int] = None,
+    expanding: bool = False,
+    thr: float = 0.005,
+    horizon: int = 20,
+    thr_enter: float = 0.60,
+    fee_bps: float = 6.0,
+    workers: int = 2,
+    cache_root: Path | str = "/tmp/sls_walkforward",
+    raw: Optional[pd.DataFrame] = None,
+) -> Dict[str, Any]:
+    """Re-entrena por ventanas sobre el histórico local y evalúa cada fold fuera de muestra."""
+    raw = raw if raw is not None else _load_raw(symbol, marco, rows)
+    cache_dir = cache_matrices(raw, Path(cache_root), {"symbol": symbol.upper(), "marco": marco}, thr, horizon)
+    n = len(np.load(cache_dir / "y.npy", mmap_mode="r"))
+    windows = fold_windows(n, train_size, test_size, step=step, purge=horizon, expanding=expanding)
+    if not windows:
+        raise RuntimeError(f"Datos insuficientes para walk-forward: {n} filas")
+    workers = max(1, int(workers))
+    base = {"horizon": horizon, "thr_enter": thr_enter, "fee_bps": fee_bps, "n_jobs": 1 if workers > 1 else 2}
+    specs = [(str(cache_dir), fold, dict(base, index=i)) for i, fold in enumerate(windows)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            folds = list(pool.map(_run_fold, *zip(*specs)))
+    else:
+        folds = [_run_fold(*spec) for spec in specs]
+    return {
+        "symbol": symbol.upper(),
+        "marco": marco,
+        "params": {"rows": n, "train_size": train_size, "test_size": test_size, "step": step or test_size,
+                   "expanding": expanding, "thr": thr, "horizon": horizon, "thr_enter": thr_enter, "fee_bps": fee_bps},
+        "cache_dir": str(cache_dir),
+        "folds": folds,
+        "summary": summarize_folds(folds),
+    }
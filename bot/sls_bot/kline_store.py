@@ -0,0 +1,367 @@
+"""
+Almacén local de klines históricas en columnas NumPy mapeadas en memoria.
+
+Estructura en disco::
+
+    <root>/<SYMBOL>/<interval>/manifest.json
+    <root>/<SYMBOL>/<interval>/<YYYY-MM>.<sufijo>/{ts,open,high,low,close,volume,turnover}.npy
+
+- El descargador pagina `/v5/market/kline` hacia atrás (1000 velas por
+  petición) y fusiona cada mes de forma atómica: las columnas fusionadas van a
+  un directorio nuevo y el manifest (campo `dir`) es el punto de commit; el
+  directorio anterior se borra después. Un corte a mitad deja como mucho un
+  directorio huérfano, nunca columnas de longitudes distintas.
+- Cada `write()` (leer, fusionar, commit y borrar) se hace con `flock` sobre
+  `<SYMBOL>/<interval>/.lock`: la CLI y el top-up de `/ia/train` pueden
+  escribir la misma serie a la vez sin borrarse directorios entre sí.
+- El manifest guarda filas, rango y huecos de cada mes; `gaps()` y
+  `repair()` detectan y rellenan velas faltantes.
+- `read()`/`tail()` mapean solo los meses del rango pedido (`mmap_mode="r"`)
+  y devuelven el mismo formato que `ia_utils.fetch_ohlc`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:  # pragma: no cover - solo POSIX
+    import fcntl
+except Exception:  # pragma: no cover
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+COLUMNS: Tuple[str, ...] = ("ts", "open", "high", "low", "close", "volume", "turnover")
+PAGE_LIMIT = 1000
+
+FetchPage = Callable[[str, str, int, int, int], pd.DataFrame]
+
+
+def interval_ms(interval: str) -> int:
+    s = str(interval).lower().strip()
+    if s.endswith("m"):
+        return int(s[:-1]) * 60_000
+    if s.endswith("h"):
+        return int(s[:-1]) * 3_600_000
+    if s in ("1d", "d", "day"):
+        return 86_400_000
+    if s in ("1w", "w", "week"):
+        return 7 * 86_400_000
+    raise ValueError(f"intervalo no soportado: {interval}")
+
+
+def bybit_interval(interval: str) -> str:
+    step = interval_ms(interval)
+    if step >= 7 * 86_400_000:
+        return "W"
+    if step >= 86_400_000:
+        return "D"
+    return str(step // 60_000)
+
+
+def to_ms(value) -> Optional[int]:
+    """Acepta epoch (s/ms), ISO-8601 o fechas `YYYY-MM-DD` (UTC)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        num = float(value)
+        return int(num if num > 1e11 else num * 1000)
+    text = str(value).strip()
+    try:
+        return to_ms(float(text))
+    except ValueError:
+        pass
+    dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def month_key(ts_ms: int) -> str:
+    return datetime.fromtimestamp(int(ts_ms) / 1000, tz=timezone.utc).strftime("%Y-%m")
+
+
+def find_gaps(ts: np.ndarray, step_ms: int) -> List[List[int]]:
+    """Huecos internos como pares [primera_vela_faltante, última_vela_faltante]."""
+    if len(ts) < 2:
+        return []
+    diffs = np.diff(ts)
+    idx = np.nonzero(diffs > step_ms)[0]
+    return [[int(ts[i] + step_ms), int(ts[i + 1] - step_ms)] for i in idx]
+
+
+def iter_pages(fetch_page: FetchPage, symbol: str, interval: str, start_ms: int, end_ms: int,
+               limit: int = PAGE_LIMIT) -> Iterator[pd.DataFrame]:
+    """Pagina hacia atrás desde `end_ms` hasta `start_ms` (Bybit devuelve lo más reciente primero)."""
+    step = interval_ms(interval)
+    cursor = int(end_ms)
+    while cursor >= start_ms:
+        page = fetch_page(symbol, interval, int(start_ms), cursor, limit)
+        if page is None or page.empty:
+            return
+        page = page[(page["ts"] >= start_ms) & (page["ts"] <= cursor)]
+        if page.empty:
+            return
+        yield page
+        oldest = int(page["ts"].min())
+        if oldest <= start_ms:
+            return
+        cursor = oldest - step
+
+
+def bybit_fetch_page(base_url: str, timeout: float = 12.0) -> FetchPage:
+    """Crea un `fetch_page(symbol, interval, start_ms, end_ms, limit)` contra la API pública."""
+    import requests
+
+    url = f"{base_url.rstrip('/')}/v5/market/kline"
+
+    def _fetch(symbol: str, interval: str, start_ms: int, end_ms: int, limit: int) -> pd.DataFrame:
+        params = {
+            "category": "linear",
+            "symbol": symbol.upper(),
+            "interval": bybit_interval(interval),
+            "start": int(start_ms),
+            "end": int(end_ms),
+            "limit": min(PAGE_LIMIT, int(limit)),
+        }
+        resp = requests.get(url, params=params, timeout=timeout)
+        resp.raise_for_status()
+        data = resp.json()
+        if data.get("retCode") != 0:
+            raise RuntimeError(data)
+        rows = (data.get("result") or {}).get("list") or []
+        df = pd.DataFrame(rows, columns=["ts", "open", "high", "low", "close", "volume", "turnover"])
+        return df.apply(pd.to_numeric, errors="coerce")
+
+    return _fetch
+
+
+class KlineStore:
+    def __init__(self, root: Path | str):
+        self.root = Path(root)
+
+    @classmethod
+    def from_config(cls, cfg: Optional[dict] = None) -> Optional["KlineStore"]:
+        """Usa SLS_KLINE_STORE o `paths.klines_dir`; None si no está configurado."""
+        root = os.getenv("SLS_KLINE_STORE") or ((cfg or {}).get("paths") or {}).get("klines_dir")
+        return cls(root) if root else None
+
+    # ----- rutas / manifest -----
+    def series_dir(self, symbol: str, interval: str) -> Path:
+        return self.root / symbol.upper() / str(interval).lower()
+
+    def _manifest_path(self, symbol: str, interval: str) -> Path:
+        return self.series_dir(symbol, interval) / "manifest.json"
+
+    def manifest(self, symbol: str, interval: str) -> dict:
+        path = self._manifest_path(symbol, interval)
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            return {"symbol": symbol.upper(), "interval": str(interval).lower(), "months": {}}
+
+    def _write_manifest(self, symbol: str, interval: str, manifest: dict) -> None:
+        path = self._manifest_path(symbol, interval)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".manifest.")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+
+    def has(self, symbol: str, interval: str) -> bool:
+        return bool(self.manifest(symbol, interval).get("months"))
+
+    def coverage(self, symbol: str, interval: str) -> Optional[Tuple[int, int]]:
+        months = self.manifest(symbol, interval).get("months") or {}
+        if not months:
+            return None
+        return (min(m["ts_min"] for m in months.values()), max(m["ts_max"] for m in months.values()))
+
+    @contextmanager
+    def _series_lock(self, symbol: str, interval: str) -> Iterator[None]:
+        """Lock exclusivo entre procesos (y hilos: cada uno abre su descriptor) de una serie."""
+        path = self.series_dir(symbol, interval) / ".lock"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a+") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+    def _month_dir(self, symbol: str, interval: str, key: str, meta: Optional[dict]) -> Path:
+        # meses escritos antes del campo `dir` viven en <YYYY-MM>/
+        return self.series_dir(symbol, interval) / ((meta or {}).get("dir") or key)
+
+    # ----- escritura -----
+    def _load_month(self, month_dir: Path, mmap: bool = False, rows: Optional[int] = None) -> Dict[str, np.ndarray]:
+        mode = "r" if mmap else None
+        missing = [col for col in COLUMNS if not (month_dir / f"{col}.npy").exists()]
+        if rows and missing:
+            # el manifest dice que hay filas: fusionar sobre {} perdería el mes entero
+            raise RuntimeError(f"faltan columnas {missing} en {month_dir} (manifest {rows} filas); "
+                               "vuelve a descargarlo")
+        data = {col: np.load(month_dir / f"{col}.npy", mmap_mode=mode) for col in COLUMNS
+                if (month_dir / f"{col}.npy").exists()}
+        lengths = {len(arr) for arr in data.values()}
+        if len(lengths) > 1 or (rows is not None and data and lengths != {rows}):
+            raise RuntimeError(f"mes inconsistente en {month_dir} (filas {sorted(lengths)}, manifest {rows}); "
+                               "vuelve a descargarlo")
+        return data
+
+    def write(self, symbol: str, interval: str, df: pd.DataFrame) -> int:
+        """Fusiona velas nuevas (deduplicadas por ts) en los meses afectados."""
+        if df is None or df.empty:
+            return 0
+        step = interval_ms(interval)
+        frame = df.copy()
+        for col in COLUMNS:
+            if col not in frame.columns:
+                frame[col] = 0.0 if col == "turnover" else np.nan
+        frame = frame[list(COLUMNS)].dropna(subset=["ts", "close"])
+        frame["ts"] = frame["ts"].astype(np.int64)
+        frame["month"] = [month_key(ts) for ts in frame["ts"].to_numpy()]
+        with self._series_lock(symbol, interval):
+            return self._write_locked(symbol, interval, frame, step)
+
+    def _write_locked(self, symbol: str, interval: str, frame: pd.DataFrame, step: int) -> int:
+        manifest = self.manifest(symbol, interval)
+        months = manifest.setdefault("months", {})
+        written = 0
+        replaced: List[Path] = []
+        for key, chunk in frame.groupby("month", sort=True):
+            previous = months.get(key)
+            month_dir = self._month_dir(symbol, interval, key, previous)
+            current = self._load_month(month_dir, rows=(previous or {}).get("rows")) if previous else {}
+            if current.get("ts") is not None and len(current["ts"]):
+                merged = pd.concat([pd.DataFrame(current), chunk[list(COLUMNS)]], ignore_index=True)
+            else:
+                merged = chunk[list(COLUMNS)]
+            merged = merged.drop_duplicates("ts", keep="last").sort_values("ts")
+            month_dir.parent.mkdir(parents=True, exist_ok=True)
+            new_dir = Path(tempfile.mkdtemp(dir=month_dir.parent, prefix=f"{key}."))
+            for col in COLUMNS:
+                dtype = np.int64 if col == "ts" else np.float64
+                np.save(new_dir / f"{col}.npy", merged[col].to_numpy(dtype=dtype))
+            if previous and month_dir.exists():
+                replaced.append(month_dir)
+            ts = merged["ts"].to_numpy(dtype=np.int64)
+            months[key] = {
+                "dir": new_dir.name,
+                "rows": int(len(ts)),
+                "ts_min": int(ts[0]),
+                "ts_max": int(ts[-1]),
+                "gaps": find_gaps(ts, step),
+                "updated_at": int(time.time()),
+            }
+            written += len(chunk)
+        self._write_manifest(symbol, interval, manifest)  # commit: a partir de aquí se leen los nuevos
+        for old in replaced:
+            shutil.rmtree(old, ignore_errors=True)
+        return written
+
+    # ----- descarga / huecos -----
+    def download(self, symbol: str, interval: str, start_ms: int, end_ms: int,
+                 fetch_page: FetchPage, limit: int = PAGE_LIMIT) -> int:
+        """Descarga `[start_ms, end_ms]` y persiste cada página según llega."""
+        return sum(self.write(symbol, interval, page)
+                   for page in iter_pages(fetch_page, symbol, interval, start_ms, end_ms, limit))
+
+    def gaps(self, symbol: str, interval: str, start_ms: Optional[int] = None,
+             end_ms: Optional[int] = None) -> List[List[int]]:
+        """Huecos (internos, entre meses y en los extremos del rango pedido)."""
+        step = interval_ms(interval)
+        months = self.manifest(symbol, interval).get("months") or {}
+        if not months:
+            return [[int(start_ms), int(end_ms)]] if start_ms is not None and end_ms is not None else []
+        ordered = [months[k] for k in sorted(months)]
+        out: List[List[int]] = []
+        lo = ordered[0]["ts_min"] if start_ms is None else int(start_ms)
+        hi = ordered[-1]["ts_max"] if end_ms is None else int(end_ms)
+        if ordered[0]["ts_min"] > lo:
+            out.append([lo, ordered[0]["ts_min"] - step])
+        prev_max = None
+        for meta in ordered:
+            if prev_max is not None and meta["ts_min"] - prev_max > step:
+                out.append([prev_max + step, meta["ts_min"] - step])
+            out.extend(list(gap) for gap in meta.get("gaps") or [])
+            prev_max = meta["ts_max"]
+        last = (hi // step) * step
+        if prev_max is not None and last > prev_max:
+            out.append([prev_max + step, last])
+        return [[max(a, lo), min(b, hi)] for a, b in out if b >= lo and a <= hi and b >= a]
+
+    def repair(self, symbol: str, interval: str, fetch_page: FetchPage, start_ms: Optional[int] = None,
+               end_ms: Optional[int] = None) -> List[List[int]]:
+        """Vuelve a descargar cada hueco; devuelve los que siguen abiertos (p.ej. mantenimiento)."""
+        for gap_start, gap_end in self.gaps(symbol, interval, start_ms, end_ms):
+            self.download(symbol, interval, gap_start, gap_end, fetch_page)
+        return self.gaps(symbol, interval, start_ms, end_ms)
+
+    # ----- lectura -----
+    def _months(self, symbol: str, interval: str, start_ms: Optional[int],
+                end_ms: Optional[int]) -> List[Tuple[Path, dict]]:
+        months = self.manifest(symbol, interval).get("months") or {}
+        out = []
+        for key in sorted(months):
+            meta = months[key]
+            if start_ms is not None and meta["ts_max"] < start_ms:
+                continue
+            if end_ms is not None and meta["ts_min"] > end_ms:
+                continue
+            out.append((self._month_dir(symbol, interval, key, meta), meta))
+        return out
+
+    def _frame(self, parts: Sequence[Dict[str, np.ndarray]], columns: Sequence[str]) -> pd.DataFrame:
+        if not parts:
+            return pd.DataFrame({col: np.array([], dtype=np.int64 if col == "ts" else np.float64) for col in columns})
+        if len(parts) == 1:
+            data = {col: parts[0][col] for col in columns}
+        else:
+            data = {col: np.concatenate([p[col] for p in parts]) for col in columns}
+        df = pd.DataFrame(data, copy=False)
+        if {"high", "low", "close"}.issubset(df.columns):
+            df["typical"] = (df["high"] + df["low"] + df["close"]) / 3.0
+        return df
+
+    def read(self, symbol: str, interval: str, start_ms: Optional[int] = None, end_ms: Optional[int] = None,
+             columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        cols = list(columns or COLUMNS)
+        if "ts" not in cols:
+            cols.insert(0, "ts")
+        parts = []
+        for month_dir, meta in self._months(symbol, interval, start_ms, end_ms):
+            month = self._load_month(month_dir, mmap=True, rows=meta.get("rows"))
+            ts = month["ts"]
+            lo = 0 if start_ms is None else int(np.searchsorted(ts, start_ms, side="left"))
+            hi = len(ts) if end_ms is None else int(np.searchsorted(ts, end_ms, side="right"))
+            if hi > lo:
+                parts.append({col: month[col][lo:hi] for col in cols})
+        return self._frame(parts, cols)
+
+    def tail(self, symbol: str, interval: str, rows: int, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Últimas `rows` velas, mapeando solo los meses necesarios."""
+        cols = list(columns or COLUMNS)
+        if "ts" not in cols:
+            cols.insert(0, "ts")
+        parts: List[Dict[str, np.ndarray]] = []
+        remaining = int(rows)
+        for month_dir, meta in reversed(self._months(symbol, interval, None, None)):
+            if remaining <= 0:
+                break
+            month = self._load_month(month_dir, mmap=True, rows=meta.get("rows"))
+            take = min(remaining, len(month["ts"]))
+            parts.insert(0, {col: month[col][len(month["ts"]) - take:] for col in cols})
+            remaining -= take
+        return self._frame(parts, cols)
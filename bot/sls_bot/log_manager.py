@@ -0,0 +1,563 @@
+"""Gestión de logs JSONL/texto con buffer compartido y rotación a segmentos comprimidos.
+
+Cada log vivo (`logs/pnl.jsonl`, `logs/bridge.log`...) rota por tamaño o por
+cambio de día UTC hacia `<log>.segments/`, donde cada segmento se guarda en
+gzip y queda registrado en `manifest.json` con su rango de timestamps. Los
+lectores usan ese manifiesto para abrir solo los segmentos que se solapan con
+la ventana pedida.
+
+La escritura es thread-safe: cada log mantiene su handle abierto, acumula
+líneas en memoria y las vuelca al superar `flush_bytes` o cada
+`flush_seconds` (un hilo flusher compartido). Los registros críticos
+(auditoría) pueden pedir `sync=True` para volcar y hacer fsync al instante.
+
+Varios procesos (bot, API de control, Cerebro, daemon) escriben los mismos
+logs, así que rotación + manifiesto van bajo `flock` exclusivo sobre
+`<log>.segments/.lock` y cada volcado toma el mismo lock en modo compartido:
+nadie escribe en un archivo que otro está comprimiendo, y quien llega tarde a
+rotar ve que el inode ya cambió y no rota dos veces.
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+try:  # pragma: no cover - solo POSIX
+    import fcntl
+except Exception:  # pragma: no cover
+    fcntl = None
+
+TimeLike = Union[datetime, date, int, float, str, None]
+
+MANIFEST_NAME = "manifest.json"
+_TS_KEYS = ("ts", "timestamp", "day", "date", "generated_at")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+@dataclass
+class RotationPolicy:
+    max_bytes: int = 50 * 1024 * 1024
+    rotate_daily: bool = True
+    fsync_seconds: float = 5.0
+    keep_segments: int = 0  # 0 = conservar todos
+    compress_level: int = 6
+    flush_bytes: int = 64 * 1024
+    flush_seconds: float = 1.0
+
+    @classmethod
+    def from_env(cls) -> "RotationPolicy":
+        return cls(
+            max_bytes=_env_int("SLS_LOG_MAX_BYTES", cls.max_bytes),
+            rotate_daily=os.getenv("SLS_LOG_ROTATE_DAILY", "1").lower() in {"1", "true", "yes"},
+            fsync_seconds=float(_env_int("SLS_LOG_FSYNC_SECONDS", int(cls.fsync_seconds))),
+            keep_segments=_env_int("SLS_LOG_KEEP_SEGMENTS", cls.keep_segments),
+            flush_bytes=_env_int("SLS_LOG_FLUSH_BYTES", cls.flush_bytes),
+            flush_seconds=float(os.getenv("SLS_LOG_FLUSH_SECONDS", str(cls.flush_seconds))),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "RotationPolicy":
+        base = cls.from_env()
+        if not data:
+            return base
+        max_mb = data.get("max_mb")
+        return cls(
+            max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else int(data.get("max_bytes") or base.max_bytes),
+            rotate_daily=bool(data.get("rotate_daily", base.rotate_daily)),
+            fsync_seconds=float(data.get("fsync_seconds") or base.fsync_seconds),
+            keep_segments=int(data.get("keep_segments") or base.keep_segments),
+            compress_level=int(data.get("compress_level") or base.compress_level),
+            flush_bytes=int(data.get("flush_bytes") or base.flush_bytes),
+            flush_seconds=float(data.get("flush_seconds") or base.flush_seconds),
+        )
+
+
+_DEFAULT_POLICY = RotationPolicy.from_env()
+
+
+def set_default_policy(policy: RotationPolicy) -> None:
+    """Cambia la política usada por los logs que se abran a partir de ahora."""
+    global _DEFAULT_POLICY
+    _DEFAULT_POLICY = policy
+
+
+# ---------- timestamps ----------
+def to_epoch(value: TimeLike) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day, tzinfo=timezone.utc).timestamp()
+    if isinstance(value, (int, float)):
+        num = float(value)
+        return num / 1000.0 if num > 1e12 else num
+    if isinstance(value, str):
+        txt = value.strip()
+        if not txt:
+            return None
+        if txt.endswith("Z"):
+            txt = txt[:-1] + "+00:00"
+        try:
+            parsed = datetime.fromisoformat(txt)
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    return None
+
+
+def record_ts(payload: Any) -> Optional[float]:
+    if not isinstance(payload, dict):
+        return None
+    for key in _TS_KEYS:
+        if payload.get(key) is not None:
+            ts = to_epoch(payload.get(key))
+            if ts is not None:
+                return ts
+    return None
+
+
+def line_ts(line: str) -> Optional[float]:
+    """Timestamp de una línea JSON o de texto con prefijo ISO (`bridge.log`)."""
+    raw = line.strip()
+    if not raw:
+        return None
+    if raw.startswith("{"):
+        try:
+            return record_ts(json.loads(raw))
+        except json.JSONDecodeError:
+            return None
+    return to_epoch(raw.split(" ", 1)[0])
+
+
+def _utc_day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+# ---------- segmentos ----------
+def segments_dir(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + ".segments")
+
+
+def load_manifest(path: Path) -> List[dict]:
+    manifest = segments_dir(path) / MANIFEST_NAME
+    if not manifest.exists():
+        return []
+    try:
+        data = json.loads(manifest.read_text(encoding="utf-8"))
+    except Exception:
+        return []
+    segments = data.get("segments") if isinstance(data, dict) else None
+    return [seg for seg in (segments or []) if isinstance(seg, dict) and seg.get("file")]
+
+
+def _write_manifest(path: Path, segments: List[dict]) -> None:
+    seg_dir = segments_dir(path)
+    seg_dir.mkdir(parents=True, exist_ok=True)
+    tmp = seg_dir / (MANIFEST_NAME + ".tmp")
+    tmp.write_text(
+        json.dumps({"log": Path(path).name, "segments": segments}, ensure_ascii=False, separators=(",", ":")),
+        encoding="utf-8",
+    )
+    os.replace(tmp, seg_dir / MANIFEST_NAME)
+
+
+def _overlaps(seg: dict, start: Optional[float], end: Optional[float]) -> bool:
+    ts_min = seg.get("ts_min")
+    ts_max = seg.get("ts_max")
+    if start is not None and ts_max is not None and ts_max < start:
+        return False
+    if end is not None and ts_min is not None and ts_min > end:
+        return False
+    return True
+
+
+def list_segments(path: Path, start: TimeLike = None, end: TimeLike = None) -> List[Path]:
+    """Segmentos (más antiguos primero) cuyo rango se solapa con [start, end]."""
+    start_ts, end_ts = to_epoch(start), to_epoch(end)
+    seg_dir = segments_dir(path)
+    ordered = sorted(load_manifest(path), key=lambda seg: (seg.get("ts_min") or 0.0, seg["file"]))
+    return [seg_dir / seg["file"] for seg in ordered if _overlaps(seg, start_ts, end_ts)]
+
+
+def log_exists(path: Path) -> bool:
+    path = Path(path)
+    return path.exists() or bool(load_manifest(path))
+
+
+# ---------- escritura ----------
+class RotatingLog:
+    """Handle de append con buffer que permanece abierto y rota a segmentos gzip."""
+
+    def __init__(self, path: Path, policy: RotationPolicy | None = None):
+        self.path = Path(path)
+        self.policy = policy or _DEFAULT_POLICY
+        self._lock = threading.RLock()
+        self._lock_fh = None  # <log>.segments/.lock, abierto una vez por instancia
+        self._fh = None
+        self._inode: Optional[int] = None
+        self._size = 0
+        self._day: Optional[str] = None
+        self._pending: List[str] = []
+        self._pending_bytes = 0
+        self._last_flush = time.monotonic()
+        self._last_fsync = time.monotonic()
+
+    # -- lock entre procesos --
+    @contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        if self._lock_fh is None:
+            seg_dir = segments_dir(self.path)
+            seg_dir.mkdir(parents=True, exist_ok=True)
+            self._lock_fh = (seg_dir / ".lock").open("a+")
+        fcntl.flock(self._lock_fh.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fh.fileno(), fcntl.LOCK_UN)
+
+    # -- handle --
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = self.path.open("a", encoding="utf-8")
+        st = os.fstat(self._fh.fileno())
+        self._inode = st.st_ino
+        self._size = st.st_size + self._pending_bytes
+        self._day = _utc_day(st.st_mtime) if st.st_size else _utc_day(time.time())
+
+    def _ensure_open(self) -> None:
+        if self._fh is None:
+            self._open()
+            return
+        # otro proceso pudo rotar el archivo: reabrimos si cambió el inode
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            inode = None
+        if inode != self._inode:
+            self._close_handle()
+            self._open()
+
+    def _close_handle(self) -> None:
+        if self._fh is None:
+            return
+        try:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+        except Exception:
+            pass
+        try:
+            self._fh.close()
+        finally:
+            self._fh = None
+            self._inode = None
+
+    def _drain(self, fsync: bool) -> None:
+        if self._pending:
+            with self._file_lock(exclusive=False):  # que nadie rote entre el stat y la escritura
+                self._ensure_open()
+                self._fh.write("".join(self._pending))
+                self._fh.flush()
+            self._pending = []
+            self._pending_bytes = 0
+        if self._fh is not None:
+            self._fh.flush()
+            now = time.monotonic()
+            if fsync or now - self._last_fsync >= self.policy.fsync_seconds:
+                os.fsync(self._fh.fileno())
+                self._last_fsync = now
+        self._last_flush = time.monotonic()
+
+    # -- API --
+    def append(self, payload: dict, sync: bool = False) -> None:
+        self.write_lines([json.dumps(payload, ensure_ascii=False)], sync=sync)
+
+    def append_line(self, line: str, sync: bool = False) -> None:
+        self.write_lines([line], sync=sync)
+
+    def write_lines(self, lines: List[str], sync: bool = False) -> None:
+        if not lines:
+            return
+        data = "".join(line.rstrip("\n") + "\n" for line in lines)
+        size = len(data.encode("utf-8"))
+        with self._lock:
+            if self._fh is None:
+                self._open()
+            if self._should_rotate(size):
+                self.rotate()
+                self._open()
+            self._pending.append(data)
+            self._pending_bytes += size
+            self._size += size
+            if sync or self._pending_bytes >= self.policy.flush_bytes:
+                self._drain(fsync=sync)
+        if not sync:
+            _ensure_flusher()
+
+    def flush(self, fsync: bool = False) -> None:
+        with self._lock:
+            if self._fh is None and not self._pending:
+                return
+            self._drain(fsync=fsync)
+
+    def flush_if_due(self) -> None:
+        with self._lock:
+            if self._pending and time.monotonic() - self._last_flush >= self.policy.flush_seconds:
+                self._drain(fsync=False)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pending:
+                self._drain(fsync=True)
+            self._close_handle()
+            if self._lock_fh is not None:
+                self._lock_fh.close()
+                self._lock_fh = None
+
+    def _should_rotate(self, incoming: int) -> bool:
+        if self._size <= 0:
+            return False
+        if self.policy.max_bytes and self._size + incoming > self.policy.max_bytes:
+            return True
+        return bool(self.policy.rotate_daily and self._day and self._day != _utc_day(time.time()))
+
+    def rotate(self) -> Optional[Path]:
+        """Mueve el archivo vivo a un segmento gzip y actualiza el manifiesto."""
+        with self._lock:
+            if self._pending:
+                self._drain(fsync=True)
+            inode = self._inode
+            self._close_handle()
+            with self._file_lock(exclusive=True):
+                return self._rotate_locked(inode)
+
+    def _rotate_locked(self, inode: Optional[int]) -> Optional[Path]:
+        # con el lock tomado se vuelve a mirar: otro proceso pudo rotar mientras esperábamos
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        if st.st_size == 0 or (inode is not None and st.st_ino != inode):
+            return None
+        seg_dir = segments_dir(self.path)
+        seg_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        base_name = self.path.name.split(".")[0]
+        suffix = "".join(self.path.suffixes) or ".log"
+        staging = seg_dir / f"{base_name}-{stamp}{suffix}"
+        os.replace(self.path, staging)
+        target = staging.with_name(staging.name + ".gz")
+        ts_min: Optional[float] = None
+        ts_max: Optional[float] = None
+        lines = 0
+        raw_bytes = 0
+        with staging.open("r", encoding="utf-8", errors="ignore") as src, gzip.open(
+            target, "wt", encoding="utf-8", compresslevel=self.policy.compress_level
+        ) as dst:
+            for line in src:
+                dst.write(line)
+                lines += 1
+                raw_bytes += len(line)
+                ts = line_ts(line)
+                if ts is None:
+                    continue
+                ts_min = ts if ts_min is None else min(ts_min, ts)
+                ts_max = ts if ts_max is None else max(ts_max, ts)
+        staging.unlink()
+        segments = load_manifest(self.path)
+        segments.append({
+            "file": target.name,
+            "ts_min": ts_min,
+            "ts_max": ts_max,
+            "lines": lines,
+            "bytes": raw_bytes,
+            "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        })
+        keep = self.policy.keep_segments
+        if keep and len(segments) > keep:
+            for old in segments[:-keep]:
+                try:
+                    (seg_dir / old["file"]).unlink()
+                except FileNotFoundError:
+                    pass
+            segments = segments[-keep:]
+        _write_manifest(self.path, segments)
+        return target
+
+
+_LOGS: Dict[str, RotatingLog] = {}
+_LOGS_LOCK = threading.Lock()
+
+
+def get_log(path: Path, policy: RotationPolicy | None = None) -> RotatingLog:
+    key = str(Path(path).resolve())
+    with _LOGS_LOCK:
+        log = _LOGS.get(key)
+        if log is None:
+            log = RotatingLog(Path(path), policy)
+            _LOGS[key] = log
+        return log
+
+
+def append_jsonl(path: Path, payload: dict, sync: bool = False) -> None:
+    get_log(path).append(payload, sync=sync)
+
+
+def flush_all(fsync: bool = False) -> None:
+    with _LOGS_LOCK:
+        logs = list(_LOGS.values())
+    for log in logs:
+        try:
+            log.flush(fsync=fsync)
+        except Exception:
+            pass
+
+
+def pending_lines() -> int:
+    """Líneas en buffer aún sin volcar (todas las rutas); lo expone /metrics."""
+    with _LOGS_LOCK:
+        logs = list(_LOGS.values())
+    return sum(len(log._pending) for log in logs)
+
+
+def close_all() -> None:
+    with _LOGS_LOCK:
+        logs = list(_LOGS.values())
+    for log in logs:
+        try:
+            log.close()
+        except Exception:
+            pass
+
+
+def _flush_pending(path: Path) -> None:
+    """Vuelca el buffer propio antes de leer, para que el proceso vea sus escrituras."""
+    try:
+        key = str(Path(path).resolve())
+    except OSError:
+        return
+    log = _LOGS.get(key)
+    if log is not None:
+        try:
+            log.flush()
+        except Exception:
+            pass
+
+
+_FLUSHER: Optional[threading.Thread] = None
+_FLUSHER_LOCK = threading.Lock()
+
+
+def _flusher_loop() -> None:
+    while True:
+        with _LOGS_LOCK:
+            logs = list(_LOGS.values())
+        interval = min((log.policy.flush_seconds for log in logs), default=_DEFAULT_POLICY.flush_seconds)
+        time.sleep(max(0.05, interval / 2))
+        for log in logs:
+            try:
+                log.flush_if_due()
+            except Exception:
+                pass
+
+
+def _ensure_flusher() -> None:
+    global _FLUSHER
+    if _FLUSHER is not None and _FLUSHER.is_alive():
+        return
+    with _FLUSHER_LOCK:
+        if _FLUSHER is not None and _FLUSHER.is_alive():
+            return
+        _FLUSHER = threading.Thread(target=_flusher_loop, daemon=True, name="log-flusher")
+        _FLUSHER.start()
+
+
+atexit.register(close_all)
+
+
+# ---------- lectura ----------
+def _open_text(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", errors="ignore")
+    return path.open("r", encoding="utf-8", errors="ignore")
+
+
+def iter_lines(path: Path, start: TimeLike = None, end: TimeLike = None) -> Iterator[str]:
+    """Recorre segmentos solapados con la ventana y luego el archivo vivo."""
+    path = Path(path)
+    _flush_pending(path)
+    for seg in list_segments(path, start, end):
+        try:
+            with _open_text(seg) as fh:
+                yield from fh
+        except (FileNotFoundError, OSError, EOFError):
+            continue
+    if path.exists():
+        with _open_text(path) as fh:
+            yield from fh
+
+
+def iter_jsonl(path: Path, start: TimeLike = None, end: TimeLike = None) -> Iterator[dict]:
+    """Registros JSON dentro de la ventana; los que no tienen ts se conservan."""
+    start_ts, end_ts = to_epoch(start), to_epoch(end)
+    for raw in iter_lines(path, start_ts, end_ts):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            payload = json.loads(raw)
+        except json.JSONDecodeError:
+            continue
+        if start_ts is not None or end_ts is not None:
+            ts = record_ts(payload)
+            if ts is not None and ((start_ts is not None and ts < start_ts) or (end_ts is not None and ts > end_ts)):
+                continue
+        yield payload
+
+
+def tail_lines(path: Path, limit: int) -> List[str]:
+    """Últimas `limit` líneas, retrocediendo a segmentos si el archivo vivo no alcanza."""
+    path = Path(path)
+    limit = max(0, int(limit))
+    if limit == 0:
+        return []
+    _flush_pending(path)
+    collected: deque[str] = deque(maxlen=limit)
+    if path.exists():
+        with _open_text(path) as fh:
+            collected.extend(fh)
+    segments = list_segments(path)
+    while len(collected) < limit and segments:
+        seg = segments.pop()
+        try:
+            with _open_text(seg) as fh:
+                older = deque(fh, maxlen=limit - len(collected))
+        except (FileNotFoundError, OSError, EOFError):
+            continue
+        collected.extendleft(reversed(older))
+    return list(collected)
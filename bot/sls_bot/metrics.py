@@ -0,0 +1,272 @@
+"""
+Registro de métricas en formato Prometheus, sin dependencias externas.
+
+`REGISTRY` guarda contadores, gauges e histogramas con etiquetas; `render()`
+produce el texto de exposición 0.0.4 que sirve `GET /metrics`. `install(app,
+name)` añade ese endpoint y un middleware ASGI que mide cada petición por
+ruta (plantilla, no path real, para no disparar la cardinalidad).
+
+Las métricas del camino caliente se declaran aquí para que el bot, la API de
+control y el Cerebro compartan nombres:
+
+- `sls_webhook_seconds{signal,status}` y `sls_webhook_stage_seconds{stage}`
+- `sls_bybit_request_seconds{endpoint,ret_code}` (`endpoint` es la ruta v5,
+  p.ej. `/v5/order/create`, tanto para pybit como para las llamadas firmadas)
+- `sls_cerebro_cycle_seconds{symbol,timeframe}`
+- `sls_worker_queue_depth{worker}` (gauges calculados al leer)
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: etiquetas {sorted(labels)} != {list(self.labelnames)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:  # pragma: no cover - lo implementan las subclases
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_fmt(val)}" for key, val in items]
+
+
+class Gauge(_Metric):
+    """Gauge con valores fijados o calculados al leer (`set_function`)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        self._functions: Dict[LabelKey, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def set_function(self, fn: Callable[[], float], **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = fn
+
+    def value(self, **labels) -> Optional[float]:
+        key = self._key(labels)
+        fn = self._functions.get(key)
+        return float(fn()) if fn else self._values.get(key)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, fn in functions.items():
+            try:
+                values[key] = float(fn())
+            except Exception:
+                values.pop(key, None)
+        return [f"{self.name}{_labels(self.labelnames, key)} {_fmt(val)}" for key, val in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        self._series: Dict[LabelKey, List[float]] = {}  # [cuentas por bucket..., +Inf, suma]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            series[idx] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self, **labels) -> Dict[str, float]:
+        series = self._series.get(self._key(labels))
+        if series is None:
+            return {"count": 0, "sum": 0.0}
+        return {"count": sum(series[:-1]), "sum": series[-1]}
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        lines: List[str] = []
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, ('le', _fmt(bound)))} {_fmt(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {_fmt(cumulative)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"métrica {name} ya registrada con otro tipo/etiquetas")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "sls_http_request_seconds", "Duración de peticiones HTTP por app y ruta.", ("app", "method", "route", "status"))
+WEBHOOK_SECONDS = REGISTRY.histogram(
+    "sls_webhook_seconds", "Tiempo extremo a extremo del webhook.", ("signal", "status"))
+WEBHOOK_STAGE_SECONDS = REGISTRY.histogram(
+    "sls_webhook_stage_seconds", "Tiempo por etapa del webhook.", ("stage",))
+BYBIT_REQUEST_SECONDS = REGISTRY.histogram(
+    "sls_bybit_request_seconds", "Latencia REST de Bybit por endpoint y retCode.", ("endpoint", "ret_code"))
+CEREBRO_CYCLE_SECONDS = REGISTRY.histogram(
+    "sls_cerebro_cycle_seconds", "Duración del ciclo del Cerebro por par.", ("symbol", "timeframe"),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+QUEUE_DEPTH = REGISTRY.gauge(
+    "sls_worker_queue_depth", "Trabajos pendientes en cada worker de fondo.", ("worker",))
+
+
+def stage(name: str):
+    """Atajo: `with stage("balance"): ...` mide una etapa del webhook."""
+    return WEBHOOK_STAGE_SECONDS.time(stage=name)
+
+
+def observe_bybit(endpoint: str, started: float, ret_code: object) -> None:
+    BYBIT_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, ret_code=ret_code)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: mide cada petición HTTP con la plantilla de ruta de FastAPI."""
+
+    def __init__(self, app, name: str, histogram: Histogram = HTTP_REQUEST_SECONDS):
+        self.app = app
+        self.name = name
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            route = scope.get("route")
+            self.histogram.observe(time.perf_counter() - started, app=self.name, method=scope.get("method", ""),
+                                   route=getattr(route, "path", "unmatched"), status=status["code"])
+
+
+def install(app, name: str, registry: Registry = REGISTRY, path: str = "/metrics") -> None:
+    """Registra `GET /metrics` y el middleware de latencia HTTP en una app FastAPI."""
+    from fastapi.responses import PlainTextResponse
+
+    app.add_middleware(MetricsMiddleware, name=name)
+
+    @app.get(path, include_in_schema=False)
+    def metrics_endpoint():
+        return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
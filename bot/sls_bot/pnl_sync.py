@@ -0,0 +1,234 @@
+"""Sincronización incremental del closed PnL de Bybit por día y símbolo.
+
+Guarda un cursor (high-water mark de `createdTime`) junto a los ids vistos en
+los últimos minutos, de modo que cada pasada solo pide filas nuevas (con un
+pequeño solape para registros tardíos) y las suma como deltas al agregado
+diario (`pnl_daily_symbols.json`). El backfill parte el rango en ventanas de
+como mucho 7 días (límite de Bybit) y las descarga en paralelo.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DAY_MS = 24 * 60 * 60 * 1000
+MAX_WINDOW_MS = 7 * DAY_MS
+
+
+def _now_ms() -> int:
+    return int(datetime.now(timezone.utc).timestamp() * 1000)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _entry_ts_ms(entry: dict) -> Optional[int]:
+    raw = entry.get("createdTime") or entry.get("updatedTime") or entry.get("execTime")
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+def _entry_id(entry: dict) -> str:
+    return str(entry.get("orderId") or entry.get("execId") or "") + ":" + str(_entry_ts_ms(entry))
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def split_windows(start_ms: int, end_ms: int, window_ms: int = MAX_WINDOW_MS) -> List[Tuple[int, int]]:
+    """Parte [start, end] en ventanas consecutivas de como mucho `window_ms`."""
+    windows: List[Tuple[int, int]] = []
+    cursor = start_ms
+    while cursor < end_ms:
+        upper = min(end_ms, cursor + window_ms)
+        windows.append((cursor, upper))
+        cursor = upper
+    return windows
+
+
+def apply_entries(cache: Dict[str, dict], entries: Iterable[dict], refreshed_at: Optional[str] = None) -> int:
+    """Suma `entries` al agregado día/símbolo en `cache`. Devuelve filas aplicadas."""
+    refreshed_at = refreshed_at or _now_iso()
+    applied = 0
+    for entry in entries:
+        ts_ms = _entry_ts_ms(entry)
+        symbol = entry.get("symbol")
+        if ts_ms is None or not symbol:
+            continue
+        day = datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).date().isoformat()
+        pnl = _as_float(entry.get("closedPnl") or entry.get("pnl"))
+        fees = _as_float(entry.get("cumCommission") or entry.get("fees"))
+        ref = cache.setdefault(day, {"total": 0.0, "symbols": {}, "refreshed_at": refreshed_at})
+        ref["total"] = float(ref.get("total") or 0.0) + pnl
+        ref["refreshed_at"] = refreshed_at
+        sym = ref.setdefault("symbols", {}).setdefault(symbol, {"pnl": 0.0, "fees": 0.0, "trades": 0})
+        sym["pnl"] += pnl
+        sym["fees"] += fees
+        sym["trades"] += 1
+        applied += 1
+    return applied
+
+
+class ClosedPnlSync:
+    def __init__(
+        self,
+        client,
+        cache_path: Path,
+        state_path: Path,
+        *,
+        retain_days: int = 90,
+        max_workers: int = 4,
+        page_limit: int = 200,
+        max_pages: int = 30,
+        overlap_ms: int = 10 * 60 * 1000,
+    ):
+        self.client = client
+        self.cache_path = Path(cache_path)
+        self.state_path = Path(state_path)
+        self.retain_days = retain_days
+        self.max_workers = max(1, max_workers)
+        self.page_limit = page_limit
+        self.max_pages = max_pages
+        self.overlap_ms = overlap_ms
+        self._lock = threading.Lock()
+
+    # ----- persistencia -----
+    @staticmethod
+    def _read_json(path: Path) -> dict:
+        try:
+            if not path.exists():
+                return {}
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    @staticmethod
+    def _write_json(path: Path, payload: dict) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def load_state(self) -> dict:
+        return self._read_json(self.state_path)
+
+    def load_cache(self) -> dict:
+        return self._read_json(self.cache_path)
+
+    def _save(self, cache: dict, state: dict) -> None:
+        keys = sorted(cache.keys())
+        if self.retain_days and len(keys) > self.retain_days:
+            for day in keys[: -self.retain_days]:
+                cache.pop(day, None)
+        self._write_json(self.cache_path, cache)
+        self._write_json(self.state_path, state)
+
+    # ----- descarga -----
+    def fetch_window(self, start_ms: int, end_ms: int) -> List[dict]:
+        """Descarga una ventana (<= 7 días) siguiendo la paginación de Bybit."""
+        rows: List[dict] = []
+        cursor: Optional[str] = None
+        for _ in range(self.max_pages):  # evita bucles infinitos
+            resp = self.client.get_closed_pnl(start_time=start_ms, end_time=end_ms, cursor=cursor, limit=self.page_limit)
+            if resp.get("retCode") != 0:
+                raise RuntimeError(f"get_closed_pnl retCode={resp.get('retCode')} {resp.get('retMsg')}")
+            result = resp.get("result") or {}
+            rows.extend(result.get("list") or [])
+            cursor = result.get("nextPageCursor")
+            if not cursor:
+                break
+        return rows
+
+    def fetch_range(self, start_ms: int, end_ms: int) -> List[dict]:
+        windows = split_windows(start_ms, end_ms)
+        if len(windows) <= 1 or self.max_workers == 1:
+            chunks = [self.fetch_window(s, e) for s, e in windows]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(windows))) as pool:
+                chunks = list(pool.map(lambda w: self.fetch_window(*w), windows))
+        # las ventanas comparten el milisegundo frontera: deduplicamos
+        rows: List[dict] = []
+        seen = set()
+        for chunk in chunks:
+            for row in chunk:
+                key = _entry_id(row)
+                if key in seen:
+                    continue
+                seen.add(key)
+                rows.append(row)
+        return rows
+
+    def _advance_cursor(self, state: dict, entries: List[dict], end_ms: int) -> None:
+        """Mueve el cursor a `end_ms` y recuerda los ids dentro del solape."""
+        cursor_ms = max(int(state.get("cursor_ms") or 0), end_ms)
+        recent = {k: int(v) for k, v in (state.get("recent_ids") or {}).items()}
+        for entry in entries:
+            ts_ms = _entry_ts_ms(entry)
+            if ts_ms is not None:
+                recent[_entry_id(entry)] = ts_ms
+        floor_ms = cursor_ms - self.overlap_ms
+        state["cursor_ms"] = cursor_ms
+        state["recent_ids"] = {k: v for k, v in recent.items() if v >= floor_ms}
+
+    # ----- API -----
+    def backfill(self, days: int, now_ms: Optional[int] = None) -> dict:
+        """Reconstruye los últimos `days` días UTC completos y reposiciona el cursor."""
+        end_ms = now_ms or _now_ms()
+        start_ms = ((end_ms - days * DAY_MS) // DAY_MS) * DAY_MS
+        entries = self.fetch_range(start_ms, end_ms)
+        with self._lock:
+            cache = self.load_cache()
+            state = self.load_state()
+            first_day = datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc).date().isoformat()
+            for day in [d for d in cache if d >= first_day]:
+                cache.pop(day, None)
+            apply_entries(cache, entries)
+            state.pop("recent_ids", None)
+            state["cursor_ms"] = 0
+            self._advance_cursor(state, entries, end_ms)
+            state["backfilled_at"] = _now_iso()
+            self._save(cache, state)
+        return {"mode": "backfill", "rows": len(entries), "cursor_ms": state["cursor_ms"]}
+
+    def sync(self, initial_days: int = 30, now_ms: Optional[int] = None) -> dict:
+        """Trae solo filas posteriores al cursor (con un pequeño solape); sin cursor hace backfill."""
+        state = self.load_state()
+        if not state.get("cursor_ms"):
+            return self.backfill(initial_days, now_ms=now_ms)
+        end_ms = now_ms or _now_ms()
+        start_ms = max(0, int(state["cursor_ms"]) - self.overlap_ms)
+        entries = self.fetch_range(start_ms, end_ms) if end_ms > start_ms else []
+        with self._lock:
+            state = self.load_state()
+            seen = set((state.get("recent_ids") or {}).keys())
+            new_rows: List[dict] = []
+            for entry in entries:
+                key = _entry_id(entry)
+                if _entry_ts_ms(entry) is None or key in seen:
+                    continue
+                seen.add(key)
+                new_rows.append(entry)
+            cache = self.load_cache()
+            if new_rows:
+                apply_entries(cache, new_rows)
+            self._advance_cursor(state, new_rows, end_ms)
+            state["synced_at"] = _now_iso()
+            if new_rows:
+                self._save(cache, state)
+            else:
+                self._write_json(self.state_path, state)
+        return {"mode": "incremental", "rows": len(new_rows), "cursor_ms": state["cursor_ms"]}
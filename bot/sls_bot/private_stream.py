@@ -0,0 +1,301 @@
+"""Stream privado de Bybit v5 (position/execution/order) y libro de posiciones.
+
+Un único consumidor WebSocket mantiene `PositionBook` en memoria y avisa a los
+listeners registrados (TP1/BE, guardia de scalping) en vez de que cada uno
+haga polling REST. `PrivateStream.replay()` permite alimentar mensajes
+grabados para pruebas o diagnóstico sin conexión.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:  # websocket-client es opcional: sin él el bot sigue con polling REST
+    import websocket  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    websocket = None  # type: ignore
+
+log = logging.getLogger(__name__)
+
+TOPICS = ("position", "execution", "order")
+Listener = Callable[[str, str, dict], None]
+
+
+def private_ws_url(base_url: str) -> str:
+    """Deriva el endpoint WS privado a partir del `base_url` REST configurado."""
+    lowered = (base_url or "").lower()
+    if "api-demo" in lowered:
+        return "wss://stream-demo.bybit.com/v5/private"
+    if "testnet" in lowered:
+        return "wss://stream-testnet.bybit.com/v5/private"
+    if lowered.startswith("http://") or lowered.startswith("https://"):
+        host = lowered.split("://", 1)[1].split("/", 1)[0]
+        if not host.endswith("bybit.com"):
+            # exchange propio (p.ej. simulador local): mismo host, esquema ws
+            scheme = "wss" if lowered.startswith("https") else "ws"
+            return f"{scheme}://{host}/v5/private"
+    return "wss://stream.bybit.com/v5/private"
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class PositionBook:
+    """Posiciones abiertas por símbolo (modo one-way) alimentadas por eventos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._positions: Dict[str, dict] = {}
+        self._executions: Dict[str, List[dict]] = {}
+
+    def apply_position(self, row: dict) -> Optional[dict]:
+        symbol = (row.get("symbol") or "").upper()
+        if not symbol:
+            return None
+        size = _as_float(row.get("size"))
+        snapshot = {
+            "symbol": symbol,
+            "size": size,
+            "side": row.get("side") or "",
+            "avg_price": _as_float(row.get("avgPrice") or row.get("entryPrice")),
+            "mark_price": _as_float(row.get("markPrice")),
+            "unrealised_pnl": _as_float(row.get("unrealisedPnl")),
+            "updated_ts": time.time(),
+        }
+        with self._lock:
+            if size > 0:
+                self._positions[symbol] = snapshot
+            else:
+                self._positions.pop(symbol, None)
+        return snapshot
+
+    def apply_execution(self, row: dict, keep: int = 50) -> Optional[dict]:
+        symbol = (row.get("symbol") or "").upper()
+        if not symbol:
+            return None
+        fill = {
+            "symbol": symbol,
+            "side": row.get("side") or "",
+            "order_id": row.get("orderId"),
+            "price": _as_float(row.get("execPrice")),
+            "qty": _as_float(row.get("execQty")),
+            "exec_type": row.get("execType"),
+            "ts": _as_float(row.get("execTime")) / 1000.0 or time.time(),
+        }
+        with self._lock:
+            bucket = self._executions.setdefault(symbol, [])
+            bucket.append(fill)
+            del bucket[:-keep]
+        return fill
+
+    def get(self, symbol: str) -> Optional[dict]:
+        with self._lock:
+            pos = self._positions.get(symbol.upper())
+            return dict(pos) if pos else None
+
+    def executions(self, symbol: str) -> List[dict]:
+        with self._lock:
+            return list(self._executions.get(symbol.upper(), []))
+
+    def symbols(self) -> List[str]:
+        with self._lock:
+            return list(self._positions.keys())
+
+    def seed(self, rows: Iterable[dict]) -> None:
+        """Reemplaza el libro con un snapshot REST (`get_positions`)."""
+        with self._lock:
+            self._positions.clear()
+        for row in rows:
+            self.apply_position(row)
+
+
+class PrivateStream:
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        url: str,
+        *,
+        book: Optional[PositionBook] = None,
+        snapshot_loader: Optional[Callable[[], List[dict]]] = None,
+        ping_interval: float = 20.0,
+        max_backoff: float = 60.0,
+        dispatch_inline: bool = False,
+    ):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.url = url
+        self.book = book or PositionBook()
+        self.snapshot_loader = snapshot_loader
+        self.ping_interval = ping_interval
+        self.max_backoff = max_backoff
+        self._listeners: List[Listener] = []
+        self._dispatch = None if dispatch_inline else ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-dispatch")
+        self._ws = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._authed = False
+        self._subscribed = False
+        self._last_msg_ts = 0.0
+        self.stats = {"messages": 0, "reconnects": 0, "errors": 0}
+
+    # ----- listeners -----
+    def add_listener(self, callback: Listener) -> None:
+        self._listeners.append(callback)
+
+    def _emit(self, topic: str, symbol: str, data: dict) -> None:
+        for callback in list(self._listeners):
+            if self._dispatch is None:
+                self._safe_call(callback, topic, symbol, data)
+            else:
+                self._dispatch.submit(self._safe_call, callback, topic, symbol, data)
+
+    def _safe_call(self, callback: Listener, topic: str, symbol: str, data: dict) -> None:
+        try:
+            callback(topic, symbol, data)
+        except Exception:
+            self.stats["errors"] += 1
+            log.debug("private stream listener failed", exc_info=True)
+
+    # ----- mensajes -----
+    def handle_message(self, raw: Any) -> None:
+        try:
+            msg = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+        except json.JSONDecodeError:
+            return
+        if not isinstance(msg, dict):
+            return
+        self._last_msg_ts = time.time()
+        op = msg.get("op")
+        if op == "auth":
+            self._authed = bool(msg.get("success"))
+            if self._authed:
+                self._send({"op": "subscribe", "args": list(TOPICS)})
+            else:
+                log.warning("private stream auth failed: %s", msg.get("ret_msg"))
+            return
+        if op == "subscribe":
+            self._subscribed = bool(msg.get("success"))
+            return
+        topic = msg.get("topic") or ""
+        rows = msg.get("data") or []
+        if not topic or not isinstance(rows, list):
+            return
+        self.stats["messages"] += 1
+        base_topic = topic.split(".", 1)[0]
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            if base_topic == "position":
+                snap = self.book.apply_position(row)
+                if snap:
+                    self._emit("position", snap["symbol"], snap)
+            elif base_topic == "execution":
+                fill = self.book.apply_execution(row)
+                if fill:
+                    self._emit("execution", fill["symbol"], fill)
+            elif base_topic == "order":
+                symbol = (row.get("symbol") or "").upper()
+                if symbol:
+                    self._emit("order", symbol, row)
+
+    def replay(self, messages: Iterable[Any]) -> int:
+        """Procesa mensajes grabados (dicts o líneas JSON) como si vinieran del socket."""
+        count = 0
+        for raw in messages:
+            if isinstance(raw, str) and not raw.strip():
+                continue
+            self.handle_message(raw)
+            count += 1
+        if self._dispatch is not None:
+            self._dispatch.submit(lambda: None).result()
+        return count
+
+    # ----- conexión -----
+    def is_live(self, max_silence: Optional[float] = None) -> bool:
+        if not (self._authed and self._subscribed):
+            return False
+        silence = max_silence if max_silence is not None else self.ping_interval * 3
+        return time.time() - self._last_msg_ts <= silence
+
+    def _auth_payload(self) -> dict:
+        expires = int((time.time() + 10) * 1000)
+        signature = hmac.new(self.api_secret.encode(), f"GET/realtime{expires}".encode(), hashlib.sha256).hexdigest()
+        return {"op": "auth", "args": [self.api_key, expires, signature]}
+
+    def _send(self, payload: dict) -> None:
+        ws = self._ws
+        if ws is None:
+            return
+        try:
+            ws.send(json.dumps(payload))
+        except Exception:
+            log.debug("private stream send failed", exc_info=True)
+
+    def _on_open(self, _ws) -> None:
+        if self.snapshot_loader:
+            try:
+                self.book.seed(self.snapshot_loader())
+            except Exception:
+                log.debug("private stream snapshot failed", exc_info=True)
+        self._send(self._auth_payload())
+
+    def _ping_loop(self) -> None:
+        while not self._stop.wait(self.ping_interval):
+            self._send({"op": "ping"})
+
+    def _run(self) -> None:
+        backoff = 1.0
+        threading.Thread(target=self._ping_loop, daemon=True, name="private-stream-ping").start()
+        while not self._stop.is_set():
+            started = time.time()
+            self._authed = self._subscribed = False
+            self._ws = websocket.WebSocketApp(
+                self.url,
+                on_open=self._on_open,
+                on_message=lambda _ws, raw: self.handle_message(raw),
+            )
+            try:
+                self._ws.run_forever()
+            except Exception:
+                log.debug("private stream crashed", exc_info=True)
+            self._ws = None
+            self._authed = self._subscribed = False
+            if self._stop.is_set():
+                break
+            self.stats["reconnects"] += 1
+            if time.time() - started > 60:
+                backoff = 1.0
+            self._stop.wait(backoff)
+            backoff = min(self.max_backoff, backoff * 2)
+
+    def start(self) -> bool:
+        if websocket is None:
+            log.info("websocket-client no instalado: stream privado desactivado")
+            return False
+        if self._thread and self._thread.is_alive():
+            return True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="private-stream")
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
@@ -0,0 +1,278 @@
+"""
+Perfilado bajo demanda del loop del Cerebro y del webhook.
+
+- `PROFILER.start(seconds, targets)` lanza un hilo que cada `interval_ms` lee
+  `sys._current_frames()` y acumula las pilas de los hilos que están dentro de
+  un bloque `profiled("cerebro")` / `profiled("webhook")`. Al terminar (o con
+  `stop()`) deja un informe con pilas colapsadas (formato de flamegraph,
+  `raíz;...;hoja cuenta`) y las funciones con más muestras propias y totales.
+- Sin sesión activa `profiled()` solo comprueba un atributo y el muestreador
+  no existe, así que el coste en producción es despreciable.
+- `AllocationTracker.measure()` compara instantáneas de `tracemalloc` antes y
+  después de cada ciclo; solo se usa si `cerebro.profile_allocations` (o
+  `SLS_CEREBRO_TRACEMALLOC=1`) está activo, porque `tracemalloc` sí penaliza.
+
+`router(prefix)` expone `POST <prefix>/start`, `POST <prefix>/stop` y
+`GET <prefix>` en la app del bot y en la API de control (`/cerebro/profile`).
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional, Sequence
+
+TARGETS = ("cerebro", "webhook")
+MAX_DEPTH = 128
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack(frame, depth: int = MAX_DEPTH) -> List[str]:
+    out: List[str] = []
+    while frame is not None and len(out) < depth:
+        out.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    out.reverse()
+    return out
+
+
+class _Session:
+    def __init__(self, targets: Sequence[str], seconds: float, interval: float):
+        self.session_id = uuid.uuid4().hex[:12]
+        self.targets = frozenset(targets)
+        self.seconds = seconds
+        self.interval = interval
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.ticks = 0
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self._marks: Dict[int, List[str]] = {}
+        self._lock = threading.Lock()
+        self._session: Optional[_Session] = None
+        self._last: Optional[_Session] = None
+
+    # ----- marcado de hilos -----
+    @contextmanager
+    def profiled(self, target: str) -> Iterator[None]:
+        """Marca el hilo actual como parte de `target` mientras haya una sesión."""
+        if self._session is None:
+            yield
+            return
+        ident = threading.get_ident()
+        with self._lock:
+            self._marks.setdefault(ident, []).append(target)
+        try:
+            yield
+        finally:
+            with self._lock:
+                marks = self._marks.get(ident)
+                if marks:
+                    marks.pop()
+                    if not marks:
+                        del self._marks[ident]
+
+    # ----- sesión -----
+    def start(self, seconds: float = 10.0, targets: Sequence[str] = TARGETS, interval_ms: float = 5.0) -> dict:
+        targets = [t for t in targets if t in TARGETS]
+        if not targets:
+            raise ValueError(f"targets válidos: {', '.join(TARGETS)}")
+        seconds = max(0.1, min(float(seconds), float(os.getenv("SLS_PROFILE_MAX_SECONDS", 300))))
+        with self._lock:
+            if self._session is not None:
+                raise ProfilerBusy(f"sesión {self._session.session_id} en curso")
+            session = _Session(targets, seconds, max(0.001, float(interval_ms) / 1000.0))
+            session.thread = threading.Thread(target=self._run, args=(session,), daemon=True, name="sls-profiler")
+            self._session = session
+        session.thread.start()
+        return self._describe(session)
+
+    def stop(self, wait: float = 2.0) -> Optional[dict]:
+        session = self._session
+        if session is not None:
+            session.stop_event.set()
+            if session.thread is not None and session.thread is not threading.current_thread():
+                session.thread.join(timeout=wait)
+        return self.report()
+
+    def _run(self, session: _Session) -> None:
+        own = threading.get_ident()
+        deadline = time.monotonic() + session.seconds
+        try:
+            while time.monotonic() < deadline and not session.stop_event.wait(session.interval):
+                session.ticks += 1
+                with self._lock:
+                    marked = [(ident, marks[-1]) for ident, marks in self._marks.items()
+                              if ident != own and session.targets.intersection(marks)]
+                if not marked:
+                    continue
+                frames = sys._current_frames()
+                for ident, target in marked:
+                    frame = frames.get(ident)
+                    if frame is None:
+                        continue
+                    session.stacks[";".join([target] + _stack(frame))] += 1
+                    session.samples += 1
+                del frames
+        finally:
+            session.finished_at = time.time()
+            with self._lock:
+                self._session = None
+                self._last = session
+                self._marks.clear()
+
+    # ----- informe -----
+    @staticmethod
+    def _describe(session: _Session) -> dict:
+        return {
+            "session_id": session.session_id,
+            "running": session.finished_at is None,
+            "targets": sorted(session.targets),
+            "seconds": session.seconds,
+            "interval_ms": round(session.interval * 1000.0, 3),
+            "started_at": round(session.started_at, 3),
+            "finished_at": round(session.finished_at, 3) if session.finished_at else None,
+            "ticks": session.ticks,
+            "samples": session.samples,
+        }
+
+    def report(self, top: int = 30, collapsed: bool = True) -> Optional[dict]:
+        """Sesión en curso (solo estado) o la última terminada con pilas y funciones más calientes."""
+        session = self._session
+        if session is not None:
+            return self._describe(session)
+        session = self._last
+        if session is None:
+            return None
+        out = self._describe(session)
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in session.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            self_counts[frames[-1]] += count
+            for name in set(frames):
+                total_counts[name] += count
+        samples = max(1, session.samples)
+        out["top"] = [
+            {"function": name, "self": self_counts.get(name, 0), "total": total,
+             "self_pct": round(100.0 * self_counts.get(name, 0) / samples, 2),
+             "total_pct": round(100.0 * total / samples, 2)}
+            for name, total in sorted(total_counts.items(), key=lambda kv: (-self_counts.get(kv[0], 0), -kv[1]))[:top]
+        ]
+        if collapsed:
+            out["collapsed"] = "\n".join(f"{stack} {count}" for stack, count in session.stacks.most_common())
+        return out
+
+
+class AllocationTracker:
+    """Asignaciones por ciclo con `tracemalloc` (memoria viva, pico y líneas que más crecen)."""
+
+    def __init__(self, top: int = 10, frames: int = 1, history: int = 50):
+        self.top = int(top)
+        self.frames = int(frames)
+        self._history: Deque[dict] = deque(maxlen=max(1, int(history)))
+        self._filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+
+    @staticmethod
+    def enabled(flag: object = None) -> bool:
+        env = os.getenv("SLS_CEREBRO_TRACEMALLOC")
+        if env is not None:
+            return env.strip().lower() in {"1", "true", "yes", "on"}
+        return bool(flag)
+
+    @contextmanager
+    def measure(self, label: str) -> Iterator[None]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot().filter_traces(self._filters)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot().filter_traces(self._filters)
+            diff = after.compare_to(before, "lineno")
+            self._history.append({
+                "label": label,
+                "ts": round(time.time(), 3),
+                "duration_ms": round(duration * 1000.0, 3),
+                "current_kb": round(current / 1024.0, 1),
+                "peak_kb": round(peak / 1024.0, 1),
+                "delta_kb": round(sum(stat.size_diff for stat in diff) / 1024.0, 1),
+                "top": [
+                    {"where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                     "size_diff_kb": round(stat.size_diff / 1024.0, 1), "count_diff": stat.count_diff}
+                    for stat in diff[: self.top] if stat.size_diff
+                ],
+            })
+
+    def recent(self, limit: int = 10) -> List[dict]:
+        return list(self._history)[-int(limit):][::-1] if limit else []
+
+
+PROFILER = SamplingProfiler()
+
+
+def profiled(target: str):
+    """Atajo: `with profiled("webhook"): ...` sobre el perfilador del proceso."""
+    return PROFILER.profiled(target)
+
+
+def router(prefix: str = "/profile", profiler: SamplingProfiler = PROFILER):
+    """APIRouter con `POST start`, `POST stop` y `GET` del informe."""
+    from fastapi import APIRouter, HTTPException, Query
+
+    api = APIRouter()
+
+    @api.post(f"{prefix}/start")
+    def profile_start(
+        seconds: float = 10.0,
+        targets: List[str] = Query(list(TARGETS)),
+        interval_ms: float = 5.0,
+    ):
+        try:
+            return profiler.start(seconds=seconds, targets=targets, interval_ms=interval_ms)
+        except ProfilerBusy as exc:
+            raise HTTPException(status_code=409, detail=str(exc))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+    @api.post(f"{prefix}/stop")
+    def profile_stop(top: int = 30):
+        profiler.stop()
+        report = profiler.report(top=top)
+        if report is None:
+            raise HTTPException(status_code=404, detail="No hay sesiones de perfilado")
+        return report
+
+    @api.get(prefix)
+    def profile_report(top: int = 30, collapsed: bool = True):
+        report = profiler.report(top=top, collapsed=collapsed)
+        if report is None:
+            raise HTTPException(status_code=404, detail="No hay sesiones de perfilado")
+        return report
+
+    return api
@@ -0,0 +1,196 @@
+"""
+Timeframes superiores derivados de un único buffer de velas de 1m por símbolo.
+
+`Resampler.raw_slice(symbol, marco, limit)` devuelve las últimas `limit`
+velas de cualquier intervalo (3m, 5m, 15m, 1h, D...) agregando OHLCV desde
+el buffer de 1m con los límites UTC de Bybit. El buffer se rellena una vez
+(paginando hacia atrás) y después solo se piden las velas de 1m nuevas; los
+agregados cacheados se recalculan a partir del primer bucket afectado.
+Si un intervalo necesita más historia de la que cabe en el buffer, devuelve
+None y el llamador vuelve al REST directo.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .kline_store import PAGE_LIMIT, FetchPage, interval_ms, iter_pages
+
+BASE_MS = 60_000
+WEEK_MS = 7 * 86_400_000
+_WEEK_OFFSET_MS = 4 * 86_400_000  # 1970-01-01 fue jueves; las semanas de Bybit empiezan en lunes
+OHLCV = ["ts", "open", "high", "low", "close", "volume"]
+
+
+def bucket_start(ts: np.ndarray, step_ms: int) -> np.ndarray:
+    ts = np.asarray(ts, dtype=np.int64)
+    if step_ms == WEEK_MS:
+        return ((ts - _WEEK_OFFSET_MS) // WEEK_MS) * WEEK_MS + _WEEK_OFFSET_MS
+    return (ts // step_ms) * step_ms
+
+
+def aggregate(df: pd.DataFrame, step_ms: int) -> pd.DataFrame:
+    """Agrega velas ordenadas por ts a `step_ms` (el último bucket puede estar en curso)."""
+    if df.empty:
+        return pd.DataFrame({col: pd.Series(dtype=np.int64 if col == "ts" else np.float64) for col in OHLCV + ["typical"]})
+    ts = df["ts"].to_numpy(dtype=np.int64)
+    buckets = bucket_start(ts, step_ms)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    high = df["high"].to_numpy(dtype=np.float64)
+    low = df["low"].to_numpy(dtype=np.float64)
+    out = pd.DataFrame({
+        "ts": buckets[starts],
+        "open": df["open"].to_numpy(dtype=np.float64)[starts],
+        "high": np.maximum.reduceat(high, starts),
+        "low": np.minimum.reduceat(low, starts),
+        "close": df["close"].to_numpy(dtype=np.float64)[ends],
+        "volume": np.add.reduceat(df["volume"].to_numpy(dtype=np.float64), starts),
+    })
+    out["typical"] = (out["high"] + out["low"] + out["close"]) / 3.0
+    return out
+
+
+class CandleBuffer:
+    """Buffer de 1m de un símbolo con agregados por intervalo actualizados de forma incremental."""
+
+    def __init__(self, capacity_minutes: int):
+        self.capacity_ms = int(capacity_minutes) * BASE_MS
+        self.base = pd.DataFrame({col: pd.Series(dtype=np.int64 if col == "ts" else np.float64) for col in OHLCV})
+        self.refreshed_at = 0.0
+        self.covered_from: Optional[int] = None
+        self._frames: Dict[int, pd.DataFrame] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def first_ts(self) -> Optional[int]:
+        return int(self.base["ts"].iloc[0]) if len(self.base) else None
+
+    @property
+    def last_ts(self) -> Optional[int]:
+        return int(self.base["ts"].iloc[-1]) if len(self.base) else None
+
+    def update(self, candles: pd.DataFrame) -> Optional[int]:
+        """Inserta/reemplaza velas de 1m; devuelve el primer ts modificado."""
+        if candles is None or candles.empty:
+            return None
+        fresh = candles[OHLCV].apply(pd.to_numeric, errors="coerce").dropna()
+        if fresh.empty:
+            return None
+        fresh["ts"] = fresh["ts"].astype(np.int64)
+        changed = int(fresh["ts"].min())
+        merged = pd.concat([self.base, fresh], ignore_index=True)
+        merged = merged.drop_duplicates("ts", keep="last").sort_values("ts", kind="stable")
+        cutoff = int(merged["ts"].iloc[-1]) - self.capacity_ms
+        self.base = merged[merged["ts"] > cutoff].reset_index(drop=True)
+        for step, frame in list(self._frames.items()):
+            keep_before = max(int(bucket_start(np.array([changed]), step)[0]), self._complete_from(step))
+            head = frame[(frame["ts"] < keep_before) & (frame["ts"] >= self._complete_from(step))]
+            tail = aggregate(self.base[self.base["ts"] >= keep_before], step)
+            self._frames[step] = pd.concat([head, tail], ignore_index=True) if len(head) else tail
+        return changed
+
+    def _complete_from(self, step_ms: int) -> int:
+        """Primer bucket completo: si el buffer empieza a mitad de un bucket se descarta ese."""
+        first = self.first_ts
+        if first is None:
+            return 0
+        start = int(bucket_start(np.array([first]), step_ms)[0])
+        return start if start == first else start + step_ms
+
+    def frame(self, step_ms: int, limit: Optional[int] = None) -> pd.DataFrame:
+        if step_ms == BASE_MS:
+            out = self.base.copy()
+            out["typical"] = (out["high"] + out["low"] + out["close"]) / 3.0
+        else:
+            if step_ms not in self._frames:
+                complete = self._complete_from(step_ms)
+                self._frames[step_ms] = aggregate(self.base[self.base["ts"] >= complete], step_ms)
+            out = self._frames[step_ms]
+        if limit is not None:
+            out = out.tail(int(limit))
+        return out.reset_index(drop=True)
+
+
+class Resampler:
+    def __init__(
+        self,
+        fetch_base: Callable[[str, int], pd.DataFrame],
+        fetch_page: Optional[FetchPage] = None,
+        *,
+        capacity_minutes: int = 10_080,
+        min_refresh_s: float = 2.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.fetch_base = fetch_base
+        self.fetch_page = fetch_page
+        self.capacity_minutes = int(capacity_minutes)
+        self.min_refresh_s = float(min_refresh_s)
+        self.clock = clock
+        self._buffers: Dict[str, CandleBuffer] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "bootstraps": 0, "served": 0, "fallbacks": 0}
+
+    def _buffer(self, symbol: str) -> CandleBuffer:
+        with self._lock:
+            buf = self._buffers.get(symbol)
+            if buf is None:
+                buf = self._buffers[symbol] = CandleBuffer(self.capacity_minutes)
+            return buf
+
+    def _refresh(self, symbol: str, buf: CandleBuffer, need_ms: int) -> None:
+        now = self.clock()
+        now_ms = int(now * 1000)
+        start_needed = (now_ms // BASE_MS) * BASE_MS - need_ms
+        if buf.covered_from is None or buf.covered_from > start_needed or buf.last_ts is None:
+            # arranque (o ampliación): se pagina hacia atrás el historial necesario
+            if self.fetch_page is None:
+                buf.update(self.fetch_base(symbol, PAGE_LIMIT))
+                self.stats["requests"] += 1
+            else:
+                for page in iter_pages(self.fetch_page, symbol, "1m", start_needed, now_ms):
+                    buf.update(page)
+                    self.stats["requests"] += 1
+            buf.covered_from = start_needed
+            self.stats["bootstraps"] += 1
+        elif now - buf.refreshed_at >= self.min_refresh_s:
+            missing = (now_ms - int(buf.last_ts)) // BASE_MS + 2
+            if missing > PAGE_LIMIT and self.fetch_page is not None:
+                for page in iter_pages(self.fetch_page, symbol, "1m", int(buf.last_ts), now_ms):
+                    buf.update(page)
+                    self.stats["requests"] += 1
+            else:
+                buf.update(self.fetch_base(symbol, int(min(missing, PAGE_LIMIT))))
+                self.stats["requests"] += 1
+        else:
+            return
+        buf.refreshed_at = now
+
+    def raw_slice(self, symbol: str, marco: str, limit: int) -> Optional[pd.DataFrame]:
+        """Últimas `limit` velas de `marco` desde el buffer de 1m, o None si no es servible."""
+        try:
+            step = interval_ms(marco)
+        except ValueError:
+            return None
+        need_ms = (int(limit) + 1) * step
+        max_ms = self.capacity_minutes * BASE_MS if self.fetch_page is not None else PAGE_LIMIT * BASE_MS
+        if step % BASE_MS or need_ms > max_ms:
+            self.stats["fallbacks"] += 1
+            return None
+        buf = self._buffer(symbol.upper())
+        with buf.lock:
+            self._refresh(symbol.upper(), buf, need_ms)
+            out = buf.frame(step, limit)
+        self.stats["served"] += 1
+        return out
+
+    def metrics(self) -> dict:
+        with self._lock:
+            buffers = {sym: {"rows": len(buf.base), "first_ts": buf.first_ts, "last_ts": buf.last_ts,
+                             "intervals": sorted(buf._frames)} for sym, buf in self._buffers.items()}
+        return {**self.stats, "buffers": buffers}
@@ -0,0 +1,224 @@
+"""Planificador único por deadlines para los trabajos de fondo del bot.
+
+Un hilo despachador mantiene un heap ordenado por deadline y entrega cada
+tarea vencida a un pool pequeño de workers. Sustituye a los hilos que solo
+dormían (TTL de scalping, snapshot de fill, heartbeat, resumen diario, sync de
+PnL) y registra lag (inicio real - deadline) y duración por nombre de tarea.
+
+`stop()` no descarta nada: las periódicas se replanifican aunque el planificador
+esté parado y lo que quedaba en la cola del pool vuelve al heap, así que tras un
+stop/start (lifespan de tests, recargas) siguen corriendo.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class ScheduledTask:
+    name: str
+    deadline: float
+    fn: Callable[..., Any]
+    args: tuple = ()
+    kwargs: dict = field(default_factory=dict)
+    interval: Optional[float] = None
+    next_deadline: Optional[Callable[[float], float]] = None
+    cancelled: bool = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class _TaskStats:
+    __slots__ = ("runs", "errors", "lag_last", "lag_max", "lag_sum", "dur_last", "dur_max", "dur_sum")
+
+    def __init__(self):
+        self.runs = 0
+        self.errors = 0
+        self.lag_last = self.lag_max = self.lag_sum = 0.0
+        self.dur_last = self.dur_max = self.dur_sum = 0.0
+
+    def record(self, lag: float, duration: float, ok: bool) -> None:
+        self.runs += 1
+        if not ok:
+            self.errors += 1
+        self.lag_last = lag
+        self.lag_max = max(self.lag_max, lag)
+        self.lag_sum += lag
+        self.dur_last = duration
+        self.dur_max = max(self.dur_max, duration)
+        self.dur_sum += duration
+
+    def as_dict(self) -> dict:
+        runs = max(1, self.runs)
+        return {
+            "runs": self.runs,
+            "errors": self.errors,
+            "lag_ms_last": round(self.lag_last * 1000, 3),
+            "lag_ms_max": round(self.lag_max * 1000, 3),
+            "lag_ms_avg": round(self.lag_sum / runs * 1000, 3),
+            "duration_ms_last": round(self.dur_last * 1000, 3),
+            "duration_ms_max": round(self.dur_max * 1000, 3),
+            "duration_ms_avg": round(self.dur_sum / runs * 1000, 3),
+        }
+
+
+class Scheduler:
+    def __init__(self, workers: int = 2, clock: Callable[[], float] = time.time, name: str = "sls-scheduler"):
+        self.workers = max(1, workers)
+        self.clock = clock
+        self.name = name
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._stats: Dict[str, _TaskStats] = {}
+        self._stats_lock = threading.Lock()
+
+    # ----- alta de tareas -----
+    def _push(self, task: ScheduledTask) -> ScheduledTask:
+        with self._cond:
+            heapq.heappush(self._heap, (task.deadline, next(self._seq), task))
+            self._cond.notify()
+        return task
+
+    def call_at(self, deadline: float, fn: Callable[..., Any], *args, name: Optional[str] = None, **kwargs) -> ScheduledTask:
+        return self._push(ScheduledTask(name or getattr(fn, "__name__", "task"), float(deadline), fn, args, kwargs))
+
+    def call_later(self, delay: float, fn: Callable[..., Any], *args, name: Optional[str] = None, **kwargs) -> ScheduledTask:
+        return self.call_at(self.clock() + max(0.0, delay), fn, *args, name=name, **kwargs)
+
+    def every(self, interval: float, fn: Callable[..., Any], *args, name: Optional[str] = None,
+              first_delay: Optional[float] = None, **kwargs) -> ScheduledTask:
+        """Tarea periódica; la siguiente ejecución se planifica al terminar (sin solapes)."""
+        interval = max(0.001, float(interval))
+        delay = interval if first_delay is None else max(0.0, first_delay)
+        task = ScheduledTask(name or getattr(fn, "__name__", "task"), self.clock() + delay, fn, args, kwargs, interval=interval)
+        return self._push(task)
+
+    def daily_at(self, hour: int, minute: int, second: int, fn: Callable[..., Any], *args,
+                 name: Optional[str] = None, **kwargs) -> ScheduledTask:
+        """Tarea diaria a la hora local indicada (mismo criterio que el resumen diario)."""
+
+        def _next(after: float) -> float:
+            now = datetime.fromtimestamp(after)
+            target = now.replace(hour=hour, minute=minute, second=second, microsecond=0)
+            if target <= now:
+                target = target + timedelta(days=1)
+            return target.timestamp()
+
+        task = ScheduledTask(name or getattr(fn, "__name__", "task"), _next(self.clock()), fn, args, kwargs, next_deadline=_next)
+        return self._push(task)
+
+    # ----- ejecución -----
+    def _run_task(self, task: ScheduledTask) -> None:
+        started = self.clock()
+        lag = max(0.0, started - task.deadline)
+        t0 = time.perf_counter()
+        ok = True
+        try:
+            task.fn(*task.args, **task.kwargs)
+        except Exception:
+            ok = False
+            log.debug("scheduled task %s failed", task.name, exc_info=True)
+        duration = time.perf_counter() - t0
+        with self._stats_lock:
+            self._stats.setdefault(task.name, _TaskStats()).record(lag, duration, ok)
+        if task.cancelled:
+            return
+        if task.interval is not None:
+            deadline = task.deadline + task.interval
+            now = self.clock()
+            if deadline <= now:
+                # nos atrasamos: saltamos los ticks perdidos en vez de encadenarlos
+                deadline += ((now - deadline) // task.interval + 1) * task.interval
+            task.deadline = deadline
+            self._push(task)
+        elif task.next_deadline is not None:
+            task.deadline = task.next_deadline(max(self.clock(), task.deadline + 1))
+            self._push(task)
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._running:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    wait = self._heap[0][0] - self.clock()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(timeout=wait)
+                if not self._running:
+                    return
+                _, _, task = heapq.heappop(self._heap)
+            if task.cancelled:
+                continue
+            try:
+                future = self._pool.submit(self._run_task, task)
+            except RuntimeError:
+                self._push(task)
+                return
+            future.add_done_callback(lambda fut, task=task: self._requeue_if_cancelled(fut, task))
+
+    def _requeue_if_cancelled(self, future, task: ScheduledTask) -> None:
+        # stop() cancela lo que esperaba en el pool: vuelve al heap para el próximo start()
+        if future.cancelled() and not task.cancelled:
+            self._push(task)
+
+    def run_pending(self) -> int:
+        """Ejecuta en el hilo actual las tareas ya vencidas (tests / modo sin hilos)."""
+        executed = 0
+        while True:
+            with self._cond:
+                if not self._heap or self._heap[0][0] > self.clock():
+                    return executed
+                _, _, task = heapq.heappop(self._heap)
+            if task.cancelled:
+                continue
+            was_running = self._running
+            self._running = True
+            try:
+                self._run_task(task)
+            finally:
+                self._running = was_running
+            executed += 1
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{self.name}-worker")
+        self._thread = threading.Thread(target=self._dispatch_loop, daemon=True, name=self.name)
+        self._thread.start()
+
+    def stop(self, wait: bool = False) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    # ----- métricas -----
+    def pending(self) -> int:
+        with self._cond:
+            return sum(1 for _, _, task in self._heap if not task.cancelled)
+
+    def metrics(self) -> dict:
+        with self._stats_lock:
+            tasks = {name: stats.as_dict() for name, stats in sorted(self._stats.items())}
+        return {"running": self._running, "workers": self.workers, "pending": self.pending(), "tasks": tasks}
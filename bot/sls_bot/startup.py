@@ -0,0 +1,83 @@
+"""
+Fases de arranque medidas para `sls_bot.app` y la API de control.
+
+`checkpoint(nombre)` anota el tramo síncrono transcurrido desde el anterior
+(imports, config, clientes, rutas...). `background({...})` lanza en hilos
+daemon lo que no debe retrasar el primer `/health` (sync de hora, warmups de
+imports pesados, loop del Cerebro) y registra estado y duración de cada
+tarea. `snapshot()` es lo que sirve `GET /startup`.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+_T0 = time.perf_counter()  # primer import del módulo ≈ inicio del import de la app
+
+
+class StartupReport:
+    def __init__(self, service: str, t0: Optional[float] = None):
+        self.service = service
+        self._t0 = _T0 if t0 is None else t0
+        self._last = self._t0
+        self._lock = threading.Lock()
+        self.phases: Dict[str, float] = {}
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        self.ready_ms: Optional[float] = None
+
+    def _elapsed_ms(self, since: float) -> float:
+        return round((time.perf_counter() - since) * 1000.0, 2)
+
+    def checkpoint(self, name: str) -> float:
+        """Cierra el tramo `name` (desde el checkpoint anterior) y devuelve sus ms."""
+        now = time.perf_counter()
+        with self._lock:
+            ms = round((now - self._last) * 1000.0, 2)
+            self.phases[name] = round(self.phases.get(name, 0.0) + ms, 2)
+            self._last = now
+        return ms
+
+    def mark_ready(self) -> float:
+        """Lista para servir: ms desde el inicio del import hasta aquí."""
+        self.checkpoint("lifespan")
+        self.ready_ms = self._elapsed_ms(self._t0)
+        log.info("%s listo en %.1f ms (fases=%s)", self.service, self.ready_ms, self.phases)
+        return self.ready_ms
+
+    def background(self, tasks: Dict[str, Callable[[], Any]]) -> Dict[str, threading.Thread]:
+        """Ejecuta cada tarea en su hilo daemon; los fallos se anotan, nunca se propagan."""
+        threads: Dict[str, threading.Thread] = {}
+        for name, fn in tasks.items():
+            with self._lock:
+                self.tasks[name] = {"status": "running", "ms": None}
+
+            def _run(name: str = name, fn: Callable[[], Any] = fn) -> None:
+                started = time.perf_counter()
+                status, error = "ok", None
+                try:
+                    fn()
+                except Exception as exc:  # warmup fallido: se reintenta en el primer uso real
+                    status, error = "error", f"{type(exc).__name__}: {exc}"
+                    log.warning("tarea de arranque %s falló: %s", name, error)
+                with self._lock:
+                    self.tasks[name] = {"status": status, "ms": self._elapsed_ms(started), "error": error}
+
+            thread = threading.Thread(target=_run, daemon=True, name=f"startup-{name}")
+            thread.start()
+            threads[name] = thread
+        return threads
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "service": self.service,
+                "phases_ms": dict(self.phases),
+                "ready_ms": self.ready_ms,
+                "background": {name: dict(info) for name, info in self.tasks.items()},
+                "uptime_s": round(time.perf_counter() - self._t0, 3),
+            }
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from typing import Any, Dict, Tuple
 
 import numpy as np
+import pandas as pd
 
 from ..ia_utils import latest_slice
 
@@ -220,6 +221,99 @@ class ScalpingStrategy:
 
         return ScalpingDecision(payload=payload, evidences=evid, metadata=metadata)
 
+    def score_frame(self, df: pd.DataFrame, anchor: pd.DataFrame | None = None, symbol: str = "") -> pd.DataFrame:
+        """Versión vectorizada de `decide` sobre todas las velas de `df`.
+
+        `df` debe traer los indicadores de `compute_indicators`; `anchor` (opcional)
+        las columnas `close`, `ema_mid` y `rsi` del timeframe ancla ya alineadas
+        fila a fila con `df`. Cada fila reproduce lo que `decide` devolvería si esa
+        vela fuese la última de la ventana.
+        """
+        close = df["close"].to_numpy(dtype=float)
+        ema_fast = df["ema_fast"]
+        ema_mid = df["ema_mid"].to_numpy(dtype=float)
+        ema_slow = df["ema_slow"].to_numpy(dtype=float)
+        atr = df["atr"].to_numpy(dtype=float)
+
+        # decide usa iloc[-8] sobre la ventana: 7 velas hacia atrás
+        ema_slope = (ema_fast - ema_fast.shift(7)).fillna(0.0).to_numpy(dtype=float)
+        ema_slope_bps = ema_slope / close * 10000.0
+
+        if anchor is not None:
+            a_close = anchor["close"].to_numpy(dtype=float)
+            a_mid = anchor["ema_mid"].to_numpy(dtype=float)
+            a_rsi = anchor["rsi"].to_numpy(dtype=float)
+            has_anchor = np.isfinite(a_close) & np.isfinite(a_mid) & np.isfinite(a_rsi)
+            anchor_trend = np.where(has_anchor, np.where(a_close > a_mid, 1.0, -1.0), 0.0)
+            anchor_momentum = np.where(has_anchor, np.tanh(np.nan_to_num(a_rsi - 50.0) / 20.0), 0.0)
+        else:
+            anchor_trend = np.zeros(len(df))
+            anchor_momentum = np.zeros(len(df))
+
+        def _norm(values: np.ndarray, low: float, high: float) -> np.ndarray:
+            if high - low <= 0:
+                return np.zeros_like(values)
+            return np.clip((values - low) / (high - low), 0.0, 1.0)
+
+        slope_score = _norm(np.abs(ema_slope_bps), 0.5, 8.0) * 0.2
+        micro_long = np.where((close > ema_mid) & (ema_mid > ema_slow), 0.35, 0.0) + np.where(ema_slope_bps > 0, slope_score, 0.0)
+        micro_short = np.where((close < ema_mid) & (ema_mid < ema_slow), 0.35, 0.0) + np.where(ema_slope_bps > 0, 0.0, slope_score)
+
+        breakout_bonus = np.where(df["breakout_up"].to_numpy() == 1, 0.1, 0.0)
+        breakdown_bonus = np.where(df["breakout_dn"].to_numpy() == 1, 0.1, 0.0)
+
+        atr_bps = atr / close * 10000.0
+        volatility_score = _norm(atr_bps, self.volatility_min, self.volatility_max)
+
+        recent_range = df["range_pct"].rolling(20, min_periods=1).mean().fillna(0.0).to_numpy(dtype=float)
+        compression = _norm(60 - recent_range, 0, 40)
+
+        volume = df["volume"]
+        volume_mean = volume.rolling(self.volume_window, min_periods=1).mean().to_numpy(dtype=float)
+        volume_mean = np.where(np.isfinite(volume_mean) & (volume_mean > 0), volume_mean, 1.0)
+        volume_ratio = volume.to_numpy(dtype=float) / volume_mean
+        liquidity_score = _norm(volume_ratio, 0.8, 2.5)
+
+        anchor_bias = 0.15 * anchor_trend
+        anchor_momo = 0.1 * anchor_momentum
+        common = volatility_score * 0.2 + liquidity_score * 0.15
+        avwap = df["avwap"].to_numpy(dtype=float)
+        long_score = micro_long + breakout_bonus + common + np.maximum(0.0, anchor_bias) + np.maximum(0.0, anchor_momo)
+        short_score = micro_short + breakdown_bonus + common + np.maximum(0.0, -anchor_bias) + np.maximum(0.0, -anchor_momo)
+        long_score = long_score + np.where(close > avwap, compression * 0.1, 0.0)
+        short_score = short_score + np.where(close < avwap, compression * 0.1, 0.0)
+
+        direction = np.where(long_score >= short_score, 1, -1)
+        confidence_norm = np.clip(np.maximum(long_score, short_score), 0.0, 1.5) / 1.5
+        confident = confidence_norm >= self.conf_threshold
+        forced = ~confident & (confidence_norm >= self.force_trade_conf)
+
+        riesgo = np.full(len(df), self.base_risk_pct)
+        leverage = self.base_leverage
+        if symbol.upper() in self.aggressive_symbols:
+            riesgo = riesgo * 1.15
+            leverage = max(leverage, self.base_leverage + 3)
+        riesgo = np.where(volatility_score < 0.3, riesgo * 0.6, np.where(volatility_score > 0.8, riesgo * 0.85, riesgo))
+        fee_ratio = self.fee_bps_round_trip / 10000.0
+        riesgo = np.maximum(self.min_risk_pct, riesgo - fee_ratio * leverage)
+        riesgo = np.where(forced, np.maximum(self.min_risk_pct, riesgo * 0.5), riesgo)
+        riesgo = np.clip(riesgo, 0.1, 2.5)
+
+        atr_levels = np.where(atr > 0, atr, close * 0.004)
+        return pd.DataFrame({
+            "long_score": long_score,
+            "short_score": short_score,
+            "confidence_norm": confidence_norm,
+            "direction": direction,
+            "signal": np.where(confident | forced, direction, 0),
+            "forced_entry": forced,
+            "risk_pct": riesgo,
+            "leverage": max(1, min(leverage, 30)),
+            "stop_distance": atr_levels * self.atr_stop_mult,
+            "tp_distance": atr_levels * self.atr_tp_mult + close * fee_ratio,
+            "volatility_score": volatility_score,
+        }, index=df.index)
+
     def _force_timeframe(self, marco: str) -> bool:
         if not self.allowed_timeframes:
             return True
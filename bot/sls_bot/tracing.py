@@ -0,0 +1,233 @@
+"""
+Trazas en proceso para el pipeline del webhook.
+
+`TRACER.trace("webhook", symbol=...)` abre una traza (según `sample_rate`) y
+`TRACER.span("guardrails")` registra cada etapa dentro de ella con su inicio
+relativo, duración, atributos y error si lo hubo. Sin traza activa, `span()`
+devuelve un span nulo y no mide nada, así que el coste con muestreo bajo es
+despreciable.
+
+Las trazas terminadas van a un buffer circular (`recent()`, expuesto en
+`GET /traces`) y, si hay `export_path`, también a un JSONL rotado con
+`log_manager`.
+
+Configuración: bloque `tracing` del config (`sample_rate`, `buffer_size`,
+`export_path`) o `SLS_TRACE_SAMPLE_RATE`, `SLS_TRACE_BUFFER`,
+`SLS_TRACE_EXPORT`.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from .log_manager import get_log
+
+
+class Span:
+    __slots__ = ("name", "parent", "start", "end", "attrs", "error")
+
+    def __init__(self, name: str, parent: Optional[int], start: float, attrs: Dict[str, Any]):
+        self.name = name
+        self.parent = parent
+        self.start = start
+        self.end: Optional[float] = None
+        self.attrs = attrs
+        self.error: Optional[str] = None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Trace:
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.ts = time.time()
+        self.t0 = time.perf_counter()
+        self.spans: List[Span] = [Span(name, None, 0.0, attrs)]
+        self.stack: List[int] = [0]
+
+    def to_dict(self) -> dict:
+        root = self.spans[0]
+        spans = []
+        for idx, span in enumerate(self.spans[1:], start=1):
+            item = {
+                "id": idx,
+                "name": span.name,
+                "parent": span.parent,
+                "start_ms": round(span.start * 1000.0, 3),
+                "duration_ms": round(((span.end or span.start) - span.start) * 1000.0, 3),
+            }
+            if span.attrs:
+                item["attrs"] = span.attrs
+            if span.error:
+                item["error"] = span.error
+            spans.append(item)
+        out = {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "ts": round(self.ts, 3),
+            "duration_ms": round(((root.end or 0.0) - root.start) * 1000.0, 3),
+            "attrs": root.attrs,
+            "spans": spans,
+        }
+        if root.error:
+            out["error"] = root.error
+        return out
+
+
+_CURRENT: ContextVar[Optional[_Trace]] = ContextVar("sls_trace", default=None)
+
+
+class Tracer:
+    def __init__(self, sample_rate: float = 0.0, buffer_size: int = 200, export_path: Optional[Path | str] = None,
+                 rng: Optional[random.Random] = None):
+        self.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        self.export_path = Path(export_path) if export_path else None
+        self._buffer: Deque[dict] = deque(maxlen=max(1, int(buffer_size)))
+        self._lock = threading.Lock()
+        self._rng = rng or random.Random()
+        self.stats = {"started": 0, "skipped": 0, "exported": 0}
+
+    @classmethod
+    def from_config(cls, cfg: Optional[dict] = None) -> "Tracer":
+        tcfg = (cfg or {}).get("tracing") or {}
+        return cls(
+            sample_rate=float(os.getenv("SLS_TRACE_SAMPLE_RATE", tcfg.get("sample_rate", 0.0))),
+            buffer_size=int(os.getenv("SLS_TRACE_BUFFER", tcfg.get("buffer_size", 200))),
+            export_path=os.getenv("SLS_TRACE_EXPORT") or tcfg.get("export_path") or None,
+        )
+
+    def configure(self, *, sample_rate: Optional[float] = None, export_path: Optional[Path | str] = None) -> None:
+        if sample_rate is not None:
+            self.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        if export_path is not None:
+            self.export_path = Path(export_path) if export_path else None
+
+    def _sampled(self, force: bool) -> bool:
+        return force or (self.sample_rate > 0 and (self.sample_rate >= 1.0 or self._rng.random() < self.sample_rate))
+
+    @contextmanager
+    def trace(self, name: str, force: bool = False, **attrs: Any) -> Iterator[Span | _NullSpan]:
+        """Traza raíz; si no se muestrea (o ya hay una activa) se comporta como `span()`."""
+        if _CURRENT.get() is not None:
+            with self.span(name, **attrs) as span:
+                yield span
+            return
+        if not self._sampled(force):
+            self.stats["skipped"] += 1
+            yield NULL_SPAN
+            return
+        self.stats["started"] += 1
+        current = _Trace(name, attrs)
+        token = _CURRENT.set(current)
+        root = current.spans[0]
+        try:
+            yield root
+        except BaseException as exc:
+            root.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            root.end = time.perf_counter() - current.t0
+            _CURRENT.reset(token)
+            self._finish(current)
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span | _NullSpan]:
+        current = _CURRENT.get()
+        if current is None:
+            yield NULL_SPAN
+            return
+        span = Span(name, current.stack[-1], time.perf_counter() - current.t0, attrs)
+        current.spans.append(span)
+        current.stack.append(len(current.spans) - 1)
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            span.end = time.perf_counter() - current.t0
+            current.stack.pop()
+
+    def record(self, name: str, started: float, **attrs: Any) -> None:
+        """Span ya terminado (inicio `started` en `perf_counter`, fin ahora) bajo el span actual."""
+        current = _CURRENT.get()
+        if current is None:
+            return
+        span = Span(name, current.stack[-1], started - current.t0, attrs)
+        span.end = time.perf_counter() - current.t0
+        current.spans.append(span)
+
+    def _finish(self, current: _Trace) -> None:
+        record = current.to_dict()
+        with self._lock:
+            self._buffer.append(record)
+        if self.export_path is not None:
+            try:
+                get_log(self.export_path).append(record)
+                self.stats["exported"] += 1
+            except Exception:
+                pass
+
+    def recent(self, limit: int = 50, min_ms: float = 0.0, span: Optional[str] = None) -> List[dict]:
+        """Últimas trazas (más nuevas primero); `span` filtra por etapa y `min_ms` por su duración."""
+        with self._lock:
+            items = list(self._buffer)
+        out = []
+        for record in reversed(items):
+            if span:
+                durations = [s["duration_ms"] for s in record["spans"] if s["name"] == span]
+                if not durations or max(durations) < min_ms:
+                    continue
+            elif record["duration_ms"] < min_ms:
+                continue
+            out.append(record)
+            if len(out) >= limit:
+                break
+        return out
+
+    def summary(self) -> Dict[str, Any]:
+        """p50/p95/máx por etapa sobre lo que hay en el buffer."""
+        with self._lock:
+            items = list(self._buffer)
+        per_stage: Dict[str, List[float]] = {}
+        for record in items:
+            per_stage.setdefault(record["name"], []).append(record["duration_ms"])
+            for span in record["spans"]:
+                per_stage.setdefault(span["name"], []).append(span["duration_ms"])
+        stages = {}
+        for name, values in per_stage.items():
+            values.sort()
+            stages[name] = {
+                "count": len(values),
+                "p50_ms": values[len(values) // 2],
+                "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))],
+                "max_ms": values[-1],
+            }
+        return {"sample_rate": self.sample_rate, "buffered": len(items), **self.stats, "stages": stages}
+
+
+def current_span() -> Span | _NullSpan:
+    current = _CURRENT.get()
+    if current is None:
+        return NULL_SPAN
+    return current.spans[current.stack[-1]]
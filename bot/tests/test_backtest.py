@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bot.sls_bot import backtest
+from bot.sls_bot.ia_utils import compute_indicators
+from bot.sls_bot.strategies import scalping
+from scripts.tools import arena_rank
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_score_frame_matches_decide_on_last_bar(monkeypatch, make_klines):
+    df = compute_indicators(backtest.normalize_klines(make_klines(900, price=30000.0, vol=0.0009)))
+    anchor_df = compute_indicators(backtest.resample_klines(backtest.normalize_klines(make_klines(9000, price=30000.0, vol=0.0009)), "15m"))
+    anchor_last = anchor_df.iloc[-1]
+
+    def _fake_slice(symbol, marco, limit=600):
+        return (anchor_df, anchor_last) if marco == "15m" else (df, df.iloc[-1])
+
+    monkeypatch.setattr(scalping, "latest_slice", _fake_slice)
+    strategy = scalping.ScalpingStrategy({"volume_window": 60})
+    decision = strategy.decide(symbol="BTCUSDT", marco="1m", riesgo_pct_user=None, leverage_user=None)
+
+    anchor_rows = pd.DataFrame({col: np.full(len(df), float(anchor_last[col])) for col in ("close", "ema_mid", "rsi")})
+    scores = strategy.score_frame(df, anchor_rows, symbol="BTCUSDT").iloc[-1]
+    assert scores["long_score"] == pytest.approx(decision.evidences["scores"]["long"], abs=1e-3)
+    assert scores["short_score"] == pytest.approx(decision.evidences["scores"]["short"], abs=1e-3)
+    assert scores["risk_pct"] == pytest.approx(decision.payload["riesgo_pct"], abs=1e-3)
+    expected = {"LONG": 1, "SHORT": -1, "NO_TRADE": 0}[decision.payload["decision"]]
+    assert scores["signal"] == expected
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_run_backtest_emits_arena_stats(make_klines):
+    klines = make_klines(3000, price=30000.0, vol=0.0009)
+    config = {"confidence_threshold": 0.55, "force_trade_confidence": 0.45, "max_hold_minutes": 20}
+    result = backtest.run_backtest(klines, config, symbol="BTCUSDT")
+
+    trades = result.trades
+    assert result.stats["trades"] == len(trades) > 0
+    # nunca hay dos posiciones abiertas a la vez
+    assert (trades["entry_idx"].to_numpy()[1:] > trades["exit_idx"].to_numpy()[:-1]).all()
+    assert ((trades["exit_idx"] - trades["entry_idx"]) < 20).all()
+    assert len(result.equity) == len(trades) + 1
+
+    record = backtest.arena_record(result, name="bt", symbol="BTCUSDT", timeframe="1m", config=config, klines=klines)
+    extracted = arena_rank.extract_stats(record)
+    assert extracted["trades"] == result.stats["trades"]
+    assert extracted["max_drawdown"] == result.stats["max_drawdown"]
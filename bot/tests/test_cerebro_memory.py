@@ -0,0 +1,65 @@
+import json
+import random
+from types import SimpleNamespace
+
+import pytest
+
+import cerebro.policy as policy_module
+from cerebro.memory import Experience, ExperienceMemory
+from cerebro.policy import PolicyEnsemble
+
+
+def _brute(buffer, key=None, value=None):
+    rows = [e for e in buffer if key is None or getattr(e, key) == value]
+    wins = sum(1 for e in rows if e.pnl > 0)
+    losses = sum(1 for e in rows if e.pnl < 0)
+    return {"total": len(rows), "wins": wins, "losses": losses, "win_rate": wins / len(rows) if rows else 0.0}
+
+
+def test_running_counters_match_full_scan_after_evictions():
+    rng = random.Random(3)
+    memory = ExperienceMemory(maxlen=50)
+    for _ in range(400):
+        memory.push(Experience(symbol=rng.choice(["btcusdt", "ETHUSDT", "SOLUSDT"]), timeframe=rng.choice(["15m", "1h"]),
+                               pnl=rng.choice([-1.0, 0.0, 2.0]), features={}, decision="LONG"))
+    stats = memory.stats()
+    assert {k: stats[k] for k in ("total", "wins", "losses", "win_rate")} == _brute(memory.buffer)
+    for symbol, sym_stats in stats["by_symbol"].items():
+        assert sym_stats == _brute([e for e in memory.buffer if e.symbol.upper() == symbol])
+    for tf, tf_stats in stats["by_timeframe"].items():
+        assert tf_stats == _brute(memory.buffer, "timeframe", tf)
+    assert sum(s["total"] for s in stats["by_symbol"].values()) == 50
+    assert memory.symbol_stats("BTCUSDT") == stats["by_symbol"]["BTCUSDT"]
+    assert memory.symbol_stats("DOGEUSDT")["total"] == 0
+
+
+def test_load_lines_reads_experience_log_tail():
+    lines = [json.dumps({"symbol": "BTCUSDT", "timeframe": "15m", "pnl": pnl, "decision": "LONG", "mode": mode})
+             for pnl, mode in ((1.0, "test"), (-1.0, "test"), (3.0, "real"), (2.0, None))]
+    memory = ExperienceMemory(maxlen=2)
+    assert memory.load_lines(lines + ["", "{roto", json.dumps({"pnl": 1})], mode="test") == 3
+    assert [e.pnl for e in memory.buffer] == [-1.0, 2.0]
+    assert memory.stats()["by_symbol"]["BTCUSDT"]["wins"] == 1
+
+
+def test_policy_prefers_symbol_win_rate(monkeypatch):
+    payload = {"decision": "LONG", "confianza_pct": 80, "riesgo_pct": 1.0, "leverage": 5, "resumen": ""}
+    engine = SimpleNamespace(decide=lambda **_: (payload, {"rules": {"long": 0.6, "short": 0.1}}, {}))
+    monkeypatch.setattr(policy_module, "_signal_engine", lambda: engine)
+    policy = PolicyEnsemble(min_confidence=0.55, sl_atr=1.5, tp_atr=2.0, model_path=None)
+    memory = ExperienceMemory()
+    for i in range(40):
+        memory.push(Experience(symbol="BTCUSDT", timeframe="15m", pnl=1.0 if i % 4 else -1.0, features={}, decision="LONG"))
+        memory.push(Experience(symbol="ETHUSDT", timeframe="15m", pnl=-1.0, features={}, decision="LONG"))
+    for i in range(5):
+        memory.push(Experience(symbol="SOLUSDT", timeframe="15m", pnl=1.0, features={}, decision="LONG"))
+
+    def _decide(symbol):
+        return policy.decide(symbol=symbol, timeframe="15m", market_row={"close": 100.0, "atr": 1.0},
+                             memory_stats=memory.stats())
+
+    btc, eth, sol = _decide("BTCUSDT"), _decide("ETHUSDT"), _decide("SOLUSDT")
+    assert btc.risk_pct == 1.25 and btc.metadata["memory_symbol_win_rate"] == 0.75
+    assert eth.risk_pct == 0.5
+    assert sol.risk_pct == pytest.approx(0.5 + 35 / 85) and sol.metadata["memory_symbol_trades"] == 5  # pocas: global
+    assert any("win_rate global" in reason for reason in sol.reasons)
@@ -0,0 +1,110 @@
+import struct
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import cerebro.service as service
+from cerebro import snapshot
+from cerebro.config import CerebroConfig
+from cerebro.policy import PolicyDecision
+
+
+def _decision(symbol: str, timeframe: str, market_row: dict, **_) -> PolicyDecision:
+    return PolicyDecision(
+        symbol=symbol, timeframe=timeframe, action="LONG", confidence=0.7, risk_pct=1.0, leverage=5,
+        summary="", evidences={}, price=market_row["close"], stop_loss=1.0, take_profit=2.0,
+        metadata={"memory_win_rate": 0.5}, reasons=["test"],
+    )
+
+
+@pytest.fixture
+def make_cerebro(tmp_path, monkeypatch):
+    monkeypatch.setattr(service, "SNAPSHOT_PATH", tmp_path / "cerebro_state.snap")
+    monkeypatch.setattr(service, "DECISIONS_LOG", tmp_path / "decisions.jsonl")
+    monkeypatch.setattr(service, "EXPERIENCE_LOG", tmp_path / "experience.jsonl")
+
+    def _make(**overrides) -> service.Cerebro:
+        cfg = CerebroConfig(**{"enabled": True, "symbols": ["BTCUSDT"], "timeframes": ["15m", "1h"], **overrides})
+        cerebro = service.Cerebro(cfg)
+        rows = [{"close": np.float64(100 + i), "atr": np.float64(1.5), "breakout_up": np.int64(i % 2)} for i in range(5)]
+        monkeypatch.setattr(cerebro.market_source, "fetch", lambda **_: rows)
+        monkeypatch.setattr(cerebro.policy, "decide", _decision)
+        cerebro.whale_watcher = None
+        return cerebro
+
+    return _make
+
+
+def test_snapshot_roundtrip_restores_state(make_cerebro, monkeypatch, tmp_path):
+    first = make_cerebro()
+    first.run_cycle()
+    for pnl in (1.0, -0.5, 2.0):
+        first.register_trade(symbol="BTCUSDT", timeframe="15m", pnl=pnl, features={"confidence": 0.7}, decision="LONG")
+    assert first.save_snapshot() > 0
+
+    second = make_cerebro()
+    restored = second.get_status()["snapshot"]["restored"]
+    assert restored["decisions"] == 2 and restored["history"] == 2
+    # la memoria sale del log de experiencias; el snapshot no la duplica
+    assert restored["memory"] == 0 and second.memory.stats()["wins"] == 2 and len(second.memory.buffer) == 3
+    assert second.feature_store.latest("BTCUSDT", "1h").data[-1] == {"close": 104.0, "atr": 1.5, "breakout_up": 0}
+    assert second.latest_decision("BTCUSDT", "15m") == first.latest_decision("BTCUSDT", "15m")
+
+    monkeypatch.setattr(service, "EXPERIENCE_LOG", tmp_path / "missing.jsonl")
+    third = make_cerebro()
+    assert third.get_status()["snapshot"]["restored"]["memory"] == 3
+
+
+def test_stale_snapshot_keeps_memory_but_drops_market_state(make_cerebro):
+    first = make_cerebro()
+    first.run_cycle()
+    first.register_trade(symbol="BTCUSDT", timeframe="15m", pnl=1.0, features={}, decision="LONG")
+    state_path = service.SNAPSHOT_PATH
+    first.save_snapshot()
+    created, state = snapshot.load(state_path)
+    snapshot.dump(state_path, state, created_at=created - 3600)
+
+    second = make_cerebro(snapshot_max_age_minutes=30)
+    assert len(second.memory.buffer) == 1
+    assert second.latest_decision("BTCUSDT", "15m") is None and not second.feature_store.stats()
+
+    snapshot.dump(state_path, state, created_at=created)
+    third = make_cerebro(timeframes=["15m", "5m"])  # pares fuera de la config no se restauran
+    assert set(third.feature_store.stats()) == {"BTCUSDT::15m"}
+
+
+def test_invalid_snapshots_are_ignored(tmp_path):
+    path = tmp_path / "state.snap"
+    snapshot.dump(path, {"mode": "test"})
+    assert snapshot.load(path)[1] == {"mode": "test"}
+
+    blob = bytearray(path.read_bytes())
+    blob[-1] ^= 0xFF
+    path.write_bytes(bytes(blob))
+    assert snapshot.load(path) is None
+
+    header = struct.Struct("<8sHdI")
+    path.write_bytes(header.pack(snapshot.MAGIC, snapshot.SNAPSHOT_VERSION + 1, time.time(), 0))
+    assert snapshot.load(path) is None
+    assert snapshot.load(tmp_path / "missing.snap") is None
+
+
+def test_get_cerebro_builds_a_single_instance_under_concurrency(monkeypatch):
+    built = []
+
+    class _Slow:
+        def __init__(self):
+            time.sleep(0.05)  # construcción lenta, como la real
+            built.append(self)
+
+    monkeypatch.setattr(service, "Cerebro", _Slow)
+    monkeypatch.setattr(service, "_singleton", None)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.get_cerebro())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1 and all(r is built[0] for r in results)
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from bot.sls_bot import feature_cache as fc
+from bot.sls_bot import ia_train
+from bot.sls_bot.ia_utils import compute_indicators
+
+STEP = 60_000
+T0 = 1_704_067_200_000
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_incremental_updates_match_full_computation(tmp_path, make_klines):
+    raw = make_klines(4000, seed=4, start_ms=T0)
+    cache = fc.FeatureCache(tmp_path, warmup_bars=1000)
+    # la última vela está en curso y no se cachea
+    now = int(raw["ts"].iloc[2999]) + STEP // 2
+    assert cache.update("BTCUSDT", "1m", raw.iloc[:3000], now_ms=now) > 0
+    assert cache.last_row("BTCUSDT", "1m")["ts"] == raw["ts"].iloc[2998]
+
+    for hi in range(3000, 4000, 50):
+        cache.update("BTCUSDT", "1m", raw.iloc[hi - 60:hi + 50], now_ms=int(raw["ts"].iloc[hi + 49]) + STEP)
+    meta = cache.meta("BTCUSDT", "1m")
+    assert len(meta["chunks"]) <= fc.MAX_CHUNKS
+
+    full = compute_indicators(raw)
+    cached = cache.frame("BTCUSDT", "1m")
+    assert cached["ts"].tolist() == full["ts"].tolist()
+    tail = slice(-800, None)
+    for col in ("rsi", "atr", "avwap", "breakout_up", "range_pct"):
+        assert np.allclose(cached[col].iloc[tail], full[col].iloc[tail], rtol=1e-9)
+    for col in ("ema_fast", "ema_mid", "ema_slow"):
+        assert np.allclose(cached[col].iloc[tail], full[col].iloc[tail], rtol=1e-5)
+
+    window = cache.frame("BTCUSDT", "1m", int(raw["ts"].iloc[3500]), int(raw["ts"].iloc[3509]))
+    assert len(window) == 10
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_version_bump_and_older_history_rebuild(tmp_path, monkeypatch, make_klines):
+    raw = make_klines(1500, seed=4, start_ms=T0)
+    cache = fc.FeatureCache(tmp_path)
+    cache.update("ETHUSDT", "1m", raw.iloc[500:], now_ms=T0 + 10**9)
+    first = cache.frame("ETHUSDT", "1m")["ts"].iloc[0]
+    cache.update("ETHUSDT", "1m", raw, now_ms=T0 + 10**9)  # histórico más antiguo -> reconstrucción
+    assert cache.frame("ETHUSDT", "1m")["ts"].iloc[0] < first
+
+    monkeypatch.setattr(fc, "INDICATOR_VERSION", 999)
+    assert cache.meta("ETHUSDT", "1m") == {}
+    assert cache.update("ETHUSDT", "1m", raw, now_ms=T0 + 10**9) > 0
+    assert (tmp_path / "ETHUSDT" / "1m" / "v999" / "meta.json").exists()
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_gap_after_downtime_rebuilds_instead_of_leaving_hole(tmp_path, make_klines):
+    raw = make_klines(4400, seed=4, start_ms=T0)
+    cache = fc.FeatureCache(tmp_path)
+    now = T0 + 10**9
+    cache.update("BTCUSDT", "1m", raw.iloc[:1000], now_ms=now)
+    assert cache.update("BTCUSDT", "1m", raw.iloc[2400:], now_ms=now) > 0  # hueco 1000..2399
+    ts = cache.frame("BTCUSDT", "1m")["ts"].to_numpy()
+    assert ts[0] >= raw["ts"].iloc[2400] and (np.diff(ts) == STEP).all()
+
+    assert cache.update("BTCUSDT", "1m", raw, now_ms=now) > 0  # histórico completo -> sin hueco
+    ts = cache.tail("BTCUSDT", "1m", 3000)["ts"].to_numpy()
+    assert len(ts) == 3000 and (np.diff(ts) == STEP).all()
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_ia_train_features_use_cache(tmp_path, monkeypatch, make_klines):
+    raw = make_klines(1200, seed=4, start_ms=T0)
+    monkeypatch.setenv("SLS_FEATURE_CACHE", str(tmp_path))
+    monkeypatch.setattr(ia_train, "_load_raw", lambda symbol, marco, rows: raw.tail(rows))
+    df = ia_train._features("BTCUSDT", "1m", 900)
+    expected = compute_indicators(raw.tail(900).reset_index(drop=True))
+    assert df["ts"].tolist() == expected["ts"].tolist()
+    assert np.allclose(df["dist_to_ema200_bps"], expected["dist_to_ema200_bps"])
+    assert fc.FeatureCache(tmp_path).meta("BTCUSDT", "1m")["chunks"]
@@ -206,3 +206,10 @@ def test_autopilot_summary_endpoint(tmp_path) -> None:
         assert payload["arena"]["accepted"][0]["name"] == "alpha"
     finally:
         api_main.AUTOPILOT_SUMMARY_JSON = prev
+
+
+def test_metrics_endpoint_exposes_http_histograms():
+    client.get("/health")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert 'sls_http_request_seconds_count{app="control",method="GET",route="/health",status="200"}' in resp.text
@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bot.sls_bot import ia_jobs, ia_train
+
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _fake_train(gate: threading.Event, models_dir):
+    def train_model(symbol, marco, thr=0.005, horizon=20, limit=3000, n_jobs=2, progress=None):
+        progress("dataset", 0.1)
+        while not gate.wait(0.01):
+            progress("fit", 0.4)
+        meta = models_dir / f"ia_model_{symbol}_{marco}.meta.pkl"
+        return {"ok": True, "metrics": {"auc": 0.6}, "paths": {"meta": str(meta)}}
+    return train_model
+
+
+def test_jobs_run_in_background_and_persist(tmp_path, monkeypatch):
+    gate = threading.Event()
+    monkeypatch.setattr(ia_train, "train_model", _fake_train(gate, tmp_path))
+    queue = ia_jobs.TrainJobQueue(tmp_path, host_slots=1, executor=ThreadPoolExecutor(max_workers=2))
+
+    job = queue.submit("btcusdt", "15m", limit=100)
+    assert job["status"] == "queued"
+    assert queue.submit("BTCUSDT", "15m")["deduplicated"] is True
+    assert _wait(lambda: queue.status(job["job_id"])["stage"] == "fit")
+    assert queue.status(job["job_id"])["status"] == "running"
+
+    gate.set()
+    assert _wait(lambda: queue.status(job["job_id"])["status"] == "done")
+    saved = json.loads((tmp_path / "jobs" / f"{job['job_id']}.json").read_text())
+    assert saved["result"]["metrics"]["auc"] == 0.6
+    beside = json.loads((tmp_path / "ia_model_BTCUSDT_15m.train.json").read_text())
+    assert beside["job_id"] == job["job_id"]
+    assert not (tmp_path / "jobs" / f"{job['job_id']}.progress.json").exists()
+
+    reloaded = ia_jobs.TrainJobQueue(tmp_path, executor=ThreadPoolExecutor(max_workers=1))
+    assert reloaded.status(job["job_id"])["status"] == "done"
+    queue.shutdown()
+
+
+def test_cancel_running_and_waiting_for_host_slot(tmp_path, monkeypatch):
+    gate = threading.Event()
+    monkeypatch.setattr(ia_train, "train_model", _fake_train(gate, tmp_path))
+    queue = ia_jobs.TrainJobQueue(tmp_path, host_slots=1, executor=ThreadPoolExecutor(max_workers=2))
+
+    first = queue.submit("BTCUSDT", "1m")
+    assert _wait(lambda: queue.status(first["job_id"])["stage"] == "fit")
+    second = queue.submit("ETHUSDT", "1m")
+    # el único slot del host está ocupado: el segundo espera sin empezar
+    assert _wait(lambda: queue.status(second["job_id"])["stage"] == "waiting_slot")
+    assert queue.status(second["job_id"])["status"] == "queued"
+
+    queue.cancel(second["job_id"])
+    assert _wait(lambda: queue.status(second["job_id"])["status"] == "cancelled")
+    queue.cancel(first["job_id"])
+    assert _wait(lambda: queue.status(first["job_id"])["status"] == "cancelled")
+    assert queue.metrics()["jobs"] == {"cancelled": 2}
+    queue.shutdown()
+
+
+def test_interrupted_jobs_are_marked_failed_on_reload(tmp_path):
+    jobs_dir = tmp_path / "jobs"
+    jobs_dir.mkdir()
+    (jobs_dir / "abc.json").write_text(json.dumps({"job_id": "abc", "symbol": "BTCUSDT", "marco": "1m",
+                                                   "status": "running", "submitted_at": "2024"}))
+    queue = ia_jobs.TrainJobQueue(tmp_path, executor=ThreadPoolExecutor(max_workers=1))
+    assert queue.status("abc")["status"] == "failed"
+    assert queue.list(status="failed")[0]["job_id"] == "abc"
+
+
+def test_second_worker_keeps_live_jobs_and_dedups_from_disk(tmp_path, monkeypatch):
+    gate = threading.Event()
+    monkeypatch.setattr(ia_train, "train_model", _fake_train(gate, tmp_path))
+    worker_a = ia_jobs.TrainJobQueue(tmp_path, host_slots=1, executor=ThreadPoolExecutor(max_workers=1))
+    job = worker_a.submit("BTCUSDT", "15m")
+    assert _wait(lambda: worker_a.status(job["job_id"])["stage"] == "fit")
+
+    # otro worker de uvicorn arranca su cola mientras A entrena
+    worker_b = ia_jobs.TrainJobQueue(tmp_path, host_slots=1, executor=ThreadPoolExecutor(max_workers=1))
+    try:
+        assert worker_b.status(job["job_id"])["status"] == "running"
+        again = worker_b.submit("BTCUSDT", "15m")
+        assert again["deduplicated"] is True and again["job_id"] == job["job_id"]
+    finally:
+        gate.set()
+    assert _wait(lambda: worker_b.status(job["job_id"])["status"] == "done")
+    worker_a.shutdown()
+    worker_b.shutdown()
+
+    # un job activo cuyo dueño ya no tiene el lock se da por interrumpido
+    dead = dict(json.loads((tmp_path / "jobs" / f"{job['job_id']}.json").read_text()), job_id="dead1",
+                status="running", owner={"host": "otro", "pid": 1, "lock": "otro-1-abc.lock"})
+    (tmp_path / "jobs" / "dead1.json").write_text(json.dumps(dead))
+    assert ia_jobs.TrainJobQueue(tmp_path, executor=ThreadPoolExecutor(max_workers=1)).status("dead1")["status"] == "failed"
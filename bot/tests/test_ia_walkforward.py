@@ -0,0 +1,40 @@
+import pytest
+
+from bot.sls_bot import ia_signal_engine, ia_walkforward
+from bot.sls_bot.ia_utils import compute_indicators
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_rule_scores_frame_matches_row_rules(make_klines):
+    df = compute_indicators(make_klines(600, seed=9, step_ms=900_000, vol=0.004, wick=0.002, volume_scale=50.0))
+    vec = ia_signal_engine.rule_scores_frame(df)
+    for i in range(0, len(df), 37):
+        row = ia_signal_engine._rule_scores(df.iloc[i])
+        assert vec["long"][i] == pytest.approx(row["long"])
+        assert vec["short"][i] == pytest.approx(row["short"])
+
+
+def test_fold_windows_purge_labels():
+    folds = ia_walkforward.fold_windows(1000, 400, 100, purge=20)
+    assert folds[0] == (0, 400, 420, 520)
+    assert all(test_lo - train_hi == 20 for _, train_hi, test_lo, _ in folds)
+    assert folds[-1][3] <= 1000
+    expanding = ia_walkforward.fold_windows(1000, 400, 100, purge=20, expanding=True)
+    assert {f[0] for f in expanding} == {0}
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_walk_forward_reports_parallel_folds_and_reuses_cache(tmp_path, make_klines):
+    raw = make_klines(2600, seed=9, step_ms=900_000, vol=0.004, wick=0.002, volume_scale=50.0)
+    kwargs = dict(train_size=800, test_size=300, horizon=10, thr=0.003, thr_enter=0.45,
+                  cache_root=tmp_path, raw=raw)
+    report = ia_walkforward.walk_forward("BTCUSDT", "15m", workers=2, **kwargs)
+    folds = report["folds"]
+    assert len(folds) == report["summary"]["folds"] >= 4
+    assert all(f["test"][0] > f["train"][1] for f in folds)
+    assert all(0.0 <= f["auc"] <= 1.0 for f in folds if f.get("auc") is not None)
+    assert "pnl_pct" in report["summary"]["ensemble"] and "pnl_pct" in report["summary"]["rules_only"]
+
+    again = ia_walkforward.walk_forward("BTCUSDT", "15m", workers=1, **kwargs)
+    assert again["cache_dir"] == report["cache_dir"]
+    assert [f["auc"] for f in again["folds"]] == [f["auc"] for f in folds]
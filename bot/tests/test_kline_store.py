@@ -0,0 +1,148 @@
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bot.sls_bot import ia_train
+from bot.sls_bot.kline_store import KlineStore, find_gaps, to_ms
+
+STEP = 60_000
+START = to_ms("2024-01-31T22:00:00")
+
+
+def _exchange(n: int = 300, missing=()):
+    ts = START + np.arange(n) * STEP
+    close = 100 + np.sin(np.arange(n) / 7.0)
+    full = pd.DataFrame({"ts": ts, "open": close, "high": close + 1, "low": close - 1,
+                         "close": close, "volume": np.ones(n), "turnover": close})
+    state = {"holes": set(missing), "calls": 0}
+
+    def fetch_page(symbol, interval, start_ms, end_ms, limit):
+        # igual que Bybit: las más recientes primero, como mucho `limit`
+        state["calls"] += 1
+        rows = full[(full["ts"] >= start_ms) & (full["ts"] <= end_ms) & ~full["ts"].isin(state["holes"])]
+        return rows.sort_values("ts", ascending=False).head(limit)
+
+    return full, state, fetch_page
+
+
+def test_download_paginates_across_months_and_reads_ranges(tmp_path):
+    full, state, fetch_page = _exchange()
+    store = KlineStore(tmp_path)
+    end = int(full["ts"].iloc[-1])
+    assert store.download("btcusdt", "1m", START, end, fetch_page, limit=100) == 300
+    assert state["calls"] == 3
+    assert sorted(store.manifest("BTCUSDT", "1m")["months"]) == ["2024-01", "2024-02"]
+    assert store.gaps("BTCUSDT", "1m", START, end) == []
+
+    window = store.read("BTCUSDT", "1m", START + 100 * STEP, START + 149 * STEP)
+    assert len(window) == 50 and window["ts"].is_monotonic_increasing
+    assert np.allclose(window["close"], full["close"].iloc[100:150])
+    assert "typical" in window.columns
+
+    tail = store.tail("BTCUSDT", "1m", 200)
+    assert tail["ts"].tolist() == full["ts"].iloc[-200:].tolist()
+
+    # re-descargar es idempotente
+    store.download("BTCUSDT", "1m", START, end, fetch_page)
+    assert store.manifest("BTCUSDT", "1m")["months"]["2024-02"]["rows"] + \
+        store.manifest("BTCUSDT", "1m")["months"]["2024-01"]["rows"] == 300
+
+
+def test_gaps_are_detected_and_repaired(tmp_path):
+    holes = {START + 50 * STEP, START + 51 * STEP, START + 200 * STEP}
+    full, state, fetch_page = _exchange(missing=holes)
+    store = KlineStore(tmp_path)
+    end = int(full["ts"].iloc[-1])
+    store.download("BTCUSDT", "1m", START, end, fetch_page)
+    gaps = store.gaps("BTCUSDT", "1m", START - 2 * STEP, end)
+    assert [START - 2 * STEP, START - STEP] in gaps
+    assert [START + 50 * STEP, START + 51 * STEP] in gaps
+    assert [START + 200 * STEP, START + 200 * STEP] in gaps
+
+    state["holes"].clear()
+    assert store.repair("BTCUSDT", "1m", fetch_page, START, end) == []
+    assert len(store.read("BTCUSDT", "1m")) == 300
+    assert find_gaps(store.read("BTCUSDT", "1m")["ts"].to_numpy(), STEP) == []
+
+
+def test_ia_train_prefers_local_store(tmp_path, monkeypatch):
+    full, _, fetch_page = _exchange()
+    store = KlineStore(tmp_path)
+    store.download("BTCUSDT", "1m", START, int(full["ts"].iloc[-1]), fetch_page)
+    monkeypatch.setenv("SLS_KLINE_STORE", str(tmp_path))
+    monkeypatch.setattr(ia_train, "fetch_ohlc", lambda *a, **k: (_ for _ in ()).throw(AssertionError("red")))
+    raw = ia_train._load_raw("BTCUSDT", "1m", 120, now_ms=int(full["ts"].iloc[-1]) + STEP)
+    assert len(raw) == 120
+
+
+def test_ia_train_tops_up_stale_store(tmp_path, monkeypatch):
+    full, state, fetch_page = _exchange()
+    store = KlineStore(tmp_path)
+    store.download("BTCUSDT", "1m", START, int(full["ts"].iloc[199]), fetch_page)
+    monkeypatch.setenv("SLS_KLINE_STORE", str(tmp_path))
+    monkeypatch.setattr(ia_train, "bybit_fetch_page", lambda base_url: fetch_page)
+    now = int(full["ts"].iloc[-1]) + STEP + 5_000  # la vela 299 ya cerró
+    raw = ia_train._load_raw("BTCUSDT", "1m", 150, now_ms=now)
+    assert raw["ts"].tolist() == full["ts"].iloc[-150:].tolist()
+    assert store.coverage("BTCUSDT", "1m")[1] == int(full["ts"].iloc[-1])
+
+    # sin poder completar la cola (exchange caído) se entrena con REST, no con datos viejos
+    monkeypatch.setattr(ia_train, "bybit_fetch_page", lambda base_url: (lambda *a: (_ for _ in ()).throw(OSError())))
+    monkeypatch.setattr(ia_train, "fetch_ohlc", lambda symbol, marco, limit: full.tail(limit))
+    assert len(ia_train._load_raw("BTCUSDT", "1m", 50, now_ms=now + 10 * STEP)) == 50
+
+
+def test_month_rewrite_commits_through_manifest(tmp_path, monkeypatch):
+    full, _, fetch_page = _exchange()
+    store = KlineStore(tmp_path)
+    store.download("BTCUSDT", "1m", START, int(full["ts"].iloc[99]), fetch_page)
+    before = store.read("BTCUSDT", "1m")
+
+    def _crash(*args):
+        raise OSError("corte")
+
+    monkeypatch.setattr(store, "_write_manifest", _crash)
+    with pytest.raises(OSError):
+        store.download("BTCUSDT", "1m", START, int(full["ts"].iloc[-1]), fetch_page)
+    monkeypatch.undo()
+    assert store.read("BTCUSDT", "1m")["ts"].tolist() == before["ts"].tolist()
+
+    store.download("BTCUSDT", "1m", START, int(full["ts"].iloc[-1]), fetch_page)
+    months = store.manifest("BTCUSDT", "1m")["months"]
+    assert len(store.read("BTCUSDT", "1m")) == 300
+    live = {meta["dir"] for meta in months.values()}
+    on_disk = {p.name for p in (tmp_path / "BTCUSDT" / "1m").iterdir() if p.is_dir()}
+    assert live <= on_disk  # los directorios sustituidos se borran tras el commit
+
+    month_dir = tmp_path / "BTCUSDT" / "1m" / months["2024-02"]["dir"]
+    np.save(month_dir / "close.npy", np.zeros(3))  # columna truncada a mano
+    with pytest.raises(RuntimeError):
+        store.read("BTCUSDT", "1m")
+
+
+def test_write_refuses_month_whose_data_vanished(tmp_path):
+    full, _, fetch_page = _exchange()
+    store = KlineStore(tmp_path)
+    store.download("BTCUSDT", "1m", START, int(full["ts"].iloc[-1]), fetch_page)
+    before = store.manifest("BTCUSDT", "1m")
+    shutil.rmtree(tmp_path / "BTCUSDT" / "1m" / before["months"]["2024-02"]["dir"])
+    with pytest.raises(RuntimeError):
+        store.write("BTCUSDT", "1m", full.tail(5))  # no puede quedar como "el mes entero"
+    assert store.manifest("BTCUSDT", "1m") == before
+
+
+def test_concurrent_writers_keep_every_row(tmp_path):
+    full, _, _ = _exchange()
+    store = KlineStore(tmp_path)
+    chunks = [full.iloc[i::4] for i in range(4)]
+    threads = [threading.Thread(target=KlineStore(tmp_path).write, args=("BTCUSDT", "1m", chunk)) for chunk in chunks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.read("BTCUSDT", "1m")["ts"].tolist() == full["ts"].tolist()
+    live = {meta["dir"] for meta in store.manifest("BTCUSDT", "1m")["months"].values()}
+    assert live == {p.name for p in (tmp_path / "BTCUSDT" / "1m").iterdir() if p.is_dir()}
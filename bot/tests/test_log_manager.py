@@ -0,0 +1,111 @@
+import gzip
+import json
+import threading
+
+from bot.sls_bot import log_manager
+from bot.sls_bot.log_manager import RotatingLog, RotationPolicy
+
+
+def _write_day(log: RotatingLog, day: str, count: int) -> None:
+    for i in range(count):
+        log.append({"ts": f"{day}T00:00:{i:02d}Z", "pnl": i})
+
+
+def test_rotation_creates_gzip_segments_and_manifest(tmp_path):
+    path = tmp_path / "pnl.jsonl"
+    log = RotatingLog(path, RotationPolicy(max_bytes=200, rotate_daily=False))
+    _write_day(log, "2024-01-01", 3)
+    _write_day(log, "2024-01-05", 3)
+    log.close()
+
+    manifest = log_manager.load_manifest(path)
+    assert manifest, "debe existir al menos un segmento rotado"
+    first = manifest[0]
+    assert first["lines"] > 0
+    assert first["ts_min"] <= first["ts_max"]
+    seg_file = log_manager.segments_dir(path) / first["file"]
+    with gzip.open(seg_file, "rt", encoding="utf-8") as fh:
+        assert json.loads(fh.readline())["ts"].startswith("2024-01-01")
+
+    rows = list(log_manager.iter_jsonl(path))
+    assert len(rows) == 6
+    assert [row["pnl"] for row in rows] == [0, 1, 2, 0, 1, 2]
+
+
+def test_window_reader_skips_segments_outside_range(tmp_path):
+    path = tmp_path / "decisions.jsonl"
+    log = RotatingLog(path, RotationPolicy(max_bytes=0, rotate_daily=False))
+    _write_day(log, "2024-01-01", 2)
+    log.rotate()
+    _write_day(log, "2024-02-01", 2)
+    log.rotate()
+    _write_day(log, "2024-03-01", 2)
+    log.close()
+
+    segs = log_manager.list_segments(path, start="2024-01-15T00:00:00Z")
+    assert len(segs) == 1
+    rows = list(log_manager.iter_jsonl(path, start="2024-01-15T00:00:00Z"))
+    assert {row["ts"][:7] for row in rows} == {"2024-02", "2024-03"}
+
+
+def test_tail_lines_reaches_into_rotated_segments(tmp_path):
+    path = tmp_path / "bridge.log"
+    log = RotatingLog(path, RotationPolicy(max_bytes=0, rotate_daily=False))
+    for i in range(5):
+        log.append_line(f"2024-01-01T00:00:0{i} line{i}")
+    log.rotate()
+    log.append_line("2024-01-02T00:00:00 line5")
+    log.close()
+
+    tail = [line.strip().split(" ", 1)[1] for line in log_manager.tail_lines(path, 3)]
+    assert tail == ["line3", "line4", "line5"]
+
+
+def test_buffered_appender_flushes_on_size_and_sync(tmp_path):
+    path = tmp_path / "heartbeat.jsonl"
+    log = RotatingLog(path, RotationPolicy(flush_bytes=10_000, flush_seconds=3600, rotate_daily=False))
+    log.append({"ts": "2024-01-01T00:00:00Z", "n": 1})
+    assert path.read_text(encoding="utf-8") == ""
+    log.append({"ts": "2024-01-01T00:00:01Z", "n": 2}, sync=True)
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 2
+    log.close()
+
+
+def test_buffered_appender_is_thread_safe(tmp_path):
+    path = tmp_path / "audit.log"
+    log = RotatingLog(path, RotationPolicy(flush_bytes=256, rotate_daily=False))
+
+    def _writer(idx: int) -> None:
+        for j in range(200):
+            log.append({"writer": idx, "j": j})
+
+    threads = [threading.Thread(target=_writer, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    log.close()
+    rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert len(rows) == 800
+    assert {(r["writer"], r["j"]) for r in rows} == {(i, j) for i in range(4) for j in range(200)}
+
+
+def test_writers_in_separate_handles_never_lose_rotated_lines(tmp_path):
+    # un RotatingLog por hilo equivale a un proceso: solo el flock los coordina
+    path = tmp_path / "cerebro_decisions.jsonl"
+
+    def _writer(idx: int) -> None:
+        log = RotatingLog(path, RotationPolicy(max_bytes=2_000, flush_bytes=0, rotate_daily=False))
+        for j in range(300):
+            log.append({"ts": f"2024-01-01T00:00:{j % 60:02d}Z", "writer": idx, "j": j})
+        log.close()
+
+    threads = [threading.Thread(target=_writer, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    rows = list(log_manager.iter_jsonl(path))
+    assert sorted((r["writer"], r["j"]) for r in rows) == [(i, j) for i in range(4) for j in range(300)]
+    seg_dir = log_manager.segments_dir(path)
+    assert {seg["file"] for seg in log_manager.load_manifest(path)} == {p.name for p in seg_dir.glob("*.gz")}
@@ -0,0 +1,61 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from bot.sls_bot import metrics
+from bot.sls_bot.bybit import _TimedSession
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = metrics.Registry()
+    hist = registry.histogram("t_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    hist.observe(0.05, stage="a")
+    hist.observe(0.1, stage="a")
+    hist.observe(3.0, stage="a")
+    registry.counter("t_total", "test", ("name",)).inc(name='x"y')
+    registry.gauge("t_depth", "test", ("worker",)).set_function(lambda: 7, worker="w")
+
+    text = registry.render()
+    assert 't_seconds_bucket{stage="a",le="0.1"} 2' in text
+    assert 't_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 't_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 't_seconds_count{stage="a"} 3' in text
+    assert 't_total{name="x\\"y"} 1' in text
+    assert 't_depth{worker="w"} 7' in text
+    assert "# TYPE t_seconds histogram" in text
+    assert registry.histogram("t_seconds", "test", ("stage",)) is hist
+
+
+def test_install_exposes_metrics_with_route_templates():
+    app = FastAPI()
+    metrics.install(app, "unit")
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    for idx in range(3):
+        assert client.get(f"/items/{idx}").status_code == 200
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'sls_http_request_seconds_count{app="unit",method="GET",route="/items/{item_id}",status="200"} 3' in resp.text
+
+
+def test_bybit_session_calls_are_timed():
+    class _Session:
+        def get_tickers(self, **kwargs):
+            return {"retCode": 10001}
+
+        def get_wallet_balance(self, **kwargs):
+            raise RuntimeError("boom")
+
+    session = _TimedSession(_Session())
+    before = metrics.BYBIT_REQUEST_SECONDS.snapshot(endpoint="/v5/market/tickers", ret_code="10001")["count"]
+    assert session.get_tickers(category="linear")["retCode"] == 10001
+    try:
+        session.get_wallet_balance(accountType="UNIFIED")
+    except RuntimeError:
+        pass
+    assert metrics.BYBIT_REQUEST_SECONDS.snapshot(endpoint="/v5/market/tickers", ret_code="10001")["count"] == before + 1
+    assert metrics.BYBIT_REQUEST_SECONDS.snapshot(endpoint="/v5/account/wallet-balance", ret_code="exception")["count"] >= 1
@@ -0,0 +1,58 @@
+import json
+
+from bot.sls_bot.pnl_sync import DAY_MS, MAX_WINDOW_MS, ClosedPnlSync, split_windows
+
+NOW_MS = 1_700_000_000_000
+
+
+class _FakeClosedPnlClient:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def get_closed_pnl(self, start_time=None, end_time=None, cursor=None, limit=200):
+        self.calls.append((start_time, end_time))
+        assert end_time - start_time <= MAX_WINDOW_MS
+        matches = [r for r in self.rows if start_time <= int(r["createdTime"]) <= end_time]
+        offset = int(cursor or 0)
+        page = matches[offset: offset + limit]
+        next_cursor = str(offset + limit) if offset + limit < len(matches) else ""
+        return {"retCode": 0, "result": {"list": page, "nextPageCursor": next_cursor}}
+
+
+def _row(order_id, ts_ms, pnl, symbol="BTCUSDT"):
+    return {"orderId": order_id, "symbol": symbol, "createdTime": str(ts_ms), "closedPnl": str(pnl), "cumCommission": "0.1"}
+
+
+def test_split_windows_respects_limit():
+    windows = split_windows(0, 20 * DAY_MS)
+    assert len(windows) == 3
+    assert all(end - start <= MAX_WINDOW_MS for start, end in windows)
+    assert windows[-1][1] == 20 * DAY_MS
+
+
+def test_incremental_sync_only_applies_new_rows(tmp_path):
+    rows = [_row(f"o{i}", NOW_MS - i * DAY_MS, 1.0) for i in range(1, 15)]
+    client = _FakeClosedPnlClient(rows)
+    sync = ClosedPnlSync(client, tmp_path / "pnl_daily_symbols.json", tmp_path / "state.json", max_workers=3)
+
+    first = sync.sync(initial_days=20, now_ms=NOW_MS)
+    assert first["mode"] == "backfill"
+    assert first["rows"] == 14
+    assert len(client.calls) >= 3
+    cache = json.loads((tmp_path / "pnl_daily_symbols.json").read_text())
+    assert sum(day["total"] for day in cache.values()) == 14.0
+
+    client.calls.clear()
+    client.rows.append(_row("late", NOW_MS + 60_000, 2.5, symbol="ETHUSDT"))
+    second = sync.sync(now_ms=NOW_MS + 120_000)
+    assert second == {"mode": "incremental", "rows": 1, "cursor_ms": NOW_MS + 120_000}
+    assert len(client.calls) == 1
+    assert client.calls[0][0] >= NOW_MS - sync.overlap_ms
+
+    third = sync.sync(now_ms=NOW_MS + 180_000)
+    assert third["rows"] == 0
+    cache = json.loads((tmp_path / "pnl_daily_symbols.json").read_text())
+    assert sum(day["total"] for day in cache.values()) == 16.5
+    trades = sum(sym["trades"] for day in cache.values() for sym in day["symbols"].values())
+    assert trades == 15
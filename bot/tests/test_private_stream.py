@@ -0,0 +1,68 @@
+import json
+
+from bot.sls_bot import app as sls_app
+from bot.sls_bot.private_stream import PositionBook, PrivateStream, private_ws_url
+
+# Mensajes grabados del stream privado v5 (recortados a los campos usados)
+RECORDED = [
+    {"op": "auth", "success": True, "ret_msg": "", "conn_id": "c1"},
+    {"op": "subscribe", "success": True, "ret_msg": "", "conn_id": "c1"},
+    {"topic": "order", "data": [{"symbol": "BTCUSDT", "orderId": "o-1", "orderStatus": "Filled", "side": "Buy"}]},
+    {"topic": "execution", "data": [{"symbol": "BTCUSDT", "orderId": "o-1", "side": "Buy", "execPrice": "30000",
+                                      "execQty": "0.010", "execType": "Trade", "execTime": "1700000000000"}]},
+    {"topic": "position", "data": [{"symbol": "BTCUSDT", "side": "Buy", "size": "0.010", "entryPrice": "30000",
+                                     "markPrice": "30010", "unrealisedPnl": "0.1"}]},
+    {"topic": "position", "data": [{"symbol": "BTCUSDT", "side": "Buy", "size": "0.005", "entryPrice": "30000"}]},
+]
+
+
+def _stream(book=None):
+    return PrivateStream("key", "secret", "wss://example.invalid", book=book, dispatch_inline=True)
+
+
+def test_private_ws_url_follows_base_url():
+    assert private_ws_url("https://api-demo.bybit.com") == "wss://stream-demo.bybit.com/v5/private"
+    assert private_ws_url("https://api-testnet.bybit.com") == "wss://stream-testnet.bybit.com/v5/private"
+    assert private_ws_url("https://api.bybit.com") == "wss://stream.bybit.com/v5/private"
+    assert private_ws_url("http://127.0.0.1:9000") == "ws://127.0.0.1:9000/v5/private"
+
+
+def test_replay_updates_book_and_listeners():
+    stream = _stream()
+    events = []
+    stream.add_listener(lambda topic, symbol, data: events.append((topic, symbol)))
+    assert stream.replay(json.dumps(msg) for msg in RECORDED) == len(RECORDED)
+
+    assert stream.is_live()
+    pos = stream.book.get("BTCUSDT")
+    assert pos["size"] == 0.005 and pos["avg_price"] == 30000.0
+    assert stream.book.executions("BTCUSDT")[0]["qty"] == 0.01
+    assert [e[0] for e in events] == ["order", "execution", "position", "position"]
+
+    stream.replay([{"topic": "position", "data": [{"symbol": "BTCUSDT", "side": "", "size": "0"}]}])
+    assert stream.book.get("BTCUSDT") is None
+
+
+def test_tp1_breakeven_reacts_to_position_events(monkeypatch):
+    book = PositionBook()
+    stream = _stream(book)
+    orders, stops = [], []
+    monkeypatch.setattr(sls_app, "_POSITION_BOOK", book)
+    monkeypatch.setattr(sls_app, "_private_stream_live", lambda: True)
+    monkeypatch.setattr(sls_app, "_get_symbol_filters_simple", lambda symbol: (0.1, 0.001))
+    monkeypatch.setattr(sls_app, "_create_order_signed", lambda payload: orders.append(payload) or {"retCode": 0})
+    monkeypatch.setattr(sls_app, "_move_sl_to_be", lambda symbol, price: stops.append((symbol, price)))
+
+    autopilot = sls_app.Tp1BreakEvenAutopilot()
+    stream.add_listener(autopilot.on_stream_event)
+    autopilot.start("BTCUSDT", "LONG", close_pct=50, tp1_pct=1.0, be_offset_bps=2.0)
+
+    stream.replay(RECORDED[:5])
+    assert len(orders) == 1
+    assert orders[0]["side"] == "Sell" and orders[0]["qty"] == "0.005"
+    assert float(orders[0]["price"]) == 30300.0
+    assert not stops
+
+    stream.replay(RECORDED[5:])
+    assert stops == [("BTCUSDT", 30006.0)]
+    assert autopilot.pending() == {}
@@ -0,0 +1,90 @@
+import threading
+import time
+import tracemalloc
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from bot.sls_bot.profiling import AllocationTracker, ProfilerBusy, SamplingProfiler, router
+
+
+def _busy_cycle(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(i * i for i in range(2000))
+
+
+def test_profiled_is_noop_without_session():
+    profiler = SamplingProfiler()
+    with profiler.profiled("webhook"):
+        assert profiler._marks == {}
+    assert profiler.report() is None
+
+
+def test_sampler_collects_marked_threads_only():
+    profiler = SamplingProfiler()
+    profiler.start(seconds=5, targets=["cerebro"], interval_ms=1)
+    with pytest.raises(ProfilerBusy):
+        profiler.start(seconds=1)
+    stop = threading.Event()
+
+    def marked():
+        with profiler.profiled("cerebro"):
+            _busy_cycle(stop)
+
+    def unmarked():
+        with profiler.profiled("webhook"):
+            _busy_cycle(stop)
+
+    threads = [threading.Thread(target=marked), threading.Thread(target=unmarked)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.3)
+    report = profiler.stop()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert report["running"] is False and report["samples"] > 0
+    lines = report["collapsed"].splitlines()
+    assert lines and all(line.startswith("cerebro;") for line in lines)
+    assert any("_busy_cycle" in line for line in lines)
+    assert any(item["function"].startswith("_busy_cycle") and item["total"] > 0 for item in report["top"])
+    assert profiler._marks == {}
+
+
+def test_allocation_tracker_reports_growth():
+    tracker = AllocationTracker(top=5)
+    keep = []
+    try:
+        with tracker.measure("cycle"):
+            keep.append([bytearray(1024) for _ in range(200)])
+    finally:
+        tracemalloc.stop()
+    stats = tracker.recent(1)[0]
+    assert stats["label"] == "cycle"
+    assert stats["delta_kb"] > 100
+    assert any("test_profiling.py" in item["where"] for item in stats["top"])
+
+
+def test_allocation_flag_env_override(monkeypatch):
+    monkeypatch.delenv("SLS_CEREBRO_TRACEMALLOC", raising=False)
+    assert AllocationTracker.enabled(True) and not AllocationTracker.enabled(False)
+    monkeypatch.setenv("SLS_CEREBRO_TRACEMALLOC", "0")
+    assert not AllocationTracker.enabled(True)
+
+
+def test_profile_endpoints():
+    profiler = SamplingProfiler()
+    app = FastAPI()
+    app.include_router(router("/profile", profiler=profiler))
+    client = TestClient(app)
+
+    assert client.get("/profile").status_code == 404
+    assert client.post("/profile/start", params={"targets": "nope"}).status_code == 400
+    started = client.post("/profile/start", params={"seconds": 5, "targets": "webhook", "interval_ms": 1})
+    assert started.status_code == 200 and started.json()["targets"] == ["webhook"]
+    assert client.post("/profile/start").status_code == 409
+    stopped = client.post("/profile/stop")
+    assert stopped.status_code == 200 and stopped.json()["running"] is False
+    assert "collapsed" not in client.get("/profile", params={"collapsed": False}).json()
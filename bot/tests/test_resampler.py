@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from bot.sls_bot.resampler import CandleBuffer, Resampler, aggregate, bucket_start
+
+MIN = 60_000
+T0 = 1_704_067_200_000  # 2024-01-01 00:00 UTC (lunes)
+
+
+def test_aggregate_matches_groupby_and_week_starts_monday(make_klines):
+    base = make_klines(95, seed=5, start_ms=T0)
+    out = aggregate(base, 15 * MIN)
+    grouped = base.groupby(base["ts"] // (15 * MIN))
+    assert out["ts"].tolist() == [T0 + i * 15 * MIN for i in range(7)]
+    assert np.allclose(out["high"], grouped["high"].max())
+    assert np.allclose(out["close"], grouped["close"].last())
+    assert np.allclose(out["volume"], grouped["volume"].sum())
+    # 2024-01-03 (miércoles) cae en la semana que empieza el lunes 2024-01-01
+    assert bucket_start(np.array([T0 + 2 * 86_400_000]), 7 * 86_400_000)[0] == T0
+
+
+def test_incremental_updates_match_full_recompute(make_klines):
+    full = make_klines(400, seed=5, start_ms=T0 + 7 * MIN)  # empieza a mitad de bucket
+    buf = CandleBuffer(capacity_minutes=10_000)
+    buf.update(full.iloc[:200])
+    buf.frame(5 * MIN)
+    buf.frame(60 * MIN)
+    for lo in range(200, 400, 13):
+        buf.update(full.iloc[lo:lo + 13])
+    revised = full.iloc[-1:].copy()
+    revised["high"] += 5  # la vela en curso se reescribe
+    buf.update(revised)
+    full.loc[full.index[-1], "high"] += 5
+
+    expected = aggregate(full[full["ts"] >= T0 + 10 * MIN], 5 * MIN)
+    pd.testing.assert_frame_equal(buf.frame(5 * MIN), expected)
+    assert buf.frame(60 * MIN)["ts"].iloc[0] == T0 + 60 * MIN  # el primer bucket parcial se descarta
+
+
+def test_resampler_serves_every_interval_from_one_feed(make_klines):
+    exchange = make_klines(6000, seed=5, start_ms=T0)
+    clock = {"now": (T0 + 5000 * MIN) / 1000 + 30}
+    calls = {"base": [], "page": 0}
+
+    def visible():
+        return exchange[exchange["ts"] <= clock["now"] * 1000]
+
+    def fetch_base(symbol, limit):
+        calls["base"].append(limit)
+        return visible().tail(limit)
+
+    def fetch_page(symbol, interval, start_ms, end_ms, limit):
+        calls["page"] += 1
+        rows = visible()
+        rows = rows[(rows["ts"] >= start_ms) & (rows["ts"] <= end_ms)]
+        return rows.sort_values("ts", ascending=False).head(limit)
+
+    res = Resampler(fetch_base, fetch_page, capacity_minutes=4000, min_refresh_s=1.0, clock=lambda: clock["now"])
+    m15 = res.raw_slice("btcusdt", "15m", 200)
+    assert calls["page"] == 4 and calls["base"] == []
+    assert len(m15) == 200 and m15["ts"].iloc[-1] == T0 + 4995 * MIN
+
+    m1 = res.raw_slice("BTCUSDT", "1m", 300)
+    assert calls["base"] == [] and m1["ts"].iloc[-1] == T0 + 5000 * MIN
+
+    clock["now"] += 180
+    m5 = res.raw_slice("BTCUSDT", "5m", 50)
+    assert calls["base"] == [5] and calls["page"] == 4
+    assert m5["ts"].iloc[-1] == T0 + 5000 * MIN
+    assert m5["close"].iloc[-1] == exchange.loc[exchange["ts"] == T0 + 5003 * MIN, "close"].iloc[0]
+
+    assert res.raw_slice("BTCUSDT", "1h", 500) is None  # no cabe en el buffer -> REST directo
@@ -0,0 +1,109 @@
+import threading
+import time
+
+from bot.sls_bot import app as sls_app
+from bot.sls_bot.scheduler import Scheduler
+
+
+class _Clock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_run_pending_respects_deadlines_and_cancel():
+    clock = _Clock()
+    sched = Scheduler(clock=clock)
+    calls = []
+    sched.call_later(5, calls.append, "b", name="b")
+    sched.call_later(1, calls.append, "a", name="a")
+    cancelled = sched.call_later(2, calls.append, "x", name="x")
+    cancelled.cancel()
+
+    assert sched.run_pending() == 0
+    clock.now += 10
+    assert sched.run_pending() == 2
+    assert calls == ["a", "b"]
+    metrics = sched.metrics()
+    assert metrics["tasks"]["a"]["runs"] == 1
+    assert metrics["tasks"]["a"]["lag_ms_last"] == 9000.0
+    assert "x" not in metrics["tasks"]
+
+
+def test_periodic_task_skips_missed_ticks():
+    clock = _Clock()
+    sched = Scheduler(clock=clock)
+    calls = []
+    sched.every(10, lambda: calls.append(clock.now), name="tick", first_delay=0)
+    sched.run_pending()
+    clock.now += 35  # se pierden 3 ticks
+    sched.run_pending()
+    assert calls == [1_000.0, 1_035.0]
+    assert sched.pending() == 1
+    assert sched._heap[0][0] == 1_040.0
+
+
+def test_threaded_scheduler_runs_call_at():
+    sched = Scheduler(workers=1)
+    done = threading.Event()
+    sched.start()
+    try:
+        sched.call_later(0.05, done.set, name="fire")
+        assert done.wait(2.0)
+    finally:
+        sched.stop()
+
+
+def test_periodic_task_survives_stop_and_start():
+    sched = Scheduler(workers=1)
+    runs = []
+    started, release = threading.Event(), threading.Event()
+
+    def _tick():
+        runs.append(time.time())
+        if len(runs) == 1:
+            started.set()
+            release.wait(2.0)
+
+    sched.every(0.01, _tick, name="tick", first_delay=0)
+    sched.start()
+    assert started.wait(2.0)
+    sched.stop()  # la tarea está en marcha mientras se para (lifespan de tests/recarga)
+    release.set()
+    deadline = time.time() + 2.0
+    while sched.pending() == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    sched.start()
+    try:
+        deadline = time.time() + 2.0
+        while len(runs) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(runs) >= 3
+    finally:
+        sched.stop(wait=True)
+
+
+def test_scalp_ttl_closes_at_deadline(monkeypatch):
+    clock = _Clock(time.time())
+    sched = Scheduler(clock=clock)
+    closed = []
+    monkeypatch.setattr(sls_app, "_SCHEDULER", sched)
+    monkeypatch.setattr(sls_app, "_private_stream_live", lambda: False)
+    monkeypatch.setattr(sls_app, "_close_position_reduce_only", lambda symbol: closed.append(symbol) or {"retCode": 0})
+    monkeypatch.setattr(sls_app, "_append_scalp_telemetry", lambda entry: None)
+    monkeypatch.setattr(sls_app, "_append_bridge_log", lambda message: None)
+    manager = sls_app.ScalpPositionManager()
+    monkeypatch.setattr(manager, "_fetch_position", lambda symbol: {"size": 1.0, "avg_price": 100.0})
+
+    manager.register(symbol="BTCUSDT", side="LONG", ttl_minutes=2, expected_price=100.0,
+                     latency_ms=5.0, strategy_meta={"strategy": "scalping_v1"})
+    entry_ts = manager.tracked()["BTCUSDT"]["start_ts"]
+    clock.now = entry_ts + 119
+    sched.run_pending()
+    assert closed == []
+    clock.now = entry_ts + 120
+    sched.run_pending()
+    assert closed == ["BTCUSDT"]
+    assert manager.tracked() == {}
@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from sls_bot.startup import StartupReport
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+HEAVY = ("pandas", "openpyxl", "sklearn", "xgboost", "joblib", "vaderSentiment")
+
+
+def test_startup_report_phases_and_background_tasks():
+    report = StartupReport("demo", t0=time.perf_counter())
+    time.sleep(0.01)
+    assert report.checkpoint("imports") >= 10
+    release = threading.Event()
+
+    def _boom():
+        raise RuntimeError("sin red")
+
+    threads = report.background({"slow": release.wait, "broken": _boom})
+    threads["broken"].join(1)
+    assert report.mark_ready() >= 10
+    snap = report.snapshot()
+    assert set(snap["phases_ms"]) == {"imports", "lifespan"}
+    assert snap["background"]["slow"]["status"] == "running"
+    assert snap["background"]["broken"] == {"status": "error", "ms": snap["background"]["broken"]["ms"],
+                                             "error": "RuntimeError: sin red"}
+    release.set()
+    threads["slow"].join(1)
+    assert report.snapshot()["background"]["slow"]["status"] == "ok"
+
+
+def test_apps_import_without_heavy_dependencies():
+    code = (
+        "import json, sys\n"
+        "import sls_bot.app, app.main\n"
+        f"print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))\n"
+    )
+    env = dict(os.environ, SLSBOT_CONFIG=str(PROJECT_ROOT / "config" / "config.sample.json"), SLS_SKIP_TIME_SYNC="1")
+    proc = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT / "bot", env=env,
+                          capture_output=True, text=True, timeout=120)
+    assert proc.returncode == 0, proc.stderr
+    assert json.loads(proc.stdout.strip().splitlines()[-1]) == []
+
+
+def test_control_api_lifespan_reports_startup(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import app.main as api_main
+
+    started = threading.Event()
+    monkeypatch.setattr(api_main, "_CEREBRO_LOOP_ENABLED", True)
+    monkeypatch.setattr(api_main, "_start_cerebro_loop", started.set)
+    with TestClient(api_main.app) as client:
+        assert started.wait(1)
+        data = client.get("/startup").json()
+    assert data["service"] == "control" and data["ready_ms"] > 0
+    assert {"imports", "config", "routes", "lifespan"} <= set(data["phases_ms"])
+    assert "cerebro_loop" in data["background"]
@@ -0,0 +1,58 @@
+import json
+import random
+
+import pytest
+
+from bot.sls_bot.log_manager import flush_all
+from bot.sls_bot.tracing import NULL_SPAN, Tracer, current_span
+
+
+def test_spans_nest_and_record_errors(tmp_path):
+    export = tmp_path / "traces.jsonl"
+    tracer = Tracer(sample_rate=1.0, buffer_size=2, export_path=export)
+    with tracer.trace("webhook", symbol="BTCUSDT") as root:
+        with tracer.span("guardrails") as span:
+            span.set(blocked=False)
+            assert current_span() is span
+        with tracer.span("order_create"):
+            tracer.record("bybit_order_create", 0.0, attempt=0)
+            with pytest.raises(RuntimeError):
+                with tracer.span("retry"):
+                    raise RuntimeError("timeout")
+        root.set(status="ok")
+
+    trace = tracer.recent()[0]
+    assert trace["attrs"] == {"symbol": "BTCUSDT", "status": "ok"}
+    names = {s["name"]: s for s in trace["spans"]}
+    assert names["guardrails"]["parent"] == 0 and names["guardrails"]["attrs"] == {"blocked": False}
+    order_id = names["order_create"]["id"]
+    assert names["bybit_order_create"]["parent"] == order_id
+    assert names["retry"]["parent"] == order_id and names["retry"]["error"].startswith("RuntimeError")
+    flush_all()
+    assert json.loads(export.read_text().splitlines()[0])["trace_id"] == trace["trace_id"]
+
+    for _ in range(3):
+        with tracer.trace("webhook"):
+            pass
+    assert len(tracer.recent(limit=10)) == 2
+    assert tracer.recent(span="guardrails") == []
+    assert tracer.summary()["stages"]["webhook"]["count"] == 2
+
+
+def test_sampling_rate_and_noop_outside_trace():
+    tracer = Tracer(sample_rate=0.25, rng=random.Random(7))
+    with tracer.span("orphan") as span:
+        assert span is NULL_SPAN
+    for _ in range(400):
+        with tracer.trace("webhook"):
+            with tracer.span("stage"):
+                pass
+    assert 60 <= tracer.stats["started"] <= 140
+    assert tracer.stats["started"] + tracer.stats["skipped"] == 400
+
+    off = Tracer(sample_rate=0.0)
+    with off.trace("webhook") as root:
+        assert root is NULL_SPAN
+    with off.trace("webhook", force=True):
+        pass
+    assert len(off.recent()) == 1
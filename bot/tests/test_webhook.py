@@ -0,0 +1,60 @@
+import json
+import os
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("SLS_SKIP_TIME_SYNC", "1")
+
+
+class _Session:
+    def get_instruments_info(self, category="linear", symbol="", **_):
+        return {"retCode": 0, "result": {"list": [{
+            "symbol": symbol,
+            "priceFilter": {"tickSize": "0.1"},
+            "lotSizeFilter": {"qtyStep": "0.001", "minOrderQty": "0.001", "maxOrderQty": "1000"},
+        }]}}
+
+    def get_positions(self, **_):
+        return {"retCode": 0, "result": {"list": []}}
+
+    def set_trading_stop(self, **_):
+        return {"retCode": 0, "result": {}}
+
+
+class _Bybit:
+    session = _Session()
+
+    def get_balance(self):
+        return 10_000.0
+
+    def get_mark_price(self, symbol):
+        return 60_000.0
+
+    def set_leverage(self, symbol, buy, sell, category="linear"):
+        return {"retCode": 0}
+
+
+def test_entry_signal_reaches_order_placement(monkeypatch):
+    # la cola de SLS_EXIT llegó a quedar fuera de su rama y toda entrada moría en un `pnl` sin definir
+    import sls_bot.app as bot_app
+
+    posted = []
+
+    def _post(url, data=None, **_):
+        posted.append(url)
+        payload = json.loads(data or "{}")
+        return SimpleNamespace(status_code=200, json=lambda: {
+            "retCode": 0, "retMsg": "OK", "result": {"orderId": "t-1", "orderType": payload.get("orderType")}})
+
+    monkeypatch.setattr(bot_app, "bb", _Bybit())
+    monkeypatch.setattr(bot_app, "requests", SimpleNamespace(post=_post, get=bot_app.requests.get))
+    monkeypatch.setattr(bot_app, "_maybe_apply_cerebro", lambda *a, **k: None)
+    client = TestClient(bot_app.app)
+    path = bot_app.cfg.get("server", {}).get("webhook_path", "/webhook")
+    resp = client.post(path, json={"signal": "SLS_LONG_ENTRY", "symbol": "BTCUSDT", "tf": "15m", "price": 60000.0,
+                                   "risk_pct": 0.5, "leverage": 5, "post_only": False, "sl": 59400.0, "tp1": 60600.0})
+    body = resp.json()
+    assert body["status"] == "ok", body
+    assert body["placed"]["orderType"] == "Market" and float(body["qty"]) > 0
+    assert any(url.endswith("/v5/order/create") for url in posted)
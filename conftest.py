@@ -0,0 +1,11 @@
+"""Fixtures compartidas por `bot/tests` y `scripts/tests`."""
+
+import pytest
+
+from benchmarks.fixtures import lognormal_klines
+
+
+@pytest.fixture
+def make_klines():
+    """Fábrica de velas sintéticas con semilla fija: `make_klines(n, seed=..., price=..., ...)`."""
+    return lognormal_klines
@@ -41,3 +41,87 @@ def test_rank_filters_and_scores(tmp_path: Path):
 
     assert result["accepted"] and result["accepted"][0]["name"] == "good"
     assert result["rejected"][0]["name"] == "bad-drawdown"
+
+
+def _random_runs(tmp_path: Path, files: int = 3, per_file: int = 400) -> list:
+    import random
+
+    rng = random.Random(11)
+    paths = []
+    for idx in range(files):
+        lines = []
+        for n in range(per_file):
+            lines.append(json.dumps({
+                "name": f"f{idx}_{n}",
+                "stats": {
+                    "pnl": rng.uniform(-500, 2000),
+                    "max_drawdown": rng.uniform(0.5, 9.0),
+                    "gross_profit": rng.uniform(500, 5000),
+                    "gross_loss": -rng.uniform(500, 3000),
+                    "trades": rng.randint(10, 300),
+                    "win_rate": rng.uniform(0.3, 0.7),
+                    "returns_avg": rng.uniform(-0.01, 0.04),
+                    "returns_std": rng.uniform(0.01, 0.05),
+                },
+            }))
+        lines.insert(5, "{no es json")
+        path = tmp_path / f"runs_{idx}.jsonl"
+        path.write_text("\n".join(lines), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def test_stream_rank_matches_full_ranking(tmp_path: Path):
+    paths = _random_runs(tmp_path)
+    args = arena_rank.parse_args([str(tmp_path), "--json"])
+    full = arena_rank.rank_candidates([tmp_path], args)
+
+    for workers in (1, 2):
+        streamed = arena_rank.rank_stream([tmp_path], args, top_k=25, workers=workers)
+        assert [row["name"] for row in streamed["accepted"]] == [row["name"] for row in full["accepted"][:25]]
+        assert streamed["totals"]["seen"] == 1200
+        assert streamed["totals"]["accepted"] == len(full["accepted"])
+        assert streamed["totals"]["rejected"] == len(full["rejected"])
+        assert len(streamed["rejected"]) <= arena_rank.REJECTED_SAMPLE
+
+    expected_dd = sum(1 for rej in full["rejected"] if any(v.startswith("max_drawdown") for v in rej["violations"]))
+    assert streamed["rejected_counts"]["max_drawdown"] == expected_dd
+    assert len(paths) == streamed["totals"]["files"]
+
+
+def test_columnar_rank_matches_row_ranking(tmp_path: Path):
+    _random_runs(tmp_path, files=2, per_file=300)
+    args = arena_rank.parse_args([str(tmp_path), "--json"])
+    rows = arena_rank.rank_candidates([tmp_path], args)
+    columnar = arena_rank.rank_columnar([tmp_path], args)
+
+    assert [(r["name"], r["score"]) for r in columnar["accepted"]] == [(r["name"], r["score"]) for r in rows["accepted"]]
+    assert columnar["accepted"][0]["stats"] == rows["accepted"][0]["stats"]
+    assert columnar["accepted"][0]["components"] == rows["accepted"][0]["components"]
+    assert [r["violations"] for r in columnar["rejected"]] == [r["violations"] for r in rows["rejected"]]
+
+    limited = arena_rank.rank_columnar([tmp_path], args, limit=5, rejected_limit=0)
+    assert limited["accepted"] == columnar["accepted"][:5] and limited["rejected"] == []
+    assert limited["totals"] == {"seen": 600, "accepted": len(rows["accepted"]), "rejected": len(rows["rejected"])}
+    assert limited["rejected_counts"] == columnar["rejected_counts"]
+
+    exported = arena_rank.export_columns(arena_rank.load_columns([tmp_path]), tmp_path / "cols" / "runs.npz")
+    reloaded = arena_rank.rank_columnar([exported], args)
+    assert [r["name"] for r in reloaded["accepted"]] == [r["name"] for r in rows["accepted"]]
+
+
+def test_rescore_presets_for_sensitivity(tmp_path: Path):
+    _random_runs(tmp_path, files=1, per_file=300)
+    args = arena_rank.parse_args([str(tmp_path)])
+    columns = arena_rank.load_columns([tmp_path])
+    presets = [
+        {"name": "base"},
+        {"name": "sharpe_only", "weights": {"sharpe": 1.0, "calmar": 0, "profit_factor": 0, "win_rate": 0, "drawdown": 0}},
+        {"name": "loose", "min_trades": 10, "max_drawdown": 20.0},
+    ]
+    out = arena_rank.rescore_presets(columns, args, presets, top=5)
+
+    base_top = [row["name"] for row in arena_rank.rank_candidates([tmp_path], args)["accepted"][:5]]
+    assert [row["name"] for row in out["presets"]["base"]["top"]] == base_top
+    assert out["presets"]["loose"]["accepted"] > out["presets"]["base"]["accepted"]
+    assert out["consensus"][0]["appearances"] >= 1
@@ -0,0 +1,58 @@
+import json
+from pathlib import Path
+
+from scripts.tools import arena_scoreboard
+
+
+def _run(name: str, pnl: float = 1500.0) -> str:
+    return json.dumps({
+        "name": name,
+        "stats": {"pnl": pnl, "max_drawdown": 2.0, "gross_profit": 5000, "gross_loss": -1500, "trades": 200,
+                  "win_rate": 0.62, "returns_avg": 0.04, "returns_std": 0.02},
+    })
+
+
+def _argv(tmp_path: Path, *runs: Path, top: int = 200) -> list:
+    return ["--runs", *map(str, runs), "--scoreboard", str(tmp_path / "scoreboard.json"),
+            "--champions", str(tmp_path / "champions.json"), "--promotion-wins", "2", "--top", str(top)]
+
+
+def test_scoreboard_is_idempotent_and_incremental(tmp_path: Path):
+    runs = tmp_path / "runs.jsonl"
+    runs.write_text(_run("alpha") + "\n" + _run("beta") + "\n", encoding="utf-8")
+
+    first = arena_scoreboard.main(_argv(tmp_path, runs))
+    assert first["applied"] == 1 and first["victories"] == 2
+    again = arena_scoreboard.main(_argv(tmp_path, runs))
+    assert again["applied"] == 0 and again["skipped"] == 1
+    board = json.loads((tmp_path / "scoreboard.json").read_text(encoding="utf-8"))
+    assert board["alpha"]["victories"] == 1
+
+    # el JSONL crece (con una línea a medio escribir): solo se aplica lo nuevo y completo
+    with runs.open("a", encoding="utf-8") as fh:
+        fh.write(_run("alpha") + "\n" + _run("gamma")[:20])
+    grown = arena_scoreboard.main(_argv(tmp_path, runs))
+    assert grown["victories"] == 1
+    board = json.loads((tmp_path / "scoreboard.json").read_text(encoding="utf-8"))
+    assert board["alpha"]["victories"] == 2 and board["beta"]["victories"] == 1 and "gamma" not in board
+    champions = json.loads((tmp_path / "champions.json").read_text(encoding="utf-8"))
+    assert [c["name"] for c in champions] == ["alpha"]
+
+    with runs.open("a", encoding="utf-8") as fh:
+        fh.write(_run("gamma")[20:] + "\n")
+    arena_scoreboard.main(_argv(tmp_path, runs))
+    board = json.loads((tmp_path / "scoreboard.json").read_text(encoding="utf-8"))
+    assert board["gamma"]["victories"] == 1 and board["alpha"]["victories"] == 2
+
+
+def test_scoreboard_prunes_to_top_with_heap(tmp_path: Path):
+    first = tmp_path / "a.jsonl"
+    first.write_text("\n".join(_run(f"s{i}", pnl=1000 + i * 50) for i in range(6)), encoding="utf-8")
+    second = tmp_path / "b.json"
+    second.write_text(json.dumps([json.loads(_run("s0", pnl=1000)), json.loads(_run("s1", pnl=1050))]), encoding="utf-8")
+
+    arena_scoreboard.main(_argv(tmp_path, first, second, top=3))
+    board = json.loads((tmp_path / "scoreboard.json").read_text(encoding="utf-8"))
+    # s0 y s1 suman dos victorias; de los demás sobrevive el de mejor score
+    assert set(board) == {"s0", "s1", "s5"}
+    assert arena_scoreboard.prune(board, 1) == {"s1": board["s1"]}
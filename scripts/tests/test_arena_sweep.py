@@ -0,0 +1,47 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from scripts.tools import arena_rank, arena_sweep
+
+
+def test_iter_combos_grid_and_random():
+    grid = arena_sweep.build_grid(["confidence_threshold=0.5,0.6", "volume_window=30,60"], None)
+    combos = list(arena_sweep.iter_combos(grid, [], 0, None))
+    assert len(combos) == 4
+    assert {"confidence_threshold": 0.5, "volume_window": 60} in combos
+
+    sampled = list(arena_sweep.iter_combos({}, ["volume_window=20:80", "atr_stop_multiple=0.8:1.4"], 5, seed=1))
+    assert len(sampled) == 5
+    assert all(isinstance(c["volume_window"], int) and 20 <= c["volume_window"] <= 80 for c in sampled)
+    assert sampled == list(arena_sweep.iter_combos({}, ["volume_window=20:80", "atr_stop_multiple=0.8:1.4"], 5, seed=1))
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_sweep_writes_runs_and_resumes(tmp_path: Path, make_klines):
+    klines = tmp_path / "klines.csv"
+    make_klines(2500, seed=3, price=30000.0, vol=0.0009).to_csv(klines, index=False)
+    output = tmp_path / "runs" / "sweep.jsonl"
+    argv = ["--klines", str(klines), "--workers", "2", "--output", str(output),
+            "--param", "confidence_threshold=0.55,0.65", "--param", "force_trade_confidence=0.45"]
+
+    summary = arena_sweep.main(argv)
+    assert summary["completed"] == 2 and summary["failed"] == 0
+    lines = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert {line["metadata"]["sweep_params"]["confidence_threshold"] for line in lines} == {0.55, 0.65}
+    assert all("trades" in arena_rank.extract_stats(line) for line in lines)
+
+    # se simula una interrupción: línea truncada + una combinación nueva
+    with output.open("a", encoding="utf-8") as fh:
+        fh.write('{"name": "cut')
+    columns = tmp_path / "runs" / "sweep.npz"
+    resumed = arena_sweep.main(argv + ["--param", "confidence_threshold=0.55,0.65,0.75", "--columns", str(columns)])
+    assert resumed["skipped"] == 2 and resumed["completed"] == 1
+    assert len(arena_sweep.completed_ids(output)) == 3
+    assert len(arena_rank.load_columns([columns])["name"]) == 3
+
+    # mismo archivo de salida con otro símbolo: nada se da por hecho
+    other = arena_sweep.main(argv + ["--symbol", "ETHUSDT"])
+    assert other["skipped"] == 0 and other["completed"] == 2
+    assert len(arena_sweep.completed_ids(output)) == 5
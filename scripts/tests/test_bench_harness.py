@@ -0,0 +1,25 @@
+import json
+
+from benchmarks import harness
+
+
+def test_pedantic_runs_setup_outside_timing():
+    calls = []
+    bench = harness.Benchmark(rounds=3)
+    result = bench.pedantic(lambda x: x * 2, setup=lambda: (calls.append(1) or (len(calls),), {}), warmup_rounds=1)
+    assert result == 8
+    assert len(calls) == 4 and len(bench.timings) == 3
+
+
+def test_compare_flags_regressions(tmp_path):
+    def _result(name, median):
+        return harness.BenchResult(name=name, group="g", size=None, rounds=1, min_s=median, max_s=median,
+                                   mean_s=median, median_s=median, stddev_s=0.0, ops_per_s=1 / median)
+
+    base = harness.write_results(tmp_path / "base.json", [_result("a", 0.010), _result("b", 0.010)])
+    cur = harness.write_results(tmp_path / "cur.json", [_result("a", 0.013), _result("b", 0.005), _result("c", 1.0)])
+    rows = {row["name"]: row for row in harness.compare(json.loads(cur.read_text()), json.loads(base.read_text()))}
+    assert set(rows) == {"a", "b"}
+    assert rows["a"]["regression"] and not rows["a"]["improvement"]
+    assert rows["b"]["improvement"] and rows["b"]["ratio"] == 0.5
+    assert json.loads(cur.read_text())["environment"]["python"]
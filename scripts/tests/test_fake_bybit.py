@@ -0,0 +1,70 @@
+from fastapi.testclient import TestClient
+
+from scripts.tools import fake_bybit
+
+
+def _client(**faults):
+    state = fake_bybit.ExchangeState(seed=1, balance=1_000.0)
+    app = fake_bybit.create_app(state, fake_bybit.FaultConfig(**faults), tick_ms=0)
+    return TestClient(app), state
+
+
+def _order(client, **body):
+    payload = {"category": "linear", "symbol": "BTCUSDT", "orderType": "Market", **body}
+    return client.post("/v5/order/create", json=payload).json()
+
+
+def test_market_order_opens_position_and_sl_closes_it():
+    client, state = _client()
+    assert _order(client, side="Buy", qty="0.01", stopLoss="1000")["retCode"] == 0
+    pos = client.get("/v5/position/list", params={"category": "linear", "symbol": "BTCUSDT"}).json()["result"]["list"][0]
+    assert pos["side"] == "Buy" and float(pos["size"]) == 0.01 and pos["stopLoss"]
+
+    state.set_price("BTCUSDT", 999.0)
+    closed = client.get("/v5/position/closed-pnl", params={"category": "linear"}).json()["result"]["list"]
+    assert len(closed) == 1 and float(closed[0]["closedPnl"]) < 0
+    assert state.positions["BTCUSDT"]["size"] == 0
+    assert _order(client, side="Sell", qty="0.01", reduceOnly=True)["retCode"] == 110017
+
+
+def test_limit_orders_and_margin_check():
+    client, state = _client()
+    bid, ask = state.quote("ETHUSDT")
+    post_only = _order(client, symbol="ETHUSDT", side="Buy", orderType="Limit", qty="0.1",
+                       price=f"{ask:.2f}", timeInForce="PostOnly")
+    rows = client.get("/v5/order/realtime", params={"orderId": post_only["result"]["orderId"]}).json()["result"]["list"]
+    assert rows[0]["orderStatus"] == "Cancelled"
+
+    resting = _order(client, symbol="ETHUSDT", side="Buy", orderType="Limit", qty="0.1", price=f"{bid * 0.99:.2f}")
+    assert state.orders[resting["result"]["orderId"]]["orderStatus"] == "New"
+    state.set_price("ETHUSDT", bid * 0.98)
+    assert state.orders[resting["result"]["orderId"]]["orderStatus"] == "Filled"
+    assert _order(client, side="Buy", qty="10")["retCode"] == 110007
+
+
+def test_fault_injection_and_klines():
+    client, _ = _client(error_rate=1.0, error_code=10006)
+    resp = client.get("/v5/market/tickers", params={"category": "linear", "symbol": "BTCUSDT"})
+    assert resp.json()["retCode"] == 10006 and "X-Bapi-Limit-Reset-Timestamp" in resp.headers
+    client.post("/fake/config", json={"error_rate": 0})
+    rows = client.get("/v5/market/kline", params={"symbol": "SOLUSDT", "interval": "15", "limit": 5}).json()["result"]["list"]
+    assert len(rows) == 5 and int(rows[0][0]) > int(rows[-1][0])
+
+
+def test_private_stream_pushes_fills():
+    client, _ = _client()
+    with client, client.websocket_connect("/v5/private") as ws:  # un solo event loop para REST y WS
+        ws.send_json({"op": "auth", "args": ["key", 0, "sig"]})
+        assert ws.receive_json()["success"]
+        ws.send_json({"op": "subscribe", "args": ["position", "execution", "order"]})
+        assert ws.receive_json()["success"]
+        _order(client, side="Sell", qty="0.01")
+        topics = [ws.receive_json()["topic"] for _ in range(3)]
+    assert topics == ["execution", "order", "position"]
+
+
+def test_bybit_client_uses_custom_endpoint():
+    from sls_bot.bybit import BybitClient
+
+    assert BybitClient("k", "s", "http://127.0.0.1:9100/").session._session.endpoint == "http://127.0.0.1:9100"
+    assert "bybit.com" in BybitClient("k", "s", "https://api-testnet.bybit.com").session._session.endpoint
@@ -0,0 +1,82 @@
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from statistics import pstdev
+
+from scripts.tools import metrics_business as mb
+from sls_bot.log_manager import RotatingLog, RotationPolicy
+
+NOW = datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _trade(minutes_ago: float, pnl: float, after: float, symbol: str = "BTCUSDT") -> dict:
+    ts = (NOW - timedelta(minutes=minutes_ago)).isoformat().replace("+00:00", "Z")
+    return {"type": "close", "ts": ts, "symbol": symbol, "pnl": pnl, "before": after - pnl, "after": after}
+
+
+def _args(tmp_path: Path, lookback_days: int = 1) -> object:
+    return mb.parse_args(["--output", str(tmp_path / "business.prom"), "--lookback-days", str(lookback_days),
+                          "--heartbeat", "3600"])
+
+
+def _value(prom: Path, name: str) -> float:
+    for line in prom.read_text().splitlines():
+        if line.startswith(name + "{"):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(name)
+
+
+def test_daemon_tails_incrementally_and_matches_batch(tmp_path):
+    pnl = tmp_path / "pnl.jsonl"
+    rows = [_trade(600 - i * 10, pnl, 1000 + i * 5 + pnl, sym)
+            for i, (pnl, sym) in enumerate([(5, "BTCUSDT"), (-8, "ETHUSDT"), (3, "BTCUSDT"), (-1, "BTCUSDT")])]
+    pnl.write_text("".join(json.dumps(r) + "\n" for r in rows))
+    args = _args(tmp_path)
+    prom = tmp_path / "business.prom"
+
+    clock = {"now": NOW}
+    assert mb.run_daemon(args, "test", pnl, now_fn=lambda: clock["now"], sleep=lambda s: None, max_cycles=3) == 1
+    trades, daily = mb._collect_entries(rows, NOW - timedelta(days=1))
+    batch = mb.compute_metrics(trades, daily, now=NOW)
+    assert _value(prom, "sls_bot_business_trades_total") == batch["trades_total"] == 4
+    assert abs(_value(prom, "sls_bot_business_pnl_std_eur") - batch["pnl_std"]) < 1e-9
+    assert abs(_value(prom, "sls_bot_business_max_drawdown_pct") - batch["max_drawdown_pct"]) < 1e-9
+
+    # línea a medio escribir: no se consume hasta que llega el salto de línea
+    extra = _trade(5, 7, 1100)
+    with pnl.open("a") as fh:
+        fh.write(json.dumps(extra)[:20])
+    mb.run_daemon(args, "test", pnl, now_fn=lambda: clock["now"], sleep=lambda s: None, max_cycles=1)
+    assert _value(prom, "sls_bot_business_trades_total") == 4
+    with pnl.open("a") as fh:
+        fh.write(json.dumps(extra)[20:] + "\n")
+    mb.run_daemon(args, "test", pnl, now_fn=lambda: clock["now"], sleep=lambda s: None, max_cycles=1)
+    assert _value(prom, "sls_bot_business_trades_total") == 5
+    assert _value(prom, "sls_bot_business_pnl_total_eur") == 6.0
+
+    # los trades que salen de la ventana se expulsan y el desvío se ajusta
+    clock["now"] = NOW + timedelta(days=1) - timedelta(minutes=595)
+    mb.run_daemon(args, "test", pnl, now_fn=lambda: clock["now"], sleep=lambda s: None, max_cycles=1)
+    remaining = [-8, 3, -1, 7]
+    assert _value(prom, "sls_bot_business_trades_total") == 4
+    assert abs(_value(prom, "sls_bot_business_pnl_std_eur") - pstdev(remaining)) < 1e-9
+    assert 'symbol="ETHUSDT"' in prom.read_text()
+
+
+def test_daemon_follows_rotation_without_duplicates(tmp_path):
+    pnl = tmp_path / "pnl.jsonl"
+    log = RotatingLog(pnl, RotationPolicy(rotate_daily=False, flush_bytes=1))
+    log.append(_trade(30, 1, 1001))
+    log.flush()
+    args = _args(tmp_path)
+    mb.run_daemon(args, "test", pnl, now_fn=lambda: NOW, sleep=lambda s: None, max_cycles=1)
+
+    log.append(_trade(20, 2, 1003))
+    log.rotate()
+    log.append(_trade(10, 4, 1007))
+    log.flush()
+    mb.run_daemon(args, "test", pnl, now_fn=lambda: NOW, sleep=lambda s: None, max_cycles=1)
+    prom = tmp_path / "business.prom"
+    assert _value(prom, "sls_bot_business_trades_total") == 3
+    assert _value(prom, "sls_bot_business_pnl_total_eur") == 7.0
+    log.close()
@@ -0,0 +1,55 @@
+import itertools
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scripts.tools import webhook_load
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        status, payload = (500, b"boom") if body["signal"] == "SLS_EXIT" else (200, json.dumps({"status": "ok"}).encode())
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_synth_payloads_only_exit_open_symbols():
+    mix = webhook_load.parse_mix("entry=1,exit=1,update=1")
+    payloads = list(itertools.islice(webhook_load.synth_payloads(["BTCUSDT", "ETHUSDT"], mix, {"BTCUSDT": 100.0}), 200))
+    opened = set()
+    for p in payloads:
+        if p["signal"] == "SLS_EXIT":
+            assert p["symbol"] in opened
+            opened.discard(p["symbol"])
+        else:
+            opened.add(p["symbol"])
+            assert ("sl" in p) == (p["symbol"] == "BTCUSDT")
+    assert {p["signal"] for p in payloads} >= {"SLS_EXIT", "SLS_UPDATE", "SLS_LONG_ENTRY", "SLS_SHORT_ENTRY"}
+    assert webhook_load.resolve_symbols("7")[-1] == "LOAD01USDT"
+
+
+def test_run_stage_reports_statuses_and_errors():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/webhook"
+        payloads = itertools.cycle([{"signal": "SLS_LONG_ENTRY", "symbol": "BTCUSDT"},
+                                    {"signal": "SLS_LONG_ENTRY", "symbol": "ETHUSDT"},
+                                    {"signal": "SLS_LONG_ENTRY", "symbol": "SOLUSDT"},
+                                    {"signal": "SLS_EXIT", "symbol": "BTCUSDT"}])
+        samples = webhook_load.run_stage(url, payloads, rate=200, duration=0.2, concurrency=4, timeout=5)
+    finally:
+        server.shutdown()
+    stage = webhook_load.summarize(samples, 200, 0.2)
+    assert stage["requests"] == 40
+    assert stage["statuses"]["ok"] == 30 and stage["statuses"]["error"] == 10
+    assert stage["errors"] == {"http_500": 10} and stage["error_rate"] == 0.25
+    assert stage["latency_ms"]["p99"] >= stage["latency_ms"]["p50"] > 0
+    assert webhook_load.sustainable_rate([stage], slo_p99_ms=10_000, max_error_rate=0.3) == 200
+    assert webhook_load.sustainable_rate([stage], slo_p99_ms=10_000, max_error_rate=0.1) is None
@@ -5,16 +5,43 @@ Ranking multi-métrica para Arena/Autopilot 2V.
 Lee uno o varios archivos (JSON/JSONL) con resultados de backtests/autopilot y
 produce una tabla ordenada por score agregando Sharpe, Calmar, Profit Factor,
 win rate y drawdown.
+
+Con `--stream` el ranking se hace línea a línea conservando solo un heap con
+los `--top-k` mejores y contadores de descartes por motivo, de modo que la
+memoria no crece con el tamaño de los runs; `--workers N` reparte los
+archivos entre procesos y fusiona los heaps al final. Si `orjson` está
+instalado se usa para parsear.
+
+Con `--columnar` las métricas, guardias y scores se calculan con NumPy para
+todas las filas a la vez (también desde `.npz`/`.parquet` generados con
+`--export-columns`), y `--presets presets.json` re-puntúa el mismo set bajo
+varios pesos/objetivos sin volver a parsear.
 """
 
 from __future__ import annotations
 
 import argparse
+import heapq
 import json
 import math
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:  # parser rápido opcional
+    import orjson
+
+    _loads = orjson.loads
+    _JSONDecodeError: Tuple[type, ...] = (orjson.JSONDecodeError, ValueError)
+except Exception:  # pragma: no cover - depende del entorno
+    orjson = None
+    _loads = json.loads
+    _JSONDecodeError = (json.JSONDecodeError, UnicodeDecodeError)
+
+REJECTED_SAMPLE = 20
 
 
 def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
@@ -30,9 +57,49 @@ def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
     parser.add_argument("--target-drawdown", type=float, default=4.0, help="Drawdown óptimo para normalizar.")
     parser.add_argument("--json", action="store_true", help="Imprime la salida completa en JSON.")
     parser.add_argument("--top", type=int, default=5, help="Cantidad de filas a mostrar en modo tabla.")
+    parser.add_argument("--stream", action="store_true", help="Ranking en streaming con heap top-K (memoria constante).")
+    parser.add_argument("--top-k", type=int, default=None, help="Candidatos conservados en modo streaming (por defecto --top).")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos para rankear archivos en paralelo (modo streaming).")
+    parser.add_argument("--columnar", action="store_true", help="Puntúa todas las filas con NumPy (acepta .npz/.parquet).")
+    parser.add_argument("--presets", type=Path, default=None,
+                        help="JSON con una lista de presets de pesos/objetivos para análisis de sensibilidad.")
+    parser.add_argument("--export-columns", type=Path, default=None,
+                        help="Guarda los runs en formato columnar (.npz o .parquet) y sale.")
     return parser.parse_args(list(argv) if argv is not None else None)
 
 
+def expand_paths(paths: Iterable[Path]) -> List[Path]:
+    files: List[Path] = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(expand_paths(sorted(path.iterdir())))
+        elif path.suffix.lower() in (".jsonl", ".json"):
+            files.append(path)
+    return files
+
+
+def iter_jsonl(path: Path, offset: int = 0, end: Optional[int] = None) -> Iterable[dict]:
+    """Candidatos de un JSONL leídos línea a línea entre los bytes `offset` y `end`."""
+    with path.open("rb") as fh:
+        if offset:
+            fh.seek(offset)
+        pos = offset
+        for line in fh:
+            pos += len(line)
+            if end is not None and pos > end:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = _loads(line)
+            except _JSONDecodeError:
+                continue
+            if isinstance(data, dict):
+                data.setdefault("_source", str(path))
+                yield data
+
+
 def iter_candidates(paths: Iterable[Path]) -> Iterable[dict]:
     for path in paths:
         if path.is_dir():
@@ -40,16 +107,7 @@ def iter_candidates(paths: Iterable[Path]) -> Iterable[dict]:
                 yield from iter_candidates([child])
             continue
         if path.suffix.lower() == ".jsonl":
-            for line in path.read_text(encoding="utf-8").splitlines():
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    data = json.loads(line)
-                    data.setdefault("_source", str(path))
-                    yield data
-                except json.JSONDecodeError:
-                    continue
+            yield from iter_jsonl(path)
         elif path.suffix.lower() == ".json":
             try:
                 data = json.loads(path.read_text(encoding="utf-8"))
@@ -64,7 +122,18 @@ def iter_candidates(paths: Iterable[Path]) -> Iterable[dict]:
                 continue
 
 
-def extract_stats(item: dict) -> Dict[str, float]:
+BASE_FIELDS = ("pnl", "max_drawdown", "gross_profit", "gross_loss", "trades", "win_rate",
+               "returns_avg", "returns_std", "feature_drift")
+DEFAULT_WEIGHTS = {
+    "sharpe": 0.3,
+    "calmar": 0.25,
+    "profit_factor": 0.2,
+    "win_rate": 0.15,
+    "drawdown": 0.1,
+}
+
+
+def _base_stats(item: dict) -> Tuple[float, ...]:
     stats = item.get("stats") or item
     pnl = float(stats.get("pnl") or stats.get("pnl_usd") or 0.0)
     max_dd = abs(float(stats.get("max_drawdown") or stats.get("max_dd_pct") or 0.0))
@@ -75,7 +144,11 @@ def extract_stats(item: dict) -> Dict[str, float]:
     returns_avg = float(stats.get("returns_avg") or stats.get("daily_return_avg") or 0.0)
     returns_std = abs(float(stats.get("returns_std") or stats.get("daily_return_std") or 0.0))
     feature_drift = float(stats.get("feature_drift") or item.get("feature_drift") or 0.0)
+    return pnl, max_dd, gross_profit, gross_loss, trades, win_rate, returns_avg, returns_std, feature_drift
+
 
+def extract_stats(item: dict) -> Dict[str, float]:
+    pnl, max_dd, gross_profit, gross_loss, trades, win_rate, returns_avg, returns_std, feature_drift = _base_stats(item)
     sharpe = returns_avg / returns_std if returns_std else 0.0
     calmar = pnl / max_dd if max_dd else 0.0
     profit_factor = gross_profit / gross_loss if gross_loss else math.inf if gross_profit > 0 else 0.0
@@ -121,40 +194,285 @@ def compute_score(stats: Dict[str, float], args: argparse.Namespace) -> Tuple[fl
         "win_rate": clamp_ratio(stats["win_rate"], args.target_win_rate),
         "drawdown": 1.0 - min(stats["max_drawdown"] / max(args.target_drawdown, 0.01), 1.5),
     }
-    weights = {
-        "sharpe": 0.3,
-        "calmar": 0.25,
-        "profit_factor": 0.2,
-        "win_rate": 0.15,
-        "drawdown": 0.1,
-    }
+    weights = getattr(args, "weights", None) or DEFAULT_WEIGHTS
     score = sum(components[key] * weights[key] for key in components)
     return score, components
 
 
+def _candidate_name(item: dict) -> str:
+    return item.get("name") or item.get("strategy") or item.get("id") or item.get("_source", "unknown")
+
+
+def _accepted_row(item: dict, name: str, score: float, stats: Dict[str, float], comps: Dict[str, float]) -> dict:
+    return {
+        "name": name,
+        "score": score,
+        "stats": stats,
+        "components": {k: round(v, 4) for k, v in comps.items()},
+        "source": item.get("_source"),
+        "metadata": item.get("metadata"),
+    }
+
+
 def rank_candidates(paths: Iterable[Path], args: argparse.Namespace) -> Dict[str, List[dict]]:
+    return rank_items(iter_candidates(paths), args)
+
+
+def rank_items(items: Iterable[dict], args: argparse.Namespace) -> Dict[str, List[dict]]:
     accepted: List[dict] = []
     rejected: List[dict] = []
-    for item in iter_candidates(paths):
-        name = item.get("name") or item.get("strategy") or item.get("id") or item.get("_source", "unknown")
+    for item in items:
+        name = _candidate_name(item)
         stats = extract_stats(item)
         violations = guardrails(stats, args)
         if violations:
             rejected.append({"name": name, "stats": stats, "violations": violations, "source": item.get("_source")})
             continue
         score, comps = compute_score(stats, args)
-        accepted.append({
-            "name": name,
-            "score": round(score, 4),
-            "stats": stats,
-            "components": {k: round(v, 4) for k, v in comps.items()},
-            "source": item.get("_source"),
-            "metadata": item.get("metadata"),
-        })
+        accepted.append(_accepted_row(item, name, round(score, 4), stats, comps))
     accepted.sort(key=lambda x: x["score"], reverse=True)
     return {"accepted": accepted, "rejected": rejected}
 
 
+def _rank_stream_partial(paths: List[Path], args: argparse.Namespace, top_k: int, offset: int = 0) -> dict:
+    """Heap mínimo de tamaño `top_k`; en empates gana el candidato leído antes."""
+    heap: List[Tuple[float, Tuple[int, int], dict]] = []
+    rejected_counts: Dict[str, int] = {}
+    rejected_sample: List[dict] = []
+    seen = accepted_total = 0
+    for file_idx, path in enumerate(paths, offset):
+        for line_no, item in enumerate(iter_candidates([path])):
+            seen += 1
+            stats = extract_stats(item)
+            violations = guardrails(stats, args)
+            if violations:
+                for reason in violations:
+                    key = reason.split("(", 1)[0]
+                    rejected_counts[key] = rejected_counts.get(key, 0) + 1
+                if len(rejected_sample) < REJECTED_SAMPLE:
+                    rejected_sample.append({"name": _candidate_name(item), "stats": stats, "violations": violations,
+                                            "source": item.get("_source")})
+                continue
+            accepted_total += 1
+            score, comps = compute_score(stats, args)
+            score = round(score, 4)
+            order = (-file_idx, -line_no)
+            if len(heap) >= top_k and (score, order) <= heap[0][:2]:
+                continue
+            entry = (score, order, _accepted_row(item, _candidate_name(item), score, stats, comps))
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heapreplace(heap, entry)
+    return {"heap": heap, "rejected_counts": rejected_counts, "rejected_sample": rejected_sample,
+            "seen": seen, "accepted_total": accepted_total}
+
+
+def rank_stream(paths: Iterable[Path], args: argparse.Namespace, top_k: Optional[int] = None,
+                workers: int = 1) -> dict:
+    """Ranking con memoria acotada: top-K aceptados + conteo de descartes por motivo."""
+    files = expand_paths(paths)
+    top_k = max(1, int(top_k or getattr(args, "top_k", None) or getattr(args, "top", 5)))
+    if workers > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_rank_stream_partial, [path], args, top_k, idx) for idx, path in enumerate(files)]
+            partials = [future.result() for future in futures]
+    else:
+        partials = [_rank_stream_partial(files, args, top_k)]
+
+    merged = heapq.nlargest(top_k, (entry for part in partials for entry in part["heap"]), key=lambda e: e[:2])
+    rejected_counts: Dict[str, int] = {}
+    rejected_sample: List[dict] = []
+    for part in partials:
+        for key, count in part["rejected_counts"].items():
+            rejected_counts[key] = rejected_counts.get(key, 0) + count
+        rejected_sample.extend(part["rejected_sample"][: REJECTED_SAMPLE - len(rejected_sample)])
+    seen = sum(part["seen"] for part in partials)
+    accepted_total = sum(part["accepted_total"] for part in partials)
+    return {
+        "accepted": [entry[2] for entry in merged],
+        "rejected": rejected_sample,
+        "rejected_counts": rejected_counts,
+        "totals": {"seen": seen, "accepted": accepted_total, "rejected": seen - accepted_total, "files": len(files)},
+    }
+
+
+# ----- modo columnar -----
+def load_columns(paths: Iterable[Path]) -> Dict[str, np.ndarray]:
+    """Carga runs en arrays: `.npz`/`.parquet` columnar directamente, JSON/JSONL parseando una vez."""
+    names: List[str] = []
+    sources: List[str] = []
+    rows: List[Tuple[float, ...]] = []
+    frames: List[Dict[str, np.ndarray]] = []
+    json_paths: List[Path] = []
+    for path in paths:
+        for child in (sorted(path.rglob("*")) if path.is_dir() else [path]):
+            suffix = child.suffix.lower()
+            if suffix == ".npz":
+                with np.load(child, allow_pickle=False) as data:
+                    frames.append({key: data[key] for key in data.files})
+            elif suffix == ".parquet":
+                import pandas as pd  # requiere pyarrow/fastparquet
+
+                df = pd.read_parquet(child)
+                frames.append({col: df[col].to_numpy() for col in df.columns})
+            elif suffix in (".json", ".jsonl"):
+                json_paths.append(child)
+    for item in iter_candidates(json_paths):
+        names.append(str(_candidate_name(item)))
+        sources.append(str(item.get("_source") or ""))
+        rows.append(_base_stats(item))
+    if rows:
+        matrix = np.asarray(rows, dtype=np.float64).reshape(-1, len(BASE_FIELDS))
+        frame = {field: matrix[:, idx] for idx, field in enumerate(BASE_FIELDS)}
+        frame.update(name=np.asarray(names, dtype=str), source=np.asarray(sources, dtype=str))
+        frames.append(frame)
+    if not frames:
+        return {field: np.zeros(0) for field in BASE_FIELDS} | {"name": np.zeros(0, dtype=str), "source": np.zeros(0, dtype=str)}
+    columns = {field: np.concatenate([f[field].astype(np.float64) for f in frames]) for field in BASE_FIELDS}
+    columns["name"] = np.concatenate([f["name"].astype(str) for f in frames])
+    columns["source"] = np.concatenate([f.get("source", np.full(len(f["name"]), "")).astype(str) for f in frames])
+    return columns
+
+
+def export_columns(columns: Dict[str, np.ndarray], path: Path) -> Path:
+    """Guarda runs en formato columnar (`.parquet` si hay pyarrow, si no `.npz`)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix.lower() == ".parquet":
+        import pandas as pd
+
+        pd.DataFrame(columns).to_parquet(path, index=False)
+    else:
+        np.savez(path, **columns)
+    return path
+
+
+def derived_metrics(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Sharpe/Calmar/Profit Factor de todas las filas a la vez (misma semántica que extract_stats)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = columns["returns_std"]
+        dd = columns["max_drawdown"]
+        gl = columns["gross_loss"]
+        gp = columns["gross_profit"]
+        sharpe = np.where(std != 0, columns["returns_avg"] / np.where(std != 0, std, 1.0), 0.0)
+        calmar = np.where(dd != 0, columns["pnl"] / np.where(dd != 0, dd, 1.0), 0.0)
+        pf = np.where(gl != 0, gp / np.where(gl != 0, gl, 1.0), np.where(gp > 0, np.inf, 0.0))
+    return {"sharpe": sharpe, "calmar": calmar, "profit_factor": pf}
+
+
+def _clamp_ratio_np(values: np.ndarray, target: float, cap: float = 2.0) -> np.ndarray:
+    if target <= 0:
+        return np.zeros_like(values)
+    return np.clip(values / target, 0.0, cap)
+
+
+def score_columns(columns: Dict[str, np.ndarray], args: argparse.Namespace,
+                  derived: Optional[Dict[str, np.ndarray]] = None) -> dict:
+    derived = derived or derived_metrics(columns)
+    masks = {
+        "min_trades": columns["trades"] < args.min_trades,
+        "max_drawdown": columns["max_drawdown"] > args.max_drawdown,
+        "feature_drift": columns["feature_drift"] > args.max_drift,
+    }
+    accepted = ~(masks["min_trades"] | masks["max_drawdown"] | masks["feature_drift"])
+    components = {
+        "sharpe": _clamp_ratio_np(derived["sharpe"], args.target_sharpe),
+        "calmar": _clamp_ratio_np(derived["calmar"], args.target_calmar),
+        "profit_factor": _clamp_ratio_np(derived["profit_factor"], args.target_profit_factor),
+        "win_rate": _clamp_ratio_np(columns["win_rate"], args.target_win_rate),
+        "drawdown": 1.0 - np.minimum(columns["max_drawdown"] / max(args.target_drawdown, 0.01), 1.5),
+    }
+    weights = getattr(args, "weights", None) or DEFAULT_WEIGHTS
+    score = np.zeros(len(columns["name"]))
+    for key in components:  # mismo orden de suma que compute_score
+        score = score + components[key] * weights[key]
+    return {"score": score, "components": components, "accepted": accepted, "masks": masks, "derived": derived}
+
+
+def _ranked_indices(scored: dict) -> np.ndarray:
+    idx = np.flatnonzero(scored["accepted"])
+    rounded = np.round(scored["score"][idx], 4)
+    order = np.argsort(-rounded, kind="stable")
+    return idx[order], rounded[order]
+
+
+def _columnar_stats(columns: Dict[str, np.ndarray], derived: Dict[str, np.ndarray], i: int) -> Dict[str, float]:
+    stats = {field: float(columns[field][i]) for field in BASE_FIELDS}
+    stats["trades"] = int(stats["trades"])
+    stats.update({key: float(values[i]) for key, values in derived.items()})
+    return stats
+
+
+def rank_columnar(paths: Iterable[Path], args: argparse.Namespace, columns: Optional[Dict[str, np.ndarray]] = None,
+                  limit: Optional[int] = None, rejected_limit: Optional[int] = None) -> dict:
+    """Mismo ranking que `rank_candidates`, puntuando todas las filas con NumPy.
+
+    Solo se construyen dicts para las `limit` mejores y los `rejected_limit` primeros
+    descartados (None = todos); el resto se resume en `rejected_counts`/`totals` a
+    partir de las máscaras, sin recorrer filas en Python.
+    """
+    columns = columns if columns is not None else load_columns(paths)
+    scored = score_columns(columns, args)
+    order, rounded = _ranked_indices(scored)
+    if limit is not None:
+        order, rounded = order[:limit], rounded[:limit]
+    derived = scored["derived"]
+    accepted = []
+    for i, score in zip(order.tolist(), rounded.tolist()):
+        accepted.append({
+            "name": str(columns["name"][i]),
+            "score": score,
+            "stats": _columnar_stats(columns, derived, i),
+            "components": {k: round(float(v[i]), 4) for k, v in scored["components"].items()},
+            "source": str(columns["source"][i]) or None,
+            "metadata": None,
+        })
+    rejected_idx = np.flatnonzero(~scored["accepted"])
+    rejected = []
+    for i in rejected_idx[:rejected_limit].tolist():
+        stats = _columnar_stats(columns, derived, i)
+        rejected.append({"name": str(columns["name"][i]), "stats": stats, "violations": guardrails(stats, args),
+                         "source": str(columns["source"][i]) or None})
+    return {
+        "accepted": accepted,
+        "rejected": rejected,
+        "rejected_counts": {key: int(mask.sum()) for key, mask in scored["masks"].items() if mask.any()},
+        "totals": {"seen": int(len(columns["name"])), "accepted": int(scored["accepted"].sum()),
+                   "rejected": int(len(rejected_idx))},
+    }
+
+
+def rescore_presets(columns: Dict[str, np.ndarray], base_args: argparse.Namespace, presets: List[dict],
+                    top: int = 10) -> dict:
+    """Re-puntúa el mismo set bajo varios presets de pesos/objetivos (análisis de sensibilidad).
+
+    Cada preset es un dict con `name`, opcionalmente `weights` y cualquier
+    umbral/objetivo de los argumentos (`target_sharpe`, `min_trades`...). Las
+    métricas derivadas se calculan una sola vez.
+    """
+    derived = derived_metrics(columns)
+    results: Dict[str, dict] = {}
+    appearances: Dict[str, int] = {}
+    for preset in presets:
+        args = argparse.Namespace(**vars(base_args))
+        for key, value in preset.items():
+            if key == "weights":
+                args.weights = {**DEFAULT_WEIGHTS, **value}
+            elif key != "name":
+                setattr(args, key, value)
+        scored = score_columns(columns, args, derived)
+        order, rounded = _ranked_indices(scored)
+        names = [str(columns["name"][i]) for i in order[:top].tolist()]
+        for name in names:
+            appearances[name] = appearances.get(name, 0) + 1
+        results[str(preset.get("name") or f"preset_{len(results)}")] = {
+            "accepted": int(scored["accepted"].sum()),
+            "top": [{"name": n, "score": float(sc)} for n, sc in zip(names, rounded[:top].tolist())],
+        }
+    consensus = sorted(appearances.items(), key=lambda kv: kv[1], reverse=True)
+    return {"presets": results, "consensus": [{"name": n, "appearances": c} for n, c in consensus]}
+
+
 def print_table(accepted: List[dict], top: int) -> None:
     headers = ["#", "Strategy", "Score", "Sharpe", "Calmar", "ProfitF", "Win%", "DD%", "Trades"]
     print(" | ".join(headers))
@@ -175,7 +493,23 @@ def print_table(accepted: List[dict], top: int) -> None:
 
 def main() -> None:
     args = parse_args()
-    result = rank_candidates(args.paths, args)
+    if args.export_columns or args.presets:
+        columns = load_columns(args.paths)
+        if args.export_columns:
+            export_columns(columns, args.export_columns)
+            print(f"{len(columns['name'])} runs -> {args.export_columns}")
+            return
+        presets = json.loads(args.presets.read_text(encoding="utf-8"))
+        print(json.dumps(rescore_presets(columns, args, presets, top=args.top), ensure_ascii=False, indent=2))
+        return
+    if args.columnar:
+        # la tabla solo enseña --top; --json pide el ranking completo
+        result = rank_columnar(args.paths, args, limit=None if args.json else args.top,
+                               rejected_limit=None if args.json else REJECTED_SAMPLE)
+    elif args.stream:
+        result = rank_stream(args.paths, args, top_k=args.top_k or args.top, workers=args.workers)
+    else:
+        result = rank_candidates(args.paths, args)
     if args.json:
         print(json.dumps(result, ensure_ascii=False, indent=2))
     else:
@@ -185,7 +519,11 @@ def main() -> None:
                 print(f"- {rej['name']}: {', '.join(rej['violations'])}")
         else:
             print_table(result["accepted"], args.top)
-            if result["rejected"]:
+            if result.get("rejected_counts"):
+                total = (result.get("totals") or {}).get("rejected", len(result["rejected"]))
+                print(f"\nDescartados ({total}): " +
+                      ", ".join(f"{k}={v}" for k, v in sorted(result["rejected_counts"].items())))
+            elif result["rejected"]:
                 print(f"\nDescartados ({len(result['rejected'])}):")
                 for rej in result["rejected"]:
                     print(f"- {rej['name']}: {', '.join(rej['violations'])}")
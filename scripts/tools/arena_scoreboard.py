@@ -1,13 +1,24 @@
 #!/usr/bin/env python3
-"""Gestiona el tablero de victorias para estrategias Arena."""
+"""Gestiona el tablero de victorias para estrategias Arena.
+
+Es incremental e idempotente: un índice (`--index`, por defecto
+`<scoreboard>_index.json`) guarda el hash de contenido de cada run ya aplicado
+y, para JSONL que crecen, hasta qué byte se procesaron. Solo se rankean los
+runs nuevos, y el recorte a `--top` usa un heap en vez de ordenar todo el
+tablero. Se puede llamar desde cron cada pocos minutos.
+"""
 
 from __future__ import annotations
 
 import argparse
+import hashlib
+import heapq
 import json
+import os
+import tempfile
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import sys
 
@@ -31,11 +42,20 @@ def load_json(path: Path) -> dict:
         return {}
 
 
-def build_args() -> argparse.Namespace:
+def write_json(path: Path, payload) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def build_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Actualiza el scoreboard de Arena según los runs más recientes.")
     parser.add_argument("--runs", type=Path, nargs="+", required=True, help="Archivos JSON/JSONL con estrategias.")
     parser.add_argument("--scoreboard", type=Path, default=Path("arena/scoreboard.json"))
     parser.add_argument("--champions", type=Path, default=Path("arena/champions.json"))
+    parser.add_argument("--index", type=Path, default=None, help="Índice de runs aplicados (por defecto junto al scoreboard).")
     parser.add_argument("--score-threshold", type=float, default=1.15)
     parser.add_argument("--promotion-wins", type=int, default=10)
     parser.add_argument("--top", type=int, default=200, help="Máximo de estrategias guardadas en el scoreboard.")
@@ -47,11 +67,11 @@ def build_args() -> argparse.Namespace:
     parser.add_argument("--target-profit-factor", type=float, default=2.0)
     parser.add_argument("--target-win-rate", type=float, default=0.58)
     parser.add_argument("--target-drawdown", type=float, default=4.5)
-    return parser.parse_args()
+    return parser.parse_args(list(argv) if argv is not None else None)
 
 
-def make_rank(namespace: argparse.Namespace, paths: List[Path]) -> Dict[str, List[dict]]:
-    args = argparse.Namespace(
+def _rank_args(namespace: argparse.Namespace, paths: List[Path]) -> argparse.Namespace:
+    return argparse.Namespace(
         min_trades=namespace.min_trades,
         max_drawdown=namespace.max_drawdown,
         max_drift=namespace.max_drift,
@@ -64,28 +84,153 @@ def make_rank(namespace: argparse.Namespace, paths: List[Path]) -> Dict[str, Lis
         top=namespace.top,
         paths=paths,
     )
-    return arena_rank.rank_candidates(paths, args)
 
 
-def prune(scoreboard: dict, top: int) -> dict:
-    ordered = sorted(scoreboard.items(), key=lambda kv: (kv[1].get("victories", 0), kv[1].get("last_score", 0)), reverse=True)
-    trimmed = dict(ordered[:top])
-    return trimmed
+def make_rank(namespace: argparse.Namespace, paths: List[Path]) -> Dict[str, List[dict]]:
+    return arena_rank.rank_candidates(paths, _rank_args(namespace, paths))
 
 
-def update_scoreboard(namespace: argparse.Namespace, ranking: Dict[str, List[dict]], scoreboard: dict) -> dict:
-    updated = dict(scoreboard)
+# ----- índice de runs aplicados -----
+def file_digest(path: Path, limit: Optional[int] = None) -> str:
+    """sha256 del contenido (o de los primeros `limit` bytes)."""
+    digest = hashlib.sha256()
+    remaining = limit
+    with path.open("rb") as fh:
+        while remaining is None or remaining > 0:
+            chunk = fh.read(1 << 20 if remaining is None else min(1 << 20, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def _complete_lines_end(path: Path) -> int:
+    """Byte tras el último salto de línea (una línea a medio escribir se deja para la próxima)."""
+    size = path.stat().st_size
+    with path.open("rb") as fh:
+        pos = size
+        while pos > 0:
+            step = min(1 << 16, pos)
+            fh.seek(pos - step)
+            chunk = fh.read(step)
+            idx = chunk.rfind(b"\n")
+            if idx >= 0:
+                return pos - step + idx + 1
+            pos -= step
+    return 0
+
+
+def _is_complete_record(path: Path, start: int) -> bool:
+    """La última línea sin salto final cuenta si ya es un JSON válido."""
+    with path.open("rb") as fh:
+        fh.seek(start)
+        tail = fh.read().strip()
+    try:
+        json.loads(tail)
+        return True
+    except ValueError:
+        return False
+
+
+def load_index(path: Path) -> dict:
+    index = load_json(path)
+    index.setdefault("files", {})
+    index.setdefault("paths", {})
+    return index
+
+
+def plan_run(path: Path, index: dict) -> Optional[Tuple[int, int]]:
+    """Rango de bytes pendiente de aplicar, o None si el contenido ya se aplicó."""
+    size = path.stat().st_size
+    if file_digest(path) in index["files"]:
+        return None
+    if path.suffix.lower() != ".jsonl":
+        return 0, size
+    end = _complete_lines_end(path)
+    if end < size and _is_complete_record(path, end):
+        end = size
+    record = index["paths"].get(str(path.resolve()))
+    offset = 0
+    if record and record.get("offset", 0) <= end and file_digest(path, record["offset"]) == record.get("prefix_hash"):
+        offset = int(record["offset"])
+    if offset >= end:
+        return None
+    return offset, end
+
+
+def mark_applied(index: dict, path: Path, end: int, accepted: int) -> None:
     now = _now()
-    for row in ranking.get("accepted") or []:
-        if row["score"] < namespace.score_threshold:
-            continue
-        entry = updated.setdefault(row["name"], {"victories": 0})
+    if path.suffix.lower() == ".jsonl":
+        index["paths"][str(path.resolve())] = {"offset": end, "prefix_hash": file_digest(path, end), "updated_at": now}
+    if end >= path.stat().st_size:
+        index["files"][file_digest(path)] = {"path": str(path), "applied_at": now, "accepted": accepted}
+
+
+def rank_new(namespace: argparse.Namespace, path: Path, offset: int, end: int) -> Dict[str, List[dict]]:
+    args = _rank_args(namespace, [path])
+    if path.suffix.lower() == ".jsonl":
+        return arena_rank.rank_items(arena_rank.iter_jsonl(path, offset, end), args)
+    return arena_rank.rank_candidates([path], args)
+
+
+# ----- scoreboard -----
+class Scoreboard:
+    """Entradas por nombre + heap mínimo (con borrado perezoso) para recortar a `top` en O(log n)."""
+
+    def __init__(self, entries: Optional[dict] = None, top: int = 200):
+        self.entries: Dict[str, dict] = dict(entries or {})
+        self.top = int(top)
+        self._heap: List[Tuple[Tuple[float, float], str]] = [(self._key(e), name) for name, e in self.entries.items()]
+        heapq.heapify(self._heap)
+
+    @staticmethod
+    def _key(entry: dict) -> Tuple[float, float]:
+        return (entry.get("victories", 0), entry.get("last_score") or 0)
+
+    def record(self, row: dict, now: str) -> None:
+        entry = self.entries.setdefault(row["name"], {"victories": 0})
         entry["victories"] = entry.get("victories", 0) + 1
         entry["last_score"] = row["score"]
         entry["stats"] = row.get("stats")
         entry["source"] = row.get("source")
         entry["updated_at"] = now
-    return prune(updated, namespace.top)
+        heapq.heappush(self._heap, (self._key(entry), row["name"]))
+
+    def prune(self) -> None:
+        while len(self.entries) > self.top and self._heap:
+            key, name = heapq.heappop(self._heap)
+            entry = self.entries.get(name)
+            if entry is not None and self._key(entry) == key:
+                del self.entries[name]
+        if len(self._heap) > 4 * len(self.entries) + 64:
+            self._heap = [(self._key(e), name) for name, e in self.entries.items()]
+            heapq.heapify(self._heap)
+
+
+def prune(scoreboard: dict, top: int) -> dict:
+    board = Scoreboard(scoreboard, top)
+    board.prune()
+    return board.entries
+
+
+def apply_ranking(namespace: argparse.Namespace, ranking: Dict[str, List[dict]], board: Scoreboard) -> int:
+    now = _now()
+    wins = 0
+    for row in ranking.get("accepted") or []:
+        if row["score"] < namespace.score_threshold:
+            continue
+        board.record(row, now)
+        wins += 1
+    return wins
+
+
+def update_scoreboard(namespace: argparse.Namespace, ranking: Dict[str, List[dict]], scoreboard: dict) -> dict:
+    board = Scoreboard(scoreboard, namespace.top)
+    apply_ranking(namespace, ranking, board)
+    board.prune()
+    return board.entries
 
 
 def compute_champions(scoreboard: dict, promotion_wins: int) -> List[dict]:
@@ -98,22 +243,40 @@ def compute_champions(scoreboard: dict, promotion_wins: int) -> List[dict]:
     return champions
 
 
-def main() -> None:
-    args = build_args()
+def main(argv: Iterable[str] | None = None) -> dict:
+    args = build_args(argv)
     paths = [p for p in args.runs if p.exists()]
     if not paths:
         raise SystemExit("No runs provided")
-    ranking = make_rank(args, paths)
-    scoreboard_path = args.scoreboard
-    scoreboard = load_json(scoreboard_path)
-    scoreboard = update_scoreboard(args, ranking, scoreboard)
-    scoreboard_path.parent.mkdir(parents=True, exist_ok=True)
-    scoreboard_path.write_text(json.dumps(scoreboard, ensure_ascii=False, indent=2), encoding="utf-8")
-
-    champions = compute_champions(scoreboard, args.promotion_wins)
-    args.champions.parent.mkdir(parents=True, exist_ok=True)
-    args.champions.write_text(json.dumps(champions, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(f"Scoreboard actualizado ({len(scoreboard)} estrategias, {len(champions)} champions)")
+    index_path = args.index or args.scoreboard.with_name(f"{args.scoreboard.stem}_index.json")
+    index = load_index(index_path)
+    board = Scoreboard(load_json(args.scoreboard), args.top)
+
+    applied, skipped, wins = 0, 0, 0
+    for path in paths:
+        plan = plan_run(path, index)
+        if plan is None:
+            skipped += 1
+            continue
+        offset, end = plan
+        ranking = rank_new(args, path, offset, end)
+        wins += apply_ranking(args, ranking, board)
+        mark_applied(index, path, end, len(ranking.get("accepted") or []))
+        applied += 1
+
+    board.prune()
+    summary = {"applied": applied, "skipped": skipped, "victories": wins, "strategies": len(board.entries)}
+    if not applied:
+        print(f"Scoreboard sin cambios ({skipped} runs ya aplicados)")
+        return summary
+    write_json(args.scoreboard, board.entries)
+    champions = compute_champions(board.entries, args.promotion_wins)
+    write_json(args.champions, champions)
+    write_json(index_path, index)
+    summary["champions"] = len(champions)
+    print(f"Scoreboard actualizado ({len(board.entries)} estrategias, {len(champions)} champions, "
+          f"{applied} runs nuevos, {skipped} ya aplicados)")
+    return summary
 
 
 if __name__ == "__main__":
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Barrido de parámetros de `strategies.scalping` que genera runs reales para Arena.
+
+- Grid (`--param clave=v1,v2` o `--grid grid.json`) o búsqueda aleatoria
+  (`--random N --range clave=min:max`).
+- Los indicadores se calculan una vez en el proceso padre y se publican en
+  memoria compartida; cada worker del pool los mapea sin copiarlos.
+- `--columns runs.npz` deja además la salida en formato columnar para
+  `arena_rank.py --columnar` / `--presets`.
+- Cada combinación terminada se escribe como una línea JSONL con su
+  `combo_id`; al relanzar el barrido se saltan las que ya están en la salida.
+  El `combo_id` incluye la huella del barrido (símbolo, timeframe, datos de
+  entrada y config base), así que otro dataset sobre la misma salida no
+  reutiliza resultados ajenos.
+
+Uso típico:
+
+    python scripts/tools/arena_sweep.py --klines data/BTCUSDT_1m.csv \
+        --param confidence_threshold=0.55,0.6,0.65 --param atr_stop_multiple=0.9,1.15 \
+        --workers 4 --output arena/runs/sweep_btc.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(REPO_ROOT / "bot"))
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+INDICATOR_COLUMNS = [
+    "ts", "open", "high", "low", "close", "volume", "ema_fast", "ema_mid", "ema_slow",
+    "rsi", "atr", "avwap", "range_pct", "breakout_up", "breakout_dn",
+]
+ANCHOR_COLUMNS = ["close", "ema_mid", "rsi"]
+
+
+def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Barrido paralelo de parámetros de scalping para Arena.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--klines", type=Path, help="CSV/Parquet/NPZ con ts,open,high,low,close,volume.")
+    source.add_argument("--store", type=Path, help="Directorio del almacén local de klines (kline_store).")
+    parser.add_argument("--start", type=str, default=None, help="Inicio del rango con --store (epoch o ISO).")
+    parser.add_argument("--end", type=str, default=None, help="Fin del rango con --store (epoch o ISO).")
+    parser.add_argument("--anchor-klines", type=Path, default=None)
+    parser.add_argument("--symbol", type=str, default="BTCUSDT")
+    parser.add_argument("--timeframe", type=str, default=None)
+    parser.add_argument("--config", type=Path, default=None, help="Ruta manual a config.json.")
+    parser.add_argument("--param", action="append", default=[], metavar="KEY=V1,V2",
+                        help="Valores a barrer para una clave (repetible).")
+    parser.add_argument("--grid", type=Path, default=None, help="JSON {clave: [valores]} para el grid.")
+    parser.add_argument("--random", type=int, default=0, help="Número de combinaciones aleatorias (usa --range).")
+    parser.add_argument("--range", dest="ranges", action="append", default=[], metavar="KEY=MIN:MAX",
+                        help="Rango uniforme para la búsqueda aleatoria (enteros si ambos extremos lo son).")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--initial-equity", type=float, default=1000.0)
+    parser.add_argument("--prefix", type=str, default="sweep")
+    parser.add_argument("--output", type=Path, default=Path("arena/runs/sweep.jsonl"))
+    parser.add_argument("--columns", type=Path, default=None,
+                        help="Exporta también la salida en columnas (.npz/.parquet) para arena_rank --columnar.")
+    return parser.parse_args(list(argv) if argv is not None else None)
+
+
+def _coerce(value: str) -> Any:
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+def build_grid(params: Sequence[str], grid_file: Optional[Path]) -> Dict[str, List[Any]]:
+    grid: Dict[str, List[Any]] = {}
+    if grid_file:
+        data = json.loads(grid_file.read_text(encoding="utf-8"))
+        grid.update({key: list(values) for key, values in data.items()})
+    for item in params:
+        key, _, raw = item.partition("=")
+        if key and raw:
+            grid[key.strip()] = [_coerce(v.strip()) for v in raw.split(",") if v.strip()]
+    return grid
+
+
+def iter_combos(grid: Dict[str, List[Any]], ranges: Sequence[str], samples: int,
+                seed: Optional[int]) -> Iterable[Dict[str, Any]]:
+    if samples > 0:
+        rng = random.Random(seed)
+        bounds: Dict[str, Tuple[Any, Any]] = {}
+        for item in ranges:
+            key, _, raw = item.partition("=")
+            low, _, high = raw.partition(":")
+            bounds[key.strip()] = (_coerce(low), _coerce(high))
+        for _ in range(samples):
+            combo = {key: rng.choice(values) for key, values in grid.items()}
+            for key, (low, high) in bounds.items():
+                if isinstance(low, int) and isinstance(high, int):
+                    combo[key] = rng.randint(low, high)
+                else:
+                    combo[key] = round(rng.uniform(float(low), float(high)), 4)
+            yield combo
+        return
+    keys = sorted(grid)
+    for values in itertools.product(*(grid[key] for key in keys)):
+        yield dict(zip(keys, values))
+
+
+def _source_stamp(path: Optional[Path]) -> Optional[list]:
+    """Ruta absoluta + tamaño + mtime: cambia si el archivo se reescribe."""
+    if path is None:
+        return None
+    path = Path(path).resolve()
+    try:
+        st = path.stat()
+    except OSError:
+        return [str(path)]
+    return [str(path), st.st_size, st.st_mtime_ns]
+
+
+def sweep_fingerprint(args: argparse.Namespace, timeframe: str, strategy_cfg: Dict[str, Any]) -> str:
+    """Huella de todo lo que no son los parámetros barridos pero cambia el resultado."""
+    if args.store:
+        from sls_bot.kline_store import KlineStore  # type: ignore
+
+        manifest = KlineStore(args.store).series_dir(args.symbol, timeframe) / "manifest.json"
+        source = ["store", _source_stamp(manifest), args.start, args.end]
+    else:
+        source = ["klines", _source_stamp(args.klines)]
+    payload = {
+        "symbol": args.symbol.upper(),
+        "timeframe": timeframe,
+        "source": source,
+        "anchor": _source_stamp(args.anchor_klines),
+        "initial_equity": args.initial_equity,
+        "base_config": strategy_cfg,
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def combo_id(params: Dict[str, Any], fingerprint: str = "") -> str:
+    raw = json.dumps({"params": params, "sweep": fingerprint}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def completed_ids(output: Path) -> Set[str]:
+    """Combinaciones ya escritas en la salida (checkpoint para reanudar)."""
+    done: Set[str] = set()
+    if not output.exists():
+        return done
+    with output.open("r", encoding="utf-8", errors="ignore") as fh:
+        for line in fh:
+            try:
+                payload = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # línea truncada por una interrupción
+            cid = (payload.get("metadata") or {}).get("combo_id")
+            if cid:
+                done.add(cid)
+    return done
+
+
+def _terminate_partial_line(output: Path) -> None:
+    """Cierra con salto de línea un registro truncado para no pegarle el siguiente."""
+    try:
+        with output.open("rb+") as fh:
+            fh.seek(0, os.SEEK_END)
+            if fh.tell() == 0:
+                return
+            fh.seek(-1, os.SEEK_END)
+            if fh.read(1) != b"\n":
+                fh.write(b"\n")
+    except FileNotFoundError:
+        pass
+
+
+# ----- memoria compartida -----
+def publish_frames(primary, anchor) -> Tuple[shared_memory.SharedMemory, dict]:
+    """Copia los indicadores a un bloque compartido (una fila por columna, contigua)."""
+    columns = list(INDICATOR_COLUMNS)
+    arrays = [primary[col].to_numpy(dtype=np.float64) for col in columns]
+    if anchor is not None:
+        for col in ANCHOR_COLUMNS:
+            columns.append(f"anchor_{col}")
+            arrays.append(anchor[col].to_numpy(dtype=np.float64))
+    shape = (len(columns), len(primary))
+    shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    for idx, values in enumerate(arrays):
+        matrix[idx] = values
+    return shm, {"name": shm.name, "shape": shape, "columns": columns}
+
+
+_WORKER: Dict[str, Any] = {}
+
+
+def _frames_from_matrix(matrix: np.ndarray, columns: List[str]):
+    import pandas as pd
+
+    primary = pd.DataFrame({col: matrix[i] for i, col in enumerate(columns) if not col.startswith("anchor_")}, copy=False)
+    anchor_cols = {col[len("anchor_"):]: matrix[i] for i, col in enumerate(columns) if col.startswith("anchor_")}
+    anchor = pd.DataFrame(anchor_cols, copy=False) if anchor_cols else None
+    return primary, anchor
+
+
+def _init_worker(spec: dict, context: dict) -> None:
+    shm = shared_memory.SharedMemory(name=spec["name"])
+    matrix = np.ndarray(spec["shape"], dtype=np.float64, buffer=shm.buf)
+    _WORKER.update(shm=shm, frames=_frames_from_matrix(matrix, spec["columns"]), context=context)
+
+
+def _run_combo(params: Dict[str, Any]) -> dict:
+    from sls_bot import backtest  # type: ignore
+
+    ctx = _WORKER["context"]
+    config = dict(ctx["base_config"])
+    config.update(params)
+    started = time.perf_counter()
+    result = backtest.run_backtest(
+        None, config, symbol=ctx["symbol"], timeframe=ctx["timeframe"],
+        initial_equity=ctx["initial_equity"], frames=_WORKER["frames"],
+    )
+    cid = combo_id(params, ctx["fingerprint"])
+    record = backtest.arena_record(result, name=f"{ctx['prefix']}_{cid[:10]}", symbol=ctx["symbol"],
+                                   timeframe=ctx["timeframe"], config=config)
+    record["metadata"].update({
+        "combo_id": cid,
+        "sweep_fingerprint": ctx["fingerprint"],
+        "sweep_params": params,
+        "bars": ctx["bars"],
+        "range_ms": ctx["range_ms"],
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    })
+    return record
+
+
+def run_sweep(args: argparse.Namespace, strategy_cfg: Dict[str, Any]) -> dict:
+    from sls_bot import backtest  # type: ignore
+    from sls_bot.strategies.scalping import ScalpingStrategy  # type: ignore
+
+    timeframe = args.timeframe or str(strategy_cfg.get("primary_timeframe", "1m"))
+    grid = build_grid(args.param, args.grid)
+    combos = list(iter_combos(grid, args.ranges, args.random, args.seed))
+    fingerprint = sweep_fingerprint(args, timeframe, strategy_cfg)
+    done = completed_ids(args.output)
+    pending = [c for c in combos if combo_id(c, fingerprint) not in done]
+    summary = {"total": len(combos), "skipped": len(combos) - len(pending), "completed": 0, "failed": 0,
+               "output": str(args.output)}
+    if not pending:
+        return summary
+
+    if args.store:
+        klines = backtest.load_store_klines(args.store, args.symbol, timeframe, args.start, args.end)
+    else:
+        klines = backtest.load_klines(args.klines)
+    anchor_klines = backtest.load_klines(args.anchor_klines) if args.anchor_klines else None
+    primary, anchor = backtest.prepare_frames(klines, ScalpingStrategy(strategy_cfg), anchor_klines, timeframe)
+    context = {
+        "base_config": strategy_cfg,
+        "symbol": args.symbol.upper(),
+        "timeframe": timeframe,
+        "initial_equity": args.initial_equity,
+        "prefix": args.prefix,
+        "fingerprint": fingerprint,
+        "bars": int(len(klines)),
+        "range_ms": [int(klines["ts"].iloc[0]), int(klines["ts"].iloc[-1])] if len(klines) else [],
+    }
+    shm, spec = publish_frames(primary, anchor)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    _terminate_partial_line(args.output)
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=_init_worker,
+                                 initargs=(spec, context)) as pool, args.output.open("a", encoding="utf-8") as out:
+            futures = {pool.submit(_run_combo, combo): combo for combo in pending}
+            for future in as_completed(futures):
+                try:
+                    record = future.result()
+                except Exception as exc:  # pragma: no cover - se reporta y se sigue
+                    summary["failed"] += 1
+                    print(f"[sweep] fallo en {futures[future]}: {exc}", file=sys.stderr)
+                    continue
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                summary["completed"] += 1
+    finally:
+        shm.close()
+        shm.unlink()
+    return summary
+
+
+def main(argv: Iterable[str] | None = None) -> dict:
+    args = parse_args(argv)
+    if args.config:
+        os.environ["SLSBOT_CONFIG"] = str(args.config)
+    elif not os.getenv("SLSBOT_CONFIG"):
+        sample_cfg = REPO_ROOT / "config" / "config.sample.json"
+        if not (REPO_ROOT / "config" / "config.json").exists() and sample_cfg.exists():
+            os.environ["SLSBOT_CONFIG"] = str(sample_cfg)
+
+    from sls_bot.config_loader import load_config  # type: ignore  # noqa: E402
+
+    cfg = load_config()
+    strategy_cfg = (cfg.get("strategies") or {}).get("scalping") or {}
+    summary = run_sweep(args, strategy_cfg)
+    if args.columns and args.output.exists():
+        from scripts.tools import arena_rank
+
+        arena_rank.export_columns(arena_rank.load_columns([args.output]), args.columns)
+        summary["columns"] = str(args.columns)
+    print(json.dumps(summary, ensure_ascii=False))
+    return summary
+
+
+if __name__ == "__main__":
+    main()
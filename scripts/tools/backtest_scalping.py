@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Backtest histórico (vectorizado) de la estrategia de scalping.
+
+Uso típico:
+
+    python scripts/tools/backtest_scalping.py --klines data/BTCUSDT_1m.csv \
+        --symbol BTCUSDT --set confidence_threshold=0.7 --output arena/runs/backtest.jsonl
+
+Con `--store <dir> --start 2024-01-01` las velas salen del almacén local
+(`sls_bot.kline_store`) en vez de un fichero.
+
+La salida es una línea JSONL con `stats` en el formato de arena_rank.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(REPO_ROOT / "bot"))
+
+
+def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Backtest vectorizado de ScalpingStrategy.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--klines", type=Path, help="CSV/Parquet/NPZ con ts,open,high,low,close,volume.")
+    source.add_argument("--store", type=Path, help="Directorio del almacén local de klines (kline_store).")
+    parser.add_argument("--start", type=str, default=None, help="Inicio del rango con --store (epoch o ISO).")
+    parser.add_argument("--end", type=str, default=None, help="Fin del rango con --store (epoch o ISO).")
+    parser.add_argument("--anchor-klines", type=Path, default=None, help="Klines del timeframe ancla (si no, se re-muestrea).")
+    parser.add_argument("--symbol", type=str, default="BTCUSDT")
+    parser.add_argument("--timeframe", type=str, default=None, help="Timeframe de las klines (por defecto primary_timeframe).")
+    parser.add_argument("--config", type=Path, default=None, help="Ruta manual a config.json.")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                        help="Sobrescribe claves de strategies.scalping (repetible).")
+    parser.add_argument("--initial-equity", type=float, default=1000.0)
+    parser.add_argument("--name", type=str, default=None)
+    parser.add_argument("--output", type=Path, default=None, help="Archivo JSONL donde añadir el resultado.")
+    return parser.parse_args(list(argv) if argv is not None else None)
+
+
+def _coerce(value: str) -> Any:
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+def apply_overrides(config: Dict[str, Any], overrides: Iterable[str]) -> Dict[str, Any]:
+    merged = dict(config)
+    for item in overrides:
+        key, _, raw = item.partition("=")
+        if key:
+            merged[key.strip()] = _coerce(raw.strip())
+    return merged
+
+
+def _ensure_config_env(path: Path | None) -> None:
+    if path:
+        os.environ["SLSBOT_CONFIG"] = str(path)
+    elif not os.getenv("SLSBOT_CONFIG"):
+        default_cfg = REPO_ROOT / "config" / "config.json"
+        sample_cfg = default_cfg.with_name("config.sample.json")
+        if not default_cfg.exists() and sample_cfg.exists():
+            os.environ["SLSBOT_CONFIG"] = str(sample_cfg)
+
+
+def main(argv: Iterable[str] | None = None) -> dict:
+    args = parse_args(argv)
+    _ensure_config_env(args.config)
+
+    from sls_bot.config_loader import load_config  # type: ignore  # noqa: E402
+    from sls_bot import backtest  # type: ignore  # noqa: E402
+
+    cfg = load_config()
+    strategy_cfg = apply_overrides((cfg.get("strategies") or {}).get("scalping") or {}, args.overrides)
+    timeframe = args.timeframe or str(strategy_cfg.get("primary_timeframe", "1m"))
+
+    started = time.perf_counter()
+    if args.store:
+        klines = backtest.load_store_klines(args.store, args.symbol, timeframe, args.start, args.end)
+    else:
+        klines = backtest.load_klines(args.klines)
+    anchor = backtest.load_klines(args.anchor_klines) if args.anchor_klines else None
+    result = backtest.run_backtest(
+        klines,
+        strategy_cfg,
+        symbol=args.symbol,
+        timeframe=timeframe,
+        anchor_klines=anchor,
+        initial_equity=args.initial_equity,
+    )
+    name = args.name or f"scalp_bt_{args.symbol.lower()}_{timeframe}"
+    record = backtest.arena_record(result, name=name, symbol=args.symbol, timeframe=timeframe,
+                                   config=strategy_cfg, klines=klines)
+    record["metadata"]["elapsed_s"] = round(time.perf_counter() - started, 3)
+
+    line = json.dumps(record, ensure_ascii=False)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with args.output.open("a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+    print(line)
+    return record
+
+
+if __name__ == "__main__":
+    main()
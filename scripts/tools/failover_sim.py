@@ -9,6 +9,10 @@ Ejemplos:
 
     # Ejecuta reinicios reales y guarda el log en logs/failover/
     sudo python scripts/tools/failover_sim.py --execute --services sls-api.service,sls-cerebro.service,sls-bot.service
+
+Con `--execute` además de esperar a `active` se sondea el endpoint HTTP de cada
+servicio (`--health-urls`) y se anota el tiempo desde `systemctl restart` hasta
+la primera respuesta 200: eso es lo que ve el balanceador/TradingView.
 """
 
 from __future__ import annotations
@@ -20,11 +24,16 @@ import subprocess
 import sys
 import textwrap
 import time
+import urllib.request
 from pathlib import Path
-from typing import Iterable, List
+from typing import Dict, Iterable, List, Optional
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 DEFAULT_SERVICES = ["sls-api.service", "sls-cerebro.service", "sls-bot.service"]
+DEFAULT_HEALTH_URLS = {
+    "sls-api.service": "http://127.0.0.1:8880/health",
+    "sls-bot.service": "http://127.0.0.1:8080/health",
+}
 
 
 def parse_args() -> argparse.Namespace:
@@ -52,6 +61,11 @@ def parse_args() -> argparse.Namespace:
         default=50,
         help="Cantidad de líneas de journalctl a capturar tras cada reinicio.",
     )
+    parser.add_argument(
+        "--health-urls",
+        default=",".join(f"{svc}={url}" for svc, url in DEFAULT_HEALTH_URLS.items()),
+        help="servicio=url separados por comas; se mide el tiempo hasta el primer 200 tras reiniciar. Vacío lo desactiva.",
+    )
     parser.add_argument(
         "--execute",
         action="store_true",
@@ -83,6 +97,28 @@ def _journal_tail(service: str, lines: int) -> str:
     return proc.stdout or proc.stderr
 
 
+def parse_health_urls(raw: str) -> Dict[str, str]:
+    urls: Dict[str, str] = {}
+    for item in (raw or "").split(","):
+        service, sep, url = item.partition("=")
+        if sep and service.strip() and url.strip():
+            urls[service.strip()] = url.strip()
+    return urls
+
+
+def wait_healthy(url: str, started: float, max_wait: float, interval: float = 0.05) -> Optional[float]:
+    """Segundos desde `started` (perf_counter) hasta el primer HTTP 200 en `url`; None si no llega."""
+    while time.perf_counter() - started < max_wait:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:
+                if resp.status == 200:
+                    return time.perf_counter() - started
+        except Exception:
+            pass
+        time.sleep(interval)
+    return None
+
+
 def _format_header(title: str) -> str:
     border = "=" * len(title)
     return f"{title}\n{border}"
@@ -95,6 +131,7 @@ def simulate_failover(
     log_dir: Path,
     max_wait: int,
     journal_lines: int,
+    health_urls: Optional[Dict[str, str]] = None,
 ) -> Path:
     services = [svc.strip() for svc in services if svc.strip()]
     if not services:
@@ -112,6 +149,8 @@ def simulate_failover(
     lines.append(f"Services      : {', '.join(services)}")
     lines.append(f"Max wait (s)  : {max_wait}")
     lines.append("")
+    health_urls = health_urls or {}
+    summary: List[str] = []
 
     for service in services:
         lines.append(_format_header(service))
@@ -121,6 +160,7 @@ def simulate_failover(
 
         if execute:
             lines.append(f"Reiniciando {service} ...")
+            restarted = time.perf_counter()
             restart_proc = _systemctl_restart(service)
             if restart_proc.returncode != 0:
                 lines.append(f"[ERROR] systemctl restart devolvió {restart_proc.returncode}:")
@@ -136,6 +176,15 @@ def simulate_failover(
                 lines.append(f"[OK] {service} volvió a 'active' en {time.time() - start:.1f} s.")
             else:
                 lines.append(f"[WARN] {service} no está 'active' tras {max_wait} s (verificar manualmente).")
+            url = health_urls.get(service)
+            if url:
+                healthy = wait_healthy(url, restarted, max_wait)
+                if healthy is None:
+                    lines.append(f"[WARN] {url} no respondió 200 tras {max_wait} s.")
+                    summary.append(f"{service}: sin respuesta sana en {max_wait} s")
+                else:
+                    lines.append(f"[OK] {url} respondió 200 a los {healthy * 1000:.0f} ms del restart.")
+                    summary.append(f"{service}: primer 200 en {healthy * 1000:.0f} ms")
         else:
             cmd = f"systemctl restart {service}"
             lines.append("Dry-run: se ejecutaría -> " + cmd)
@@ -148,6 +197,11 @@ def simulate_failover(
         lines.append(_journal_tail(service, journal_lines))
         lines.append("")
 
+    if summary:
+        lines.append(_format_header("Tiempo hasta respuesta sana"))
+        lines.extend(summary)
+        lines.append("")
+
     report_path.write_text("\n".join(lines), encoding="utf-8")
     return report_path
 
@@ -161,6 +215,7 @@ def main() -> None:
         log_dir=args.log_dir,
         max_wait=args.max_wait,
         journal_lines=args.journal_lines,
+        health_urls=parse_health_urls(args.health_urls),
     )
     print(textwrap.dedent(
         f"""
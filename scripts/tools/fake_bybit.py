@@ -0,0 +1,908 @@
+#!/usr/bin/env python3
+"""
+Exchange Bybit v5 simulado para pruebas de carga y ensayos offline.
+
+Sirve los endpoints REST que usa el bot (tickers, kline, orderbook,
+instruments-info, wallet-balance, positions, order/create, set-leverage,
+trading-stop, closed-pnl, market/time) y los WebSockets públicos
+(`/v5/public/linear`) y privados (`/v5/private`) con un motor de matching
+sencillo: órdenes Market contra bid/ask, Limit GTC/IOC/PostOnly, reduceOnly,
+SL/TP sobre la posición y comisiones taker/maker.
+
+    python scripts/tools/fake_bybit.py --port 9100 --latency-ms 40 --jitter-ms 20 --error-rate 0.02
+
+y en la config del bot:
+
+    "bybit": {"base_url": "http://127.0.0.1:9100", ...}
+
+`BybitClient`, las órdenes firmadas de `sls_bot.app`, `ia_utils` y el stream
+privado respetan ese `base_url`. Las firmas no se validan. `/fake/state`,
+`/fake/config`, `/fake/price` y `/fake/reset` permiten inspeccionar y mover
+el mercado durante una prueba.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+import uuid
+import zlib
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, fields
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+
+DEFAULT_INSTRUMENTS: Dict[str, Dict[str, float]] = {
+    "BTCUSDT": {"price": 60_000.0, "tick": 0.1, "step": 0.001, "min": 0.001, "max": 100.0},
+    "ETHUSDT": {"price": 3_000.0, "tick": 0.01, "step": 0.01, "min": 0.01, "max": 1_500.0},
+    "SOLUSDT": {"price": 150.0, "tick": 0.01, "step": 0.1, "min": 0.1, "max": 50_000.0},
+    "BNBUSDT": {"price": 550.0, "tick": 0.01, "step": 0.01, "min": 0.01, "max": 5_000.0},
+    "XRPUSDT": {"price": 0.55, "tick": 0.0001, "step": 1.0, "min": 1.0, "max": 5_000_000.0},
+}
+INTERVAL_MS = {
+    "1": 60_000, "3": 180_000, "5": 300_000, "15": 900_000, "30": 1_800_000,
+    "60": 3_600_000, "120": 7_200_000, "240": 14_400_000, "360": 21_600_000,
+    "720": 43_200_000, "D": 86_400_000, "W": 604_800_000,
+}
+TAKER_FEE = 0.00055
+MAKER_FEE = 0.0002
+HALF_SPREAD = 0.00005  # bid/ask a ±0.5 bps del mark
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _fmt(value: float, step: float = 0.0) -> str:
+    if step > 0:
+        decimals = max(0, -int(math.floor(math.log10(step)))) if step < 1 else 0
+        return f"{round(value / step) * step:.{decimals}f}"
+    return f"{value:.8f}".rstrip("0").rstrip(".") or "0"
+
+
+def _noise(*key: Any) -> float:
+    """Ruido determinista en [0, 1) para (semilla, símbolo, intervalo, vela...)."""
+    return random.Random(zlib.crc32(":".join(map(str, key)).encode())).random()
+
+
+def envelope(result: Any = None, ret_code: int = 0, ret_msg: str = "OK") -> Dict[str, Any]:
+    return {"retCode": ret_code, "retMsg": ret_msg, "result": result if result is not None else {},
+            "retExtInfo": {}, "time": _now_ms()}
+
+
+class ExchangeError(Exception):
+    def __init__(self, ret_code: int, ret_msg: str):
+        super().__init__(ret_msg)
+        self.ret_code = ret_code
+        self.ret_msg = ret_msg
+
+
+@dataclass
+class FaultConfig:
+    """Latencia y errores inyectados en cada llamada REST `/v5/...`."""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_code: int = 10016  # "service unavailable"; < 1000 se devuelve como status HTTP
+
+    def update(self, data: Dict[str, Any]) -> None:
+        for f in fields(self):
+            if f.name in data and data[f.name] is not None:
+                setattr(self, f.name, type(getattr(self, f.name))(data[f.name]))
+
+
+# ----------------- WebSockets -----------------
+class Hub:
+    """Suscripciones por conexión; cada conexión drena su propia cola."""
+
+    def __init__(self, queue_size: int = 1000):
+        self.queue_size = queue_size
+        self._subs: Dict[asyncio.Queue, Set[str]] = {}
+        self.dropped = 0
+
+    def connect(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subs[queue] = set()
+        return queue
+
+    def disconnect(self, queue: asyncio.Queue) -> None:
+        self._subs.pop(queue, None)
+
+    def subscribe(self, queue: asyncio.Queue, topics: List[str]) -> None:
+        self._subs.setdefault(queue, set()).update(topics)
+
+    def topics(self) -> Set[str]:
+        out: Set[str] = set()
+        for topics in self._subs.values():
+            out |= topics
+        return out
+
+    def publish(self, topic: str, message: Dict[str, Any]) -> None:
+        base = topic.split(".", 1)[0]
+        for queue, topics in list(self._subs.items()):
+            if topic in topics or base in topics:
+                try:
+                    queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    self.dropped += 1
+
+
+# ----------------- Estado del exchange -----------------
+class ExchangeState:
+    """Mercado (random walk sembrado) + cuenta USDT one-way + libro de órdenes propias."""
+
+    def __init__(self, seed: int = 7, balance: float = 10_000.0, volatility: float = 0.0004,
+                 instruments: Optional[Dict[str, Dict[str, float]]] = None):
+        self.seed = seed
+        self.initial_balance = float(balance)
+        self.volatility = volatility
+        self.instruments = {k: dict(v) for k, v in (instruments or DEFAULT_INSTRUMENTS).items()}
+        self.public = Hub()
+        self.private = Hub()
+        self.reset()
+
+    def reset(self) -> None:
+        self._rng = random.Random(self.seed)
+        now = _now_ms()
+        self.prices: Dict[str, float] = {s: self._fair(s, now) for s in self.instruments}
+        self.wallet = self.initial_balance
+        self.cum_realised = 0.0
+        self.positions: Dict[str, Dict[str, Any]] = {}
+        self.leverage: Dict[str, float] = {}
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.closed_pnl: List[Dict[str, Any]] = []
+        self.counters: Dict[str, int] = {"orders": 0, "fills": 0, "rejects": 0, "sl_tp": 0}
+        self._seq = itertools.count(1)
+
+    # ----- mercado -----
+    def instrument(self, symbol: str) -> Dict[str, float]:
+        symbol = symbol.upper()
+        spec = self.instruments.get(symbol)
+        if spec is None:
+            if not symbol.endswith("USDT") or len(symbol) <= 4:
+                raise ExchangeError(10001, f"params error: symbol invalid {symbol}")
+            # símbolos no listados: precio estable derivado del nombre (pruebas con muchos símbolos)
+            price = round(1 + _noise(self.seed, symbol) * 999, 2)
+            spec = {"price": price, "tick": 0.01, "step": 0.1, "min": 0.1, "max": 1_000_000.0}
+            self.instruments[symbol] = spec
+            self.prices[symbol] = self._fair(symbol, _now_ms())
+        return spec
+
+    def mark(self, symbol: str) -> float:
+        self.instrument(symbol)
+        return self.prices[symbol.upper()]
+
+    def quote(self, symbol: str) -> Tuple[float, float]:
+        spec = self.instrument(symbol)
+        mark = self.prices[symbol.upper()]
+        tick = spec["tick"]
+        bid = math.floor(mark * (1 - HALF_SPREAD) / tick) * tick
+        ask = math.ceil(mark * (1 + HALF_SPREAD) / tick) * tick
+        return float(_fmt(bid, tick)), float(_fmt(max(ask, bid + tick), tick))
+
+    def set_price(self, symbol: str, price: float) -> None:
+        self.instrument(symbol)
+        self.prices[symbol.upper()] = float(price)
+        self.match(symbol.upper())
+
+    def step_prices(self) -> None:
+        now = _now_ms()
+        for symbol in list(self.prices):
+            # random walk con leve reversión hacia `_fair` para que el mark no se aleje de las velas históricas
+            pull = 0.01 * math.log(self._fair(symbol, now) / self.prices[symbol])
+            shock = self._rng.gauss(0.0, self.volatility) + pull
+            spec = self.instruments[symbol]
+            self.prices[symbol] = max(spec["tick"], self.prices[symbol] * math.exp(shock))
+
+    def ticker(self, symbol: str) -> Dict[str, str]:
+        spec = self.instrument(symbol)
+        symbol = symbol.upper()
+        mark = self.prices[symbol]
+        bid, ask = self.quote(symbol)
+        prev = self._close(symbol, "D", _now_ms() // INTERVAL_MS["D"] - 1)
+        return {
+            "symbol": symbol,
+            "lastPrice": _fmt(mark, spec["tick"]),
+            "markPrice": _fmt(mark, spec["tick"]),
+            "indexPrice": _fmt(mark, spec["tick"]),
+            "bid1Price": _fmt(bid, spec["tick"]),
+            "bid1Size": _fmt(spec["max"] * 0.01, spec["step"]),
+            "ask1Price": _fmt(ask, spec["tick"]),
+            "ask1Size": _fmt(spec["max"] * 0.01, spec["step"]),
+            "prevPrice24h": _fmt(prev, spec["tick"]),
+            "price24hPcnt": f"{mark / prev - 1:.4f}",
+            "volume24h": _fmt(spec["max"] * 50, spec["step"]),
+            "turnover24h": _fmt(spec["max"] * 50 * mark, 0.0001),
+            "fundingRate": "0.0001",
+            "nextFundingTime": str((_now_ms() // 28_800_000 + 1) * 28_800_000),
+        }
+
+    def _fair(self, symbol: str, ts_ms: int) -> float:
+        """Precio "justo" en `ts_ms`: dos ondas sembradas (días y horas), igual para cualquier intervalo."""
+        base = self.instruments[symbol]["price"]
+        p1 = _noise(self.seed, symbol, "p1") * math.tau
+        p2 = _noise(self.seed, symbol, "p2") * math.tau
+        return base * math.exp(0.03 * math.sin(ts_ms / 41_000_000 + p1) + 0.01 * math.sin(ts_ms / 2_300_000 + p2))
+
+    def _close(self, symbol: str, interval: str, index: int) -> float:
+        """Cierre determinista de la vela `index` (onda + ruido), sin acumular el camino."""
+        fair = self._fair(symbol, (index + 1) * INTERVAL_MS[interval])
+        return fair * math.exp(0.002 * (_noise(self.seed, symbol, interval, index) - 0.5))
+
+    @lru_cache(maxsize=200_000)
+    def _bar(self, symbol: str, interval: str, index: int) -> Tuple[float, float, float, float, float]:
+        open_ = self._close(symbol, interval, index - 1)
+        close = self._close(symbol, interval, index)
+        wick = 0.002 * _noise(self.seed, symbol, interval, index, "w")
+        volume = self.instruments[symbol]["max"] * (0.05 + _noise(self.seed, symbol, interval, index, "v"))
+        return open_, max(open_, close) * (1 + wick), min(open_, close) * (1 - wick), close, volume
+
+    def klines(self, symbol: str, interval: str, start: Optional[int], end: Optional[int], limit: int) -> List[List[str]]:
+        spec = self.instrument(symbol)
+        symbol = symbol.upper()
+        iv_ms = INTERVAL_MS.get(str(interval))
+        if iv_ms is None:
+            raise ExchangeError(10001, f"params error: invalid interval {interval}")
+        now_idx = _now_ms() // iv_ms
+        last = min(now_idx, (end or _now_ms()) // iv_ms)
+        first = last - max(1, min(1000, limit)) + 1
+        if start:
+            first = max(first, -(-int(start) // iv_ms))
+        rows: List[List[str]] = []
+        for idx in range(last, first - 1, -1):
+            open_, high, low, close, volume = self._bar(symbol, str(interval), idx)
+            if idx == now_idx:  # vela en curso: cierra en el mark vivo
+                close = self.prices[symbol]
+                high, low = max(high, close), min(low, close)
+            rows.append([str(idx * iv_ms), _fmt(open_, spec["tick"]), _fmt(high, spec["tick"]),
+                         _fmt(low, spec["tick"]), _fmt(close, spec["tick"]),
+                         _fmt(volume, spec["step"]), _fmt(volume * close, 0.0001)])
+        return rows
+
+    def orderbook(self, symbol: str, depth: int) -> Dict[str, Any]:
+        spec = self.instrument(symbol)
+        symbol = symbol.upper()
+        bid, ask = self.quote(symbol)
+        tick_ms = _now_ms() // 100
+        bids, asks = [], []
+        for level in range(max(1, min(500, depth))):
+            size_b = spec["max"] * 0.002 * (1 + 4 * _noise(self.seed, symbol, tick_ms, "b", level))
+            size_a = spec["max"] * 0.002 * (1 + 4 * _noise(self.seed, symbol, tick_ms, "a", level))
+            bids.append([_fmt(bid - level * spec["tick"], spec["tick"]), _fmt(size_b, spec["step"])])
+            asks.append([_fmt(ask + level * spec["tick"], spec["tick"]), _fmt(size_a, spec["step"])])
+        return {"s": symbol, "b": bids, "a": asks, "ts": _now_ms(), "u": tick_ms, "seq": tick_ms}
+
+    def instrument_info(self, symbol: str) -> Dict[str, Any]:
+        spec = self.instrument(symbol)
+        return {
+            "symbol": symbol.upper(),
+            "contractType": "LinearPerpetual",
+            "status": "Trading",
+            "baseCoin": symbol.upper()[:-4],
+            "quoteCoin": "USDT",
+            "settleCoin": "USDT",
+            "priceFilter": {"minPrice": _fmt(spec["tick"]), "maxPrice": _fmt(spec["price"] * 100),
+                            "tickSize": _fmt(spec["tick"])},
+            "lotSizeFilter": {"qtyStep": _fmt(spec["step"]), "minOrderQty": _fmt(spec["min"]),
+                              "maxOrderQty": _fmt(spec["max"])},
+            "leverageFilter": {"minLeverage": "1", "maxLeverage": "100.00", "leverageStep": "0.01"},
+        }
+
+    # ----- cuenta -----
+    def _position(self, symbol: str) -> Dict[str, Any]:
+        return self.positions.setdefault(symbol, {
+            "size": 0.0, "side": "", "avg": 0.0, "stop_loss": 0.0, "take_profit": 0.0,
+            "cum_realised": 0.0, "created": _now_ms(), "updated": _now_ms(),
+        })
+
+    def _upnl(self, symbol: str, pos: Dict[str, Any]) -> float:
+        if pos["size"] <= 0:
+            return 0.0
+        direction = 1 if pos["side"] == "Buy" else -1
+        return (self.prices[symbol] - pos["avg"]) * pos["size"] * direction
+
+    def _margin_in_use(self) -> float:
+        used = 0.0
+        for symbol, pos in self.positions.items():
+            used += pos["size"] * pos["avg"] / self.leverage.get(symbol, 10.0)
+        for order in self.orders.values():
+            if order["orderStatus"] == "New" and not order["reduceOnly"]:
+                used += order["leavesQty"] * order["price"] / self.leverage.get(order["symbol"], 10.0)
+        return used
+
+    def wallet_row(self) -> Dict[str, Any]:
+        upnl = sum(self._upnl(s, p) for s, p in self.positions.items())
+        available = max(0.0, self.wallet - self._margin_in_use())
+        equity = self.wallet + upnl
+        coin = {
+            "coin": "USDT",
+            "walletBalance": _fmt(self.wallet, 0.0001),
+            "equity": _fmt(equity, 0.0001),
+            "usdValue": _fmt(equity, 0.0001),
+            "availableToWithdraw": _fmt(available, 0.0001),
+            "unrealisedPnl": _fmt(upnl, 0.0001),
+            "cumRealisedPnl": _fmt(self.cum_realised, 0.0001),
+            "totalPositionIM": _fmt(self._margin_in_use(), 0.0001),
+        }
+        return {"accountType": "UNIFIED", "totalEquity": coin["equity"], "totalWalletBalance": coin["walletBalance"],
+                "totalAvailableBalance": coin["availableToWithdraw"], "coin": [coin]}
+
+    def position_row(self, symbol: str) -> Dict[str, Any]:
+        spec = self.instrument(symbol)
+        symbol = symbol.upper()
+        pos = self.positions.get(symbol) or {"size": 0.0, "side": "", "avg": 0.0, "stop_loss": 0.0,
+                                             "take_profit": 0.0, "cum_realised": 0.0, "created": 0, "updated": 0}
+        return {
+            "symbol": symbol,
+            "positionIdx": 0,
+            "side": pos["side"] if pos["size"] > 0 else "",
+            "size": _fmt(pos["size"], spec["step"]),
+            "avgPrice": _fmt(pos["avg"], spec["tick"]) if pos["size"] > 0 else "0",
+            "positionValue": _fmt(pos["size"] * pos["avg"], 0.0001),
+            "leverage": _fmt(self.leverage.get(symbol, 10.0)),
+            "markPrice": _fmt(self.prices[symbol], spec["tick"]),
+            "unrealisedPnl": _fmt(self._upnl(symbol, pos), 0.0001),
+            "cumRealisedPnl": _fmt(pos["cum_realised"], 0.0001),
+            "stopLoss": _fmt(pos["stop_loss"], spec["tick"]) if pos["stop_loss"] else "",
+            "takeProfit": _fmt(pos["take_profit"], spec["tick"]) if pos["take_profit"] else "",
+            "tpslMode": "Full",
+            "liqPrice": "",
+            "createdTime": str(pos["created"]),
+            "updatedTime": str(pos["updated"]),
+        }
+
+    def set_leverage(self, symbol: str, buy: float, sell: float) -> None:
+        self.instrument(symbol)
+        symbol = symbol.upper()
+        lev = float(buy or sell or 0)
+        if not 1 <= lev <= 100:
+            raise ExchangeError(10001, "params error: leverage invalid")
+        if self.leverage.get(symbol, 10.0) == lev:
+            raise ExchangeError(110043, "leverage not modified")
+        self.leverage[symbol] = lev
+
+    def set_trading_stop(self, symbol: str, stop_loss: Optional[str], take_profit: Optional[str]) -> None:
+        self.instrument(symbol)
+        symbol = symbol.upper()
+        pos = self.positions.get(symbol)
+        if not pos or pos["size"] <= 0:
+            raise ExchangeError(10001, "can not set tp/sl/ts for zero position")
+        if stop_loss is not None:
+            pos["stop_loss"] = float(stop_loss or 0)
+        if take_profit is not None:
+            pos["take_profit"] = float(take_profit or 0)
+        pos["updated"] = _now_ms()
+        self._push_private("position", [self.position_row(symbol)])
+        self.match(symbol)
+
+    # ----- órdenes -----
+    def create_order(self, body: Dict[str, Any]) -> Dict[str, str]:
+        symbol = str(body.get("symbol") or "").upper()
+        spec = self.instrument(symbol)
+        side = body.get("side")
+        order_type = body.get("orderType")
+        if side not in ("Buy", "Sell") or order_type not in ("Market", "Limit"):
+            raise ExchangeError(10001, "params error: side/orderType invalid")
+        try:
+            qty = float(body.get("qty"))
+        except (TypeError, ValueError):
+            raise ExchangeError(10001, "params error: qty invalid")
+        steps = qty / spec["step"]
+        if qty < spec["min"] - 1e-12 or qty > spec["max"] + 1e-12 or abs(steps - round(steps)) > 1e-6:
+            raise ExchangeError(10001, "params error: qty invalid")
+        price = float(body.get("price") or 0)
+        if order_type == "Limit" and price <= 0:
+            raise ExchangeError(10001, "params error: price invalid")
+        reduce_only = str(body.get("reduceOnly", "")).lower() in {"1", "true"}
+        pos = self.positions.get(symbol)
+        if reduce_only and (not pos or pos["size"] <= 0 or pos["side"] == side):
+            raise ExchangeError(110017, "current position is zero, cannot fix reduce-only order qty")
+        bid, ask = self.quote(symbol)
+        ref = price if order_type == "Limit" else (ask if side == "Buy" else bid)
+        if not reduce_only:
+            needed = qty * ref / self.leverage.get(symbol, 10.0) + qty * ref * TAKER_FEE
+            if needed > self.wallet - self._margin_in_use() + 1e-9:
+                raise ExchangeError(110007, "ab not enough for new order")
+
+        now = _now_ms()
+        order = {
+            "orderId": str(uuid.uuid4()),
+            "orderLinkId": str(body.get("orderLinkId") or ""),
+            "symbol": symbol,
+            "side": side,
+            "orderType": order_type,
+            "price": price,
+            "qty": qty,
+            "leavesQty": qty,
+            "cumExecQty": 0.0,
+            "avgPrice": 0.0,
+            "timeInForce": body.get("timeInForce") or ("IOC" if order_type == "Market" else "GTC"),
+            "orderStatus": "New",
+            "rejectReason": "EC_NoError",
+            "reduceOnly": reduce_only,
+            "stopLoss": float(body.get("stopLoss") or 0),
+            "takeProfit": float(body.get("takeProfit") or 0),
+            "createdTime": now,
+            "updatedTime": now,
+        }
+        self.orders[order["orderId"]] = order
+        self.counters["orders"] += 1
+        crosses = order_type == "Market" or (price >= ask if side == "Buy" else price <= bid)
+        if crosses and order["timeInForce"] == "PostOnly":
+            self._finish(order, "Cancelled", "EC_PostOnlyWillTakeLiquidity")
+        elif crosses:
+            fill_price = ref if order_type == "Market" else (ask if side == "Buy" else bid)
+            self._fill(order, fill_price, TAKER_FEE)
+        elif order["timeInForce"] in ("IOC", "FOK"):
+            self._finish(order, "Cancelled", "EC_NoImmediateQtyToFill")
+        else:
+            self._push_private("order", [self._order_row(order)])
+        return {"orderId": order["orderId"], "orderLinkId": order["orderLinkId"]}
+
+    def cancel_order(self, order_id: Optional[str], link_id: Optional[str]) -> Dict[str, str]:
+        for order in self.orders.values():
+            if order["orderStatus"] != "New":
+                continue
+            if (order_id and order["orderId"] == order_id) or (link_id and order["orderLinkId"] == link_id):
+                self._finish(order, "Cancelled", "EC_PerCancelRequest")
+                return {"orderId": order["orderId"], "orderLinkId": order["orderLinkId"]}
+        raise ExchangeError(110001, "order not exists or too late to cancel")
+
+    def open_orders(self, symbol: Optional[str], order_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        rows = []
+        for order in sorted(self.orders.values(), key=lambda o: o["createdTime"], reverse=True):
+            if symbol and order["symbol"] != symbol.upper():
+                continue
+            if order_id:
+                if order_id in (order["orderId"], order["orderLinkId"]):
+                    rows.append(self._order_row(order))
+            elif order["orderStatus"] == "New":
+                rows.append(self._order_row(order))
+        return rows
+
+    def _order_row(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        spec = self.instruments[order["symbol"]]
+        row = {k: order[k] for k in ("orderId", "orderLinkId", "symbol", "side", "orderType", "timeInForce",
+                                     "orderStatus", "rejectReason", "reduceOnly")}
+        row.update(
+            category="linear",
+            price=_fmt(order["price"], spec["tick"]) if order["price"] else "0",
+            qty=_fmt(order["qty"], spec["step"]),
+            leavesQty=_fmt(order["leavesQty"], spec["step"]),
+            cumExecQty=_fmt(order["cumExecQty"], spec["step"]),
+            avgPrice=_fmt(order["avgPrice"], spec["tick"]) if order["avgPrice"] else "",
+            stopLoss=_fmt(order["stopLoss"], spec["tick"]) if order["stopLoss"] else "",
+            takeProfit=_fmt(order["takeProfit"], spec["tick"]) if order["takeProfit"] else "",
+            createdTime=str(order["createdTime"]),
+            updatedTime=str(order["updatedTime"]),
+        )
+        return row
+
+    def _finish(self, order: Dict[str, Any], status: str, reason: str = "EC_NoError") -> None:
+        order["orderStatus"] = status
+        order["rejectReason"] = reason
+        order["updatedTime"] = _now_ms()
+        self._push_private("order", [self._order_row(order)])
+        # el histórico de órdenes cerradas no necesita crecer sin límite en una prueba larga
+        if len(self.orders) > 5_000:
+            for oid in [oid for oid, o in self.orders.items() if o["orderStatus"] != "New"][:1_000]:
+                self.orders.pop(oid, None)
+
+    def _fill(self, order: Dict[str, Any], price: float, fee_rate: float, exec_type: str = "Trade") -> None:
+        symbol = order["symbol"]
+        pos = self._position(symbol)
+        qty = order["leavesQty"]
+        if order["reduceOnly"]:
+            qty = min(qty, pos["size"] if pos["side"] and pos["side"] != order["side"] else 0.0)
+        fee = qty * price * fee_rate
+        self.wallet -= fee
+        now = _now_ms()
+        if pos["size"] > 0 and pos["side"] != order["side"]:
+            closed = min(qty, pos["size"])
+            direction = 1 if pos["side"] == "Buy" else -1
+            pnl = (price - pos["avg"]) * closed * direction
+            self.wallet += pnl
+            self.cum_realised += pnl
+            pos["cum_realised"] += pnl
+            self.closed_pnl.append({
+                "symbol": symbol,
+                "orderId": order["orderId"],
+                "side": order["side"],
+                "qty": _fmt(closed),
+                "orderPrice": _fmt(order["price"] or price),
+                "orderType": order["orderType"],
+                "execType": exec_type,
+                "closedSize": _fmt(closed),
+                "cumEntryValue": _fmt(closed * pos["avg"]),
+                "avgEntryPrice": _fmt(pos["avg"]),
+                "cumExitValue": _fmt(closed * price),
+                "avgExitPrice": _fmt(price),
+                "closedPnl": _fmt(pnl - fee),
+                "fillCount": "1",
+                "leverage": _fmt(self.leverage.get(symbol, 10.0)),
+                "createdTime": str(now),
+                "updatedTime": str(now),
+            })
+            pos["size"] -= closed
+            remainder = qty - closed
+            if pos["size"] <= 1e-12:
+                pos.update(size=0.0, side="", avg=0.0, stop_loss=0.0, take_profit=0.0)
+            if remainder > 1e-12:
+                pos.update(size=remainder, side=order["side"], avg=price, created=now)
+        elif qty > 0:
+            total = pos["size"] + qty
+            pos["avg"] = (pos["avg"] * pos["size"] + price * qty) / total
+            pos["size"] = total
+            pos["side"] = order["side"]
+        if pos["size"] > 0 and not order["reduceOnly"]:
+            if order["stopLoss"]:
+                pos["stop_loss"] = order["stopLoss"]
+            if order["takeProfit"]:
+                pos["take_profit"] = order["takeProfit"]
+        pos["updated"] = now
+        order["cumExecQty"] += qty
+        order["leavesQty"] = 0.0
+        order["avgPrice"] = price
+        self.counters["fills"] += 1
+        spec = self.instruments[symbol]
+        self._push_private("execution", [{
+            "category": "linear", "symbol": symbol, "orderId": order["orderId"], "orderLinkId": order["orderLinkId"],
+            "side": order["side"], "execPrice": _fmt(price, spec["tick"]), "execQty": _fmt(qty, spec["step"]),
+            "execFee": _fmt(fee, 0.00000001), "execType": exec_type, "execTime": str(now),
+            "isMaker": fee_rate == MAKER_FEE, "execId": str(uuid.uuid4()),
+        }])
+        self._finish(order, "Filled")
+        self._push_private("position", [self.position_row(symbol)])
+        self._push_private("wallet", [self.wallet_row()])
+
+    def _close_position(self, symbol: str, price: float, stop_type: str) -> None:
+        pos = self.positions[symbol]
+        side = "Sell" if pos["side"] == "Buy" else "Buy"
+        now = _now_ms()
+        order = {
+            "orderId": str(uuid.uuid4()), "orderLinkId": "", "symbol": symbol, "side": side,
+            "orderType": "Market", "price": 0.0, "qty": pos["size"], "leavesQty": pos["size"],
+            "cumExecQty": 0.0, "avgPrice": 0.0, "timeInForce": "IOC", "orderStatus": "New",
+            "rejectReason": "EC_NoError", "reduceOnly": True, "stopLoss": 0.0, "takeProfit": 0.0,
+            "stopOrderType": stop_type, "createdTime": now, "updatedTime": now,
+        }
+        self.orders[order["orderId"]] = order
+        self.counters["sl_tp"] += 1
+        self._fill(order, price, TAKER_FEE)
+
+    def match(self, symbol: Optional[str] = None) -> None:
+        """Casa límites en reposo y dispara SL/TP con el precio actual."""
+        symbols = [symbol] if symbol else list(self.prices)
+        for sym in symbols:
+            bid, ask = self.quote(sym)
+            for order in [o for o in self.orders.values() if o["symbol"] == sym and o["orderStatus"] == "New"]:
+                if (order["side"] == "Buy" and ask <= order["price"]) or (order["side"] == "Sell" and bid >= order["price"]):
+                    if order["reduceOnly"] and not (self.positions.get(sym) or {}).get("size"):
+                        self._finish(order, "Cancelled", "EC_ReduceOnlySetButNotReducing")
+                    else:
+                        self._fill(order, order["price"], MAKER_FEE)
+            pos = self.positions.get(sym)
+            if not pos or pos["size"] <= 0:
+                continue
+            mark = self.prices[sym]
+            long = pos["side"] == "Buy"
+            if pos["stop_loss"] and (mark <= pos["stop_loss"] if long else mark >= pos["stop_loss"]):
+                self._close_position(sym, bid if long else ask, "StopLoss")
+            elif pos["take_profit"] and (mark >= pos["take_profit"] if long else mark <= pos["take_profit"]):
+                self._close_position(sym, bid if long else ask, "TakeProfit")
+
+    def closed_pnl_page(self, symbol: Optional[str], start: Optional[int], end: Optional[int],
+                        limit: int, cursor: Optional[str]) -> Dict[str, Any]:
+        rows = [r for r in reversed(self.closed_pnl)
+                if (not symbol or r["symbol"] == symbol.upper())
+                and (not start or int(r["createdTime"]) >= int(start))
+                and (not end or int(r["createdTime"]) <= int(end))]
+        offset = int(cursor or 0)
+        limit = max(1, min(100, limit))
+        page = rows[offset:offset + limit]
+        next_cursor = str(offset + limit) if offset + limit < len(rows) else ""
+        return {"category": "linear", "list": page, "nextPageCursor": next_cursor}
+
+    # ----- streams -----
+    def _push_private(self, topic: str, rows: List[Dict[str, Any]]) -> None:
+        self.private.publish(topic, {"id": str(next(self._seq)), "topic": topic,
+                                     "creationTime": _now_ms(), "data": rows})
+
+    def tick(self) -> None:
+        """Un paso del mercado: mueve precios, casa órdenes y publica los topics públicos suscritos."""
+        self.step_prices()
+        self.match()
+        now = _now_ms()
+        for topic in self.public.topics():
+            parts = topic.split(".")
+            try:
+                if parts[0] == "tickers":
+                    data: Any = self.ticker(parts[1])
+                elif parts[0] == "orderbook":
+                    book = self.orderbook(parts[2], int(parts[1]))
+                    data = {"s": book["s"], "b": book["b"], "a": book["a"], "u": book["u"], "seq": book["seq"]}
+                elif parts[0] == "kline":
+                    iv = parts[1]
+                    row = self.klines(parts[2], iv, None, None, 1)[0]
+                    data = [{"start": int(row[0]), "end": int(row[0]) + INTERVAL_MS[iv] - 1, "interval": iv,
+                             "open": row[1], "high": row[2], "low": row[3], "close": row[4], "volume": row[5],
+                             "turnover": row[6], "confirm": False, "timestamp": now}]
+                elif parts[0] == "publicTrade":
+                    symbol = parts[1].upper()
+                    spec = self.instrument(symbol)
+                    data = [{"T": now, "s": symbol, "S": self._rng.choice(("Buy", "Sell")),
+                             "v": _fmt(spec["min"] * self._rng.randint(1, 20), spec["step"]),
+                             "p": _fmt(self.prices[symbol], spec["tick"]), "i": str(uuid.uuid4())}]
+                else:
+                    continue
+            except (ExchangeError, IndexError, KeyError, ValueError):
+                continue
+            self.public.publish(topic, {"topic": topic, "type": "snapshot", "ts": now, "data": data})
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "wallet": self.wallet_row(),
+            "positions": [self.position_row(s) for s, p in self.positions.items() if p["size"] > 0],
+            "open_orders": self.open_orders(None),
+            "closed_pnl": len(self.closed_pnl),
+            "prices": {s: p for s, p in self.prices.items()},
+            "counters": dict(self.counters),
+            "ws_dropped": self.public.dropped + self.private.dropped,
+        }
+
+
+# ----------------- App -----------------
+def _params(request: Request, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    params = dict(request.query_params)
+    params.update(body or {})
+    return params
+
+
+async def _json_body(request: Request) -> Dict[str, Any]:
+    raw = await request.body()
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        raise ExchangeError(10001, "params error: invalid json")
+    return data if isinstance(data, dict) else {}
+
+
+def create_app(state: Optional[ExchangeState] = None, faults: Optional[FaultConfig] = None,
+               tick_ms: float = 500.0, seed: int = 7) -> FastAPI:
+    state = state or ExchangeState(seed=seed)
+    faults = faults or FaultConfig()
+    fault_rng = random.Random(seed)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        task = None
+        if tick_ms > 0:
+            async def _ticker():
+                while True:
+                    await asyncio.sleep(tick_ms / 1000.0)
+                    state.tick()
+
+            task = asyncio.create_task(_ticker())
+        yield
+        if task:
+            task.cancel()
+
+    app = FastAPI(title="fake-bybit", lifespan=lifespan)
+    app.state.exchange = state
+    app.state.faults = faults
+
+    @app.middleware("http")
+    async def _inject_faults(request: Request, call_next):
+        if not request.url.path.startswith("/v5/"):
+            return await call_next(request)
+        delay = faults.latency_ms + (fault_rng.uniform(0, faults.jitter_ms) if faults.jitter_ms > 0 else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+        if faults.error_rate > 0 and fault_rng.random() < faults.error_rate:
+            code = int(faults.error_code)
+            if code < 1000:
+                return JSONResponse({"retCode": code, "retMsg": "injected http error"}, status_code=code)
+            headers = {}
+            if code == 10006:
+                headers["X-Bapi-Limit-Reset-Timestamp"] = str(_now_ms() + 200)
+            return JSONResponse(envelope(ret_code=code, ret_msg="Server Timeout, service unavailable, try again"),
+                                headers=headers)
+        return await call_next(request)
+
+    @app.exception_handler(ExchangeError)
+    async def _exchange_error(request: Request, exc: ExchangeError):
+        state.counters["rejects"] += 1
+        return JSONResponse(envelope(ret_code=exc.ret_code, ret_msg=exc.ret_msg))
+
+    # ----- mercado -----
+    @app.get("/v5/market/time")
+    async def market_time():
+        now = time.time()
+        return envelope({"timeSecond": str(int(now)), "timeNano": str(int(now * 1e9))})
+
+    @app.get("/v5/market/tickers")
+    async def tickers(request: Request):
+        symbol = request.query_params.get("symbol")
+        rows = [state.ticker(symbol)] if symbol else [state.ticker(s) for s in list(state.instruments)]
+        return envelope({"category": "linear", "list": rows})
+
+    @app.get("/v5/market/kline")
+    async def kline(request: Request):
+        p = request.query_params
+        symbol = p.get("symbol") or ""
+        interval = p.get("interval") or "15"
+        rows = state.klines(symbol, interval, int(p["start"]) if p.get("start") else None,
+                            int(p["end"]) if p.get("end") else None, int(p.get("limit") or 200))
+        return envelope({"category": "linear", "symbol": symbol.upper(), "list": rows})
+
+    @app.get("/v5/market/orderbook")
+    async def orderbook(request: Request):
+        p = request.query_params
+        return envelope(state.orderbook(p.get("symbol") or "", int(p.get("limit") or 25)))
+
+    @app.get("/v5/market/instruments-info")
+    async def instruments_info(request: Request):
+        symbol = request.query_params.get("symbol")
+        rows = [state.instrument_info(symbol)] if symbol else [state.instrument_info(s) for s in list(state.instruments)]
+        return envelope({"category": "linear", "list": rows, "nextPageCursor": ""})
+
+    # ----- cuenta -----
+    @app.get("/v5/account/wallet-balance")
+    async def wallet_balance():
+        return envelope({"list": [state.wallet_row()]})
+
+    @app.get("/v5/position/list")
+    async def position_list(request: Request):
+        p = request.query_params
+        if p.get("symbol"):
+            rows = [state.position_row(p["symbol"])]
+        else:
+            rows = [state.position_row(s) for s, pos in state.positions.items() if pos["size"] > 0]
+        return envelope({"category": "linear", "list": rows, "nextPageCursor": ""})
+
+    @app.post("/v5/position/set-leverage")
+    async def set_leverage(request: Request):
+        p = _params(request, await _json_body(request))
+        state.set_leverage(p.get("symbol") or "", float(p.get("buyLeverage") or 0), float(p.get("sellLeverage") or 0))
+        return envelope({})
+
+    @app.post("/v5/position/trading-stop")
+    async def trading_stop(request: Request):
+        p = _params(request, await _json_body(request))
+        state.set_trading_stop(p.get("symbol") or "", p.get("stopLoss"), p.get("takeProfit"))
+        return envelope({})
+
+    @app.get("/v5/position/closed-pnl")
+    async def closed_pnl(request: Request):
+        p = request.query_params
+        return envelope(state.closed_pnl_page(p.get("symbol"), p.get("startTime"), p.get("endTime"),
+                                              int(p.get("limit") or 50), p.get("cursor")))
+
+    # ----- órdenes -----
+    @app.post("/v5/order/create")
+    async def order_create(request: Request):
+        return envelope(state.create_order(await _json_body(request)))
+
+    @app.post("/v5/order/cancel")
+    async def order_cancel(request: Request):
+        p = await _json_body(request)
+        return envelope(state.cancel_order(p.get("orderId"), p.get("orderLinkId")))
+
+    @app.get("/v5/order/realtime")
+    async def order_realtime(request: Request):
+        p = request.query_params
+        rows = state.open_orders(p.get("symbol"), p.get("orderId") or p.get("orderLinkId"))
+        return envelope({"category": "linear", "list": rows, "nextPageCursor": ""})
+
+    # ----- WebSockets -----
+    async def _serve_ws(ws: WebSocket, hub: Hub, private: bool) -> None:
+        await ws.accept()
+        queue = hub.connect()
+        conn_id = str(uuid.uuid4())
+        authed = not private
+
+        async def _sender():
+            while True:
+                await ws.send_text(json.dumps(await queue.get()))
+
+        sender = asyncio.create_task(_sender())
+        try:
+            while True:
+                try:
+                    msg = json.loads(await ws.receive_text())
+                except json.JSONDecodeError:
+                    continue
+                op = msg.get("op") if isinstance(msg, dict) else None
+                if op == "ping":
+                    await ws.send_text(json.dumps({"op": "pong", "success": True, "ret_msg": "pong",
+                                                   "conn_id": conn_id, "req_id": msg.get("req_id", "")}))
+                elif op == "auth":
+                    authed = len(msg.get("args") or []) == 3
+                    await ws.send_text(json.dumps({"op": "auth", "success": authed, "conn_id": conn_id,
+                                                   "ret_msg": "" if authed else "invalid auth args"}))
+                elif op == "subscribe":
+                    topics = [str(t) for t in msg.get("args") or []]
+                    if authed:
+                        hub.subscribe(queue, topics)
+                    await ws.send_text(json.dumps({"op": "subscribe", "success": authed, "conn_id": conn_id,
+                                                   "ret_msg": "" if authed else "request not authorized",
+                                                   "req_id": msg.get("req_id", "")}))
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+            hub.disconnect(queue)
+
+    @app.websocket("/v5/public/linear")
+    async def ws_public(ws: WebSocket):
+        await _serve_ws(ws, state.public, private=False)
+
+    @app.websocket("/v5/private")
+    async def ws_private(ws: WebSocket):
+        await _serve_ws(ws, state.private, private=True)
+
+    # ----- administración -----
+    @app.get("/fake/state")
+    async def fake_state():
+        return {"faults": asdict(faults), **state.snapshot()}
+
+    @app.post("/fake/config")
+    async def fake_config(request: Request):
+        faults.update(await _json_body(request))
+        return asdict(faults)
+
+    @app.post("/fake/price")
+    async def fake_price(request: Request):
+        data = await _json_body(request)
+        state.set_price(str(data.get("symbol") or ""), float(data.get("price") or 0))
+        return {"symbol": str(data.get("symbol") or "").upper(), "price": state.mark(str(data.get("symbol") or ""))}
+
+    @app.post("/fake/reset")
+    async def fake_reset():
+        state.reset()
+        return state.snapshot()
+
+    return app
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia fija añadida a cada llamada REST.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Latencia aleatoria extra (uniforme 0..jitter).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de llamadas REST que fallan (0-1).")
+    parser.add_argument("--error-code", type=int, default=10016,
+                        help="retCode inyectado (10006 añade cabecera de rate limit; <1000 = status HTTP).")
+    parser.add_argument("--balance", type=float, default=10_000.0, help="Saldo inicial USDT.")
+    parser.add_argument("--seed", type=int, default=7, help="Semilla del mercado y de los fallos.")
+    parser.add_argument("--tick-ms", type=float, default=500.0, help="Periodo del paso de mercado (0 = precios fijos).")
+    parser.add_argument("--volatility", type=float, default=0.0004, help="Desvío del log-retorno por tick.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    args = parse_args(argv)
+    state = ExchangeState(seed=args.seed, balance=args.balance, volatility=args.volatility)
+    faults = FaultConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                         error_rate=args.error_rate, error_code=args.error_code)
+    app = create_app(state, faults, tick_ms=args.tick_ms, seed=args.seed)
+    print(f"fake-bybit en http://{args.host}:{args.port} (ws://{args.host}:{args.port}/v5/private)")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Walk-forward de los modelos de `ia_train` sobre el histórico local.
+
+    python scripts/tools/ia_walkforward.py --symbol BTCUSDT --marco 15m --rows 20000 \
+        --train-size 3000 --test-size 500 --workers 4 --output reports/wf_btc_15m.json
+
+Usa el almacén de klines si está configurado (SLS_KLINE_STORE / paths.klines_dir).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Iterable
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(REPO_ROOT / "bot"))
+
+
+def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Evaluación walk-forward de ia_train.")
+    parser.add_argument("--symbol", type=str, required=True)
+    parser.add_argument("--marco", type=str, default="15m")
+    parser.add_argument("--rows", type=int, default=20_000, help="Velas de histórico a usar.")
+    parser.add_argument("--train-size", type=int, default=3_000)
+    parser.add_argument("--test-size", type=int, default=500)
+    parser.add_argument("--step", type=int, default=None, help="Avance entre folds (por defecto test-size).")
+    parser.add_argument("--expanding", action="store_true", help="Ventana de train creciente en vez de móvil.")
+    parser.add_argument("--thr", type=float, default=0.005)
+    parser.add_argument("--horizon", type=int, default=20)
+    parser.add_argument("--thr-enter", type=float, default=None, help="Umbral del ensemble (por defecto ia.proba_enter).")
+    parser.add_argument("--fee-bps", type=float, default=6.0)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--cache-dir", type=Path, default=Path(os.getenv("SLS_WALKFORWARD_CACHE", "/tmp/sls_walkforward")))
+    parser.add_argument("--config", type=Path, default=None, help="Ruta manual a config.json.")
+    parser.add_argument("--output", type=Path, default=None)
+    return parser.parse_args(list(argv) if argv is not None else None)
+
+
+def _ensure_config_env(path: Path | None) -> None:
+    if path:
+        os.environ["SLSBOT_CONFIG"] = str(path)
+    elif not os.getenv("SLSBOT_CONFIG"):
+        default_cfg = REPO_ROOT / "config" / "config.json"
+        sample_cfg = default_cfg.with_name("config.sample.json")
+        if not default_cfg.exists() and sample_cfg.exists():
+            os.environ["SLSBOT_CONFIG"] = str(sample_cfg)
+
+
+def main(argv: Iterable[str] | None = None) -> dict:
+    args = parse_args(argv)
+    _ensure_config_env(args.config)
+
+    from sls_bot.config_loader import load_config  # type: ignore  # noqa: E402
+    from sls_bot.ia_walkforward import walk_forward  # type: ignore  # noqa: E402
+
+    thr_enter = args.thr_enter
+    if thr_enter is None:
+        thr_enter = float((load_config().get("ia") or {}).get("proba_enter", 0.60))
+    report = walk_forward(
+        args.symbol, args.marco, rows=args.rows, train_size=args.train_size, test_size=args.test_size,
+        step=args.step, expanding=args.expanding, thr=args.thr, horizon=args.horizon, thr_enter=thr_enter,
+        fee_bps=args.fee_bps, workers=args.workers, cache_root=args.cache_dir,
+    )
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text, encoding="utf-8")
+    print(json.dumps(report["summary"], ensure_ascii=False, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
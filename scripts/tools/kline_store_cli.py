@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Gestión del almacén local de klines (`sls_bot.kline_store`).
+
+    python scripts/tools/kline_store_cli.py download --symbol BTCUSDT --interval 1m --start 2023-01-01
+    python scripts/tools/kline_store_cli.py gaps --symbol BTCUSDT --interval 1m
+    python scripts/tools/kline_store_cli.py repair --symbol BTCUSDT --interval 1m
+    python scripts/tools/kline_store_cli.py info --symbol BTCUSDT --interval 1m
+
+El directorio sale de `--store`, SLS_KLINE_STORE o `paths.klines_dir`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Iterable
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(REPO_ROOT / "bot"))
+
+
+def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Almacén local de klines históricas.")
+    parser.add_argument("command", choices=["download", "gaps", "repair", "info"])
+    parser.add_argument("--symbol", type=str, required=True)
+    parser.add_argument("--interval", type=str, default="1m")
+    parser.add_argument("--start", type=str, default=None, help="Epoch o fecha ISO (UTC).")
+    parser.add_argument("--end", type=str, default=None, help="Epoch o fecha ISO (UTC); por defecto ahora.")
+    parser.add_argument("--store", type=Path, default=None)
+    parser.add_argument("--base-url", type=str, default=None, help="Host REST (por defecto bybit.base_url).")
+    parser.add_argument("--config", type=Path, default=None, help="Ruta manual a config.json.")
+    return parser.parse_args(list(argv) if argv is not None else None)
+
+
+def _ensure_config_env(path: Path | None) -> None:
+    if path:
+        os.environ["SLSBOT_CONFIG"] = str(path)
+    elif not os.getenv("SLSBOT_CONFIG"):
+        default_cfg = REPO_ROOT / "config" / "config.json"
+        sample_cfg = default_cfg.with_name("config.sample.json")
+        if not default_cfg.exists() and sample_cfg.exists():
+            os.environ["SLSBOT_CONFIG"] = str(sample_cfg)
+
+
+def main(argv: Iterable[str] | None = None, fetch_page=None) -> dict:
+    args = parse_args(argv)
+    _ensure_config_env(args.config)
+
+    from sls_bot.config_loader import load_config  # type: ignore  # noqa: E402
+    from sls_bot.kline_store import KlineStore, bybit_fetch_page, to_ms  # type: ignore  # noqa: E402
+
+    cfg = load_config()
+    store = KlineStore(args.store) if args.store else KlineStore.from_config(cfg)
+    if store is None:
+        raise SystemExit("Configura --store, SLS_KLINE_STORE o paths.klines_dir")
+    if fetch_page is None and args.command in ("download", "repair"):
+        fetch_page = bybit_fetch_page(args.base_url or cfg["bybit"]["base_url"])
+
+    symbol = args.symbol.upper()
+    start = to_ms(args.start)
+    end = to_ms(args.end)
+    out: dict = {"symbol": symbol, "interval": args.interval, "store": str(store.root)}
+    if args.command == "download":
+        if start is None:
+            raise SystemExit("--start es obligatorio para download")
+        out["rows"] = store.download(symbol, args.interval, start, end or int(time.time() * 1000), fetch_page)
+    elif args.command == "repair":
+        out["remaining_gaps"] = store.repair(symbol, args.interval, fetch_page, start, end)
+    elif args.command == "gaps":
+        out["gaps"] = store.gaps(symbol, args.interval, start, end)
+    out["coverage"] = store.coverage(symbol, args.interval)
+    if args.command == "info":
+        out["months"] = store.manifest(symbol, args.interval).get("months")
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    return out
+
+
+if __name__ == "__main__":
+    main()
@@ -8,26 +8,38 @@ Uso típico:
 
 Luego basta con apuntar el textfile collector de Node Exporter a ese archivo
 o moverlo a /var/lib/node_exporter/textfile_collector/.
+
+Con `--daemon` el proceso queda vivo: sigue `pnl.jsonl` desde el último byte
+leído (también a través de rotaciones a segmentos gzip), mantiene los
+agregados de la ventana de forma incremental (Welford para el desvío, pico de
+equity para el drawdown), expulsa los trades que salen del `lookback` y solo
+reescribe el .prom (de forma atómica) cuando cambia algún valor. El estado
+(offset + ventana) se guarda en `--state` para no reparsear al reiniciar.
 """
 
 from __future__ import annotations
 
 import argparse
+import bisect
+import gzip
 import json
 import math
 import os
 import sys
+import tempfile
+import time
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from statistics import pstdev
-from typing import Dict, List, Optional, Sequence, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 sys.path.append(str(REPO_ROOT / "bot"))
 
 from sls_bot.config_loader import load_config  # type: ignore  # noqa: E402
+from sls_bot.log_manager import iter_jsonl, load_manifest, log_exists, segments_dir  # type: ignore  # noqa: E402
 
 
 @dataclass
@@ -47,7 +59,7 @@ class DailyEntry:
     trades: int | None
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Construye métricas de negocio a partir de logs/pnl.jsonl.")
     parser.add_argument("--mode", default=None, help="SLSBOT_MODE a usar (sobre-escribe config).")
     parser.add_argument("--config", type=Path, default=None, help="Ruta manual a config.json.")
@@ -57,7 +69,12 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--lookback-days", type=int, default=30, help="Ventana para métricas agregadas.")
     parser.add_argument("--daily-limit", type=int, default=14, help="Cuántos días recientes exportar.")
     parser.add_argument("--stdout", action="store_true", help="Imprime también el payload generado.")
-    return parser.parse_args()
+    parser.add_argument("--daemon", action="store_true", help="Sigue pnl.jsonl y actualiza el .prom en segundos.")
+    parser.add_argument("--interval", type=float, default=5.0, help="Segundos entre lecturas en modo daemon.")
+    parser.add_argument("--heartbeat", type=float, default=60.0,
+                        help="Reescribe aunque no haya cambios cada N segundos (edades/snapshot).")
+    parser.add_argument("--state", type=Path, default=None, help="Estado del daemon (por defecto <output>.state.json).")
+    return parser.parse_args(list(argv) if argv is not None else None)
 
 
 def _parse_ts(value: object) -> Optional[datetime]:
@@ -91,23 +108,14 @@ def _sanitize_float(value: object) -> float:
     return num
 
 
-def _load_pnl_entries(path: Path) -> List[dict]:
-    if not path.exists():
+def _load_pnl_entries(path: Path, since: Optional[datetime] = None) -> List[dict]:
+    """Lee pnl.jsonl (y sus segmentos rotados que caen dentro de la ventana)."""
+    if not log_exists(path):
         return []
-    entries: List[dict] = []
     try:
-        with path.open("r", encoding="utf-8", errors="ignore") as fh:
-            for raw in fh:
-                raw = raw.strip()
-                if not raw:
-                    continue
-                try:
-                    entries.append(json.loads(raw))
-                except json.JSONDecodeError:
-                    continue
+        return list(iter_jsonl(path, start=since))
     except Exception:
         return []
-    return entries
 
 
 def _resolve_logs_dir(cfg: dict, args: argparse.Namespace) -> Path:
@@ -167,10 +175,7 @@ class PrometheusWriter:
         self._described.add(name)
         labels_str = ""
         if labels:
-            escaped = [
-                f'{k}="{str(v).replace("\\\\", "\\\\\\\\").replace("\"", "\\\"")}"'
-                for k, v in sorted(labels.items())
-            ]
+            escaped = [f'{k}="{_escape_label(v)}"' for k, v in sorted(labels.items())]
             labels_str = "{" + ",".join(escaped) + "}"
         self.lines.append(f"{name}{labels_str} {value:.10f}")
 
@@ -178,6 +183,10 @@ class PrometheusWriter:
         return "\n".join(self.lines) + "\n"
 
 
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
 def _seconds_between(now: datetime, ts: Optional[datetime]) -> float:
     if not ts:
         return 0.0
@@ -289,8 +298,286 @@ def write_metrics(metrics: dict, *, writer: PrometheusWriter, mode: str, now: da
                help_text="Momento en que se calcularon estas métricas.")
 
 
-def main() -> None:
-    args = parse_args()
+def write_textfile(path: Path, payload: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write(payload)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+# ---------- modo daemon ----------
+class RollingWindow:
+    """Agregados de `compute_metrics` mantenidos trade a trade dentro de la ventana."""
+
+    def __init__(self, lookback: timedelta):
+        self.lookback = lookback
+        self.trades: List[TradeEntry] = []
+        self.daily: List[DailyEntry] = []
+        self.wins = 0
+        self.losses = 0
+        self.pnl_total = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.symbol_pnl: Dict[str, float] = defaultdict(float)
+        self.symbol_trades: Dict[str, int] = defaultdict(int)
+        self._peak = 0.0
+        self._max_dd = 0.0
+        self._dd_dirty = False
+
+    # Welford con altas y bajas; `n` es el número de trades tras la operación
+    def _push_stats(self, pnl: float, n: int) -> None:
+        delta = pnl - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (pnl - self._mean)
+
+    def _pop_stats(self, pnl: float, n: int) -> None:
+        if n == 0:
+            self._mean = self._m2 = 0.0
+            return
+        old_mean = self._mean
+        self._mean = (old_mean * (n + 1) - pnl) / n
+        self._m2 = max(0.0, self._m2 - (pnl - old_mean) * (pnl - self._mean))
+
+    def _track_drawdown(self, trade: TradeEntry) -> None:
+        before = trade.before if trade.before and trade.before > 0 else None
+        after = trade.after if trade.after and trade.after > 0 else None
+        reference = after or before
+        if reference is None:
+            return
+        self._peak = max(self._peak, reference)
+        if self._peak > 0 and after:
+            self._max_dd = max(self._max_dd, (self._peak - after) / self._peak * 100)
+
+    def add(self, trades: Sequence[TradeEntry], daily: Sequence[DailyEntry]) -> None:
+        for trade in trades:
+            if self.trades and trade.ts < self.trades[-1].ts:
+                bisect.insort(self.trades, trade, key=lambda item: item.ts)
+                self._dd_dirty = True
+            else:
+                self.trades.append(trade)
+                if not self._dd_dirty:
+                    self._track_drawdown(trade)
+            self._push_stats(trade.pnl, len(self.trades))
+            self.pnl_total += trade.pnl
+            self.wins += trade.pnl > 0
+            self.losses += trade.pnl < 0
+            self.symbol_pnl[trade.symbol] += trade.pnl
+            self.symbol_trades[trade.symbol] += 1
+        for entry in daily:
+            bisect.insort(self.daily, entry, key=lambda item: item.ts)
+
+    def evict(self, now: datetime) -> int:
+        """Quita lo que quedó fuera de la ventana; el drawdown se recalcula solo si hubo bajas."""
+        cutoff = now - self.lookback
+        idx = bisect.bisect_left(self.trades, cutoff, key=lambda item: item.ts)
+        removed = self.trades[:idx]
+        del self.trades[:idx]
+        remaining = len(self.trades) + len(removed)
+        for trade in removed:
+            remaining -= 1
+            self._pop_stats(trade.pnl, remaining)
+            self.pnl_total -= trade.pnl
+            self.wins -= trade.pnl > 0
+            self.losses -= trade.pnl < 0
+            self.symbol_pnl[trade.symbol] -= trade.pnl
+            self.symbol_trades[trade.symbol] -= 1
+            if self.symbol_trades[trade.symbol] <= 0:
+                del self.symbol_trades[trade.symbol]
+                del self.symbol_pnl[trade.symbol]
+        if removed:
+            self._dd_dirty = True
+            if not self.trades:
+                self.pnl_total = 0.0
+        day_idx = bisect.bisect_left(self.daily, cutoff, key=lambda item: item.ts)
+        del self.daily[:day_idx]
+        return len(removed) + day_idx
+
+    def _refresh_drawdown(self) -> None:
+        self._peak = self._max_dd = 0.0
+        for trade in self.trades:
+            self._track_drawdown(trade)
+        self._dd_dirty = False
+
+    def metrics(self, now: datetime) -> dict:
+        if self._dd_dirty:
+            self._refresh_drawdown()
+        count = len(self.trades)
+        last_trade_ts = self.trades[-1].ts if self.trades else None
+        last_daily_ts = self.daily[-1].ts if self.daily else None
+        return {
+            "trades_total": count,
+            "wins": self.wins,
+            "losses": self.losses,
+            "ties": count - self.wins - self.losses,
+            "win_rate": (self.wins / count) if count else 0.0,
+            "pnl_total": self.pnl_total,
+            "pnl_avg": (self.pnl_total / count) if count else 0.0,
+            "pnl_std": math.sqrt(self._m2 / count) if count >= 2 else 0.0,
+            "max_drawdown_pct": self._max_dd,
+            "last_trade_ts": last_trade_ts,
+            "last_daily_ts": last_daily_ts,
+            "last_trade_age_seconds": _seconds_between(now, last_trade_ts),
+            "last_daily_age_seconds": _seconds_between(now, last_daily_ts),
+            "symbol_pnl": dict(self.symbol_pnl),
+            "symbol_trades": dict(self.symbol_trades),
+            "daily": list(self.daily),
+        }
+
+    def to_state(self) -> dict:
+        return {
+            "trades": [[t.ts.isoformat(), t.pnl, t.symbol, t.before, t.after] for t in self.trades],
+            "daily": [[d.ts.isoformat(), d.pnl_eur, d.pnl_pct, d.trades] for d in self.daily],
+        }
+
+    @classmethod
+    def from_state(cls, data: dict, lookback: timedelta) -> "RollingWindow":
+        window = cls(lookback)
+        trades = [TradeEntry(_parse_ts(ts), pnl, sym, before, after) for ts, pnl, sym, before, after in data.get("trades", [])]
+        daily = [DailyEntry(_parse_ts(ts), pnl, pct, n) for ts, pnl, pct, n in data.get("daily", [])]
+        window.add(trades, daily)
+        return window
+
+
+class PnlTail:
+    """Líneas completas nuevas de pnl.jsonl desde el último offset, siguiendo rotaciones a segmentos."""
+
+    def __init__(self, path: Path, state: Optional[dict] = None):
+        state = state or {}
+        self.path = Path(path)
+        self.inode: Optional[int] = state.get("inode")
+        self.offset = int(state.get("offset") or 0)
+        self.segment_mark: Optional[str] = state.get("segment_mark")
+
+    def state(self) -> dict:
+        return {"inode": self.inode, "offset": self.offset, "segment_mark": self.segment_mark}
+
+    def _new_segments(self) -> List[dict]:
+        segments = sorted(load_manifest(self.path), key=lambda seg: (seg.get("created_at") or "", seg["file"]))
+        return [seg for seg in segments if self.segment_mark is None or (seg.get("created_at") or "") > self.segment_mark]
+
+    @staticmethod
+    def _complete(data: bytes) -> bytes:
+        cut = data.rfind(b"\n")
+        return data[: cut + 1] if cut >= 0 else b""
+
+    def poll(self, cutoff: Optional[datetime] = None) -> List[dict]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            stat = None
+        rotated = self.inode is not None and (stat is None or stat.st_ino != self.inode or stat.st_size < self.offset)
+        chunks: List[bytes] = []
+        for idx, seg in enumerate(self._new_segments()):
+            self.segment_mark = seg.get("created_at") or self.segment_mark
+            start = self.offset if (idx == 0 and rotated) else 0
+            ts_max = seg.get("ts_max")
+            if start == 0 and cutoff is not None and ts_max is not None and ts_max < cutoff.timestamp():
+                continue
+            try:
+                with gzip.open(segments_dir(self.path) / seg["file"], "rb") as fh:
+                    fh.seek(start)
+                    chunks.append(fh.read())
+            except (FileNotFoundError, OSError, EOFError):
+                continue
+        if rotated or self.inode is None:
+            self.offset = 0
+        if stat is not None:
+            with self.path.open("rb") as fh:
+                fh.seek(self.offset)
+                data = self._complete(fh.read())
+            self.offset += len(data)
+            self.inode = stat.st_ino
+            chunks.append(data)
+        else:
+            self.inode = None
+        rows: List[dict] = []
+        for raw in b"".join(chunks).splitlines():
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                rows.append(json.loads(raw))
+            except ValueError:
+                continue
+        return rows
+
+
+_VOLATILE = ("sls_bot_business_snapshot_timestamp", "sls_bot_business_last_trade_age_seconds",
+             "sls_bot_business_last_daily_summary_age_seconds")
+
+
+def _fingerprint(payload: str) -> str:
+    """Payload sin las series que cambian solas con el reloj."""
+    return "\n".join(line for line in payload.splitlines() if not line.startswith(_VOLATILE))
+
+
+def _read_state(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def run_daemon(
+    args: argparse.Namespace,
+    mode: str,
+    pnl_path: Path,
+    *,
+    now_fn: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    sleep: Callable[[float], None] = time.sleep,
+    max_cycles: Optional[int] = None,
+) -> int:
+    """Bucle del daemon; devuelve cuántas veces se reescribió el textfile."""
+    lookback = timedelta(days=max(1, args.lookback_days))
+    state_path = args.state or args.output.with_name(args.output.name + ".state.json")
+    saved = _read_state(state_path)
+    if saved.get("pnl_log") == str(pnl_path) and saved.get("lookback_days") == args.lookback_days:
+        window = RollingWindow.from_state(saved.get("window") or {}, lookback)
+        tail = PnlTail(pnl_path, saved.get("tail"))
+    else:
+        window = RollingWindow(lookback)
+        tail = PnlTail(pnl_path)
+
+    last_fp: Optional[str] = None
+    last_write = 0.0
+    writes = 0
+    cycles = 0
+    while True:
+        now = now_fn()
+        cutoff = now - lookback
+        rows = tail.poll(cutoff)
+        trades, daily = _collect_entries(rows, cutoff)
+        window.add(trades, daily)
+        evicted = window.evict(now)
+
+        writer = PrometheusWriter()
+        write_metrics(window.metrics(now), writer=writer, mode=mode, now=now, daily_limit=args.daily_limit)
+        payload = writer.render()
+        fingerprint = _fingerprint(payload)
+        if fingerprint != last_fp or time.monotonic() - last_write >= args.heartbeat:
+            write_textfile(args.output, payload)
+            last_fp, last_write = fingerprint, time.monotonic()
+            writes += 1
+            if args.stdout:
+                print(payload, end="")
+        if rows or evicted or cycles == 0:
+            write_textfile(state_path, json.dumps({
+                "pnl_log": str(pnl_path),
+                "lookback_days": args.lookback_days,
+                "tail": tail.state(),
+                "window": window.to_state(),
+            }))
+
+        cycles += 1
+        if max_cycles is not None and cycles >= max_cycles:
+            return writes
+        sleep(max(0.1, args.interval))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
     if args.mode:
         os.environ["SLSBOT_MODE"] = args.mode
     if args.config:
@@ -307,18 +594,21 @@ def main() -> None:
     logs_dir = _resolve_logs_dir(cfg, args)
     pnl_path = args.pnl_log or (logs_dir / "pnl.jsonl")
 
-    entries = _load_pnl_entries(pnl_path)
+    if args.daemon:
+        run_daemon(args, mode, pnl_path)
+        return
+
     now = datetime.now(timezone.utc)
     cutoff = now - timedelta(days=max(1, args.lookback_days))
+    entries = _load_pnl_entries(pnl_path, since=cutoff)
     trades, daily = _collect_entries(entries, cutoff)
     metrics = compute_metrics(trades, daily, now=now)
 
     writer = PrometheusWriter()
     write_metrics(metrics, writer=writer, mode=mode, now=now, daily_limit=args.daily_limit)
 
-    args.output.parent.mkdir(parents=True, exist_ok=True)
     payload = writer.render()
-    args.output.write_text(payload, encoding="utf-8")
+    write_textfile(args.output, payload)
     if args.stdout:
         print(payload, end="")
 
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga del `/webhook` con tráfico con forma de alertas de TradingView.
+
+Genera (o reproduce desde un JSONL) payloads `Signal` — entradas, salidas y
+`SLS_UPDATE` repartidos entre muchos símbolos — a ritmo fijo (bucle abierto:
+cada petición tiene su instante programado y la latencia se mide desde ahí,
+así las colas del cliente no esconden la saturación del bot). Con varias
+tasas (`--rate 5,10,20`) ejecuta una etapa por tasa y reporta throughput,
+p50/p95/p99, tasa de error y la distribución de `status`
+(`ok`/`blocked`/`filtered`/`error`/`ignored`).
+
+    # levanta fake_bybit + el bot en puertos libres y los apaga al terminar
+    python scripts/tools/webhook_load.py --spawn --rate 5,10,20 --duration 20 --symbols 12
+
+    # contra un bot ya levantado (apuntado a fake_bybit.py)
+    python scripts/tools/webhook_load.py --url http://127.0.0.1:8080/webhook \\
+        --exchange-url http://127.0.0.1:9100 --replay logs/test/signals.jsonl --rate 10
+
+El reporte JSON incluye commit y versiones (`benchmarks.harness.environment`)
+para comparar corridas entre versiones con `--compare`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import requests
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+DEFAULT_SYMBOLS = ("BTCUSDT", "ETHUSDT", "SOLUSDT", "BNBUSDT", "XRPUSDT")
+DEFAULT_MIX = "entry=0.55,exit=0.3,update=0.15"
+TIMEFRAMES = ("1m", "5m", "15m")
+STATUSES = ("ok", "blocked", "filtered", "error", "ignored")
+
+
+@dataclass
+class Sample:
+    signal: str
+    scheduled: float
+    sent: float
+    done: float
+    status: str
+    error: Optional[str] = None
+
+    @property
+    def latency_ms(self) -> float:
+        return (self.done - self.scheduled) * 1000.0
+
+    @property
+    def service_ms(self) -> float:
+        return (self.done - self.sent) * 1000.0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="URL completa del webhook de un bot ya levantado.")
+    target.add_argument("--spawn", action="store_true", help="Levanta fake_bybit + bot en local para la prueba.")
+    parser.add_argument("--exchange-url", default=None,
+                        help="URL del fake_bybit (precios para SL/TP y contadores en el reporte).")
+    parser.add_argument("--exchange-args", default="",
+                        help="Argumentos extra para fake_bybit.py con --spawn (p.ej. '--latency-ms 40 --error-rate 0.02').")
+    parser.add_argument("--rate", default="5", help="Peticiones/s; lista separada por comas = una etapa por tasa.")
+    parser.add_argument("--duration", type=float, default=15.0, help="Segundos por etapa.")
+    parser.add_argument("--concurrency", type=int, default=32, help="Peticiones simultáneas máximas.")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por petición (s).")
+    parser.add_argument("--symbols", default="5",
+                        help="Número de símbolos (se completan con LOADnnUSDT) o lista separada por comas.")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Pesos entry/exit/update de la señal sintética.")
+    parser.add_argument("--replay", type=Path, default=None,
+                        help="JSONL con payloads a reproducir en bucle (en lugar de sintetizar).")
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--slo-p99-ms", type=float, default=1000.0, help="p99 máximo para considerar sostenible una etapa.")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Tasa de error máxima para una etapa sostenible.")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="Reporte JSON (por defecto logs/load/webhook_<commit>_<ts>.json).")
+    parser.add_argument("--compare", type=Path, default=None, help="Reporte anterior para comparar etapa a etapa.")
+    return parser.parse_args(argv)
+
+
+# ----------------- payloads -----------------
+def resolve_symbols(spec: str) -> List[str]:
+    spec = (spec or "").strip()
+    if spec.isdigit():
+        count = max(1, int(spec))
+        extra = [f"LOAD{i:02d}USDT" for i in range(max(0, count - len(DEFAULT_SYMBOLS)))]
+        return (list(DEFAULT_SYMBOLS) + extra)[:count]
+    return [s.strip().upper() for s in spec.split(",") if s.strip()]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {"entry": 0.0, "exit": 0.0, "update": 0.0}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            key, value = part.split("=", 1)
+            if key.strip() in mix:
+                mix[key.strip()] = max(0.0, float(value))
+    if sum(mix.values()) <= 0:
+        raise ValueError(f"mix sin pesos válidos: {spec!r}")
+    return mix
+
+
+def fetch_prices(exchange_url: Optional[str], symbols: Sequence[str]) -> Dict[str, float]:
+    """Precios de referencia para SL/TP; sin exchange los payloads van sin niveles."""
+    if not exchange_url:
+        return {}
+    prices: Dict[str, float] = {}
+    for symbol in symbols:
+        try:
+            resp = requests.get(f"{exchange_url.rstrip('/')}/v5/market/tickers",
+                                params={"category": "linear", "symbol": symbol}, timeout=5).json()
+            prices[symbol] = float(resp["result"]["list"][0]["markPrice"])
+        except Exception:
+            continue
+    return prices
+
+
+def synth_payloads(symbols: Sequence[str], mix: Dict[str, float], prices: Dict[str, float],
+                   seed: int = 11) -> Iterator[Dict[str, Any]]:
+    """Alertas tipo TradingView: una salida solo cierra símbolos con una entrada previa."""
+    rng = random.Random(seed)
+    kinds, weights = zip(*mix.items())
+    open_sides: Dict[str, str] = {}
+    while True:
+        symbol = rng.choice(symbols)
+        kind = rng.choices(kinds, weights)[0]
+        tf = rng.choice(TIMEFRAMES)
+        if kind == "exit" and symbol in open_sides:
+            open_sides.pop(symbol)
+            yield {"signal": "SLS_EXIT", "symbol": symbol, "tf": tf}
+            continue
+        side = open_sides.get(symbol) if kind == "update" and symbol in open_sides else rng.choice(("LONG", "SHORT"))
+        payload: Dict[str, Any] = {
+            "signal": "SLS_UPDATE" if kind == "update" else f"SLS_{side}_ENTRY",
+            "symbol": symbol,
+            "tf": tf,
+            "side": side,
+            "risk_score": round(rng.uniform(0.5, 1.0), 2),
+            "risk_pct": round(rng.uniform(0.2, 1.0), 2),
+            "leverage": rng.choice((5, 10, 20)),
+            "post_only": False,
+            "move_sl_to_be_on_tp1": False,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        price = prices.get(symbol)
+        if price:
+            sign = 1 if side == "LONG" else -1
+            payload.update(price=price, sl=round(price * (1 - sign * 0.01), 6),
+                           tp1=round(price * (1 + sign * 0.01), 6), tp2=round(price * (1 + sign * 0.02), 6))
+        open_sides[symbol] = side
+        yield payload
+
+
+def replay_payloads(path: Path) -> Iterator[Dict[str, Any]]:
+    """Reproduce en bucle un JSONL de payloads (o registros con clave `payload`)."""
+    rows: List[Dict[str, Any]] = []
+    with path.open("r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            row = row.get("payload", row) if isinstance(row, dict) else None
+            if isinstance(row, dict) and row.get("signal") and row.get("symbol"):
+                rows.append(row)
+    if not rows:
+        raise ValueError(f"{path} no contiene payloads con signal/symbol")
+    return itertools.cycle(rows)
+
+
+# ----------------- ejecución -----------------
+def classify(resp: Optional[requests.Response], exc: Optional[Exception]) -> tuple:
+    if exc is not None:
+        return "error", type(exc).__name__
+    if resp.status_code != 200:
+        return "error", f"http_{resp.status_code}"
+    try:
+        body = resp.json()
+        status = body.get("status")
+    except Exception:
+        return "error", "invalid_json"
+    if status not in STATUSES:
+        return "error", f"status_{status}"
+    if status == "error":  # error del propio bot (excepción capturada en el webhook)
+        return status, str(body.get("message") or "error")[:120]
+    return status, None
+
+
+def run_stage(url: str, payloads: Iterator[Dict[str, Any]], rate: float, duration: float,
+              concurrency: int, timeout: float) -> List[Sample]:
+    """Bucle abierto: programa `rate*duration` envíos equiespaciados y los reparte en el pool."""
+    local = threading.local()
+    samples: List[Sample] = []
+    lock = threading.Lock()
+
+    def _send(payload: Dict[str, Any], scheduled: float) -> None:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        sent = time.perf_counter()
+        resp, exc = None, None
+        try:
+            resp = session.post(url, json=payload, timeout=timeout)
+        except Exception as err:  # timeouts/conexión cuentan como error
+            exc = err
+        status, error = classify(resp, exc)
+        sample = Sample(payload.get("signal", "?"), scheduled, sent, time.perf_counter(), status, error)
+        with lock:
+            samples.append(sample)
+
+    total = max(1, int(round(rate * duration)))
+    interval = 1.0 / rate
+    futures = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="load") as pool:
+        start = time.perf_counter()
+        for i in range(total):
+            scheduled = start + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(_send, next(payloads), scheduled))
+        wait(futures)
+    return samples
+
+
+def _percentiles(values: Sequence[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+    arr = np.asarray(values, dtype=float)
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {"p50": round(float(p50), 2), "p95": round(float(p95), 2), "p99": round(float(p99), 2),
+            "max": round(float(arr.max()), 2), "mean": round(float(arr.mean()), 2)}
+
+
+def summarize(samples: Sequence[Sample], rate: float, duration: float) -> Dict[str, Any]:
+    if not samples:
+        return {"rate": rate, "duration_s": duration, "requests": 0}
+    first = min(s.scheduled for s in samples)
+    last = max(s.done for s in samples)
+    statuses = Counter(s.status for s in samples)
+    by_signal: Dict[str, List[float]] = defaultdict(list)
+    for s in samples:
+        by_signal[s.signal].append(s.latency_ms)
+    return {
+        "rate": rate,
+        "duration_s": duration,
+        "requests": len(samples),
+        "elapsed_s": round(last - first, 3),
+        "throughput_rps": round(len(samples) / max(last - first, 1e-9), 2),
+        "latency_ms": _percentiles([s.latency_ms for s in samples]),
+        "service_ms": _percentiles([s.service_ms for s in samples]),
+        "error_rate": round(statuses.get("error", 0) / len(samples), 4),
+        "statuses": {k: statuses.get(k, 0) for k in STATUSES},
+        "errors": dict(Counter(s.error for s in samples if s.error)),
+        "by_signal": {sig: {"count": len(v), **_percentiles(v)} for sig, v in sorted(by_signal.items())},
+    }
+
+
+def sustainable_rate(stages: Sequence[Dict[str, Any]], slo_p99_ms: float, max_error_rate: float) -> Optional[float]:
+    ok = [st["rate"] for st in stages if st.get("requests")
+          and st["latency_ms"]["p99"] <= slo_p99_ms and st["error_rate"] <= max_error_rate]
+    return max(ok) if ok else None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    base = {st["rate"]: st for st in baseline.get("stages", []) if st.get("requests")}
+    rows = []
+    for st in current.get("stages", []):
+        ref = base.get(st["rate"])
+        if not ref or not st.get("requests"):
+            continue
+        rows.append({
+            "rate": st["rate"],
+            "p99_ms": (ref["latency_ms"]["p99"], st["latency_ms"]["p99"]),
+            "throughput_rps": (ref["throughput_rps"], st["throughput_rps"]),
+            "error_rate": (ref["error_rate"], st["error_rate"]),
+        })
+    return rows
+
+
+# ----------------- --spawn -----------------
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_http(url: str, timeout: float, proc: subprocess.Popen) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{proc.args[:3]} terminó con código {proc.returncode}")
+        try:
+            if requests.get(url, timeout=1).status_code < 500:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} no respondió en {timeout}s")
+
+
+def spawn_stack(workdir: Path, exchange_args: str) -> tuple:
+    """fake_bybit + `uvicorn sls_bot.app:app` con un config aislado apuntando al simulador."""
+    from benchmarks.fixtures import prepare_environment
+
+    workdir.mkdir(parents=True, exist_ok=True)
+    ex_port, bot_port = _free_port(), _free_port()
+    exchange_url = f"http://127.0.0.1:{ex_port}"
+    exchange = subprocess.Popen(
+        [sys.executable, str(REPO_ROOT / "scripts" / "tools" / "fake_bybit.py"), "--port", str(ex_port),
+         *shlex.split(exchange_args)],
+        stdout=(workdir / "fake_bybit.log").open("w"), stderr=subprocess.STDOUT,
+    )
+    procs = [exchange]
+    try:
+        _wait_http(f"{exchange_url}/v5/market/time", 30, exchange)
+        prepare_environment(workdir, base_url=exchange_url)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_ROOT / "bot"), os.environ.get("PYTHONPATH")])))
+        bot = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "sls_bot.app:app", "--host", "127.0.0.1", "--port", str(bot_port),
+             "--log-level", "warning"],
+            cwd=str(REPO_ROOT / "bot"), env=env,
+            stdout=(workdir / "bot.log").open("w"), stderr=subprocess.STDOUT,
+        )
+        procs.append(bot)
+        _wait_http(f"http://127.0.0.1:{bot_port}/health", 120, bot)
+    except Exception:
+        stop_stack(procs)
+        raise
+    return f"http://127.0.0.1:{bot_port}/webhook", exchange_url, procs
+
+
+def stop_stack(procs: Sequence[subprocess.Popen]) -> None:
+    for proc in reversed(procs):
+        if proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def _exchange_counters(exchange_url: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not exchange_url:
+        return None
+    try:
+        state = requests.get(f"{exchange_url.rstrip('/')}/fake/state", timeout=5).json()
+        return {"counters": state.get("counters"), "faults": state.get("faults"),
+                "open_positions": len(state.get("positions") or [])}
+    except Exception:
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from benchmarks.harness import environment
+
+    args = parse_args(argv)
+    rates = [float(r) for r in str(args.rate).split(",") if r.strip()]
+    if not rates or any(r <= 0 for r in rates):
+        raise SystemExit("--rate debe ser una lista de valores > 0")
+    symbols = resolve_symbols(args.symbols)
+    procs: List[subprocess.Popen] = []
+    url, exchange_url = args.url, args.exchange_url
+    workdir = None
+    if args.spawn:
+        workdir = Path(tempfile.mkdtemp(prefix="sls_load_"))
+        url, exchange_url, procs = spawn_stack(workdir, args.exchange_args)
+        print(f"bot {url} -> exchange {exchange_url} (logs en {workdir})")
+
+    try:
+        if args.replay:
+            payloads = replay_payloads(args.replay)
+        else:
+            payloads = synth_payloads(symbols, parse_mix(args.mix), fetch_prices(exchange_url, symbols), args.seed)
+        stages = []
+        for rate in rates:
+            samples = run_stage(url, payloads, rate, args.duration, args.concurrency, args.timeout)
+            stage = summarize(samples, rate, args.duration)
+            stages.append(stage)
+            lat = stage.get("latency_ms", {})
+            print(f"rate={rate:>7.1f}/s  thr={stage.get('throughput_rps', 0):>7.2f}/s  "
+                  f"p50={lat.get('p50', 0):>8.1f}  p95={lat.get('p95', 0):>8.1f}  p99={lat.get('p99', 0):>8.1f} ms  "
+                  f"err={stage.get('error_rate', 0):.2%}  {stage.get('statuses')}")
+        exchange = _exchange_counters(exchange_url)
+    finally:
+        stop_stack(procs)
+
+    env = environment()
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": env,
+        "target": {"url": url, "exchange_url": exchange_url, "spawned": bool(args.spawn),
+                   "exchange_args": args.exchange_args if args.spawn else None},
+        "config": {"rates": rates, "duration_s": args.duration, "concurrency": args.concurrency,
+                   "symbols": symbols, "mix": None if args.replay else parse_mix(args.mix),
+                   "replay": str(args.replay) if args.replay else None, "seed": args.seed},
+        "stages": stages,
+        "max_sustainable_rps": sustainable_rate(stages, args.slo_p99_ms, args.max_error_rate),
+        "slo": {"p99_ms": args.slo_p99_ms, "max_error_rate": args.max_error_rate},
+        "exchange": exchange,
+    }
+    output = args.output or REPO_ROOT / "logs" / "load" / f"webhook_{env['commit'] or 'local'}_{int(time.time())}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"máximo sostenible: {report['max_sustainable_rps']} req/s -> {output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        for row in compare(report, baseline):
+            (b_p99, c_p99), (b_thr, c_thr), (b_err, c_err) = row["p99_ms"], row["throughput_rps"], row["error_rate"]
+            print(f"rate={row['rate']:>7.1f}  p99 {b_p99:>8.1f} -> {c_p99:>8.1f} ms  "
+                  f"thr {b_thr:>7.2f} -> {c_thr:>7.2f}/s  err {b_err:.2%} -> {c_err:.2%}")
+    return 0 if any(st.get("requests") for st in stages) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())